@@ -1495,6 +1495,133 @@ _backends["recorded"]=RecordedDeviceBackend
 
 
 
+class DeviceScriptedError(DeviceBackendError):
+    """Scripted backend operation error"""
+class ScriptedDeviceBackend(IDeviceCommBackend):
+    """
+    Scripted backend, which emulates the device by a Python object; mostly intended for testing.
+
+    Connection is automatically opened on creation.
+
+    Args:
+        conn: connection parameters (script); the script is either a callable, or an object with ``respond`` method,
+            which is called with every written message (as a string with the write terminator removed) and returns the reply;
+            the reply is ``None`` (no reply), a string or bytes, or a list of strings or bytes (several replies);
+            all replies are added to the read buffer in the order they are returned
+        timeout (float): Default timeout (in seconds); since the replies are generated immediately on write, reading from an empty buffer fails right away
+        term_write (str): Line terminator for writing operations; stripped from the message before passing it to the script
+        term_read (str): Line terminator for reading operations; appended to every reply
+        datatype (str): Type of the returned data; can be ``"bytes"`` (return `bytes` object), ``"str"`` (return `str` object),
+            or ``"auto"`` (default Python result: `str` in Python 2 and `bytes` in Python 3)
+        reraise_error: if not ``None``, specifies an error to be re-raised on any backend exception (by default, use backend-specific error);
+            should be a subclass of :exc:`DeviceBackendError`.
+    """
+    Error=DeviceScriptedError
+    _backend="scripted"
+
+    _conn_params=["script"]
+    _default_conn=[None]
+
+    def __init__(self, conn, timeout=None, term_write=None, term_read=None, datatype="auto", reraise_error=None):
+        conn_dict=self.combine_conn(conn,self._default_conn)
+        if term_write is None:
+            term_write="\n"
+        if term_read is None:
+            term_read="\n"
+        if isinstance(term_read,(list,tuple)):
+            term_read=term_read[0]
+        IDeviceCommBackend.__init__(self,conn_dict,timeout=timeout,term_write=term_write,term_read=term_read,datatype=datatype,reraise_error=reraise_error)
+        self.script=self.conn["script"]
+        self.timeout=timeout
+        self.buffer=b""
+        self.opened=False
+        self.open()
+
+    def open(self):
+        """Open the connection"""
+        self.opened=True
+    def close(self):
+        """Close the connection"""
+        self.opened=False
+        self.buffer=b""
+    def is_opened(self):
+        return self.opened
+
+    def set_timeout(self, timeout):
+        """Set operations timeout (in seconds)"""
+        self.timeout=timeout
+    def get_timeout(self):
+        """Get operations timeout (in seconds)"""
+        return self.timeout
+
+    def _check_opened(self):
+        if not self.opened:
+            raise self.Error(IOError("device is not opened"))
+    def readline(self, remove_term=True, timeout=None, skip_empty=True):
+        """
+        Read a single line from the device.
+
+        Args:
+            remove_term (bool): If ``True``, remove terminal characters from the result.
+            timeout: Operation timeout (ignored, since the replies are generated immediately).
+            skip_empty (bool): If ``True``, ignore empty lines (works only for ``remove_term==True``).
+        """
+        self._check_opened()
+        term=py3.as_bytes(self.term_read)
+        while True:
+            pos=self.buffer.find(term)
+            if pos<0:
+                raise self.Error(IOError("timeout during read"))
+            result,self.buffer=self.buffer[:pos+len(term)],self.buffer[pos+len(term):]
+            if remove_term:
+                result=result[:-len(term)]
+                if skip_empty and not result:
+                    continue
+            self._log("read",result)
+            return self._to_datatype(result)
+    def read(self, size=None):
+        """
+        Read data from the device.
+
+        If `size` is not None, read `size` bytes (raise an error if there is not enough data); otherwise, read all available data.
+        """
+        self._check_opened()
+        if size is None:
+            size=len(self.buffer)
+        elif len(self.buffer)<size:
+            raise self.Error(IOError("timeout during read"))
+        result,self.buffer=self.buffer[:size],self.buffer[size:]
+        self._log("read",result)
+        return self._to_datatype(result)
+    def write(self, data, flush=True, read_echo=False, read_echo_delay=0, read_echo_lines=1):
+        """
+        Write data to the device and add the script replies to the read buffer.
+
+        If ``read_echo==True``, perform :func:`readline` (`read_echo_lines` times) afterwards (`read_echo_delay` is ignored).
+        """
+        self._check_opened()
+        self._log("write",data)
+        msg=py3.as_str(data)
+        if self.term_write and msg.endswith(self.term_write):
+            msg=msg[:-len(self.term_write)]
+        respond=getattr(self.script,"respond",self.script)
+        replies=respond(msg)
+        if replies is not None:
+            for r in (replies if isinstance(replies,list) else [replies]):
+                self.buffer+=py3.as_bytes(r)+py3.as_bytes(self.term_read)
+        if read_echo:
+            for _ in range(read_echo_lines):
+                self.readline()
+        return len(data)
+
+    def __repr__(self):
+        return "ScriptedDeviceBackend({})".format(self.script)
+
+_backends["scripted"]=ScriptedDeviceBackend
+
+
+
+
     
     
 _serial_re=re.compile(r"^com\d+",re.IGNORECASE)
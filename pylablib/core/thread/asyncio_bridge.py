@@ -0,0 +1,312 @@
+"""
+Integration of thread controllers with :mod:`asyncio`.
+
+Provides coroutine versions of the main blocking synchronization methods (command calls, variable and execution point synchronization, waiting for multicasts),
+as well as asynchronous iterators over multicast subscriptions.
+All of them are based on the standard notifiers, which, instead of sending a Qt synchronization signal, wake up the corresponding :mod:`asyncio` future.
+Hence, the waiting does not occupy any threads, and a single event loop can interact with many controller threads simultaneously.
+"""
+
+from . import controller, threadprop, callsync, synchronizing, multicast_pool as mpool
+
+import asyncio
+import collections
+
+
+
+def _set_future_threadsafe(loop, future, value=None):
+    def set_result():
+        if not future.done():
+            future.set_result(value)
+    try:
+        loop.call_soon_threadsafe(set_result)
+    except RuntimeError: # loop is closed
+        pass
+
+class _AsyncioNotifierMixin:
+    """Mixin for :class:`.QThreadNotifier` subclasses which additionally sets the :mod:`asyncio` future on notification"""
+    def _setup_future(self, loop=None):
+        self._loop=loop or asyncio.get_event_loop()
+        self._future=self._loop.create_future()
+    def _pre_notify(self, value=None):  # pylint: disable=arguments-differ
+        super()._pre_notify(value)
+        _set_future_threadsafe(self._loop,self._future)
+    async def wait_async(self, timeout=None):
+        """Wait (with the given `timeout`) for the notification; return ``True`` if the notification happened and ``False`` otherwise"""
+        try:
+            await asyncio.wait_for(self._future,timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+class QAsyncioNotifier(_AsyncioNotifierMixin, synchronizing.QThreadNotifier):
+    """
+    Version of :class:`.QThreadNotifier` which can also be awaited in an :mod:`asyncio` loop using :meth:`get_value_async`.
+
+    Args:
+        loop: :mod:`asyncio` event loop; by default, use the current loop
+    """
+    def __init__(self, loop=None):
+        super().__init__()
+        self._setup_future(loop)
+    async def get_value_async(self, timeout=None):
+        """Wait (with the given `timeout`) for the value passed by the notifier; raise :exc:`.threadprop.TimeoutThreadError` on timeout"""
+        if not await self.wait_async(timeout=timeout):
+            raise threadprop.TimeoutThreadError
+        return self.get_value()
+
+class QAsyncioCallResultSynchronizer(_AsyncioNotifierMixin, callsync.QCallResultSynchronizer):
+    """
+    Version of :class:`.QCallResultSynchronizer` which can also be awaited in an :mod:`asyncio` loop using :meth:`get_value_async`.
+
+    Args:
+        loop: :mod:`asyncio` event loop; by default, use the current loop
+    """
+    def __init__(self, loop=None):
+        super().__init__()
+        self._setup_future(loop)
+    async def get_value_async(self, timeout=None, default=None, error_on_fail=True, error_on_skip=True, pass_exception=True):
+        """
+        Wait (with the given `timeout`) for the call result.
+
+        The arguments have the same meaning as in :meth:`.QCallResultSynchronizer.get_value_sync`.
+        """
+        res=self.get_value() if await self.wait_async(timeout=timeout) else None
+        return self._parse_result(res,default=default,error_on_fail=error_on_fail,error_on_skip=error_on_skip,pass_exception=pass_exception)
+
+
+
+
+async def call_command(ctl, name, args=None, kwargs=None, timeout=None, ignore_errors=False):
+    """
+    Call the command of the given :class:`.QTaskThread` controller and wait for its result.
+
+    Coroutine analogue of :meth:`.QTaskThread.call_command` with ``sync=True``.
+    If ``ignore_errors==True``, ignore all possible problems with the call (controller stopped, call raised an exception, call was skipped, timeout passed)
+    and return ``None`` instead; otherwise, these problems raise exceptions.
+    """
+    synchronizer=ctl.call_command(name,args=args,kwargs=kwargs,sync=QAsyncioCallResultSynchronizer(),ignore_errors=ignore_errors)
+    if synchronizer is None:
+        return None
+    return await synchronizer.get_value_async(timeout=timeout,error_on_fail=not ignore_errors,error_on_skip=not ignore_errors,pass_exception=not ignore_errors)
+
+async def sync_exec_point(ctl, point, timeout=None, counter=1):
+    """
+    Wait for the given execution point of the controller.
+
+    Coroutine analogue of :meth:`.QThreadController.sync_exec_point`.
+    Return actual number of notifier calls up to date.
+    """
+    notifier=QAsyncioNotifier()
+    ctl._get_exec_note(point).add_notifier(notifier,state=counter)  # pylint: disable=protected-access
+    value=await notifier.get_value_async(timeout=timeout)
+    if value is None:
+        raise threadprop.NoControllerThreadError("synchronizer failed")
+    return value-1
+
+async def get_controller(name, timeout=None, sync_point="run"):
+    """
+    Get a controller with the given name, waiting until it is running and until it passed the `sync_point` (if not ``None``).
+
+    Coroutine analogue of :func:`.controller.get_controller` (with ``sync=True``).
+    """
+    ctd=asyncio.get_event_loop().time()+timeout if timeout is not None else None
+    while True:
+        try:
+            ctl=controller.get_controller(name,sync=False)
+            break
+        except threadprop.NoControllerThreadError:
+            if ctd is not None and asyncio.get_event_loop().time()>ctd:
+                raise threadprop.TimeoutThreadError
+            await asyncio.sleep(0.01)
+    if sync_point is not None:
+        await sync_exec_point(ctl,sync_point,timeout=None if ctd is None else max(ctd-asyncio.get_event_loop().time(),0))
+    return ctl
+
+
+class _AsyncioWatcher:
+    """Object which receives controller interrupts (used in variable watchers) and puts their values into an :mod:`asyncio` queue"""
+    def __init__(self, loop=None):
+        self._loop=loop or asyncio.get_event_loop()
+        self.queue=asyncio.Queue()
+    def send_interrupt(self, tag, value, priority=0):  # pylint: disable=unused-argument
+        try:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait,value)
+        except RuntimeError: # loop is closed
+            pass
+
+async def sync_variable(ctl, name, pred, timeout=None):
+    """
+    Wait until controller variable with the given `name` satisfies the condition given by `pred`.
+
+    Coroutine analogue of :meth:`.QThreadController.sync_variable`.
+    `pred` can be a variable values, a container (list, set, tuple) of possible values,
+    or a function which takes one argument (variable value) and returns whether the condition is satisfied.
+    If timeout is passed, raise :exc:`.threadprop.TimeoutThreadError`.
+    """
+    if not hasattr(pred,"__call__"):
+        v=pred
+        if isinstance(pred,(tuple,list,set,dict)):
+            pred=lambda x: x in v
+        else:
+            pred=lambda x: x==v
+    loop=asyncio.get_event_loop()
+    watcher=_AsyncioWatcher(loop)
+    ctl._add_variable_watcher(name,watcher)  # pylint: disable=protected-access
+    end_time=None if timeout is None else loop.time()+timeout
+    try:
+        value=ctl.get_variable(name)
+        while True:
+            if pred(value):
+                return value
+            try:
+                value=await asyncio.wait_for(watcher.queue.get(),None if end_time is None else max(end_time-loop.time(),0))
+            except asyncio.TimeoutError:
+                raise threadprop.TimeoutThreadError from None
+    finally:
+        ctl._remove_variable_watcher(name,watcher)  # pylint: disable=protected-access
+
+
+
+
+class MulticastSubscription:
+    """
+    Multicast subscription which can be read from an :mod:`asyncio` loop.
+
+    Received multicasts are stored in a queue as :class:`.multicast_pool.TMulticast` tuples ``(src, tag, value)``
+    and can be obtained using :meth:`get` or by iterating over the subscription using ``async for``.
+    Can be used as a context manager (both regular and asynchronous), which closes the subscription on exit.
+
+    Args:
+        srcs, tags, dsts, filt: subscription filters (same as in :meth:`.MulticastPool.subscribe_direct`)
+        limit_queue: maximal number of multicasts in the queue; if it is full, the new multicasts are dropped (``None`` means no limit)
+        pool: multicast pool, or a controller whose pool is used; by default, use the default multicast pool
+        loop: :mod:`asyncio` event loop; by default, use the current loop
+    """
+    def __init__(self, srcs="any", tags=None, dsts="any", filt=None, limit_queue=None, pool=None, loop=None):
+        if pool is None:
+            pool=controller._default_multicast_pool  # pylint: disable=protected-access
+        elif isinstance(pool,controller.QThreadController):
+            pool=pool._multicast_pool  # pylint: disable=protected-access
+        self.pool=pool
+        self._loop=loop or asyncio.get_event_loop()
+        self._queue=collections.deque()
+        self._waiter=None
+        self.limit_queue=limit_queue
+        self.dropped=0
+        self.sid=self.pool.subscribe_direct(self._on_multicast,srcs=srcs,dsts=dsts,tags=tags,filt=filt)
+    def _on_multicast(self, src, tag, value):
+        try:
+            self._loop.call_soon_threadsafe(self._add,mpool.TMulticast(src,tag,value))
+        except RuntimeError: # loop is closed
+            pass
+    def _add(self, msg):
+        if self.limit_queue is not None and len(self._queue)>=self.limit_queue:
+            self.dropped+=1
+            return
+        self._queue.append(msg)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+    def close(self):
+        """Close the subscription"""
+        if self.sid is not None:
+            self.pool.unsubscribe(self.sid)
+            self.sid=None
+            if self._waiter is not None and not self._waiter.done():
+                self._waiter.set_result(None)
+    def __len__(self):
+        return len(self._queue)
+    async def get(self, timeout=None):
+        """
+        Get the next multicast from the queue, waiting (with the given `timeout`) for it if the queue is empty.
+
+        Raise :exc:`.threadprop.TimeoutThreadError` on timeout, and :exc:`StopAsyncIteration` if the subscription is closed and the queue is empty.
+        """
+        while not self._queue:
+            if self.sid is None:
+                raise StopAsyncIteration
+            self._waiter=self._loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter,timeout)
+            except asyncio.TimeoutError:
+                raise threadprop.TimeoutThreadError from None
+            finally:
+                self._waiter=None
+        return self._queue.popleft()
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        return await self.get()
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        self.close()
+
+def subscribe(srcs="any", tags=None, dsts="any", filt=None, limit_queue=None, pool=None):
+    """
+    Subscribe to multicasts and return :class:`MulticastSubscription` object, which can be iterated over using ``async for``.
+
+    The arguments are the same as for :class:`MulticastSubscription`.
+    """
+    return MulticastSubscription(srcs=srcs,tags=tags,dsts=dsts,filt=filt,limit_queue=limit_queue,pool=pool)
+
+async def wait_for_multicast(srcs="any", tags=None, dsts="any", filt=None, timeout=None, pool=None):
+    """
+    Wait for a single multicast passing the given filters and return it as a :class:`.multicast_pool.TMulticast` tuple ``(src, tag, value)``.
+
+    This is the :mod:`asyncio` counterpart of :meth:`.QThreadController.wait_for_message`, since an event loop does not have its own message queue.
+    If timeout is passed, raise :exc:`.threadprop.TimeoutThreadError`.
+    """
+    with MulticastSubscription(srcs=srcs,tags=tags,dsts=dsts,filt=filt,limit_queue=1,pool=pool) as sub:
+        return await sub.get(timeout=timeout)
+
+
+
+
+class AsyncControllerAccess:
+    """
+    Wrapper around a controller which provides coroutine versions of its synchronization methods.
+
+    Commands can be called as ``await access.c.command_name(*args, **kwargs)``
+    (or ``access.cs`` to ignore errors and return ``None`` instead, similar to :attr:`.QTaskThread.csi`).
+
+    Args:
+        ctl: controller (:class:`.QThreadController` or :class:`.QTaskThread`)
+        timeout: default timeout for all operations
+    """
+    def __init__(self, ctl, timeout=None):
+        self.ctl=ctl
+        self.timeout=timeout
+        self.c=self._CommandAccess(self,ignore_errors=False)
+        self.csi=self._CommandAccess(self,ignore_errors=True)
+    class _CommandAccess:
+        def __init__(self, parent, ignore_errors=False):
+            self.parent=parent
+            self.ignore_errors=ignore_errors
+        def __getattr__(self, name):
+            async def remcall(*args, **kwargs):
+                return await self.parent.call_command(name,args,kwargs,ignore_errors=self.ignore_errors)
+            return remcall
+    async def call_command(self, name, args=None, kwargs=None, timeout="default", ignore_errors=False):
+        """Call the controller command and wait for its result (see :func:`call_command`)"""
+        timeout=self.timeout if timeout=="default" else timeout
+        return await call_command(self.ctl,name,args=args,kwargs=kwargs,timeout=timeout,ignore_errors=ignore_errors)
+    async def sync_variable(self, name, pred, timeout="default"):
+        """Wait until controller variable satisfies the condition (see :func:`sync_variable`)"""
+        timeout=self.timeout if timeout=="default" else timeout
+        return await sync_variable(self.ctl,name,pred,timeout=timeout)
+    async def sync_exec_point(self, point, timeout="default", counter=1):
+        """Wait for the given controller execution point (see :func:`sync_exec_point`)"""
+        timeout=self.timeout if timeout=="default" else timeout
+        return await sync_exec_point(self.ctl,point,timeout=timeout,counter=counter)
+    async def wait_for_multicast(self, tags=None, dsts="any", filt=None, timeout="default"):
+        """Wait for a multicast sent by the controller (see :func:`wait_for_multicast`)"""
+        timeout=self.timeout if timeout=="default" else timeout
+        return await wait_for_multicast(srcs=self.ctl.name,tags=tags,dsts=dsts,filt=filt,timeout=timeout,pool=self.ctl)
+    def subscribe(self, tags=None, dsts="any", filt=None, limit_queue=None):
+        """Subscribe to multicasts sent by the controller (see :func:`subscribe`)"""
+        return subscribe(srcs=self.ctl.name,tags=tags,dsts=dsts,filt=filt,limit_queue=limit_queue,pool=self.ctl)
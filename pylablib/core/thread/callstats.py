@@ -0,0 +1,199 @@
+"""
+Lightweight statistics of the thread calls.
+
+Keeps track of the number of scheduled, executed, and skipped calls for commands, jobs, and multicast subscriptions of :class:`.QTaskThread`,
+as well as histograms of their queue waiting and execution times.
+The statistics are disabled by default, in which case the overhead is limited to a single flag check per scheduled call.
+"""
+
+import time
+import math
+import threading
+
+
+
+class TimeHistogram:
+    """
+    Histogram of time intervals with logarithmically spaced bins.
+
+    The bin edges are ``min_time*2**n`` for ``n`` from 0 to ``nbins-2``;
+    the first bin contains all values below `min_time`, and the last one contains all values above the last edge.
+    """
+    def __init__(self, min_time=1E-6, nbins=26):
+        self.min_time=min_time
+        self.nbins=nbins
+        self.reset()
+    def reset(self):
+        """Reset the histogram"""
+        self.counts=[0]*self.nbins
+        self.count=0
+        self.total=0
+        self.max=0
+    def add(self, value):
+        """Add a value to the histogram"""
+        if value<self.min_time:
+            b=0
+        else:
+            b=min(int(math.log2(value/self.min_time))+1,self.nbins-1)
+        self.counts[b]+=1
+        self.count+=1
+        self.total+=value
+        if value>self.max:
+            self.max=value
+    def get_edges(self):
+        """Get the list of bin edges (its length is 1 less than the number of bins)"""
+        return [self.min_time*2**n for n in range(self.nbins-1)]
+    def get_percentile(self, q):
+        """
+        Get an approximate value of the given percentile (between 0 and 100).
+
+        The result is the upper edge of the bin containing the percentile (but not larger than the maximal value).
+        Return ``None`` if the histogram is empty.
+        """
+        if not self.count:
+            return None
+        thresh=self.count*q/100.
+        acc=0
+        for b,c in enumerate(self.counts[:-1]):
+            acc+=c
+            if acc>=thresh:
+                return min(self.min_time*2**b,self.max)
+        return self.max
+    def snapshot(self):
+        """
+        Get the histogram summary.
+
+        Return dictionary with the number of values ``"count"``, their ``"mean"`` and ``"max"``,
+        approximate percentiles ``"p50"``, ``"p90"``, and ``"p99"``, bin ``"counts"``, and bin ``"edges"``.
+        """
+        return {"count":self.count,"mean":self.total/self.count if self.count else None,"max":self.max,
+                "p50":self.get_percentile(50),"p90":self.get_percentile(90),"p99":self.get_percentile(99),
+                "counts":list(self.counts),"edges":self.get_edges()}
+
+
+
+
+class CallStats:
+    """
+    Statistics of a single call source (command, job, or subscription).
+
+    Args:
+        parent: :class:`ThreadCallStats` object which determines whether the statistics are enabled
+        kind: call source kind (``"commands"``, ``"jobs"``, or ``"subscriptions"``)
+        name: call source name
+    """
+    def __init__(self, parent, kind=None, name=None):
+        self.parent=parent
+        self.kind=kind
+        self.name=name
+        self._lock=threading.Lock()
+        self.reset()
+    def reset(self):
+        """Reset the statistics"""
+        with self._lock:
+            self.scheduled=0
+            self.executed=0
+            self.skipped=0
+            self.pending=0
+            self.max_pending=0
+            self.wait_time=TimeHistogram()
+            self.exec_time=TimeHistogram()
+    @property
+    def enabled(self):
+        return self.parent.enabled
+    def _finish(self, wait_time=None, exec_time=None):
+        with self._lock:
+            self.pending=max(self.pending-1,0)
+            if exec_time is None:
+                self.skipped+=1
+            else:
+                self.executed+=1
+                self.wait_time.add(wait_time)
+                self.exec_time.add(exec_time)
+    def instrument(self, call):
+        """Count the call as scheduled and set it up to record its statistics on execution or skipping"""
+        with self._lock:
+            self.scheduled+=1
+            self.pending+=1
+            self.max_pending=max(self.max_pending,self.pending)
+        func=call.func
+        t=time.perf_counter()
+        def timed_func(*args, **kwargs):
+            t0=time.perf_counter()
+            try:
+                return func(*args,**kwargs)
+            finally:
+                self._finish(t0-t,time.perf_counter()-t0)
+        call.func=timed_func
+        def on_unschedule():
+            if call.state in ["skip","fail"]:
+                self._finish()
+        call.add_callback(on_unschedule,pass_result=False,call_on_unschedule=True)
+    def snapshot(self):
+        """
+        Get the statistics summary.
+
+        Return dictionary with the number of ``"scheduled"``, ``"executed"``, and ``"skipped"`` calls,
+        current and maximal number of ``"pending"`` calls (scheduled but not yet executed or skipped),
+        and summaries (see :meth:`TimeHistogram.snapshot`) of the queue ``"wait_time"`` and ``"exec_time"``.
+        """
+        with self._lock:
+            return {"scheduled":self.scheduled,"executed":self.executed,"skipped":self.skipped,
+                    "pending":self.pending,"max_pending":self.max_pending,
+                    "wait_time":self.wait_time.snapshot(),"exec_time":self.exec_time.snapshot()}
+
+
+
+_default_enabled=False
+def set_default_enabled(enabled=True):
+    """Set whether the statistics are enabled by default for newly created threads"""
+    global _default_enabled  # pylint: disable=global-statement
+    _default_enabled=enabled
+def get_default_enabled():
+    """Check whether the statistics are enabled by default for newly created threads"""
+    return _default_enabled
+
+class ThreadCallStats:
+    """
+    Call statistics of a single thread.
+
+    Contains :class:`CallStats` objects for all call sources of a given kind (``"commands"``, ``"jobs"``, or ``"subscriptions"``) and name,
+    and counts the iterations of the thread main loop.
+
+    Args:
+        enabled: whether the statistics are enabled; by default, use the value set by :func:`set_default_enabled`
+    """
+    def __init__(self, enabled=None):
+        self.enabled=_default_enabled if enabled is None else enabled
+        self._sources={}
+        self._lock=threading.Lock()
+        self.reset()
+    def get_source(self, kind, name):
+        """Get the :class:`CallStats` object for a given call source, creating one if it does not exist"""
+        with self._lock:
+            if (kind,name) not in self._sources:
+                self._sources[kind,name]=CallStats(self,kind,name)
+            return self._sources[kind,name]
+    def reset(self):
+        """Reset the statistics"""
+        with self._lock:
+            for s in self._sources.values():
+                s.reset()
+            self.loop_iterations=0
+            self.start_time=time.time()
+    def snapshot(self):
+        """
+        Get the statistics summary.
+
+        Return dictionary with the ``"enabled"`` status, the time since the last reset ``"elapsed"``,
+        the number and the rate of the thread main loop iterations ``"loop_iterations"`` and ``"loop_rate"``,
+        and the dictionaries ``"commands"``, ``"jobs"``, and ``"subscriptions"`` containing :meth:`CallStats.snapshot` results for the corresponding call sources.
+        """
+        with self._lock:
+            sources=list(self._sources.items())
+            elapsed=time.time()-self.start_time
+            result={"enabled":self.enabled,"elapsed":elapsed,"loop_iterations":self.loop_iterations,
+                    "loop_rate":self.loop_iterations/elapsed if elapsed>0 else 0,"commands":{},"jobs":{},"subscriptions":{}}
+        for (kind,name),s in sources:
+            result[kind][name]=s.snapshot()
+        return result
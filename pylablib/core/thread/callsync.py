@@ -1,4 +1,4 @@
-from . import threadprop
+from . import threadprop, tracing
 from .synchronizing import QThreadNotifier, QMultiThreadNotifier
 from ..utils import funcargparse, functions as func_utils
 
@@ -41,6 +41,9 @@ class QCallResultSynchronizer(QThreadNotifier):
         If ``pass_exception==True`` and the returned value represents exception, re-raise it in the caller thread; otherwise, return `default`.
         """
         res=super().get_value_sync(timeout=timeout)
+        return self._parse_result(res,default=default,error_on_fail=error_on_fail,error_on_skip=error_on_skip,pass_exception=pass_exception)
+    def _parse_result(self, res, default=None, error_on_fail=True, error_on_skip=True, pass_exception=True):
+        """Parse the notified value (``None`` if timed out) according to the rules described in :meth:`get_value_sync`"""
         if res is not None:
             kind,value=res  # pylint: disable=unpacking-non-sequence
             if kind=="result":
@@ -140,6 +143,8 @@ class QScheduledCall:
             ``"async"`` (no result synchronization), or a :class:`QCallResultSynchronizer` object. 
     """
     Callback=collections.namedtuple("Callback",["func","pass_result","call_on_exception","call_on_unschedule"])
+    trace_name=None # call ``(kind, name)`` used in tracing (see :mod:`.tracing`)
+    trace_flow=None
     def __init__(self, func, args=None, kwargs=None, silent=False, result_synchronizer=None):
         self.func=func
         self.args=args or []
@@ -153,6 +158,8 @@ class QScheduledCall:
         self.callbacks=[]
         self._notified=[0] # hack to avoid use of locks ([0] is False, [] is True, use .pop() to atomically check and change)
         self.state="wait"
+        if tracing.enabled:
+            self.trace_flow=tracing.start_flow()
     def _check_notified(self):
         try:
             self._notified.pop()
@@ -163,6 +170,7 @@ class QScheduledCall:
         """Execute the call and notify the result synchronizer (invoked by the destination thread)"""
         if self._check_notified():
             return
+        t0=tracing.now() if tracing.enabled else None
         try:
             res=("fail",None)
             res=("result",self.func(*self.args,**self.kwargs))
@@ -178,7 +186,10 @@ class QScheduledCall:
                         c.func(res[1] if res[0]=="result" else None)
                     else:
                         c.func()
+            self.callbacks=[] # callbacks are only called once; remove them to break reference cycles (e.g., with the queue unschedulers)
             self.result_synchronizer.notify(res)
+            if t0 is not None:
+                tracing.add_call_span(self,t0,res[0])
     def add_callback(self, callback, pass_result=True, call_on_exception=False, call_on_unschedule=False, front=False):
         """
         Set the callback to be executed after the main call is done.
@@ -202,6 +213,7 @@ class QScheduledCall:
         for c in self.callbacks:
             if c.call_on_unschedule:
                 c.func()
+        self.callbacks=[]
         self.result_synchronizer.notify(("fail",None))
     def skip(self):
         """Notify that the call is skipped (invoked by the destination thread)"""
@@ -211,6 +223,7 @@ class QScheduledCall:
         for c in self.callbacks:
             if c.call_on_unschedule:
                 c.func()
+        self.callbacks=[]
         self.result_synchronizer.notify(("skip",None))
 
 
@@ -248,9 +261,13 @@ class QScheduler:
             pass_result (bool): if ``True``, pass `func` result as a single argument to the callback; otherwise, give no arguments
             callback_on_exception (bool): if ``True``, execute the callback on call fail or skip (if it requires an argument, ``None`` is supplied);
                 otherwise, only execute it if the call was successful
-            sync_result: if ``True``, the call has a default result synchronizer; otherwise, no synchronization is made.
+            sync_result: if ``True``, the call has a default result synchronizer; if ``False``, no synchronization is made;
+                can also be a result synchronizer object (e.g., :class:`QCallResultSynchronizer`), which is then used for the call.
         """
-        result_synchronizer=None if sync_result else "async"
+        if hasattr(sync_result,"notify"):
+            result_synchronizer=sync_result
+        else:
+            result_synchronizer=None if sync_result else "async"
         scheduled_call=QScheduledCall(func,args,kwargs,result_synchronizer=result_synchronizer)
         if self.call_info_argname:
             scheduled_call.kwargs[self.call_info_argname]=self.build_call_info()
@@ -585,12 +602,20 @@ class QMultiQueueScheduler:
 
     Support additional notifiers, which are called if the scheduling is successful
     (e.g., to notify and wake up the destination thread).
+    If `stats` is supplied, it is a :class:`.callstats.CallStats` object used to record the statistics of the built calls (if it is enabled).
     """
-    def __init__(self, schedulers, notifiers):
+    def __init__(self, schedulers, notifiers, stats=None):
         self.schedulers=schedulers
         self.notifiers=notifiers
+        self.stats=stats
     def build_call(self, *args, **kwargs):
-        return self.schedulers[0].build_call(*args,**kwargs)
+        call=self.schedulers[0].build_call(*args,**kwargs)
+        if self.stats is not None:
+            if self.stats.enabled:
+                self.stats.instrument(call)
+            if tracing.enabled:
+                call.trace_name=self.stats.kind,self.stats.name
+        return call
     def schedule(self, call):
         if schedule_multiple_queues(call,self.schedulers):
             for n in self.notifiers:
@@ -1,5 +1,5 @@
 from ..utils import general, funcargparse, dictionary, functions as func_utils, py3
-from . import multicast_pool as mpool, threadprop, synchronizing, callsync
+from . import multicast_pool as mpool, threadprop, synchronizing, callsync, callstats, tracing
 
 from ..gui import QtCore, Slot, Signal
 
@@ -261,7 +261,9 @@ class QThreadController(QtCore.QObject):
         # set up variable and methods handling
         self._params_val=dictionary.Dictionary()
         self._params_val_lock=threading.Lock()
+        self._params_flat={}  # leaf variables stored by their full names; read without locking
         self._params_exp={}
+        self._params_exp_branches={}  # number of watched paths for every branch containing them
         self._params_exp_lock=threading.Lock()
         self._params_funcs=dictionary.Dictionary()
         self._thread_methods={}
@@ -402,9 +404,9 @@ class QThreadController(QtCore.QObject):
                 stop_all_controllers(stop_self=False)
             with self._lifetime_state_lock:
                 self._lifetime_state="cleanup"
-            for sn in self._stop_notifiers:
+            stop_notifiers,self._stop_notifiers=self._stop_notifiers,[]  # notifiers can remove themselves when called
+            for sn in stop_notifiers:
                 sn()
-            self._stop_notifiers=[]
             for sid in self._multicast_pool_sids:
                 self._multicast_pool.unsubscribe(sid)
             self.notify_exec_point("stop")
@@ -669,7 +671,8 @@ class QThreadController(QtCore.QObject):
 
 
     ### Managing multicast pool interaction ###
-    def subscribe_sync(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, limit_queue=None, call_interrupt=True, add_call_info=False, sid=None):
+    def subscribe_sync(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, limit_queue=None, call_interrupt=True, add_call_info=False,
+            coalesce=None, coalesce_max_count=None, coalesce_max_age=None, sid=None):
         """
         Subscribe a synchronous callback to a multicast.
 
@@ -694,14 +697,19 @@ class QThreadController(QtCore.QObject):
                 0 or negative value means no limit (not recommended, as it can increase the queue indefinitely if the multicast rate is high enough)
             call_interrupt: whether the call is an interrupt (call inside any loop, e.g., during waiting or sleeping), or it should be called in the main event loop
             subscription_priority(int): subscription priority (higher priority subscribers are called first).
+            coalesce: if not ``None``, coalesce multicasts arriving while the previous call is still pending into a single batched call
+                (see :class:`.multicast_pool.MulticastCoalescer`); can be ``"all"`` (pass all multicasts) or ``"latest"`` (pass only the latest multicast for each source and tag);
+                in this case, `callback` takes a single argument: list of :class:`.multicast_pool.TMulticast` tuples ``(src, tag, value)``
+            coalesce_max_count(int): maximal number of multicasts in a single batch (``None`` means no limit)
+            coalesce_max_age(float): maximal age of a batch in seconds, after which the new multicasts start a new batch (``None`` means no limit)
             sid(int): subscription ID (by default, generate a new unique id and return it).
         """
         if self._multicast_pool:
             sid=self._multicast_pool.subscribe_sync(callback,srcs=srcs,dsts=dsts or self.name,tags=tags,filt=filt,priority=subscription_priority,call_interrupt=call_interrupt,
-                limit_queue=limit_queue,add_call_info=add_call_info,dest_controller=self,sid=sid)
+                limit_queue=limit_queue,add_call_info=add_call_info,dest_controller=self,coalesce=coalesce,coalesce_max_count=coalesce_max_count,coalesce_max_age=coalesce_max_age,sid=sid)
             self._multicast_pool_sids.add(sid)
             return sid
-    def subscribe_direct(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, scheduler=None, sid=None):
+    def subscribe_direct(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, scheduler=None, coalesce=None, coalesce_max_count=None, coalesce_max_age=None, sid=None):
         """
         Subscribe asynchronous callback to a multicast.
         
@@ -722,10 +730,16 @@ class QThreadController(QtCore.QObject):
                 and checks whether multicast passes the requirements.
             subscription_priority(int): subscription priority (higher priority subscribers are called first).
             scheduler: if defined, multicast call gets scheduled using this scheduler instead of being called directly (which is the default behavior)
+            coalesce: if not ``None``, coalesce multicasts arriving while the previous call is still pending into a single batched call
+                (see :class:`.multicast_pool.MulticastCoalescer`); can be ``"all"`` (pass all multicasts) or ``"latest"`` (pass only the latest multicast for each source and tag);
+                in this case, `callback` takes a single argument: list of :class:`.multicast_pool.TMulticast` tuples ``(src, tag, value)``
+            coalesce_max_count(int): maximal number of multicasts in a single batch (``None`` means no limit)
+            coalesce_max_age(float): maximal age of a batch in seconds, after which the new multicasts start a new batch (``None`` means no limit)
             sid(int): subscription ID (by default, generate a new unique id and return it).
         """
         if self._multicast_pool:
-            sid=self._multicast_pool.subscribe_direct(callback,srcs=srcs,dsts=dsts or self.name,tags=tags,filt=filt,priority=subscription_priority,scheduler=scheduler,sid=sid)
+            sid=self._multicast_pool.subscribe_direct(callback,srcs=srcs,dsts=dsts or self.name,tags=tags,filt=filt,priority=subscription_priority,scheduler=scheduler,
+                coalesce=coalesce,coalesce_max_count=coalesce_max_count,coalesce_max_age=coalesce_max_age,sid=sid)
             self._multicast_pool_sids.add(sid)
             return sid
     def unsubscribe(self, sid):
@@ -769,30 +783,64 @@ class QThreadController(QtCore.QObject):
         note that in this case the threads waiting on this variable (or branches containing it) will not be notified.
         Local call method.
         """
+        split_name=tuple(dictionary.normalize_path(name))
         if simple:
-            if update:
-                self._params_val.merge(value,name)
-            else:
-                self._params_val.add_entry(name,value,force=True)
+            self._set_variable_value(name,split_name,value,update)
         else:
-            split_name=tuple(dictionary.normalize_path(name))
             notify_list=[]
             with self._params_val_lock:
-                if name in self._params_funcs:
+                if self._params_funcs and name in self._params_funcs:
                     del self._params_funcs[name]
-                if update:
-                    self._params_val.merge(value,name)
-                else:
-                    self._params_val.add_entry(name,value,force=True)
-                for exp_name in self._params_exp:
-                    if exp_name==split_name[:len(exp_name)] or split_name==exp_name[:len(split_name)]:
-                        notify_list.append((self._params_val[exp_name],self._params_exp[exp_name]))
+                self._set_variable_value(name,split_name,value,update)
+                if self._params_exp:
+                    notify_list=self._get_variable_watchers(split_name)
             for val,lst in notify_list:
                 for ctl in lst:
                     ctl.send_interrupt(self._variable_change_tag,val)
         if notify:
             notify_tag.replace("*",name)
             self.send_multicast("any",notify_tag,value)
+    def _set_variable_value(self, name, split_name, value, update):
+        if update:
+            self._update_flat_variable(split_name) # invalidate beforehand, since merging can fail midway
+            self._params_val.merge(value,name)
+        else:
+            self._params_val.add_entry(name,value,force=True)
+            self._update_flat_variable(split_name,value,leaf=not dictionary.is_dictionary(value,generic=True))
+    def _update_flat_variable(self, split_name, value=None, leaf=False):
+        """
+        Update the flat store after the variable with the given path has been changed.
+
+        If ``leaf==True``, the variable is a leaf with the given `value`, which is added to the store;
+        otherwise, the variable and all its sub-variables are removed from the store.
+        """
+        try:
+            key="/".join(split_name)
+        except TypeError: # non-string path entries; can't reliably find affected variables
+            key=""
+        if not key:
+            self._params_flat.clear()
+            return
+        if not (leaf and key in self._params_flat): # a replaced leaf can't contain or be contained in other leaves
+            prefix=key+"/"
+            for k in [k for k in list(self._params_flat) if k.startswith(prefix)]:
+                self._params_flat.pop(k,None)
+            for i in range(1,len(split_name)):
+                self._params_flat.pop("/".join(split_name[:i]),None)
+            self._params_flat.pop(key,None)
+        if leaf:
+            self._params_flat[key]=value
+    def _get_variable_watchers(self, split_name):
+        """Get list ``[(value, controllers)]`` of the variable values and controllers watching them which are affected by the change of the given variable"""
+        watchers=[]
+        for i in range(len(split_name)+1):
+            if split_name[:i] in self._params_exp:
+                watchers.append((self._params_val[split_name[:i]],self._params_exp[split_name[:i]]))
+        if split_name in self._params_exp_branches:
+            for exp_name,lst in list(self._params_exp.items()):
+                if len(exp_name)>len(split_name) and exp_name[:len(split_name)]==split_name:
+                    watchers.append((self._params_val[exp_name],lst))
+        return watchers
     def delete_variable(self, name, missing_error=False):
         """
         Delete thread variable.
@@ -803,6 +851,7 @@ class QThreadController(QtCore.QObject):
         with self._params_val_lock:
             if name in self._params_val:
                 del self._params_val[name]
+                self._update_flat_variable(tuple(dictionary.normalize_path(name)))
             elif name in self._params_funcs:
                 del self._params_funcs[name]
             elif not missing_error:
@@ -823,6 +872,7 @@ class QThreadController(QtCore.QObject):
             self._params_funcs[name]=func,use_lock
             if name in self._params_val:
                 del self._params_val[name]
+                self._update_flat_variable(tuple(dictionary.normalize_path(name)))
     def _has_variable(self, name):
         with self._params_val_lock:
             return name in self._params_val
@@ -896,6 +946,10 @@ class QThreadController(QtCore.QObject):
         this only works with actual variables and not function variables.
         Universal call method.
         """
+        try: # fast path for leaf variables
+            return self._params_flat[name if isinstance(name,py3.textstring) else "/".join(name)]
+        except (KeyError,TypeError):
+            pass
         if simple:
             return self._params_val[name] if missing_error else self._params_val.get(name,default)
         with self._params_val_lock:
@@ -931,9 +985,7 @@ class QThreadController(QtCore.QObject):
             else:
                 pred=lambda x: x==v
         ctl=threadprop.current_controller()
-        split_name=tuple(dictionary.normalize_path(name))
-        with self._params_exp_lock:
-            self._params_exp.setdefault(split_name,[]).append(ctl)
+        self._add_variable_watcher(name,ctl)
         ctd=general.Countdown(timeout)
         try:
             value=self.get_variable(name)
@@ -942,10 +994,30 @@ class QThreadController(QtCore.QObject):
                     return value
                 value=ctl.wait_for_message(self._variable_change_tag,timeout=ctd.time_left())
         finally:
-            with self._params_exp_lock:
-                self._params_exp[split_name].remove(ctl)
-                if not self._params_exp[split_name]:
-                    del self._params_exp[split_name]
+            self._remove_variable_watcher(name,ctl)
+    def _add_variable_watcher(self, name, watcher):
+        """
+        Add a watcher for the variable with the given name.
+
+        On every change of this variable (or a branch containing it), ``watcher.send_interrupt`` method is called
+        with the variable change tag and the new variable value.
+        """
+        split_name=tuple(dictionary.normalize_path(name))
+        with self._params_exp_lock:
+            self._params_exp.setdefault(split_name,[]).append(watcher)
+            for i in range(len(split_name)):
+                self._params_exp_branches[split_name[:i]]=self._params_exp_branches.get(split_name[:i],0)+1
+    def _remove_variable_watcher(self, name, watcher):
+        """Remove the variable watcher added by :meth:`_add_variable_watcher`"""
+        split_name=tuple(dictionary.normalize_path(name))
+        with self._params_exp_lock:
+            self._params_exp[split_name].remove(watcher)
+            if not self._params_exp[split_name]:
+                del self._params_exp[split_name]
+            for i in range(len(split_name)):
+                self._params_exp_branches[split_name[:i]]-=1
+                if not self._params_exp_branches[split_name[:i]]:
+                    del self._params_exp_branches[split_name[:i]]
 
 
     ### Thread execution control ###
@@ -1100,6 +1172,8 @@ class QThreadController(QtCore.QObject):
 
     ### External call management ###
     def _place_call(self, call, tag=None, priority=0, interrupt=True):
+        if tracing.enabled:
+            tracing.add_instant(getattr(call.func,"__name__","call"),"place_call",{"dst":self.name,"tag":tag})
         if tag is None:
             cnt=self._get_next_call_counter()
             self._thread_call_request.emit((cnt,call,interrupt))
@@ -1210,7 +1284,7 @@ class QTaskThread(QThreadController):
         self.min_schedule_time=0. # minimal time to sleep between scheduling checks; acts as a quantum of scheduling
         self._last_sync_time=0
         self.jobs={}
-        self._jobs_list=[]
+        self._jobs_heap=self.JobsHeap()
         self.batch_jobs={}
         self._batch_jobs_args={}
         self._batch_jobs_stopreq=set()
@@ -1225,6 +1299,7 @@ class QTaskThread(QThreadController):
         self._priority_queues_lock=threading.Lock()
         self._command_warned=set()
         self._pause_lock=synchronizing.QLockNotifier()
+        self._call_stats=callstats.ThreadCallStats()
         self.ca=self.CommandAccess(self,sync=False)
         self.cad=self.CommandAccess(self,sync="delayed")
         self.cs=self.CommandAccess(self,sync=True)
@@ -1235,6 +1310,45 @@ class QTaskThread(QThreadController):
     ### Job handling ###
     # Called only in the controlled thread #
 
+    class JobsHeap:
+        """
+        Heap of jobs ordered by their next call time.
+
+        Removed or rescheduled jobs are marked as invalid and discarded lazily, so all operations take ``O(log n)`` time.
+        Jobs with the same call time are returned in the order in which they were added.
+        """
+        def __init__(self):
+            self.heap=[]
+            self.counter=0
+        def push(self, job):
+            """Add the job to the heap (or update its position) according to its next call time"""
+            self.remove(job)
+            due=job.next_call_time()
+            if due is not None:
+                self.counter+=1
+                job.heap_entry=[due,self.counter,job]
+                heapq.heappush(self.heap,job.heap_entry)
+        def remove(self, job):
+            """Remove the job from the heap"""
+            if job.heap_entry is not None:
+                job.heap_entry[2]=None
+                job.heap_entry=None
+        def _discard_invalid(self):
+            while self.heap and self.heap[0][2] is None:
+                heapq.heappop(self.heap)
+        def pop_due(self, t):
+            """Remove and return the earliest job if it is due at the time `t`; otherwise, return ``None``"""
+            self._discard_invalid()
+            if self.heap and self.heap[0][0]<=t:
+                job=heapq.heappop(self.heap)[2]
+                job.heap_entry=None
+                return job
+            return None
+        def time_left(self, t):
+            """Get the time left until the earliest job is due, or ``None`` if there are no jobs"""
+            self._discard_invalid()
+            return max(self.heap[0][0]-t,0) if self.heap else None
+
     class Job:
         """
         A single job loop.
@@ -1245,27 +1359,52 @@ class QTaskThread(QThreadController):
             job: job function
             period: job period
             queue: thread controller's scheduling queue, to which the job must be added
-            jobs_order: thread controller's job queue which determines the jobs scheduling order
+            jobs_heap: thread controller's :class:`JobsHeap` which determines the jobs scheduling order
+            stats: if not ``None``, a :class:`.callstats.CallStats` object used to record the job calls statistics
         """
-        def __init__(self, job, period, queue, jobs_order):
+        TLateness=collections.namedtuple("TLateness",["calls","last","total","max"])
+        def __init__(self, job, period, queue, jobs_heap, stats=None):
             self.job=job
+            self.stats=stats
             self.ctd=general.Countdown(period)
             self.queue=queue
-            self.jobs_order=jobs_order
-            self.jobs_order.append(self)
+            self.jobs_heap=jobs_heap
+            self.heap_entry=None
             self.paused=False
             self.call=None
             self.scheduled=False
-        def schedule(self):
-            """Schedule the job"""
+            self.lateness=self.TLateness(0,0,0,0)
+            self._update_heap()
+        def _update_heap(self):
+            if self.jobs_heap is not None:
+                if self.scheduled or self.paused:
+                    self.jobs_heap.remove(self)
+                else:
+                    self.jobs_heap.push(self)
+        def next_call_time(self):
+            """Get the time of the next call, or ``None`` if the job is paused or has an infinite period"""
+            if self.paused:
+                return None
+            return self.ctd.end
+        def schedule(self, t=None):
+            """Schedule the job (`t` is the current time used to calculate the lateness)"""
             if self.scheduled:
                 raise RuntimeError("job is already scheduled")
+            t=t or time.time()
+            if self.ctd.timeout:
+                l=max(t-self.ctd.end,0)
+                n,_,total,maxl=self.lateness
+                self.lateness=self.TLateness(n+1,l,total+l,max(maxl,l))
             self.call=self.queue.build_call(self.job,sync_result=False)
             self.call.add_callback(self.mark_unscheduled,pass_result=False,call_on_unschedule=True)
+            if self.stats is not None:
+                if self.stats.enabled:
+                    self.stats.instrument(self.call)
+                if tracing.enabled:
+                    self.call.trace_name=self.stats.kind,self.stats.name
             self.scheduled=True
+            self._update_heap()
             self.queue.schedule(self.call)
-            self.jobs_order.remove(self)
-            self.jobs_order.append(self)
             self.ctd.add_time(self.ctd.timeout)
         def mark_unscheduled(self):
             """
@@ -1275,6 +1414,7 @@ class QTaskThread(QThreadController):
             """
             self.call=None
             self.scheduled=False
+            self._update_heap()
         def unschedule(self):
             """Manually unschedule the job (e.g., when paused or removed)"""
             if not self.scheduled:
@@ -1282,14 +1422,19 @@ class QTaskThread(QThreadController):
             self.queue.unschedule(self.call)
             self.call=None
             self.scheduled=False
+            self._update_heap()
         def clear(self):
-            """Clear the job and remove it from the jobs list"""
+            """Clear the job and remove it from the jobs heap"""
             if self.scheduled:
                 self.unschedule()
-            self.jobs_order.remove(self)
+            if self.jobs_heap is not None:
+                self.jobs_heap.remove(self)
+                self.jobs_heap=None
         def change_period(self, period):
             """Change the job period"""
             self.ctd.set_timeout(period)
+            if self.heap_entry is not None:
+                self._update_heap()
         def pause(self, paused=True, unschedule=True):
             """
             Pause or resume the job.
@@ -1299,11 +1444,20 @@ class QTaskThread(QThreadController):
             if not self.paused and paused and unschedule:
                 self.unschedule()
             self.paused=paused
+            self._update_heap()
         def time_left(self, t=None):
             """Get the amount of time left till the next call, or ``None`` if the job is paused"""
             if self.paused:
                 return None
             return self.ctd.time_left(t)
+        def get_jitter(self):
+            """
+            Get the job scheduling jitter, i.e., the delay between the time the job is due and the time it is actually scheduled.
+
+            Return dictionary with the number of scheduled calls ``"calls"``, and the ``"last"``, ``"mean"``, and ``"max"`` delay.
+            """
+            n,last,total,maxl=self.lateness
+            return {"calls":n,"last":last,"mean":total/n if n else 0,"max":maxl}
         
 
     def add_job(self, name, job, period, initial_call=True, priority=-10):
@@ -1318,7 +1472,7 @@ class QTaskThread(QThreadController):
         """
         if name in self.jobs:
             raise ValueError("job {} already exists".format(name))
-        self.jobs[name]=self.Job(job,period,self._get_priority_queue(priority),self._jobs_list)
+        self.jobs[name]=self.Job(job,period,self._get_priority_queue(priority),self._jobs_heap,stats=self._call_stats.get_source("jobs",name))
         if initial_call:
             job()
     def change_job_period(self, name, period):
@@ -1330,6 +1484,19 @@ class QTaskThread(QThreadController):
         if name not in self.jobs:
             raise ValueError("job {} doesn't exists".format(name))
         self.jobs[name].change_period(period)
+    def get_job_jitter(self, name=None):
+        """
+        Get the scheduling jitter of the job `name`, i.e., the delay between the time the job is due and the time it is actually scheduled.
+
+        Return dictionary with the number of scheduled calls ``"calls"``, and the ``"last"``, ``"mean"``, and ``"max"`` delay.
+        If `name` is ``None``, return dictionary ``{name: jitter}`` for all jobs.
+        Local call method.
+        """
+        if name is None:
+            return {n:j.get_jitter() for n,j in self.jobs.items()}
+        if name not in self.jobs:
+            raise ValueError("job {} doesn't exists".format(name))
+        return self.jobs[name].get_jitter()
     def remove_job(self, name):
         """
         Remove the job `name` from the job list.
@@ -1528,24 +1695,26 @@ class QTaskThread(QThreadController):
         Return time is 0 if a job has been scheduled during that call,
         and ``None`` if there are not jobs to schedule.
         """
-        wait_time=None
         t=t or time.time()
-        for job in self._jobs_list:
-            if not job.scheduled:
-                l=job.time_left(t)
-                if l is not None:
-                    if l<=0:
-                        job.schedule()
-                    wait_time=l if wait_time is None else min(wait_time,l)
-        return wait_time
+        scheduled=False
+        while True:
+            job=self._jobs_heap.pop_due(t)
+            if job is None:
+                break
+            job.schedule(t)
+            scheduled=True
+        return 0 if scheduled else self._jobs_heap.time_left(t)
     def _exhaust_queued_calls(self):
         """Keep extracting and executing queued calls (commands, jobs, multicasts) as long as there are any available"""
         self._in_command_loop=True
+        t0=tracing.now() if tracing.enabled else None
+        ncalls=0
         while True:
             self._schedule_pending_jobs()
             called=self._check_priority_queues()
             if not called:
                 break
+            ncalls+=1
             if self.sync_period<=0:
                 self.check_messages(top_loop=True)
             else:
@@ -1556,10 +1725,48 @@ class QTaskThread(QThreadController):
         self._in_command_loop=False
         self._poked=False
         self._check_priority_queues()
+        if t0 is not None and ncalls:
+            tracing.add_span("exhaust_queued_calls","loop",t0,args={"ncalls":ncalls})
     def _command_poke(self):
         if not self._in_command_loop and not self._poked:
+            self._poked=True  # set before poking; otherwise, the thread can process the poke and reset the flag before it is set, and the next poke is lost
             self.poke()
-            self._poked=True
+
+    ### Call statistics ###
+
+    def enable_call_stats(self, enabled=True, reset=False):
+        """
+        Enable or disable collection of the call statistics (number of scheduled, executed, and skipped calls, queue waiting and execution times).
+
+        Only the calls scheduled after enabling are recorded. If ``reset==True``, reset the already collected statistics.
+        Universal call method.
+        """
+        self._call_stats.enabled=enabled
+        if reset:
+            self._call_stats.reset()
+    def reset_call_stats(self):
+        """
+        Reset the collected call statistics.
+
+        Universal call method.
+        """
+        self._call_stats.reset()
+    def get_call_stats(self):
+        """
+        Get the call statistics summary.
+
+        Return dictionary with the statistics for all ``"commands"``, ``"jobs"``, and ``"subscriptions"`` (the latter are named by their callback names),
+        the number and the rate of the main loop iterations, and the current length of the call queues for every priority (``"queues"`` entry).
+        Job entries also contain the scheduling ``"jitter"`` (see :meth:`get_job_jitter`), which is recorded even if the statistics are disabled.
+        See :meth:`.callstats.ThreadCallStats.snapshot` and :meth:`.callstats.CallStats.snapshot` for details.
+        Also available as ``"call_stats"`` thread variable.
+        Universal call method.
+        """
+        stats=self._call_stats.snapshot()
+        stats["queues"]={p:len(q) for p,q in list(self._priority_queues.items())}
+        for n,j in list(self.jobs.items()):
+            stats["jobs"].setdefault(n,{})["jitter"]=j.get_jitter()
+        return stats
     
     ### Start/run/stop control (called automatically) ###
 
@@ -1568,6 +1775,8 @@ class QTaskThread(QThreadController):
             raise RuntimeError("calling 'run' methods from a non-controlled thread; did you mean 'start' instead?")
         schedule_time=0
         while True:
+            if self._call_stats.enabled:
+                self._call_stats.loop_iterations+=1
             ct=time.time()
             to=self._schedule_pending_jobs(ct)
             sleep_time=self._loop_wait_period if to is None else min(self._loop_wait_period,to)
@@ -1584,6 +1793,7 @@ class QTaskThread(QThreadController):
 
     def on_start(self):
         super().on_start()
+        self.set_func_variable("call_stats",self.get_call_stats,use_lock=False)
         self.add_command("add_job",priority=10)
         self.add_command("change_job_period",priority=10)
         self.add_command("remove_job",priority=10)
@@ -1705,7 +1915,8 @@ class QTaskThread(QThreadController):
         elif isinstance(scheduler,py3.textstring):
             multischeduler=self._commands[scheduler].scheduler
             scheduler=multischeduler.schedulers[0]
-        multischeduler=callsync.QMultiQueueScheduler([psch] if scheduler is None else [scheduler,psch],[self._command_poke])
+        multischeduler=callsync.QMultiQueueScheduler([psch] if scheduler is None else [scheduler,psch],[self._command_poke],
+            stats=self._call_stats.get_source("commands",name))
         self._commands[name]=self.TCommand(command,multischeduler,priority)
         self._override_command_method(name)
         return scheduler
@@ -1730,7 +1941,8 @@ class QTaskThread(QThreadController):
             command=getattr(self,name)
         self._commands[name]=self.TCommand(command,"direct_sync" if error_on_async else "direct",None)
 
-    def subscribe_commsync(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, scheduler=None, limit_queue=None, on_full_queue="skip_current", priority=0, add_call_info=False, sid=None):
+    def subscribe_commsync(self, callback, srcs="any", tags=None, dsts="any", filt=None, subscription_priority=0, scheduler=None, limit_queue=None, on_full_queue="skip_current", priority=0, add_call_info=False,
+            coalesce=None, coalesce_max_count=None, coalesce_max_age=None, sid=None):
         """
         Subscribe a callback to a multicast which is synchronized with commands and jobs execution.
 
@@ -1762,14 +1974,21 @@ class QTaskThread(QThreadController):
                 ``"call_oldest"`` (execute the oldest call in the queue immediately in the caller thread), or
                 ``"wait"`` (wait until the call can be scheduled, which is checked after every call removal from the queue; place the call)
             add_call_info(bool): if ``True``, add a fourth argument containing a call information (tuple with a single element, a timestamps of the call).
+            coalesce: if not ``None``, coalesce multicasts arriving while the previous call is still pending into a single batched call
+                (see :class:`.multicast_pool.MulticastCoalescer`); can be ``"all"`` (pass all multicasts) or ``"latest"`` (pass only the latest multicast for each source and tag);
+                in this case, `callback` takes a single argument: list of :class:`.multicast_pool.TMulticast` tuples ``(src, tag, value)``
+            coalesce_max_count(int): maximal number of multicasts in a single batch (``None`` means no limit)
+            coalesce_max_age(float): maximal age of a batch in seconds, after which the new multicasts start a new batch (``None`` means no limit)
             sid(int): subscription ID (by default, generate a new unique id and return it).
         """
         if self._multicast_pool:
             psch=self._get_priority_queue(priority)
             if scheduler is None and (limit_queue is not None or add_call_info):
                 scheduler=callsync.QQueueLengthLimitScheduler(max_len=limit_queue or 0,on_full_queue=on_full_queue,call_info_argname="call_info" if add_call_info else None)
-            multischeduler=callsync.QMultiQueueScheduler([psch] if scheduler is None else [scheduler,psch],[self._command_poke])
-            sid=self.subscribe_direct(callback,srcs=srcs,tags=tags,dsts=dsts or self.name,filt=filt,subscription_priority=subscription_priority,scheduler=multischeduler,sid=sid)
+            stats=self._call_stats.get_source("subscriptions",getattr(callback,"__name__",str(callback)))
+            multischeduler=callsync.QMultiQueueScheduler([psch] if scheduler is None else [scheduler,psch],[self._command_poke],stats=stats)
+            sid=self.subscribe_direct(callback,srcs=srcs,tags=tags,dsts=dsts or self.name,filt=filt,subscription_priority=subscription_priority,scheduler=multischeduler,
+                coalesce=coalesce,coalesce_max_count=coalesce_max_count,coalesce_max_age=coalesce_max_age,sid=sid)
             return sid
 
     ##########  EXTERNAL CALLS  ##########
@@ -1797,6 +2016,8 @@ class QTaskThread(QThreadController):
         If `callback` is not ``None``, call it after the command is successfully executed (from the target thread), with a single parameter being the command result.
         If ``sync==True``, pause caller thread execution (for at most `timeout` seconds) until the command has been executed by the target thread, and then return the command result.
         If ``sync=="delayed"``, return :class:`.QCallResultSynchronizer` object which can be used to wait for and read the command result;
+        `sync` can also be a :class:`.QCallResultSynchronizer` instance (e.g., :class:`.asyncio_bridge.QAsyncioCallResultSynchronizer`),
+        in which case it is used to synchronize the result and is returned in the same way as for ``sync=="delayed"``;
         otherwise, return ``None``.
         In the ``sync==True`` case, if ``ignore_errors==True``, ignore all possible problems with the call (controller stopped, call raised an exception, call was skipped)
         and return ``None`` instead; otherwise, these problems raise exceptions in the caller thread.
@@ -1804,6 +2025,7 @@ class QTaskThread(QThreadController):
         """
         if not self._check_running(error=not ignore_errors):
             return
+        custom_sync=isinstance(sync,callsync.QCallResultSynchronizer)
         sch=self._commands[name].scheduler
         if self.is_in_controlled() and sync!=False:
             sch="direct"
@@ -1811,13 +2033,16 @@ class QTaskThread(QThreadController):
             if sch=="direct_sync" and not sync:
                 raise RuntimeError("direct call command {} can only be called synchronously".format(name))
             value=self.call_command_direct(name,args=args,kwargs=kwargs)
+            if custom_sync:
+                sync.notify(("result",value))
+                return sync
             if sync=="delayed":
                 return callsync.QDirectResultSynchronizer(value)
             if sync:
                 return value
             return None
-        synchronizer=self._schedule_comm(name,args,kwargs,callback=callback,sync_result=bool(sync))
-        if sync=="delayed":
+        synchronizer=self._schedule_comm(name,args,kwargs,callback=callback,sync_result=sync if custom_sync else bool(sync))
+        if sync=="delayed" or custom_sync:
             return synchronizer
         elif sync:
             return synchronizer.get_value_sync(timeout=timeout,error_on_fail=not ignore_errors,error_on_skip=not ignore_errors,pass_exception=not ignore_errors)
@@ -1,10 +1,13 @@
-from ..utils import observer_pool, py3, general
-from . import callsync
+from ..utils import py3, general, funcargparse
+from . import callsync, tracing
 from .utils import ReadChangeLock
 
 import collections
 import fnmatch
 import re
+import bisect
+import threading
+import time
 
 
 def _as_name_list(lst):
@@ -13,16 +16,120 @@ def _as_name_list(lst):
     elif isinstance(lst,py3.textstring):
         return [lst]
     return lst
+_pattern_special=re.compile(r"[*?[]")
 def _split_pattern_list(lst):
-    vals,pvals=general.partition_list(lambda s: s.find("*")>=0,lst)
-    pvals=[re.compile(fnmatch.translate(v)) for v in pvals]
+    """Split the list into literal values and patterns (values containing ``*``, which are matched using :mod:`fnmatch`)"""
+    pvals,vals=general.partition_list(lambda s: s.find("*")>=0,lst)
     return vals,pvals
-def _match_pattern_list(lst, v):
-    for p in lst:
-        if p.match(v):
-            return True
-    return False
+def _get_pattern_prefix(pattern):
+    """Get the literal prefix of the pattern (part before the first special symbol)"""
+    m=_pattern_special.search(pattern)
+    return pattern if m is None else pattern[:m.start()]
+class PatternTrie:
+    """
+    Prefix tree of Unix shell style patterns.
+
+    Patterns are stored in the nodes corresponding to their literal prefixes (parts before the first special symbol),
+    so finding patterns matching a given string only requires checking patterns along its path in the tree.
+    Each pattern can be associated with several keys.
+    """
+    def __init__(self):
+        self._root=({},{})  # node: (children dictionary, dictionary {pattern: (regex, set of keys)})
+    def add(self, pattern, key):
+        """Add the `key` associated with the given pattern"""
+        node=self._root
+        for c in _get_pattern_prefix(pattern):
+            node=node[0].setdefault(c,({},{}))
+        if pattern not in node[1]:
+            node[1][pattern]=(re.compile(fnmatch.translate(pattern)),set())
+        node[1][pattern][1].add(key)
+    def remove(self, pattern, key):
+        """Remove the `key` associated with the given pattern"""
+        path=[self._root]
+        for c in _get_pattern_prefix(pattern):
+            path.append(path[-1][0][c])
+        keys=path[-1][1][pattern][1]
+        keys.discard(key)
+        if not keys:
+            del path[-1][1][pattern]
+            prefix=_get_pattern_prefix(pattern)
+            for i in range(len(prefix),0,-1): # remove empty nodes
+                if path[i][0] or path[i][1]:
+                    break
+                del path[i-1][0][prefix[i-1]]
+    def find(self, value):
+        """Get the set of keys associated with all the patterns matching the given value"""
+        found=set()
+        node=self._root
+        for i in range(len(value)+1):
+            for r,keys in node[1].values():
+                if r.match(value):
+                    found.update(keys)
+            if i==len(value) or value[i] not in node[0]:
+                break
+            node=node[0][value[i]]
+        return found
+
+
 TMulticast=collections.namedtuple("TMulticast",["src","tag","value"])
+TSubscription=collections.namedtuple("TSubscription",["callback","priority","order","srcs","dsts","tags","ptags","filt"])
+class MulticastCoalescer:
+    """
+    Multicast subscription callback which coalesces multicasts into batches.
+
+    Each batch is delivered to the callback using a single scheduled call, as a list of :class:`TMulticast` tuples ``(src, tag, value)``.
+    Multicasts arriving while the batch call is still pending are added to the same batch,
+    unless the batch is full (contains `max_count` multicasts) or too old (was started more than `max_age` seconds ago),
+    in which case a new batch is started and scheduled.
+
+    Args:
+        callback: batch callback, which takes a single argument: list of :class:`TMulticast` tuples
+        scheduler: scheduler used to schedule the batch calls; if ``None``, each multicast is delivered directly as a single-element batch
+        mode: coalescing mode; can be ``"all"`` (keep all multicasts) or ``"latest"`` (keep only the latest multicast for each source and tag)
+        max_count: maximal number of multicasts in a batch (``None`` means no limit)
+        max_age: maximal age of a batch in seconds, after which new multicasts start a new batch (``None`` means no limit)
+    """
+    def __init__(self, callback, scheduler=None, mode="all", max_count=None, max_age=None):
+        funcargparse.check_parameter_range(mode,"mode",{"all","latest"})
+        self.callback=callback
+        self.scheduler=scheduler
+        self.mode=mode
+        self.max_count=max_count
+        self.max_age=max_age
+        self._batch=None
+        self._batch_start=None
+        self._lock=threading.Lock()
+    def _add(self, batch, msg):
+        if self.mode=="all":
+            batch.append(msg)
+        else:
+            batch.pop((msg.src,msg.tag),None)
+            batch[msg.src,msg.tag]=msg
+    def __call__(self, src, tag, value):
+        msg=TMulticast(src,tag,value)
+        if self.scheduler is None:
+            self.callback([msg])
+            return
+        with self._lock:
+            batch=self._batch
+            if batch is not None:
+                full=(self.max_count is not None and len(batch)>=self.max_count and not (self.mode=="latest" and (src,tag) in batch))
+                if not (full or (self.max_age is not None and time.time()>self._batch_start+self.max_age)):
+                    self._add(batch,msg)
+                    return
+            batch=self._batch=[] if self.mode=="all" else {}
+            self._batch_start=time.time()
+            self._add(batch,msg)
+        call=self.scheduler.build_call(self._deliver,[batch],sync_result=False)
+        call.add_callback(lambda: self._close(batch),pass_result=False,call_on_unschedule=True,front=True)
+        self.scheduler.schedule(call)
+    def _close(self, batch):
+        with self._lock:
+            if self._batch is batch:
+                self._batch=None
+    def _deliver(self, batch, **kwargs):
+        self._close(batch)
+        self.callback(batch if self.mode=="all" else list(batch.values()),**kwargs)
 class MulticastPool:
     """
     Multicast dispatcher (somewhat similar in functionality to Qt signals).
@@ -31,12 +138,26 @@ class MulticastPool:
     Each multicast has defined source, destination (both can also be ``"all"`` or ``"any"``, see methods descriptions for details), tag and value.
     Any thread can send a multicast or subscribe for a multicast with given filters (source, destination, tag, additional filters).
     If a multicast is emitted, it is checked against filters for all subscribers, and the passing ones are then called.
+
+    To find the subscribers, the pool keeps an index of subscriptions by the exact tags and a prefix tree of the tag patterns,
+    which provide the candidates for the given multicast tag; the resulting routes (subscribers passing the source, destination, and tag filters)
+    are cached for each ``(src, dst, tag)`` combination and updated whenever subscriptions are added or removed.
+    Only the additional filter functions of the subscribers in the route are called on every multicast.
     """
+    _max_routes=2**12 # maximal number of cached routes
+    _names_generator=general.NamedUIDGenerator(thread_safe=True)
     def __init__(self):
-        self._pool=observer_pool.ObserverPool()
+        self._subscriptions={}
+        self._tag_index={}
+        self._any_tag=set()
+        self._tag_patterns=PatternTrie()
+        self._routes={}
+        self._subscription_routes={}
+        self._order=0
         self._pool_lock=ReadChangeLock()
+        self._routes_lock=threading.Lock()  # used to build routes while reading
 
-    def subscribe_direct(self, callback, srcs="any", dsts="any", tags=None, filt=None, priority=0, scheduler=None, sid=None):
+    def subscribe_direct(self, callback, srcs="any", dsts="any", tags=None, filt=None, priority=0, scheduler=None, coalesce=None, coalesce_max_count=None, coalesce_max_age=None, sid=None):
         """
         Subscribe an asynchronous callback to a multicast.
 
@@ -55,6 +176,11 @@ class MulticastPool:
                 and checks whether multicast passes the requirements.
             priority(int): subscription priority (higher priority subscribers are called first).
             scheduler: if defined, multicast call gets scheduled using this scheduler instead of being called directly (which is the default behavior)
+            coalesce: if not ``None``, coalesce multicasts arriving while the previous call is still pending into a single batched call (see :class:`MulticastCoalescer`);
+                can be ``"all"`` (pass all multicasts) or ``"latest"`` (pass only the latest multicast for each source and tag);
+                in this case, `callback` takes a single argument: list of :class:`TMulticast` tuples ``(src, tag, value)``
+            coalesce_max_count(int): maximal number of multicasts in a single batch (``None`` means no limit)
+            coalesce_max_age(float): maximal age of a batch in seconds, after which the new multicasts start a new batch (``None`` means no limit)
             sid(int): subscription ID (by default, generate a new unique name).
 
         Returns:
@@ -63,31 +189,32 @@ class MulticastPool:
         srcs=_as_name_list(srcs)
         dsts=_as_name_list(dsts)
         tags=_as_name_list(tags)
+        ptags=[]
         if tags is not None:
             tags,ptags=_split_pattern_list(tags)
-        src_any="any" in srcs
-        dst_any="any" in dsts
-        def full_filt(tag, value):
-            src,dst,tag=tag
-            if (tags is not None) and (tag is not None):
-                match=(tag in tags) or _match_pattern_list(ptags,tag)
-                if not match:
-                    return False
-            if (not src_any) and (src!="all") and (src not in srcs):
-                return False
-            if (not dst_any) and (dst!="all") and (dst not in dsts):
-                return False
-            return filt(src,dst,tag,value) if (filt is not None) else True
-        if scheduler is not None:
+            tags=set(tags)
+        srcs=None if "any" in srcs else set(srcs)
+        dsts=None if "any" in dsts else set(dsts)
+        if coalesce is not None:
+            callback=MulticastCoalescer(callback,scheduler,mode=coalesce,max_count=coalesce_max_count,max_age=coalesce_max_age)
+        elif scheduler is not None:
             _orig_callback=callback
             def schedule_call(*args, **kwargs):
                 call=scheduler.build_call(_orig_callback,args,kwargs,sync_result=False)
                 scheduler.schedule(call)
             callback=schedule_call
         with self._pool_lock.changing():
-            sid=self._pool.add_observer(callback,name=sid,filt=full_filt,priority=priority,cacheable=(filt is None))
+            if sid is None:
+                sid=self._names_generator("observer")
+            elif sid in self._subscriptions:
+                raise ValueError("observer {} is already subscribed".format(sid))
+            self._order+=1
+            subscription=TSubscription(callback,priority,self._order,srcs,dsts,tags,ptags,filt)
+            self._subscriptions[sid]=subscription
+            self._add_to_index(sid,subscription)
         return sid
-    def subscribe_sync(self, callback, srcs="any", dsts="any", tags=None, filt=None, priority=0, limit_queue=None, dest_controller=None, call_tag=None, call_interrupt=True, add_call_info=False, sid=None):
+    def subscribe_sync(self, callback, srcs="any", dsts="any", tags=None, filt=None, priority=0, limit_queue=None, dest_controller=None, call_tag=None, call_interrupt=True, add_call_info=False,
+            coalesce=None, coalesce_max_count=None, coalesce_max_age=None, sid=None):
         """
         Subscribe a synchronous callback to a multicast.
 
@@ -112,6 +239,11 @@ class MulticastPool:
             call_tag(str or None): tag used for the synchronized call; by default, use the interrupt call (which is the default of ``call_in_thread``).
             call_interrupt: whether the call is an interrupt (call inside any loop, e.g., during waiting or sleeping), or it should be called in the main event loop
             add_call_info(bool): if ``True``, add a fourth argument containing a call information (tuple with a single element, a timestamps of the call).
+            coalesce: if not ``None``, coalesce multicasts arriving while the previous call is still pending into a single batched call (see :class:`MulticastCoalescer`);
+                can be ``"all"`` (pass all multicasts) or ``"latest"`` (pass only the latest multicast for each source and tag);
+                in this case, `callback` takes a single argument: list of :class:`TMulticast` tuples ``(src, tag, value)``
+            coalesce_max_count(int): maximal number of multicasts in a single batch (``None`` means no limit)
+            coalesce_max_age(float): maximal age of a batch in seconds, after which the new multicasts start a new batch (``None`` means no limit)
             sid(int): subscription ID (by default, generate a new unique name).
 
         Returns:
@@ -119,11 +251,86 @@ class MulticastPool:
         """
         scheduler=callsync.QMulticastThreadCallScheduler(thread=dest_controller,limit_queue=limit_queue,
             tag=call_tag,interrupt=call_interrupt,call_info_argname="call_info" if add_call_info else None)
-        return self.subscribe_direct(callback,srcs=srcs,dsts=dsts,tags=tags,filt=filt,priority=priority,scheduler=scheduler,sid=sid)
+        return self.subscribe_direct(callback,srcs=srcs,dsts=dsts,tags=tags,filt=filt,priority=priority,scheduler=scheduler,
+            coalesce=coalesce,coalesce_max_count=coalesce_max_count,coalesce_max_age=coalesce_max_age,sid=sid)
     def unsubscribe(self, sid):
         """Unsubscribe from a subscription with a given ID"""
         with self._pool_lock.changing():
-            self._pool.remove_observer(sid)
+            subscription=self._subscriptions.pop(sid)
+            self._remove_from_index(sid,subscription)
+
+    def _add_to_index(self, sid, subscription):
+        """Add the subscription to the tag index and to all the matching cached routes"""
+        if subscription.tags is None:
+            self._any_tag.add(sid)
+        else:
+            for t in subscription.tags:
+                self._tag_index.setdefault(t,set()).add(sid)
+            for t in subscription.ptags:
+                self._tag_patterns.add(t,sid)
+        sroutes=self._subscription_routes[sid]=set()
+        entry=((-subscription.priority,subscription.order),subscription)
+        for k,route in self._routes.items():
+            if self._match_route(subscription,*k):
+                route=list(route) # copy to avoid changing the route which is currently being iterated over in some other thread
+                bisect.insort(route,entry)
+                self._routes[k]=route
+                sroutes.add(k)
+    def _remove_from_index(self, sid, subscription):
+        """Remove the subscription from the tag index and from all the cached routes"""
+        if subscription.tags is None:
+            self._any_tag.discard(sid)
+        else:
+            for t in subscription.tags:
+                self._tag_index[t].discard(sid)
+                if not self._tag_index[t]:
+                    del self._tag_index[t]
+            for t in subscription.ptags:
+                self._tag_patterns.remove(t,sid)
+        for k in self._subscription_routes.pop(sid,[]):
+            if k in self._routes:
+                self._routes[k]=[e for e in self._routes[k] if e[1] is not subscription]
+    @staticmethod
+    def _match_route(subscription, src, dst, tag):
+        """Check if the subscription passes the source, destination and tag filters (but not the additional filter function)"""
+        if (subscription.srcs is not None) and (src!="all") and (src not in subscription.srcs):
+            return False
+        if (subscription.dsts is not None) and (dst!="all") and (dst not in subscription.dsts):
+            return False
+        if (subscription.tags is not None) and (tag is not None) and (tag not in subscription.tags):
+            return any(fnmatch.fnmatchcase(tag,t) for t in subscription.ptags)
+        return True
+    def _get_route(self, src, dst, tag):
+        """Get the list of subscriptions passing the source, destination and tag filters"""
+        key=(src,dst,tag)
+        try:
+            return self._routes[key]
+        except KeyError:
+            pass
+        with self._routes_lock:
+            if key not in self._routes:
+                self._routes[key]=self._build_route(key)
+            return self._routes[key]
+    def _build_route(self, key):
+        src,dst,tag=key
+        if len(self._routes)>=self._max_routes:
+            self._clear_routes()
+        if tag is None:
+            candidates=self._subscriptions
+        else:
+            candidates=self._any_tag|self._tag_index.get(tag,set())|self._tag_patterns.find(tag)
+        route=[]
+        for sid in candidates:
+            subscription=self._subscriptions[sid]
+            if self._match_route(subscription,src,dst,tag):
+                route.append(((-subscription.priority,subscription.order),subscription))
+                self._subscription_routes[sid].add(key)
+        route.sort()
+        return route
+    def _clear_routes(self):
+        self._routes={}
+        for sroutes in self._subscription_routes.values():
+            sroutes.clear()
 
     def send(self, src, dst="any", tag=None, value=None):
         """
@@ -137,7 +344,11 @@ class MulticastPool:
             tag(str): multicast tag.
             value: multicast value.
         """
+        t0=tracing.now() if tracing.enabled else None
         with self._pool_lock.reading():
-            to_call=self._pool.find_observers(TMulticast(src,dst,tag),value)
-        for _,obs in to_call:
-            obs.callback(src,tag,value)
\ No newline at end of file
+            route=self._get_route(src,dst,tag)
+        for _,subscription in route:
+            if subscription.filt is None or subscription.filt(src,dst,tag,value):
+                subscription.callback(src,tag,value)
+        if t0 is not None:
+            tracing.add_span(tag,"multicast",t0,args=tracing.get_stream_args(value,{"src":src,"dst":dst,"tag":tag,"nsubscribers":len(route)}))
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""
+Task threads executing their task in a separate process.
+
+Pure-Python processing (e.g., fitting or metainfo handling) in the regular :class:`.QTaskThread` holds the GIL,
+so the processing threads effectively run sequentially. :class:`QProcessTaskThread` is a task thread which keeps its
+commands, multicast subscriptions, and variables in the current process (so it appears as a regular thread to the rest of the application),
+but executes the task itself (defined by a :class:`ProcessTask` subclass) in a child process.
+The communication is done through :class:`.ipc.SharedMemRingIPCChannel`, so large numpy arrays (e.g., frames) are passed through shared memory.
+
+A :class:`ProcessTask` subclass is defined in the same way as a :class:`.QTaskThread` subclass (using ``setup_task``, ``finalize_task``,
+``add_command``, ``add_job``, ``subscribe_commsync``, ``send_multicast``, ``v``, etc.), so an existing processing thread can be moved
+into a separate process by changing its base class and starting it through :class:`QProcessTaskThread`::
+
+    class FitterTask(ProcessTask):
+        def setup_task(self, src, tag):
+            self.subscribe_commsync(self.process_frames,srcs=src,tags=tag,limit_queue=1)
+            self.add_command("set_model")
+        ...
+
+    fitter=QProcessTaskThread("fitter",args=(FitterTask,"camera","frames/new"))
+    fitter.start()
+
+The task class, its setup arguments, and all the command arguments and results need to be picklable.
+Depending on the :mod:`multiprocessing` start method, the task class might need to be defined in an importable module.
+"""
+
+from ..utils import dictionary, ipc, general
+from . import controller, threadprop
+
+import multiprocessing
+import threading
+import traceback
+import time
+
+
+
+class ProcessTaskError(threadprop.ThreadError):
+    """Error raised in the process task, or the process task termination"""
+
+
+
+class ProcessTask:
+    """
+    Task executed in a child process by :class:`QProcessTaskThread`.
+
+    Provides a subset of :class:`.QTaskThread` interface: commands, jobs, multicast subscriptions and sending, and thread variables.
+    Commands and subscriptions are registered in the controlling thread (which maintains their queues, limits, and priorities),
+    while their calls are forwarded to the task process and executed there sequentially along with the jobs.
+    Variables and multicasts are forwarded to the controlling thread, so they appear as the variables and multicasts of this thread.
+
+    Args:
+        name: name of the controlling thread
+        channel: communication channel with the controlling thread
+    """
+    def __init__(self, name, channel):
+        self.name=name
+        self._channel=channel
+        self._params_val=dictionary.Dictionary()
+        self.v=dictionary.ItemAccessor(getter=lambda name: self.get_variable(name,missing_error=True),setter=self.set_variable)
+        self._commands={}
+        self._jobs={}
+        self._subscriptions={}
+        self._subscription_counter=0
+        self._running=True
+
+    ### Functions to be overloaded in subclasses ###
+    def setup_task(self, *args, **kwargs):
+        """Setup the task (called in the task process before the main task loop)"""
+    def finalize_task(self):
+        """Finalize the task (called in the task process on its termination)"""
+
+    ### Interface ###
+    def add_command(self, name, command=None, limit_queue=None, on_full_queue="skip_current", priority=0):
+        """
+        Add a new command to the command set.
+
+        The command is available in the controlling thread (see :meth:`.QTaskThread.add_command` for the parameters description).
+        """
+        if name in self._commands:
+            raise ValueError("command {} already exists".format(name))
+        if command is None:
+            command=getattr(self,name)
+        self._commands[name]=command
+        self._send(("command",name,{"limit_queue":limit_queue,"on_full_queue":on_full_queue,"priority":priority}))
+    def add_job(self, name, job, period, initial_call=True):
+        """
+        Add recurrent `job` which is called every `period` seconds.
+
+        If ``initial_call==True``, call it right away; otherwise, call it after the first period.
+        """
+        if name in self._jobs:
+            raise ValueError("job {} already exists".format(name))
+        self._jobs[name]=[job,period,time.time()+(0 if initial_call else period)]
+    def change_job_period(self, name, period):
+        """Change the period of the job `name`"""
+        self._jobs[name][1]=period
+    def remove_job(self, name):
+        """Remove the job `name`"""
+        del self._jobs[name]
+    def subscribe_commsync(self, callback, srcs="any", tags=None, dsts="any", subscription_priority=0, limit_queue=None, on_full_queue="skip_current", priority=0):
+        """
+        Subscribe a callback to a multicast which is synchronized with commands and jobs execution.
+
+        The subscription is made in the controlling thread (see :meth:`.QTaskThread.subscribe_commsync` for the parameters description).
+        Additional filter functions are not supported, since they are called in the sending thread; the filtering can be done in the callback instead.
+        Return subscription ID, which can be used to unsubscribe later.
+        """
+        sid=self._subscription_counter
+        self._subscription_counter+=1
+        self._subscriptions[sid]=callback
+        self._send(("subscribe",sid,{"srcs":srcs,"tags":tags,"dsts":dsts,"subscription_priority":subscription_priority,
+                "limit_queue":limit_queue,"on_full_queue":on_full_queue,"priority":priority,"name":getattr(callback,"__name__",None)}))
+        return sid
+    def unsubscribe(self, sid):
+        """Unsubscribe from a subscription with a given ID"""
+        del self._subscriptions[sid]
+        self._send(("unsubscribe",sid))
+    def send_multicast(self, dst="any", tag=None, value=None):
+        """Send a multicast from the controlling thread"""
+        self._send(("send_multicast",(dst,tag,value),{}))
+    def set_variable(self, name, value, update=False, notify=False, notify_tag="changed/*"):
+        """Set thread variable (see :meth:`.QThreadController.set_variable` for the parameters description)"""
+        if update:
+            self._params_val.merge(value,name)
+        else:
+            self._params_val.add_entry(name,value,force=True)
+        self._send(("set_variable",(name,value),{"update":update,"notify":notify,"notify_tag":notify_tag}))
+    def get_variable(self, name, default=None, missing_error=False):
+        """
+        Get thread variable set by the task.
+
+        If ``missing_error==False`` and no variable exists, return `default`; otherwise, raise and error.
+        """
+        if missing_error and name not in self._params_val:
+            raise KeyError("no thread variable {}".format(name))
+        return self._params_val.get(name,default)
+    def update_status(self, kind, status, text=None, notify=True):
+        """Update status represented in thread variables (see :meth:`.QTaskThread.update_status` for the parameters description)"""
+        self._send(("update_status",(kind,status),{"text":text,"notify":notify}))
+    def stop(self):
+        """Stop the task (the controlling thread is stopped as well)"""
+        self._running=False
+
+    ### Main loop ###
+    def _send(self, msg):
+        self._channel.send(msg)
+    def _execute_call(self, cid, kind, key, args, kwargs):
+        if kind=="command":
+            func=self._commands[key]
+        else:
+            func=self._subscriptions.get(key,lambda *args: None) # could be unsubscribed by now
+        try:
+            res=("result",func(*args,**kwargs))
+        except Exception as e:  # pylint: disable=broad-except
+            res=("exception",e,traceback.format_exc())
+        try:
+            self._send(("result",cid,res))
+        except Exception:  # pylint: disable=broad-except
+            self._send(("result",cid,("exception",ProcessTaskError("can not send the call result"),traceback.format_exc())))
+    def _run_jobs(self):
+        """Run all due jobs and return time until the next one (``None`` if there are no jobs)"""
+        t=time.time()
+        for job in list(self._jobs.values()):
+            if job[2]<=t:
+                job[2]=max(job[2]+job[1],t)
+                job[0]()
+        if not self._jobs:
+            return None
+        return max(min(j[2] for j in self._jobs.values())-time.time(),0)
+    def _run(self, args, kwargs):
+        try:
+            try:
+                self.setup_task(*args,**kwargs)
+                self._send(("ready",))
+                while self._running:
+                    timeout=self._run_jobs()
+                    try:
+                        msg=self._channel.recv(timeout=timeout)
+                    except TimeoutError:
+                        continue
+                    if msg[0]=="call":
+                        self._execute_call(*msg[1:])
+                    elif msg[0]=="stop":
+                        break
+            finally:
+                self.finalize_task()
+        except Exception:  # pylint: disable=broad-except
+            self._send(("error",traceback.format_exc()))
+        self._send(("stopped",))
+
+def _run_process_task(task_class, name, channel_args, args, kwargs):
+    channel=ipc.SharedMemRingIPCChannel.from_args(*channel_args)
+    try:
+        task_class(name,channel)._run(args,kwargs)
+    finally:
+        channel.close()
+
+
+
+
+class QProcessTaskThread(controller.QTaskThread):
+    """
+    Task thread which executes its task in a separate process.
+
+    The commands, subscriptions, and variables of the task (defined by a :class:`ProcessTask` subclass) appear as the ones of this thread.
+    If the task raises an error, this thread is stopped with :exc:`ProcessTaskError`; if this thread is stopped, the task process is stopped as well.
+    Failures of the task process itself during a command or a subscription call (call timeout or unexpected process exit) are only reported to the caller
+    and do not raise an error in this thread; if the task process exits, this thread is stopped.
+
+    Setup args:
+        - ``task_class``: :class:`ProcessTask` subclass defining the task
+        - the rest of the arguments are passed to the task ``setup_task`` method
+
+    Attributes:
+        ring_size: size of the shared memory rings used to pass numpy arrays (in each direction)
+        start_method: :mod:`multiprocessing` start method (``None`` means the default one)
+        stop_timeout: time to wait for the task process to finish before terminating it
+        call_timeout: maximal time to wait for a command or a subscription call result from the task process (``None`` means no limit);
+            while waiting, the task process state and the thread stop requests are checked every `call_poll_period` seconds;
+            a timed out command call raises :exc:`.threadprop.TimeoutThreadError` in the caller thread, and a timed out subscription call is dropped;
+            in both cases this thread keeps running, and the task process finishes the call in the background (its result is discarded),
+            so the subsequent calls are delayed until then
+        call_poll_period: period of checking the task process state and the thread messages while waiting for a call result or a message from the task process
+    """
+    ring_size=2**26
+    start_method=None
+    stop_timeout=5.
+    call_timeout=None
+    call_poll_period=0.05
+    def setup_task(self, task_class, *args, **kwargs):  # pylint: disable=arguments-differ
+        self._channel=ipc.SharedMemRingIPCChannel(ring_size=self.ring_size)
+        self._pending_calls={}
+        self._call_counter=0
+        self._calls_lock=threading.Lock()
+        self._channel_closed=False
+        self._remote_commands=set()
+        self._remote_subscriptions={}
+        ctx=multiprocessing.get_context(self.start_method)
+        self.process=ctx.Process(target=_run_process_task,args=(task_class,self.name,self._channel.get_peer_args(),args,kwargs),daemon=True)
+        self._reader=None
+        self.process.start()
+        self._channel.peer_conn.close() # only the task process holds the peer end, so the pipe is closed once it exits
+        try:
+            while True:
+                try:
+                    msg=self._channel.recv(timeout=0.1)
+                except TimeoutError:
+                    if not self.process.is_alive():
+                        raise ProcessTaskError("task process of thread {} exited with code {}".format(self.name,self.process.exitcode)) from None
+                    continue
+                except EOFError:
+                    self.process.join(self.stop_timeout)
+                    raise ProcessTaskError("task process of thread {} exited with code {}".format(self.name,self.process.exitcode)) from None
+                if msg[0]=="ready":
+                    break
+                self._process_message(msg)
+        except:  # pylint: disable=bare-except
+            self._stop_process()
+            raise
+        self._reader=threading.Thread(target=self._read_loop,daemon=True)
+        self._reader.start()
+    def finalize_task(self):
+        self._stop_process()
+        super().finalize_task()
+    def _stop_process(self):
+        if self._channel_closed and self._reader is None:
+            return
+        try:
+            self._channel.send(("stop",))
+        except (OSError,ValueError):
+            pass
+        self.process.join(self.stop_timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._channel_closed=True
+        self._channel.conn.close() # stop the reader thread if it is still waiting for messages
+        if self._reader is not None:
+            self._reader.join(self.stop_timeout)
+            self._reader=None
+        self._channel.close()
+
+    def _call_in_thread(self, func, *args):
+        if self.is_in_controlled():
+            func(*args)
+        else:
+            self.call_in_thread_callback(func,args=args)
+    def _raise_task_error(self, tb):
+        raise ProcessTaskError("error in the task process of thread {}:\n{}".format(self.name,tb))
+    def _process_message(self, msg):
+        kind=msg[0]
+        if kind=="result":
+            with self._calls_lock:
+                call=self._pending_calls.pop(msg[1],None)
+            if call is not None:
+                call[1]=msg[2]
+                call[0].set()
+        elif kind in ["set_variable","send_multicast","update_status"]:
+            getattr(self,kind)(*msg[1],**msg[2])
+        elif kind=="command":
+            self._call_in_thread(self._add_remote_command,msg[1],msg[2])
+        elif kind=="subscribe":
+            self._call_in_thread(self._add_remote_subscription,msg[1],msg[2])
+        elif kind=="unsubscribe":
+            self._call_in_thread(self._remove_remote_subscription,msg[1])
+        elif kind=="error":
+            self._call_in_thread(self._raise_task_error,msg[1])
+    def _read_loop(self):
+        try:
+            while True:
+                try:
+                    msg=self._channel.recv(timeout=self.call_poll_period)
+                except TimeoutError:
+                    if self.process.is_alive():
+                        continue
+                    msg=("stopped",)  # the process exited without sending the final message
+                if msg[0]=="stopped":
+                    if not self.finishing():
+                        self._call_in_thread(self.stop)
+                    break
+                self._process_message(msg)
+        except (EOFError,OSError):
+            if not (self._channel_closed or self.finishing()):
+                self._call_in_thread(self.stop)
+        finally:
+            with self._calls_lock:
+                self._channel_closed=True
+                pending,self._pending_calls=self._pending_calls,{}
+            for call in pending.values():
+                call[0].set()
+
+    def _call_remote(self, kind, key, args=None, kwargs=None):
+        """Call a command or a subscription callback in the task process and wait for the result"""
+        call=[threading.Event(),("fail",)]
+        with self._calls_lock:
+            if self._channel_closed:
+                raise ProcessTaskError("task process of thread {} is not running".format(self.name))
+            cid=self._call_counter
+            self._call_counter+=1
+            self._pending_calls[cid]=call
+        try:
+            self._channel.send(("call",cid,kind,key,args or (),kwargs or {}))
+        except Exception:
+            with self._calls_lock:
+                self._pending_calls.pop(cid,None)
+            raise
+        try:
+            self._wait_remote_call(call)
+        except:
+            with self._calls_lock:
+                self._pending_calls.pop(cid,None)
+            raise
+        res=call[1]
+        if res[0]=="result":
+            return res[1]
+        if res[0]=="exception":
+            raise res[1] from ProcessTaskError("error in the task process of thread {}:\n{}".format(self.name,res[2]))
+        raise ProcessTaskError("task process of thread {} is not running".format(self.name))
+    def _wait_remote_call(self, call):
+        """
+        Wait for the remote call result.
+
+        Periodically check if the task process is still alive and process the thread messages (so that the stop requests are not blocked by the call).
+        Raise :exc:`ProcessTaskError` if the process is terminated, and :exc:`.threadprop.TimeoutThreadError` if the call takes longer than :attr:`call_timeout`.
+        """
+        ctd=general.Countdown(self.call_timeout)
+        while not call[0].wait(self.call_poll_period):
+            if not self.process.is_alive():
+                raise ProcessTaskError("task process of thread {} exited with code {}".format(self.name,self.process.exitcode))
+            if self.is_in_controlled():
+                self.check_messages()
+            if ctd.passed():
+                raise threadprop.TimeoutThreadError("call in the task process of thread {} timed out".format(self.name))
+    def _on_call_failure(self, error):
+        """Handle the task process failure during a remote call (stop the thread if the process is no longer running)"""
+        if isinstance(error,ProcessTaskError):
+            self.call_in_thread_callback(self.stop)
+    def _schedule_comm(self, name, args, kwargs, callback=None, sync_result=True):
+        if name not in self._remote_commands:
+            return super()._schedule_comm(name,args,kwargs,callback=callback,sync_result=sync_result)
+        comm,sched,_=self._commands[name]
+        call=sched.build_call(comm,args,kwargs,callback=callback,pass_result=True,callback_on_exception=False,sync_result=sync_result)
+        func=call.func
+        def command(*cargs, **ckwargs):
+            try:
+                return func(*cargs,**ckwargs)
+            except (threadprop.TimeoutThreadError,ProcessTaskError) as err:
+                call.silent=True  # only pass the task process failure to the caller
+                self._on_call_failure(err)
+                raise
+        call.func=command
+        sched.schedule(call)
+        return call.result_synchronizer
+    def _add_remote_command(self, name, params):
+        def command(*args, **kwargs):
+            return self._call_remote("command",name,args,kwargs)
+        self.add_command(name,command,**params)
+        self._remote_commands.add(name)
+    def _add_remote_subscription(self, rsid, params):
+        def callback(src, tag, value):
+            try:
+                self._call_remote("multicast",rsid,(src,tag,value))
+            except (threadprop.TimeoutThreadError,ProcessTaskError) as err:
+                self._on_call_failure(err)
+        callback.__name__=params.pop("name") or callback.__name__
+        self._remote_subscriptions[rsid]=self.subscribe_commsync(callback,**params)
+    def _remove_remote_subscription(self, rsid):
+        self.unsubscribe(self._remote_subscriptions.pop(rsid))
@@ -1,4 +1,4 @@
-from . import controller, threadprop
+from . import controller, threadprop, callstats
 import time
 
 try:
@@ -86,4 +86,80 @@ def print_stats(nfunc=None, ntotfunc=None, min_func_frac=.001):
             funcstat=yappi.get_func_stats(ctx_id=th.id)
             for f in funcstat[:nfunc]:
                 if f.ttot>min_func_frac*ttime:
-                    print(" "*4+"{:50s} {:5d}  {:8.3f}s        {:6.1f}% / {:6.1f}%".format(f.name,f.ncall,f.ttot,f.ttot/th.ttot*100,f.ttot/ttime*100))
\ No newline at end of file
+                    print(" "*4+"{:50s} {:5d}  {:8.3f}s        {:6.1f}% / {:6.1f}%".format(f.name,f.ncall,f.ttot,f.ttot/th.ttot*100,f.ttot/ttime*100))
+
+
+
+def _get_task_controllers():
+    with controller._running_threads_lock:  # pylint: disable=protected-access
+        ctls=list(controller._running_threads.values())  # pylint: disable=protected-access
+    return [ctl for ctl in ctls if isinstance(ctl,controller.QTaskThread)]
+def enable_call_stats(enabled=True, reset=False, default=True):
+    """
+    Enable or disable collection of the call statistics in all running task threads.
+
+    If ``reset==True``, reset the already collected statistics.
+    If ``default==True``, also enable or disable it for all threads created afterwards.
+    """
+    if default:
+        callstats.set_default_enabled(enabled)
+    for ctl in _get_task_controllers():
+        ctl.enable_call_stats(enabled,reset=reset)
+def get_call_stats(reset=False):
+    """
+    Get the call statistics of all running task threads.
+
+    Return dictionary ``{name: stats}`` with the thread names and their :meth:`.QTaskThread.get_call_stats` results.
+    If ``reset==True``, reset the statistics after reading.
+    """
+    stats={}
+    for ctl in _get_task_controllers():
+        stats[ctl.name]=ctl.get_call_stats()
+        if reset:
+            ctl.reset_call_stats()
+    return stats
+
+
+
+class CallLatencyProbeThread(controller.QTaskThread):
+    """Trivial task thread used as a target for the call latency measurements"""
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.add_command("echo")
+    def echo(self, value=None):
+        """Return the supplied value"""
+        return value
+def _get_latency_stats(times):
+    times=sorted(times)
+    n=len(times)
+    return {"median":times[n//2],"mean":sum(times)/n,"p95":times[min(int(n*.95),n-1)],"max":times[-1]}
+def measure_call_latency(ncalls=1000, warmup=100, target=None):
+    """
+    Measure round-trip latency of synchronous calls from the current thread to a task thread.
+
+    `target` is the name of the target thread (it should have an ``"echo"`` command returning its argument);
+    if it is ``None``, create a temporary :class:`CallLatencyProbeThread` thread, which is stopped afterwards.
+    Return dictionary with the latency statistics (``"median"``, ``"mean"``, ``"p95"``, and ``"max"`` times in seconds)
+    for the synchronous command call (``"command"`` entry) and for :meth:`.QThreadController.call_in_thread_sync` (``"call"`` entry).
+    Must be called from a controlled thread (e.g., the main GUI thread).
+    """
+    probe=None
+    if target is None:
+        probe=CallLatencyProbeThread()
+        probe.start()
+        target=probe.name
+    try:
+        ctl=controller.sync_controller(target)
+        results={}
+        for kind,call in [("command",lambda: ctl.cs.echo(0)),("call",lambda: ctl.call_in_thread_sync(int))]:
+            for _ in range(warmup):
+                call()
+            times=[]
+            for _ in range(ncalls):
+                t0=time.perf_counter()
+                call()
+                times.append(time.perf_counter()-t0)
+            results[kind]=_get_latency_stats(times)
+        return results
+    finally:
+        if probe is not None:
+            probe.stop(sync=True)
@@ -95,6 +95,22 @@ class QMultiThreadNotifier:
             if res:
                 return res
             cnt=self.wait(cnt,timeout=ctd.time_left())
+    def add_notifier(self, notifier, state=1):
+        """
+        Add an external notifier, which is notified once the counter is equal to at least `state`.
+
+        The notifier is called with the current counter state plus 1 (same as the :meth:`wait` result), or with ``None`` if the synchronizer has failed.
+        If the counter already reached `state` (or the synchronizer has failed), notify it immediately.
+        """
+        with self._lock:
+            if self._failed:
+                value=None
+            elif self._cnt>=state:
+                value=self._cnt+1
+            else:
+                self._notifiers.setdefault(state,[]).append(notifier)
+                return
+        notifier.notify(value)
     def notify(self):
         """Notify all waiting threads"""
         with self._lock:
@@ -0,0 +1,168 @@
+"""
+Timeline tracing of the thread calls and multicasts.
+
+Records spans of the scheduled calls execution (commands, jobs, multicast callbacks, and thread calls), multicast dispatch,
+and queued calls processing loops in all threads, along with the flow events connecting the call creation and its execution.
+Stream messages passed in multicasts additionally add their stream name, session ID, and message ID to the span arguments.
+The tracing is disabled by default, in which case the overhead is limited to a single flag check in each instrumented place.
+The events are stored in per-thread ring buffers (so no locking is required on recording),
+and can be exported in Chrome Trace Event format (viewable in ``chrome://tracing`` or Perfetto UI) using :func:`save_trace`.
+"""
+
+from . import threadprop
+
+import threading
+import weakref
+import collections
+import itertools
+import time
+import json
+import os
+
+
+
+enabled=False
+_buffer_size=2**16
+_buffers=[]
+_buffers_lock=threading.Lock()
+_local=threading.local()
+_flow_ids=itertools.count()
+_start_time=time.perf_counter()
+
+now=time.perf_counter
+
+class TraceBuffer:
+    """Events buffer of a single thread"""
+    def __init__(self, size):
+        self.tid=threading.get_ident()
+        self.thread_name=threading.current_thread().name
+        self._thread=weakref.ref(threading.current_thread())
+        self.ctl_name=None
+        self.events=collections.deque(maxlen=size)
+    def update_name(self):
+        """Update the controller name of the thread (it might be assigned after the buffer is created)"""
+        ctl=threadprop.current_controller(require_controller=False)
+        if ctl is not None:
+            self.ctl_name=ctl.name
+    def is_alive(self):
+        """Check if the buffer thread is still running"""
+        thread=self._thread()
+        return thread is not None and thread.is_alive()
+def _get_buffer():
+    try:
+        buff=_local.buffer
+    except AttributeError:
+        buff=_local.buffer=TraceBuffer(_buffer_size)
+        with _buffers_lock:
+            _buffers.append(buff)
+    if buff.ctl_name is None:
+        buff.update_name()
+    return buff
+
+
+def _set_enabled(value):
+    global enabled  # pylint: disable=global-statement
+    enabled=value
+def enable(enabled=True, reset=False, buffer_size=None):  # pylint: disable=redefined-outer-name
+    """
+    Enable or disable the tracing.
+
+    If ``reset==True``, clear all the recorded events.
+    `buffer_size` specifies the maximal number of stored events per thread (older events are discarded); ``None`` keeps the current value.
+    The new buffer size only applies to the threads which have not recorded any events yet (or to all threads after reset).
+    """
+    global _buffer_size  # pylint: disable=global-statement
+    if buffer_size is not None:
+        _buffer_size=buffer_size
+    if reset:
+        clear()
+    _set_enabled(enabled)
+def is_enabled():
+    """Check whether the tracing is enabled"""
+    return enabled
+def clear():
+    """
+    Clear all recorded events.
+
+    Buffers of the threads which are no longer running are removed.
+    """
+    global _start_time  # pylint: disable=global-statement
+    with _buffers_lock:
+        _buffers[:]=[buff for buff in _buffers if buff.is_alive()]
+        for buff in _buffers:
+            if buff.events.maxlen!=_buffer_size:
+                buff.events=collections.deque(maxlen=_buffer_size)
+            else:
+                buff.events.clear()
+        _start_time=time.perf_counter()
+
+
+def get_stream_args(value, args=None):
+    """Add stream name, session ID and message ID of the given value (if it is a stream message) to the span arguments dictionary"""
+    args={} if args is None else args
+    if hasattr(value,"get_ids"):
+        try:
+            args["sn"]=value.sn
+            args["sid"],args["mid"]=value.get_ids()
+        except (AttributeError,KeyError,TypeError,ValueError):
+            pass
+    return args
+def add_span(name, cat, t0, t1=None, args=None):
+    """Record a complete span with the given `name`, category `cat`, start time `t0`, and end time `t1` (current time by default)"""
+    t1=now() if t1 is None else t1
+    _get_buffer().events.append(("X",name,cat,t0,t1-t0,args,None))
+def add_instant(name, cat, args=None):
+    """Record an instant event"""
+    _get_buffer().events.append(("i",name,cat,now(),0,args,None))
+def start_flow():
+    """Record the start of a flow (e.g., a call creation) and return its ID, which should be passed to :func:`end_flow`"""
+    fid=next(_flow_ids)
+    _get_buffer().events.append(("s","call","flow",now(),0,None,fid))
+    return fid
+def end_flow(fid, t):
+    """Record the end of the flow with the given ID at time `t` (should be within the span which finishes the flow)"""
+    _get_buffer().events.append(("f","call","flow",t,0,None,fid))
+
+def add_call_span(call, t0, state=None):
+    """Record span of a scheduled call (:class:`.QScheduledCall`) execution started at `t0`"""
+    if call.trace_name is None:
+        cat,name="call",getattr(call.func,"__name__","call")
+    else:
+        cat,name=call.trace_name
+    args={"state":state}
+    if cat=="subscriptions" and len(call.args)>=3:
+        args["src"]=call.args[0]
+        args["tag"]=call.args[1]
+        get_stream_args(call.args[2],args)
+    if call.trace_flow is not None:
+        end_flow(call.trace_flow,t0)
+    add_span(name,cat,t0,args=args)
+
+
+def get_events():
+    """Get the recorded events as a list of dictionaries in Chrome Trace Event format"""
+    pid=os.getpid()
+    with _buffers_lock:
+        buffers=list(_buffers)
+    events=[]
+    for buff in buffers:
+        tname=buff.ctl_name or buff.thread_name
+        events.append({"ph":"M","name":"thread_name","pid":pid,"tid":buff.tid,"args":{"name":tname}})
+        for ph,name,cat,ts,dur,args,fid in list(buff.events):
+            evt={"ph":ph,"name":name,"cat":cat,"ts":(ts-_start_time)*1E6,"pid":pid,"tid":buff.tid}
+            if ph=="X":
+                evt["dur"]=dur*1E6
+                evt["args"]=dict(args or {},ctl=buff.ctl_name)
+            elif ph=="i":
+                evt["s"]="t"
+                evt["args"]=dict(args or {},ctl=buff.ctl_name)
+            else:
+                evt["id"]=fid
+                if ph=="f":
+                    evt["bp"]="e"
+            events.append(evt)
+    return events
+def save_trace(path):
+    """Save the recorded events to a JSON file in Chrome Trace Event format"""
+    with open(path,"w",encoding="utf-8") as f:
+        json.dump({"traceEvents":get_events(),"displayTimeUnit":"ms"},f,default=str)
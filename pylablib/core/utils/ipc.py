@@ -5,9 +5,17 @@ Focus on higher throughput for large numpy arrays via shared memory.
 """
 
 from multiprocessing import Array, Pipe
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python<3.8
+    shared_memory=None
 import ctypes
 import collections
+import io
 import pickle
+import threading
+import time
+import weakref
 import numpy as np
 
 from . import strpack
@@ -137,6 +145,234 @@ class SharedMemIPCChannel(PipeIPCChannel):
 
 
 
+TShmemRingBlock=collections.namedtuple("TShmemRingBlock",["start","end","offset"])
+class SharedMemRing:
+    """
+    Ring buffer of variable-size data blocks in shared memory.
+
+    Intended for passing large arrays between processes: the writing side copies the data into the ring (:meth:`write_array`)
+    and passes the block descriptors to the reading side through some other channel (e.g., a pipe), and the reading side
+    accesses the data directly in the shared memory (:meth:`get_array`) and releases the blocks once they are no longer needed (:meth:`release`).
+    Blocks can be released in any order; the memory is reused once all the preceding blocks have been released.
+    Release position is stored in the shared memory itself, so no additional handshake between the sides is required.
+    Only a single writer and a single reader are supported.
+
+    Args:
+        size: ring size in bytes (only used on the writing side)
+        name: name of an existing ring shared memory (only used on the reading side)
+    """
+    _header_size=64
+    _block_align=64
+    def __init__(self, size=None, name=None):
+        if shared_memory is None:
+            raise NotImplementedError("shared memory ring requires Python 3.8 or newer")
+        if name is None:
+            self.size=size
+            self.shm=shared_memory.SharedMemory(create=True,size=size+self._header_size)
+            self.writer=True
+        else:
+            self.shm=shared_memory.SharedMemory(name=name)
+            self.size=self.shm.size-self._header_size
+            self.writer=False
+        self._header=np.ndarray((2,),dtype="<i8",buffer=self.shm.buf)
+        if self.writer:
+            self._header[:]=0
+        self._write_pos=0
+        self._released={}
+        self._release_pos=0
+        self._lock=threading.Lock()
+        self._closed=False
+
+    def get_peer_args(self):
+        """Get arguments required to create a reading side of the ring"""
+        return (None,self.shm.name)
+    @classmethod
+    def from_args(cls, *args):
+        """Create a ring from the supplied arguments"""
+        return cls(*args)
+
+    def get_used_size(self):
+        """Get the size of the currently occupied (written, but not yet released) ring part in bytes (writing side only)"""
+        return self._write_pos-int(self._header[0])
+    def is_reader_closed(self):
+        """Check if the reading side of the ring has been closed (writing side only)"""
+        return bool(self._header[1])
+    def allocate(self, nbytes, timeout=None):
+        """
+        Allocate a block of the given size and return its descriptor (writing side only).
+
+        If there is not enough free space, wait until the reading side releases enough blocks;
+        if `timeout` is passed by then, raise :exc:`TimeoutError` (``timeout=0`` means no waiting).
+        """
+        if nbytes>self.size:
+            raise ValueError("block size {} exceeds the ring size {}".format(nbytes,self.size))
+        size=max((nbytes+self._block_align-1)//self._block_align,1)*self._block_align
+        start=self._write_pos
+        offset=start%self.size
+        if offset+size>self.size: # skip to the beginning of the ring
+            offset=0
+        end=start+(offset-start%self.size)%self.size+size
+        ctd=None if timeout is None else time.time()+timeout
+        while end-int(self._header[0])>self.size:
+            if self._header[1]:
+                raise RuntimeError("ring reader is closed")
+            if ctd is not None and time.time()>=ctd:
+                raise TimeoutError
+            time.sleep(1E-3)
+        self._write_pos=end
+        return TShmemRingBlock(start,end,offset+self._header_size)
+    def write_array(self, a, timeout=None):
+        """
+        Copy numpy array into a newly allocated block (writing side only).
+
+        Return a tuple ``(block, shape, dtype)``, which needs to be passed to :meth:`get_array` on the reading side.
+        `timeout` has the same meaning as in :meth:`allocate`.
+        """
+        block=self.allocate(a.nbytes,timeout=timeout)
+        np.copyto(np.ndarray(a.shape,dtype=a.dtype,buffer=self.shm.buf,offset=block.offset),a)
+        return block,a.shape,a.dtype.str
+    def get_array(self, block, shape, dtype, release=True):
+        """
+        Get numpy array stored in the given block (reading side only).
+
+        The array directly references the shared memory.
+        If ``release==True``, the block is released automatically once the array (and all of its views) are deleted;
+        otherwise, it needs to be released explicitly using :meth:`release`.
+        """
+        a=np.ndarray(shape,dtype=dtype,buffer=self.shm.buf,offset=block.offset)
+        if release:
+            weakref.finalize(a,self.release,block)
+        return a
+    def release(self, block):
+        """Mark the block as released, so that its memory can be reused (reading side only)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._released[block.start]=block.end
+            while self._release_pos in self._released:
+                self._release_pos=self._released.pop(self._release_pos)
+            self._header[0]=self._release_pos
+    
+    def close(self):
+        """
+        Close the ring.
+
+        On the writing side, also remove the shared memory (it stays available on the reading side until it is closed).
+        On the reading side, the memory is only unmapped if no arrays obtained with :meth:`get_array` are still referenced.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed=True
+            if not self.writer:
+                self._header[1]=1
+            self._header=None
+        try:
+            self.shm.close()
+        except BufferError: # some arrays still use the memory; it gets unmapped once they are deleted
+            pass
+        if self.writer:
+            self.shm.unlink()
+
+
+
+
+class _RingPickler(pickle.Pickler):
+    """Pickler which places large numpy arrays into a shared memory ring instead of the pickled data"""
+    def __init__(self, file, ring, min_size):
+        super().__init__(file,protocol=pickle.HIGHEST_PROTOCOL)
+        self.ring=ring
+        self.min_size=min_size
+        self.blocks=[]
+    def persistent_id(self, obj):  # pylint: disable=inconsistent-return-statements
+        if type(obj) is np.ndarray and obj.nbytes>=self.min_size and obj.dtype.fields is None and not obj.dtype.hasobject:  # pylint: disable=unidiomatic-typecheck
+            try:
+                desc=self.ring.write_array(obj,timeout=0)
+                self.blocks.append(desc[0])
+                return desc
+            except (TimeoutError,ValueError,RuntimeError): # no space in the ring, or the reader is closed; pickle the array directly
+                pass
+class _RingUnpickler(pickle.Unpickler):
+    """Unpickler which restores the arrays placed into a shared memory ring by :class:`_RingPickler`"""
+    def __init__(self, file, ring):
+        super().__init__(file)
+        self.ring=ring
+    def persistent_load(self, pid):
+        return self.ring.get_array(*pid)
+
+_ring_connect=32
+_ring_release=33
+class SharedMemRingIPCChannel(PipeIPCChannel):
+    """
+    Bidirectional IPC channel using pipe for the pickled data and shared memory rings for the large numpy arrays contained in it.
+
+    Numpy arrays larger than `min_size` (anywhere inside the sent data, e.g., frames inside a message object) are copied into the sending side ring,
+    and the arrays on the receiving side directly reference the shared memory; the memory is reused once these arrays are no longer referenced.
+    If the ring does not have enough space (e.g., the receiving side holds on to many received arrays), the arrays are pickled as usual.
+    Sending is thread-safe, while receiving should be done from a single thread.
+
+    Args:
+        pipe_conn: pipe connection (``None`` means that a new pipe is created)
+        ring_size: size of the sending ring in bytes
+        peer_ring_name: name of the peer sending ring (``None`` for the side which creates the channel)
+        min_size: minimal array size (in bytes) to be sent through the ring
+    """
+    def __init__(self, pipe_conn=None, ring_size=2**26, peer_ring_name=None, min_size=2**14):
+        super().__init__(pipe_conn)
+        self.ring_size=ring_size
+        self.min_size=min_size
+        self.send_ring=SharedMemRing(ring_size)
+        self.recv_ring=None
+        self._send_lock=threading.Lock()
+        if peer_ring_name is not None:
+            self.recv_ring=SharedMemRing(name=peer_ring_name)
+            self._send_raw(TPipeMsg(_ring_connect,self.send_ring.shm.name))
+
+    def get_peer_args(self):
+        """Get arguments required to create a peer connection"""
+        return ((self.peer_conn,self.conn),self.ring_size,self.send_ring.shm.name,self.min_size)
+
+    def send(self, data):
+        """Send data"""
+        buff=io.BytesIO()
+        with self._send_lock:
+            pickler=_RingPickler(buff,self.send_ring,self.min_size)
+            try:
+                pickler.dump(data)
+            except Exception:
+                if pickler.blocks: # release the already written blocks on the receiving side
+                    self._send_raw(TPipeMsg(_ring_release,pickler.blocks))
+                raise
+            self.conn.send_bytes(buff.getbuffer())
+    def _send_raw(self, data):
+        self.conn.send_bytes(pickle.dumps(data,protocol=pickle.HIGHEST_PROTOCOL))
+    def recv(self, timeout=None):
+        """Receive data"""
+        while True:
+            if not (timeout is None or self.conn.poll(timeout)):
+                raise TimeoutError
+            data=_RingUnpickler(io.BytesIO(self.conn.recv_bytes()),self.recv_ring).load()
+            if isinstance(data,TPipeMsg) and data.id==_ring_connect:
+                self.recv_ring=SharedMemRing(name=data.data)
+            elif isinstance(data,TPipeMsg) and data.id==_ring_release:
+                for b in data.data:
+                    self.recv_ring.release(b)
+            else:
+                return data
+    def close(self):
+        """
+        Close the channel.
+
+        The memory of the receiving ring stays mapped until all received arrays are deleted.
+        """
+        self.send_ring.close()
+        if self.recv_ring is not None:
+            self.recv_ring.close()
+        self.conn.close()
+
+
+
+
 TShmemVarDesc=collections.namedtuple("TShmemVarDesc",["offset","size","kind","fixed_size"])
 class SharedMemIPCTable:
     """
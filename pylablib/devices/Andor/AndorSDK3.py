@@ -784,7 +784,7 @@ class AndorSDK3Camera(camera.IBinROICamera, camera.IExposureCamera, camera.IAttr
         bpp=self.cav["BytesPerPixel"]
         dt="<u{}".format(int(np.ceil(bpp))) # can be fractional (e.g., 1.5)
         return np.zeros((n,)+dim,dtype=dt)
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False):
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, out=None):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -796,5 +796,6 @@ class AndorSDK3Camera(camera.IBinROICamera, camera.IExposureCamera, camera.IAttr
         If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of :class:`TFrameInfo` instances
         describing frame index and frame metadata, which contains timestamp, image size, pixel format, and row stride;
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are written (see :meth:`.ICamera.read_multiple_images`).
         """
-        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
\ No newline at end of file
+        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info,out=out)
\ No newline at end of file
@@ -483,7 +483,7 @@ class DCAMCamera(camera.IBinROICamera, camera.IExposureCamera, camera.IAttribute
         bpp=int(self.get_attribute_value("BIT PER CHANNEL",default=8))
         dt="<u{}".format((bpp-1)//8+1)
         return np.zeros((n,)+dim,dtype=dt)
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False):
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, out=None):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -495,5 +495,6 @@ class DCAMCamera(camera.IBinROICamera, camera.IExposureCamera, camera.IAttribute
         If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of :class:`TFrameInfo` instances
         describing frame index, framestamp and timestamp, camera stamp, frame location on the sensor, and pixel type;
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are written (see :meth:`.ICamera.read_multiple_images`).
         """
-        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
\ No newline at end of file
+        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info,out=out)
\ No newline at end of file
@@ -521,7 +521,7 @@ class IMAQFrameGrabber(camera.IROICamera):
         roi=self.get_roi()
         w,h=roi[1]-roi[0],roi[3]-roi[2]
         return w*h*bpp
-    def _parse_buffer(self, buffer, nframes=1):
+    def _parse_buffer(self, buffer, nframes=1, copy=True):
         r,c=self._get_data_dimensions_rc()
         dt=self._get_buffer_dtype()
         # bpp=dt.itemsize
@@ -530,7 +530,7 @@ class IMAQFrameGrabber(camera.IROICamera):
         # return np.frombuffer(buffer,dtype=dt).reshape((nframes,r,c))
         cdt=ctypes.POINTER(np.ctypeslib.as_ctypes_type(dt))
         data=np.ctypeslib.as_array(ctypes.cast(buffer,cdt),shape=((nframes,r,c)))
-        return data.copy()
+        return data.copy() if copy else data
     def _read_multiple_images_raw(self, rng=None, peek=False):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
@@ -550,7 +550,26 @@ class IMAQFrameGrabber(camera.IROICamera):
             self._frame_counter.advance_read_frames(rng)
         return rng[0],skipped_frames,raw_frames
     
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, fastbuff=False):  # pylint: disable=arguments-differ
+    def _read_multiple_images_out(self, out, rng=None, peek=False, missing_frame="skip", return_info=False):
+        """Read multiple images directly into the `out` array; return tuple ``(frames, infos)`` with the filled part of `out` and the frame info list"""
+        trimmed=self._trim_images_range(rng) if self._buffer_mgr else None
+        if trimmed is None:
+            return None,None
+        rng,skipped_frames=self._fit_images_range(*trimmed,len(out),missing_frame=missing_frame)
+        first_frame,extra_skipped,raw_data=self._read_multiple_images_raw(rng=rng,peek=peek)
+        if missing_frame!="skip":
+            skipped_frames+=extra_skipped
+        out[:skipped_frames]=0
+        pos=skipped_frames
+        for n,b in raw_data:
+            out[pos:pos+n]=self._convert_indexing(self._parse_buffer(b,nframes=n,copy=False),"rct",axes=(-2,-1))
+            pos+=n
+        frame_info=None
+        if return_info:
+            frame_info=self._build_frame_info_array((first_frame,first_frame+pos-skipped_frames),nmissing=skipped_frames)
+            frame_info=self._convert_frame_info_array(frame_info)
+        return out[:pos],frame_info
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, fastbuff=False, out=None):  # pylint: disable=arguments-differ
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -559,15 +578,23 @@ class IMAQFrameGrabber(camera.IROICamera):
         If ``peek==True``, return images but not mark them as read.
         `missing_frame` determines what to do with frames which are out of range (missing or lost):
         can be ``"none"`` (replacing them with ``None``), ``"zero"`` (replacing them with zero-filled frame), or ``"skip"`` (skipping them).
-        If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of ``TFrameInfo`` single-element tuples
-        containing frame index; if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of frame infos in the format set by :meth:`.ICamera.set_frame_info_format`
+        (by default, ``TFrameInfo`` single-element tuples containing frame index); if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
         If ``fastbuff==False``, return a list of individual frames (2D numpy arrays).
         Otherwise, return a list of 'chunks', which are 3D numpy arrays containing several frames;
         in this case, if `return_info` is ``True``, then ``frame_info`` will automatically be in an ``"array"`` format, with the rows corresponding to the frames
         within the chunks, and the columns corresponding to the frames.
         Using ``fastbuff`` results in faster operation at high frame rates (>~1kFPS), at the expense of a more complicated frame processing in the following code.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are parsed directly (see :meth:`.ICamera.read_multiple_images`);
+        in this case, ``fastbuff`` is ignored.
         """
         funcargparse.check_parameter_range(missing_frame,"missing_frame",["none","zero","skip"])
+        if out is not None:
+            parsed_data,frame_info=self._read_multiple_images_out(out,rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
+            if parsed_data is None:
+                return (None,None) if return_info else None
+            parsed_data,frame_info=self._convert_frame_format(parsed_data,frame_info)
+            return (parsed_data,frame_info) if return_info else parsed_data
         if fastbuff and missing_frame=="none":
             raise ValueError("'none' missing frames mode is not supported if fastbuff==True")
         first_frame,skipped_frames,raw_data=self._read_multiple_images_raw(rng=rng,peek=peek)
@@ -587,7 +614,9 @@ class IMAQFrameGrabber(camera.IROICamera):
                     frame_info.append(np.arange(len(d))[:,None]+idx)
                     idx+=len(d)
             else:
-                frame_info=[self._TFrameInfo(first_frame+n) for n in range(len(parsed_data))]
+                nmissing=skipped_frames if missing_frame!="skip" else 0
+                frame_info=self._build_frame_info_array((first_frame,first_frame+len(parsed_data)),nmissing=nmissing)
+                frame_info=self._convert_frame_info_array(frame_info)
         if skipped_frames and missing_frame!="skip":
             if fastbuff: # only missing_frame=="zero" is possible
                 parsed_data=[np.zeros((skipped_frames,)+dim,dtype=dt)]+parsed_data
@@ -598,11 +627,27 @@ class IMAQFrameGrabber(camera.IROICamera):
                     parsed_data=list(np.zeros((skipped_frames,)+dim,dtype=dt))+parsed_data
                 else:
                     parsed_data=[None]*skipped_frames+parsed_data
-                if return_info:
-                    frame_info=[None]*skipped_frames+frame_info
         parsed_data,frame_info=self._convert_frame_format(parsed_data,frame_info)
         parsed_data=self._convert_indexing(parsed_data,"rct",axes=(-2,-1))
         return (parsed_data,frame_info) if return_info else parsed_data
+    def _read_multiple_images_view(self, rng=None, peek=False, return_info=False):
+        first_frame,_,raw_data=self._read_multiple_images_raw(rng=rng,peek=peek)
+        if raw_data is None:
+            return None,None,None
+        if not raw_data:
+            return (first_frame,first_frame),[],([] if return_info else None)
+        shape=self._get_data_dimensions_rc()
+        views=self._buffer_mgr.get_frames_views(first_frame,sum(n for n,_ in raw_data),self._get_buffer_dtype(),shape)
+        frames=[v for _,v in views]
+        frame_info=None
+        if return_info:
+            frame_info=[]
+            idx=first_frame
+            for n,_ in views:
+                frame_info.append(np.arange(n)[:,None]+idx)
+                idx+=n
+        nread=sum(n for n,_ in views)
+        return (first_frame,first_frame+nread),frames,frame_info
 
 
     def _get_grab_acquisition_parameters(self, nframes, buff_size):
@@ -1,10 +1,12 @@
 from ...core.devio import interface, comm_backend
 from ...core.devio.comm_backend import reraise
 from ...core.utils import general, funcargparse
+from . import daq_simulated
 
 import time
 import numpy as np
 import collections
+import threading
 
 class NIError(comm_backend.DeviceError):
     """Generic NI error"""
@@ -43,27 +45,106 @@ def list_devices():
     s=nidaqmx.system.System()
     return [get_device_info(d.name) for d in s.devices]
 
+
+
+class StreamBlockBuffer:
+    """
+    Set of preallocated buffers for the streamed data blocks.
+
+    The buffers are filled by the DAQmx every-N-samples callback and taken by the reading thread, which returns them after processing.
+    If all buffers are filled (i.e., the reading thread is lagging), the oldest unread block is dropped and its buffer is reused.
+    If none of the buffers are available (i.e., all of them are being processed by the reading thread), the new block is dropped;
+    it is then read into an additional scratch buffer, so that the data stream stays consistent.
+
+    Args:
+        nbuffers: number of buffers
+        block_size: number of samples per block
+        layout: list of tuples ``(shape, dtype)`` with the shapes and the dtypes of the arrays in each buffer
+            (one array for each read task; the last axis of each shape corresponds to the samples)
+    """
+    def __init__(self, nbuffers, block_size, layout):
+        self.block_size=block_size
+        self.buffers=[[np.zeros(shape,dtype=dtype) for shape,dtype in layout] for _ in range(nbuffers)]
+        self.scratch=[np.zeros(shape,dtype=dtype) for shape,dtype in layout]
+        self.free=collections.deque(range(nbuffers))
+        self.filled=collections.deque()
+        self.dropped=0
+        self._cond=threading.Condition()
+    def get_free(self):
+        """
+        Get index of a free buffer; if there are none, drop the oldest filled block and return its buffer.
+
+        If there are no filled blocks either (all buffers are taken by the reading thread), count the new block as dropped and return ``None``.
+        """
+        with self._cond:
+            if self.free:
+                return self.free.popleft()
+            self.dropped+=1
+            if self.filled:
+                return self.filled.popleft()[0]
+            return None
+    def put_filled(self, idx, start):
+        """Mark the buffer with the given index as filled with the block which starts at the given sample index"""
+        with self._cond:
+            self.filled.append((idx,start))
+            self._cond.notify_all()
+    def release(self, idx):
+        """Return the buffer with the given index to the free buffers"""
+        with self._cond:
+            self.free.append(idx)
+            self._cond.notify_all()
+    def notify(self):
+        """Wake up the threads waiting for the filled blocks"""
+        with self._cond:
+            self._cond.notify_all()
+    def get_filled(self, timeout=None, nmax=None, cond=None):
+        """
+        Wait until at least one filled block is available and return a list of tuples ``(idx, start)`` for the filled blocks (at most `nmax`).
+
+        `timeout` specifies the maximal waiting time (``None`` means wait indefinitely); if it has passed, return an empty list.
+        `cond` is an optional function which stops the waiting when it returns ``True``.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.filled or (cond is not None and cond()),timeout=timeout)
+            nmax=len(self.filled) if nmax is None else min(nmax,len(self.filled))
+            return [self.filled.popleft() for _ in range(nmax)]
+    def queued(self):
+        """Get the number of filled blocks"""
+        return len(self.filled)
+
+err_samples_not_available=-200279  # DAQmx error code raised when reading the samples which have already been overwritten
+TStreamStatus=collections.namedtuple("TStreamStatus",["read","queued","backlog","dropped","overflows","lost"])
+
 class NIDAQ(interface.IDevice):
     """
     National Instruments DAQ device interface (wrapper around nidaqmx library).
 
     Simplified interface to NI DAQ devices.
     Supports voltage, digital, and counter inputs (all synchronized to the same clock), and digital and voltage outputs (asynchronous).
+    The inputs can be either read on request (:meth:`read`), or continuously streamed in blocks (:meth:`start_streaming` and :meth:`read_stream`).
 
     Args:
         dev_name(str): root device name.
         rate(float): analog input sampling rate (can be adjusted later).
         buffer_size(int): size of the input buffer.
         reset(int): if ``True``, reset the device upon connection.
+        backend(str): DAQmx backend; can be ``"nidaqmx"`` (use the nidaqmx library and the actual hardware),
+            or ``"simulated"`` (use simulated tasks defined in :mod:`.daq_simulated`, which does not require the hardware or the library).
     """
     Error=NIError
     ReraiseError=NIDAQmxError
     BackendError=DaqError
-    def __init__(self, dev_name="dev0", rate=1E2, buffer_size=1E5, reset=False):
-        _check_nidaqmx()
+    def __init__(self, dev_name="dev0", rate=1E2, buffer_size=1E5, reset=False, backend="nidaqmx"):
+        funcargparse.check_parameter_range(backend,"backend",["nidaqmx","simulated"])
+        if backend=="nidaqmx":
+            _check_nidaqmx()
+            self._daqmx=nidaqmx
+        else:
+            self._daqmx=daq_simulated
+            self.BackendError=daq_simulated.DaqError
         super().__init__()
         self.dev_name=dev_name.strip("/")
-        self.dev=nidaqmx.system.Device(self.dev_name)
+        self.dev=self._daqmx.system.Device(self.dev_name)
         if reset:
             self.dev.reset_device()
         self.rate=rate
@@ -80,6 +161,7 @@ class NIDAQ(interface.IDevice):
         self.cpi_counter=0
         self.clk_channel_base=20E6
         self.max_ao_write_rate=1000 # maximal rate of repeating ao waveform with continuous repetition
+        self._stream_buffer=None
         self.open()
         self._add_info_variable("device_info",self.get_device_info)
         self._add_status_variable("input_channels",lambda: self.get_input_channels(include=("ai","ci","di","cpi")))
@@ -101,15 +183,17 @@ class NIDAQ(interface.IDevice):
     def open(self):
         if self.ai_task is not None:
             return
-        self.ai_task=nidaqmx.Task()
-        self.di_task=nidaqmx.Task()
-        self.do_task=nidaqmx.Task()
-        self.ao_task=nidaqmx.Task()
-        self.cpi_task=nidaqmx.Task()
+        self.ai_task=self._daqmx.Task()
+        self.di_task=self._daqmx.Task()
+        self.do_task=self._daqmx.Task()
+        self.ao_task=self._daqmx.Task()
+        self.cpi_task=self._daqmx.Task()
         self._update_channel_names()
         self._running=False
     @reraise
     def close(self):
+        if self._stream_buffer is not None:
+            self.stop_streaming()
         if self.ai_task is not None:
             self.ai_task.close()
         self.ai_task=None
@@ -147,7 +231,7 @@ class NIDAQ(interface.IDevice):
 
         Return tuple ``(name, model, serial)``.
         """
-        return get_device_info(self.dev_name)
+        return TDeviceInfo(self.dev.name,self.dev.product_type,"{:08X}".format(self.dev.dev_serial_num or 0))
 
     def _build_channel_name(self, channel):
         channel=channel.lower().strip("/")
@@ -173,13 +257,13 @@ class NIDAQ(interface.IDevice):
 
     @reraise
     def _cfg_clock(self, finite=None):
-        sample_mode=nidaqmx.constants.AcquisitionType.FINITE if finite else nidaqmx.constants.AcquisitionType.CONTINUOUS
+        sample_mode=self._daqmx.constants.AcquisitionType.FINITE if finite else self._daqmx.constants.AcquisitionType.CONTINUOUS
         samps_per_chan=finite if finite else int(self.buffer_size)
         samps_per_chan=max(samps_per_chan,2)
         if self.ai_task.ai_channels:
             self.ai_task.timing.cfg_samp_clk_timing(self.rate,source=self.clk_src or "",sample_mode=sample_mode,samps_per_chan=samps_per_chan)
         if self.di_task.di_channels:
-            self.di_task.timing.cfg_samp_clk_timing(self.rate,source="ai/SampleClock",sample_mode=nidaqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
+            self.di_task.timing.cfg_samp_clk_timing(self.rate,source="ai/SampleClock",sample_mode=self._daqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
     def setup_clock(self, rate, src=None):
         """
         Setup analog input clock (which is the main system clock).
@@ -205,7 +289,7 @@ class NIDAQ(interface.IDevice):
         Only terminal one can be active at a time.
          """
         terminal=self._strip_channel_name(terminal or "")
-        self.ai_task.export_signals.export_signal(nidaqmx.constants.Signal.SAMPLE_CLOCK,terminal)
+        self.ai_task.export_signals.export_signal(self._daqmx.constants.Signal.SAMPLE_CLOCK,terminal)
     @reraise
     def get_export_clock_terminal(self):
         """Return terminal which outputs system clock (``None`` if none is connected)"""
@@ -214,14 +298,12 @@ class NIDAQ(interface.IDevice):
         term=self.ai_task.export_signals.samp_clk_output_term
         return self._strip_channel_name(term) if term else None
 
-    if nidaqmx is not None:
-        _voltage_input_terminal_cfgs={  "default":nidaqmx.constants.TerminalConfiguration.DEFAULT,
-                                        "rse":nidaqmx.constants.TerminalConfiguration.RSE,
-                                        "nrse":nidaqmx.constants.TerminalConfiguration.NRSE,
-                                        "diff":nidaqmx.constants.TerminalConfiguration.DIFFERENTIAL,
-                                        "pseudodiff":nidaqmx.constants.TerminalConfiguration.PSEUDODIFFERENTIAL}
-    else:
-        _voltage_input_terminal_cfgs={}
+    _terminal_cfg_constants=(nidaqmx or daq_simulated).constants.TerminalConfiguration
+    _voltage_input_terminal_cfgs={  "default":_terminal_cfg_constants.DEFAULT,
+                                    "rse":_terminal_cfg_constants.RSE,
+                                    "nrse":_terminal_cfg_constants.NRSE,
+                                    "diff":_terminal_cfg_constants.DIFFERENTIAL,
+                                    "pseudodiff":_terminal_cfg_constants.PSEUDODIFFERENTIAL}
     _p_voltage_input_terminal_cfg=interface.EnumParameterClass("voltage_input_terminal_cfg",_voltage_input_terminal_cfgs)
     @reraise
     @interface.use_parameters(terminal_cfg="voltage_input_terminal_cfg")
@@ -265,12 +347,12 @@ class NIDAQ(interface.IDevice):
         """
         if name in self.ci_tasks:
             self.ci_tasks[name][0].close()
-        task=nidaqmx.Task()
+        task=self._daqmx.Task()
         counter=self._build_channel_name(counter)
         terminal=self._build_channel_name(terminal)
         ch=task.ci_channels.add_ci_count_edges_chan(counter)
         ch.ci_count_edges_term=terminal
-        task.timing.cfg_samp_clk_timing(self.rate,self._build_channel_name(clk_src),sample_mode=nidaqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
+        task.timing.cfg_samp_clk_timing(self.rate,self._build_channel_name(clk_src),sample_mode=self._daqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
         self.ci_tasks[name]=(task,len(self.ci_tasks),output_format)
         self._update_channel_names()
     @reraise
@@ -290,10 +372,10 @@ class NIDAQ(interface.IDevice):
         counter=self._build_channel_name(counter)
         if self.cpi_task.ci_channels:
             self.cpi_task.close()
-            self.cpi_task=nidaqmx.Task()
+            self.cpi_task=self._daqmx.Task()
         ch=self.cpi_task.ci_channels.add_ci_count_edges_chan(counter)
         ch.ci_count_edges_term="20MHzTimebase"
-        self.cpi_task.timing.cfg_samp_clk_timing(self.rate,self._build_channel_name(clk_src),sample_mode=nidaqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
+        self.cpi_task.timing.cfg_samp_clk_timing(self.rate,self._build_channel_name(clk_src),sample_mode=self._daqmx.constants.AcquisitionType.CONTINUOUS,samps_per_chan=int(self.buffer_size))
     @reraise
     def add_digital_input(self, name, channel):
         """
@@ -374,7 +456,9 @@ class NIDAQ(interface.IDevice):
             self.read(flush_read)
     @reraise
     def stop(self):
-        """Stop the sampling task"""
+        """Stop the sampling task (including streaming)"""
+        if self._stream_buffer is not None:
+            return self.stop_streaming()
         self.ai_task.stop()
         self.di_task.stop()
         for cit in self.ci_tasks:
@@ -430,6 +514,8 @@ class NIDAQ(interface.IDevice):
         Returns:
             2D numpy array of values arranged according to :meth:`get_input_channels` order with the given `include` parameter.
         """
+        if self._stream_buffer is not None:
+            raise NIError("can not read samples while streaming; use read_stream instead")
         running=True
         if not self._running:
             running=False
@@ -441,34 +527,170 @@ class NIDAQ(interface.IDevice):
             if len(self.ai_task.ai_channels)==1:
                 ais=[ais]
             cis=[np.array(self.ci_tasks[ci][0].read(n),dtype="u4") for ci in self.ci_names]
-            if self.cpi_task.ci_channels:
-                clk_counts=np.array(self.cpi_task.read(n),dtype="u4")
-                last_cnt=clk_counts[-1]
-                clk_counts[1:]-=clk_counts[:-1]
-                clk_counts[0]=(int(clk_counts[0])-self.cpi_counter)%int(2**32)
-                self.cpi_counter=int(last_cnt)
-                clk_periods=clk_counts/self.clk_channel_base
-            else:
-                clk_periods=np.repeat(1./self.rate,n) if ("cpi" in include) else 1./self.rate
-            if "ci" in include:
-                for i,ci in enumerate(self.ci_names):
-                    if self.ci_tasks[ci][2]!="acc":
-                        last_cnt=cis[i][-1]
-                        cis[i][1:]-=cis[i][:-1]
-                        cis[i][0]=(int(cis[i][0])-self.ci_counters[ci])%int(2**32)
-                        self.ci_counters[ci]=int(last_cnt)
-                        if self.ci_tasks[ci][2]=="rate":
-                            cis[i]=cis[i]/clk_periods
+            clk_counts=np.array(self.cpi_task.read(n),dtype="u4") if self.cpi_task.ci_channels else None
             if self.di_task.di_channels:
                 dis=self.di_task.read(n)
                 if len(self.di_task.di_channels)==1:
                     dis=[dis]
             else:
                 dis=[]
-            return np.column_stack((ais if "ai" in include else [])+(cis if "ci" in include else [])+(dis if "di" in include else [])+([clk_periods] if "cpi" in include else []))
+            return np.column_stack(self._build_input_columns(n,ais,cis,clk_counts,dis,include))
         finally:
             if not running:
                 self.stop()
+    @staticmethod
+    def _diff_counts(counts, last):
+        """Convert accumulated counts into counts per sample given the `last` count before them; return the result and the new last count"""
+        if not len(counts):
+            return counts,last
+        return np.diff(np.concatenate([np.array([last],dtype=counts.dtype),counts])),int(counts[-1])
+    def _build_input_columns(self, n, ais, cis, clk_counts, dis, include):
+        """Build the list of output columns from the raw read values (using and updating the stored counter values)"""
+        if clk_counts is not None:
+            clk_counts,self.cpi_counter=self._diff_counts(clk_counts,self.cpi_counter)
+            clk_periods=clk_counts/self.clk_channel_base
+        else:
+            clk_periods=np.repeat(1./self.rate,n) if ("cpi" in include) else 1./self.rate
+        if "ci" in include:
+            cis=list(cis)
+            for i,ci in enumerate(self.ci_names):
+                if self.ci_tasks[ci][2]!="acc":
+                    cis[i],self.ci_counters[ci]=self._diff_counts(cis[i],self.ci_counters[ci])
+                    if self.ci_tasks[ci][2]=="rate":
+                        cis[i]=cis[i]/clk_periods
+        return (list(ais) if "ai" in include else [])+(cis if "ci" in include else [])+(list(dis) if "di" in include else [])+([clk_periods] if "cpi" in include else [])
+
+    @reraise
+    def start_streaming(self, block_size=None, nbuffers=2, include=("ai","ci","di")):
+        """
+        Start continuous hardware-timed streaming of the input channels.
+
+        The samples are read in blocks of `block_size` samples (by default, corresponding to about 50ms) by the DAQmx every-N-samples callback
+        directly into one of `nbuffers` preallocated buffers (double buffering by default), and can be obtained using :meth:`read_stream`.
+        If the buffers are not read fast enough, the oldest unread blocks are dropped; if the callback can not keep up with the acquisition (hardware buffer overflow),
+        the acquisition is restarted on the first :meth:`read_stream` call after all blocks acquired before the overflow have been read.
+        Both cases are reported in :meth:`get_stream_status`.
+        Requires at least one voltage input channel, since its task drives the streaming; the input buffer size should be at least two blocks.
+        `include` specifies which channel types to include into the returned data (same as in :meth:`read`).
+        """
+        if not self.ai_task.ai_channels:
+            raise NIError("streaming requires at least one voltage input channel")
+        block_size=int(block_size or max(self.rate*0.05,1))
+        if 2*block_size>self.buffer_size:
+            raise ValueError("block size {} is too large for the input buffer size {}".format(block_size,self.buffer_size))
+        self.stop()
+        readers=self._daqmx.stream_readers
+        self._stream_readers=[readers.AnalogMultiChannelReader(self.ai_task.in_stream).read_many_sample]
+        layout=[((len(self.ai_names),block_size),"f8")]
+        for ci in self.ci_names:
+            self._stream_readers.append(readers.CounterReader(self.ci_tasks[ci][0].in_stream).read_many_sample_uint32)
+            layout.append(((block_size,),"u4"))
+        if self.cpi_task.ci_channels:
+            self._stream_readers.append(readers.CounterReader(self.cpi_task.in_stream).read_many_sample_uint32)
+            layout.append(((block_size,),"u4"))
+        if self.di_task.di_channels:
+            self._stream_readers.append(readers.DigitalMultiChannelReader(self.di_task.in_stream).read_many_sample_port_uint32)
+            layout.append(((len(self.di_names),block_size),"u4"))
+        self._stream_include=include
+        self._stream_next=0
+        self._stream_error=None
+        self._stream_backlog=0
+        self._stream_read=0
+        self._stream_overflows=0
+        self._stream_lost=0
+        self.ai_task.register_every_n_samples_acquired_into_buffer_event(block_size,self._stream_callback)
+        self._stream_buffer=StreamBlockBuffer(nbuffers,block_size,layout)
+        self.start()
+    @reraise
+    def stop_streaming(self):
+        """Stop the streaming and discard all unread data"""
+        buffer,self._stream_buffer=self._stream_buffer,None
+        if buffer is None:
+            return
+        self.stop()
+        self.ai_task.register_every_n_samples_acquired_into_buffer_event(buffer.block_size,None)
+    def is_streaming(self):
+        """Check if the streaming is running"""
+        return self._stream_buffer is not None
+    def _stream_callback(self, task_handle, event_type, nsamples, callback_data):  # pylint: disable=unused-argument
+        buffer=self._stream_buffer
+        if buffer is None or self._stream_error is not None:
+            return 0
+        idx=buffer.get_free()
+        try:
+            for read,dst in zip(self._stream_readers,buffer.scratch if idx is None else buffer.buffers[idx]):  # dropped block is still read to keep the sample count
+                read(dst,nsamples,timeout=max(1.,2*nsamples/self.rate))
+            self._stream_backlog=self.ai_task.in_stream.avail_samp_per_chan
+        except self.BackendError as err:  # pylint: disable=catching-non-exception
+            if idx is not None:
+                buffer.release(idx)
+            if self._running:
+                self._stream_error=err
+                buffer.notify()
+            return 0
+        if idx is not None:
+            buffer.put_filled(idx,self._stream_next)
+        self._stream_next+=nsamples
+        return 0
+    def _restart_streaming(self):
+        """Restart the streaming after the hardware buffer overflow"""
+        err,self._stream_error=self._stream_error,None
+        if getattr(err,"error_code",None)!=err_samples_not_available:
+            self.stop_streaming()
+            raise err
+        acquired=self.ai_task.in_stream.total_samp_per_chan_acquired
+        buffer,self._stream_buffer=self._stream_buffer,None
+        self.stop()
+        self._stream_overflows+=1
+        self._stream_lost+=max(acquired-self._stream_next,0)
+        self._stream_next=max(acquired,self._stream_next)
+        self._stream_error=None
+        self._stream_buffer=buffer
+        self.start()
+    @reraise
+    def read_stream(self, timeout=None, max_blocks=None):
+        """
+        Read the streamed data blocks.
+
+        Wait until at least one block is available (at most `timeout` seconds; ``None`` means wait indefinitely),
+        and return all available blocks (at most `max_blocks`) combined together.
+        Return tuple ``(indices, columns)``, where ``indices`` is an integer array of sample indices since the streaming start
+        (increasing, but can have gaps if some samples were lost), and ``columns`` is a list of 1D arrays
+        arranged according to :meth:`get_input_channels` order with the `include` parameter supplied to :meth:`start_streaming`.
+        If no data is available, return empty arrays.
+        """
+        buffer=self._stream_buffer
+        if buffer is None:
+            raise NIError("streaming is not running")
+        if self._stream_error is not None and not buffer.queued(): # read the blocks acquired before the error first, since the restart resets the counters
+            self._restart_streaming()
+        blocks=buffer.get_filled(timeout=timeout,nmax=max_blocks,cond=lambda: self._stream_error is not None)
+        if not blocks and self._stream_error is not None:
+            self._restart_streaming()
+        bs=buffer.block_size
+        indices=(np.array([start for _,start in blocks],dtype="i8")[:,None]+np.arange(bs)).ravel()
+        parts=[buffer.buffers[idx] for idx,_ in blocks] or [[b[...,:0] for b in buffer.buffers[0]]]
+        raw=[np.concatenate([p[i] for p in parts],axis=-1) for i in range(len(self._stream_readers))]
+        for idx,_ in blocks:
+            buffer.release(idx)
+        self._stream_read+=len(indices)
+        ais,cis=raw[0],raw[1:1+len(self.ci_names)]
+        clk_counts=raw[1+len(self.ci_names)] if self.cpi_task.ci_channels else None
+        dis=raw[-1]!=0 if self.di_task.di_channels else []
+        return indices,self._build_input_columns(len(indices),ais,cis,clk_counts,dis,self._stream_include)
+    def get_stream_status(self):
+        """
+        Get the streaming status.
+
+        Return tuple ``(read, queued, backlog, dropped, overflows, lost)`` with the total number of samples returned by :meth:`read_stream`,
+        the number of filled blocks waiting to be read, the number of samples waiting in the hardware buffer at the last block readout,
+        the number of samples dropped because the blocks were not read in time, the number of hardware buffer overflows,
+        and the number of samples lost because of these overflows.
+        """
+        buffer=self._stream_buffer
+        if buffer is None:
+            return TStreamStatus(0,0,0,0,0,0)
+        return TStreamStatus(self._stream_read,buffer.queued(),self._stream_backlog,buffer.dropped*buffer.block_size,self._stream_overflows,self._stream_lost)
 
     @reraise
     def add_digital_output(self, name, channel):
@@ -589,7 +811,7 @@ class NIDAQ(interface.IDevice):
                 raise ValueError("channel '{}' doesn't exist".format(n))
         for n,v in zip(names,values):
             self.ao_values[n]=v
-        waveform_output=self.ao_task.timing.samp_timing_type!=nidaqmx.constants.SampleTimingType.ON_DEMAND
+        waveform_output=self.ao_task.timing.samp_timing_type!=self._daqmx.constants.SampleTimingType.ON_DEMAND
         if waveform_output:
             self.ao_task.stop()
         val=[self.ao_values[ch.name] for ch in self.ao_task.ao_channels]
@@ -606,16 +828,16 @@ class NIDAQ(interface.IDevice):
             elif val.shape[1]<min_out_len:
                 nreps=min_out_len//val.shape[1]+1
                 val=np.concatenate([val]*nreps,axis=1)
-            if self.ao_task.timing.samp_quant_samp_mode==nidaqmx.constants.AcquisitionType.FINITE:
+            if self.ao_task.timing.samp_quant_samp_mode==self._daqmx.constants.AcquisitionType.FINITE:
                 max_out_len=self.ao_task.timing.samp_quant_samp_per_chan
                 val=val[:,:max_out_len]
         elif (not waveform_output) and val.ndim==2:
             val=val[:,0]
         val=np.require(val,requirements=["C","W"])
         if len(val)==1:
-            self.ao_task.write(val[0],auto_start=True if waveform_output else nidaqmx.task.AUTO_START_UNSET)
+            self.ao_task.write(val[0],auto_start=True if waveform_output else self._daqmx.task.AUTO_START_UNSET)
         else:
-            self.ao_task.write(val,auto_start=True if waveform_output else nidaqmx.task.AUTO_START_UNSET)
+            self.ao_task.write(val,auto_start=True if waveform_output else self._daqmx.task.AUTO_START_UNSET)
     def get_voltage_outputs(self, names=None):
         """
         Get values of one or several analog voltage outputs.
@@ -648,14 +870,14 @@ class NIDAQ(interface.IDevice):
         if not len(self.ao_task.ao_channels):
             return
         self.ao_task.stop()
-        sample_mode=nidaqmx.constants.AcquisitionType.CONTINUOUS if continuous else nidaqmx.constants.AcquisitionType.FINITE
+        sample_mode=self._daqmx.constants.AcquisitionType.CONTINUOUS if continuous else self._daqmx.constants.AcquisitionType.FINITE
         if rate==0 and not sync_with_ai:
-            self.ao_task.timing.samp_timing_type=nidaqmx.constants.SampleTimingType.ON_DEMAND
+            self.ao_task.timing.samp_timing_type=self._daqmx.constants.SampleTimingType.ON_DEMAND
         elif sync_with_ai:
             self.ao_task.timing.cfg_samp_clk_timing(self.rate,source="ai/SampleClock",samps_per_chan=int(samps_per_chan),sample_mode=sample_mode)
         else:
             self.ao_task.timing.cfg_samp_clk_timing(rate,source="",samps_per_chan=int(samps_per_chan),sample_mode=sample_mode)
-        if self.ao_task.timing.samp_timing_type!=nidaqmx.constants.SampleTimingType.ON_DEMAND:
+        if self.ao_task.timing.samp_timing_type!=self._daqmx.constants.SampleTimingType.ON_DEMAND:
             if continuous:
                 self.set_voltage_outputs(self.ao_names,[self.ao_values[n] for n in self.ao_names])
     @reraise
@@ -665,10 +887,10 @@ class NIDAQ(interface.IDevice):
 
         Return tuple ``(rate, sync_with_ai, continuous, samps_per_chan)``.
         """
-        if (not self.ao_channels) or self.ao_task.timing.samp_timing_type==nidaqmx.constants.SampleTimingType.ON_DEMAND:
+        if (not self.ao_channels) or self.ao_task.timing.samp_timing_type==self._daqmx.constants.SampleTimingType.ON_DEMAND:
             return (0,False,1000,True)
         sync_with_ai=self.ao_task.timing.samp_clk_src.endswith("ai/SampleClock")
         rate=self.ao_task.timing.samp_clk_rate
         samps_per_chan=self.ao_task.timing.samp_quant_samp_per_chan
-        continuous=self.ao_task.timing.samp_quant_samp_mode!=nidaqmx.constants.AcquisitionType.FINITE
+        continuous=self.ao_task.timing.samp_quant_samp_mode!=self._daqmx.constants.AcquisitionType.FINITE
         return (rate,sync_with_ai,continuous,samps_per_chan)
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""
+Simulated NI DAQmx backend.
+
+Mimics the subset of the ``nidaqmx`` package interface used by :class:`.NIDAQ` (tasks, channels, sample clock timing, stream readers, and every-N-samples events),
+so that the DAQ code can be used and tested without the hardware or the NI-DAQmx driver (use ``backend="simulated"`` when creating :class:`.NIDAQ`).
+The samples are generated on the fly based on the time passed since the sample clock start:
+voltage inputs produce sine waves with some noise, counter inputs count edges at a constant rate, and digital inputs produce square waves.
+Tasks clocked by ``"ai/SampleClock"`` follow the analog input clock of the same device.
+"""
+
+import enum
+import types
+import threading
+import itertools
+import time
+import numpy as np
+
+
+class DaqError(Exception):
+    """Simulated DAQmx error"""
+    def __init__(self, message, error_code, task_name=""):
+        super().__init__("{} (error code {})".format(message,error_code))
+        self.error_code=error_code
+        self.task_name=task_name
+
+READ_ALL_AVAILABLE=-1
+err_samples_not_available=-200279
+err_timeout=-200284
+err_task_running=-200479
+
+class AcquisitionType(enum.Enum):
+    FINITE=10178
+    CONTINUOUS=10123
+class TerminalConfiguration(enum.Enum):
+    DEFAULT=-1
+    RSE=10083
+    NRSE=10078
+    DIFFERENTIAL=10106
+    PSEUDODIFFERENTIAL=12529
+class Signal(enum.Enum):
+    SAMPLE_CLOCK=12487
+class SampleTimingType(enum.Enum):
+    SAMPLE_CLOCK=10388
+    ON_DEMAND=10390
+class EveryNSamplesEventType(enum.Enum):
+    ACQUIRED_INTO_BUFFER=1
+constants=types.SimpleNamespace(READ_ALL_AVAILABLE=READ_ALL_AVAILABLE,AcquisitionType=AcquisitionType,TerminalConfiguration=TerminalConfiguration,
+    Signal=Signal,SampleTimingType=SampleTimingType,EveryNSamplesEventType=EveryNSamplesEventType)
+task=types.SimpleNamespace(AUTO_START_UNSET=None)
+
+
+
+
+class Device:
+    """Simulated DAQ device"""
+    def __init__(self, name):
+        self.name=name
+        self.product_type="Simulated DAQ"
+        self.dev_serial_num=0
+    def reset_device(self):
+        _get_clock(self.name).reset()
+class System:
+    """Simulated DAQmx system"""
+    @property
+    def devices(self):
+        return [Device(n) for n in sorted(_clocks)] or [Device("dev0")]
+system=types.SimpleNamespace(Device=Device,System=System)
+
+
+
+class SampleClock:
+    """Simulated device analog input sample clock; keeps track of the number of ticks while it is running"""
+    def __init__(self):
+        self.reset()
+    def reset(self):
+        """Reset the clock"""
+        self.rate=None
+        self.t0=None
+        self.nmax=None
+        self.ticks0=0
+    def start(self, rate, nmax=None):
+        """Start the clock with the given rate; if `nmax` is not ``None``, it specifies the number of ticks before the clock stops"""
+        self.ticks0=self.ticks()
+        self.rate=rate
+        self.nmax=nmax
+        self.t0=time.perf_counter()
+    def stop(self):
+        """Stop the clock"""
+        self.ticks0=self.ticks()
+        self.t0=None
+    def ticks(self):
+        """Get the total number of ticks"""
+        if self.t0 is None:
+            return self.ticks0
+        n=int((time.perf_counter()-self.t0)*self.rate)
+        return self.ticks0+(n if self.nmax is None else min(n,self.nmax))
+    def wait_time(self, ticks):
+        """Get the time until the clock reaches the given number of ticks (``None`` if it never happens)"""
+        if self.t0 is None or (self.nmax is not None and ticks>self.ticks0+self.nmax):
+            return None
+        return max(self.t0+(ticks-self.ticks0)/self.rate-time.perf_counter(),0)
+_clocks={}
+_clocks_lock=threading.Lock()
+def _get_clock(dev_name):
+    with _clocks_lock:
+        return _clocks.setdefault(dev_name.strip("/").lower(),SampleClock())
+
+
+
+
+class Channel:
+    """Simulated task channel"""
+    def __init__(self, kind, physical_channel, name, idx, **kwargs):
+        self.kind=kind
+        self.physical_channel=types.SimpleNamespace(name=physical_channel.strip("/"))
+        self.name=name or self.physical_channel.name
+        self.idx=idx
+        for k,v in kwargs.items():
+            setattr(self,k,v)
+class ChannelCollection:
+    """Simulated task channel collection"""
+    def __init__(self, parent):
+        self.parent=parent
+        self._channels=[]
+    def __len__(self):
+        return len(self._channels)
+    def __iter__(self):
+        return iter(self._channels)
+    def __getitem__(self, idx):
+        return self._channels[idx]
+    def _add(self, kind, physical_channel, name, **kwargs):
+        ch=Channel(kind,physical_channel,name,len(self.parent._all_channels()),**kwargs)
+        self._channels.append(ch)
+        self.parent._dev_name=self.parent._dev_name or ch.physical_channel.name.split("/")[0]
+        return ch
+    def add_ai_voltage_chan(self, physical_channel, name_to_assign_to_channel="", terminal_config=TerminalConfiguration.DEFAULT, min_val=-5., max_val=5.):
+        return self._add("ai",physical_channel,name_to_assign_to_channel,ai_term_cfg=terminal_config,ai_min=min_val,ai_max=max_val)
+    def add_ci_count_edges_chan(self, counter, name_to_assign_to_channel=""):
+        return self._add("ci",counter,name_to_assign_to_channel,ci_count_edges_term="")
+    def add_di_chan(self, lines, name_to_assign_to_lines=""):
+        return self._add("di",lines,name_to_assign_to_lines)
+    def add_do_chan(self, lines, name_to_assign_to_lines=""):
+        return self._add("do",lines,name_to_assign_to_lines)
+    def add_ao_voltage_chan(self, physical_channel, name_to_assign_to_channel="", min_val=-10., max_val=10.):
+        return self._add("ao",physical_channel,name_to_assign_to_channel,ao_min=min_val,ao_max=max_val)
+
+class Timing:
+    """Simulated task timing configuration"""
+    def __init__(self):
+        self.samp_timing_type=SampleTimingType.ON_DEMAND
+        self.samp_clk_rate=1E3
+        self.samp_clk_src=""
+        self.samp_quant_samp_mode=AcquisitionType.FINITE
+        self.samp_quant_samp_per_chan=1000
+    def cfg_samp_clk_timing(self, rate, source="", active_edge=None, sample_mode=AcquisitionType.FINITE, samps_per_chan=1000):  # pylint: disable=unused-argument
+        self.samp_timing_type=SampleTimingType.SAMPLE_CLOCK
+        self.samp_clk_rate=rate
+        self.samp_clk_src=source
+        self.samp_quant_samp_mode=sample_mode
+        self.samp_quant_samp_per_chan=samps_per_chan
+class ExportSignals:
+    """Simulated task exported signals configuration"""
+    def __init__(self):
+        self.samp_clk_output_term=""
+    def export_signal(self, signal_id, output_terminal):  # pylint: disable=unused-argument
+        self.samp_clk_output_term=output_terminal
+
+class InStream:
+    """Simulated task input stream; generates the samples on read"""
+    def __init__(self, task):  # pylint: disable=redefined-outer-name
+        self._task=task
+    @property
+    def input_buf_size(self):
+        return self._task._buf_size
+    @property
+    def total_samp_per_chan_acquired(self):
+        return self._task._acquired()
+    @property
+    def curr_read_pos(self):
+        return self._task._read_pos
+    @property
+    def avail_samp_per_chan(self):
+        return max(self._task._acquired()-self._task._read_pos,0)
+    def _read(self, n, timeout, out=None):
+        """Read `n` samples (all available if ``n==-1``) for all channels into a 2D array `out` (create a new one if ``None``); return the number of read samples"""
+        t=self._task
+        if not t._running:
+            raise DaqError("task is not running",-200983,t.name)
+        if n==READ_ALL_AVAILABLE:
+            n=self.avail_samp_per_chan
+            if out is not None:
+                n=min(n,out.shape[-1])
+        deadline=time.perf_counter()+timeout
+        while True:
+            avail=self.avail_samp_per_chan
+            if avail>t._buf_size:
+                raise DaqError("attempted to read samples that are no longer available; the application is not able to keep up with the hardware acquisition",
+                    err_samples_not_available,t.name)
+            if avail>=n:
+                break
+            wait=t._clock.wait_time(t._read_pos+n+t._ticks_start)
+            if wait is None or time.perf_counter()+wait>deadline:
+                raise DaqError("wait until done did not indicate all samples were acquired",err_timeout,t.name)
+            time.sleep(wait+1E-4)
+        values=t._generate(t._read_pos,n)
+        t._read_pos+=n
+        if out is None:
+            return values
+        out[...,:n]=values.reshape(out[...,:n].shape)
+        return n
+
+
+
+class Task:
+    """Simulated DAQmx task"""
+    _handles=itertools.count(1)
+    def __init__(self, new_task_name=""):
+        self.name=new_task_name
+        self._handle=next(self._handles)
+        self.ai_channels=ChannelCollection(self)
+        self.ci_channels=ChannelCollection(self)
+        self.di_channels=ChannelCollection(self)
+        self.do_channels=ChannelCollection(self)
+        self.ao_channels=ChannelCollection(self)
+        self.timing=Timing()
+        self.export_signals=ExportSignals()
+        self.in_stream=InStream(self)
+        self._dev_name=None
+        self._clock=None
+        self._own_clock=False
+        self._running=False
+        self._ticks_start=0
+        self._read_pos=0
+        self._buf_size=0
+        self._values=None
+        self._every_n=None
+        self._every_n_thread=None
+        self._random=np.random.RandomState(self._handle)
+    def _all_channels(self):
+        return list(self.ai_channels)+list(self.ci_channels)+list(self.di_channels)+list(self.do_channels)+list(self.ao_channels)
+    def _acquired(self):
+        if not self._running:
+            return self._read_pos
+        return self._clock.ticks()-self._ticks_start
+
+    def _generate(self, start, n):
+        idx=np.arange(start,start+n)
+        values=[]
+        rate=self.timing.samp_clk_rate or 1.
+        for i,ch in enumerate(self._all_channels()):
+            if ch.kind=="ai":
+                center,ampl=(ch.ai_max+ch.ai_min)/2,(ch.ai_max-ch.ai_min)/2
+                v=center+ampl*(0.8*np.sin(2*np.pi*idx/(50.*(i+1))+i)+0.01*self._random.randn(n))
+            elif ch.kind=="ci":
+                edge_rate=20E6 if ch.ci_count_edges_term.lower().endswith("20mhztimebase") else 1E3*(i+1)
+                v=(np.floor(idx*(edge_rate/rate)).astype("i8")%2**32).astype("u4")
+            elif ch.kind=="di":
+                v=(idx//(16<<i))%2>0
+            else:
+                continue
+            values.append(v)
+        return np.array(values) if len(values)>1 else values[0]
+    def start(self):
+        if self._running:
+            return
+        if self.timing.samp_timing_type==SampleTimingType.SAMPLE_CLOCK:
+            self._clock=_get_clock(self._dev_name or "dev0")
+            self._own_clock=not self.timing.samp_clk_src.lower().endswith("ai/sampleclock")
+            finite=self.timing.samp_quant_samp_mode==AcquisitionType.FINITE
+            self._buf_size=int(self.timing.samp_quant_samp_per_chan)
+            if self._own_clock:
+                self._clock.start(self.timing.samp_clk_rate,self._buf_size if finite else None)
+            self._ticks_start=self._clock.ticks()
+            self._read_pos=0
+        self._running=True
+        if self._every_n is not None:
+            self._every_n_thread=threading.Thread(target=self._every_n_loop,args=(self._every_n,),daemon=True)
+            self._every_n_thread.start()
+    def stop(self):
+        if not self._running:
+            return
+        self._running=False
+        if self._own_clock:
+            self._clock.stop()
+        if self._every_n_thread is not None and self._every_n_thread is not threading.current_thread():
+            self._every_n_thread.join()
+        self._every_n_thread=None
+    def close(self):
+        self.stop()
+    def register_every_n_samples_acquired_into_buffer_event(self, sample_interval, callback_method):
+        """Register a callback called in a separate thread every time `sample_interval` new samples are acquired (``None`` to unregister)"""
+        if self._running:
+            raise DaqError("specified operation cannot be performed while the task is running",err_task_running,self.name)
+        self._every_n=None if callback_method is None else (sample_interval,callback_method)
+    def _every_n_loop(self, every_n):
+        nsamp,callback=every_n
+        nev=1
+        while self._running:
+            wait=self._clock.wait_time(self._ticks_start+nev*nsamp)
+            if wait is None:
+                break
+            if wait>0:
+                time.sleep(min(wait,0.05))
+                continue
+            callback(self._handle,EveryNSamplesEventType.ACQUIRED_INTO_BUFFER.value,nsamp,None)
+            nev+=1
+
+    def read(self, number_of_samples_per_channel=None, timeout=10.):
+        if self.do_channels or self.ao_channels:
+            values=self._values if self._values is not None else [0]*len(self._all_channels())
+            return values[0] if len(values)==1 else list(values)
+        values=self.in_stream._read(1 if number_of_samples_per_channel is None else number_of_samples_per_channel,timeout)
+        if number_of_samples_per_channel is None:
+            values=values[...,0]
+        return values.tolist()
+    def write(self, data, auto_start=None, timeout=10.):  # pylint: disable=unused-argument
+        data=np.asarray(data)
+        if len(self._all_channels())==1:
+            data=data[None]
+        self._values=[d if np.ndim(d)==0 else d[-1] for d in data]
+        return data.shape[-1] if data.ndim>1 else 1
+
+
+
+class AnalogMultiChannelReader:
+    """Simulated multi-channel analog input reader"""
+    def __init__(self, task_in_stream):
+        self._in_stream=task_in_stream
+    def read_many_sample(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE, timeout=10.):
+        return self._in_stream._read(number_of_samples_per_channel,timeout,out=data)
+class CounterReader:
+    """Simulated counter input reader"""
+    def __init__(self, task_in_stream):
+        self._in_stream=task_in_stream
+    def read_many_sample_uint32(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE, timeout=10.):
+        return self._in_stream._read(number_of_samples_per_channel,timeout,out=data)
+class DigitalMultiChannelReader:
+    """Simulated multi-channel digital input reader"""
+    def __init__(self, task_in_stream):
+        self._in_stream=task_in_stream
+    def read_many_sample_port_uint32(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE, timeout=10.):
+        return self._in_stream._read(number_of_samples_per_channel,timeout,out=data)
+stream_readers=types.SimpleNamespace(AnalogMultiChannelReader=AnalogMultiChannelReader,CounterReader=CounterReader,DigitalMultiChannelReader=DigitalMultiChannelReader)
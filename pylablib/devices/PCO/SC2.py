@@ -101,6 +101,7 @@ class PCOSC2Camera(camera.IBinROICamera, camera.IExposureCamera):
     TimeoutError=PCOSC2TimeoutError
     _TFrameInfo=TFrameInfo
     _frameinfo_fields=TFrameInfo._fields
+    _frameinfo_field_dtypes={"frame_index":"<i8","raw_metadata":"O"}
     def __init__(self, idx=0, cam_interface=None, reboot_on_fail=True):
         super().__init__()
         lib.initlib()
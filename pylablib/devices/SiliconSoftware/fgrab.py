@@ -267,6 +267,7 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
     TimeoutError=SiliconSoftwareTimeoutError
     _TFrameInfo=TFrameInfo
     _frameinfo_fields=TFrameInfo._fields
+    _frameinfo_field_dtypes={"frame_index":"<i8","framestamp":"<i8","timestamp":"<i8","timestamp_long":"<i8"}
     _adjustable_frameinfo_period=True
     def __init__(self, siso_board=0, siso_applet="DualAreaGray16", siso_port=0, siso_detector_size=None, do_open=True, **kwargs):
         super().__init__(**kwargs)
@@ -560,12 +561,12 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
         roi=self.get_grabber_roi()
         w,h=roi[1]-roi[0],roi[3]-roi[2]
         return w*h*bpp*self._frame_merge
-    def _parse_buffer(self, buffer, nframes=1):
+    def _parse_buffer(self, buffer, nframes=1, copy=True):
         r,c=self._get_data_dimensions_rc()
         dt=self._get_buffer_dtype()
         cdt=ctypes.POINTER(np.ctypeslib.as_ctypes_type(dt))
         data=np.ctypeslib.as_array(ctypes.cast(buffer,cdt),shape=((nframes*self._frame_merge,r,c)))
-        return data.copy()
+        return data.copy() if copy else data
     def _trim_images_range(self, rng):
         acquired_frames=self._get_acquired_frames()
         if acquired_frames is None:
@@ -610,14 +611,33 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
             if return_info=="chunks":
                 frame_info=[frame_info[:,i:i+n].T for i,n in zip(chidx-chidx[0],chn)]
             else:
-                frame_info=list(frame_info.T)
+                frame_info=self._build_frame_info_array((frng.start,frng.stop),**dict(zip(self._frameinfo_fields,frame_info)))
         else:
             frame_info=None
         if not peek:
             self._frame_counter.advance_read_frames(rng)
         return rng[0],skipped_frames,raw_frames,frame_info
     
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, fastbuff=False):  # pylint: disable=arguments-differ
+    def _read_multiple_images_out(self, out, rng=None, peek=False, missing_frame="skip", return_info=False):
+        """Read multiple images directly into the `out` array; return tuple ``(frames, infos)`` with the filled part of `out` and the frame info list"""
+        trimmed=self._trim_images_range(rng) if self._buffer_mgr else None
+        if trimmed is None:
+            return None,None
+        rng,skipped_frames=self._fit_images_range(*trimmed,len(out),missing_frame=missing_frame)
+        rng=rng[0],rng[0]+((rng[1]-rng[0])//self._frame_merge)*self._frame_merge # only read whole merged buffers
+        _,extra_skipped,raw_data,frame_info=self._read_multiple_images_raw(rng=rng,peek=peek,return_info="full" if return_info else False)
+        if missing_frame!="skip":
+            skipped_frames+=extra_skipped
+        out[:skipped_frames]=0
+        pos=skipped_frames
+        for n,b in raw_data:
+            n*=self._frame_merge
+            out[pos:pos+n]=self._convert_indexing(self._parse_buffer(b,nframes=n//self._frame_merge,copy=False),"rct",axes=(-2,-1))
+            pos+=n
+        if return_info:
+            frame_info=self._prepend_missing_frame_info(self._convert_frame_info_array(frame_info),skipped_frames)
+        return out[:pos],frame_info
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, fastbuff=False, out=None):  # pylint: disable=arguments-differ
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -635,8 +655,16 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
         in this case, if `return_info` is ``True``, then ``frame_info`` will automatically be in an ``"array"`` format, with the rows corresponding to the frames
         within the chunks, and the columns corresponding to the frames.
         Using ``fastbuff`` results in faster operation at high frame rates (>~1kFPS), at the expense of a more complicated frame processing in the following code.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are parsed directly (see :meth:`.ICamera.read_multiple_images`);
+        in this case, ``fastbuff`` is ignored.
         """
         funcargparse.check_parameter_range(missing_frame,"missing_frame",["none","zero","skip"])
+        if out is not None:
+            parsed_data,frame_info=self._read_multiple_images_out(out,rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
+            if parsed_data is None:
+                return (None,None) if return_info else None
+            parsed_data,frame_info=self._convert_frame_format(parsed_data,frame_info)
+            return (parsed_data,frame_info) if return_info else parsed_data
         if fastbuff and missing_frame=="none":
             raise ValueError("'none' missing frames mode is not supported if fastbuff==True")
         if return_info:
@@ -650,7 +678,7 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
         if not fastbuff:
             parsed_data=[f for chunk in parsed_data for f in chunk]
         if return_info and not fastbuff:
-            frame_info=[self._convert_frame_info(self._TFrameInfo(*fi)) for fi in frame_info]
+            frame_info=self._convert_frame_info_array(frame_info)
         if skipped_frames and missing_frame!="skip":
             if fastbuff: # only missing_frame=="zero" is possible
                 parsed_data=[np.zeros((skipped_frames,)+dim,dtype=dt)]+parsed_data
@@ -662,10 +690,21 @@ class SiliconSoftwareFrameGrabber(camera.IGrabberAttributeCamera,camera.IROICame
                 else:
                     parsed_data=[None]*skipped_frames+parsed_data
                 if return_info:
-                    frame_info=[None]*skipped_frames+frame_info
+                    frame_info=self._prepend_missing_frame_info(frame_info,skipped_frames)
         parsed_data,frame_info=self._convert_frame_format(parsed_data,frame_info)
         parsed_data=self._convert_indexing(parsed_data,"rct",axes=(-2,-1))
         return (parsed_data,frame_info) if return_info else parsed_data
+    def _read_multiple_images_view(self, rng=None, peek=False, return_info=False):
+        first_frame,_,raw_data,frame_info=self._read_multiple_images_raw(rng=rng,peek=peek,return_info="chunks" if return_info else False)
+        if raw_data is None:
+            return None,None,None
+        if not raw_data:
+            return (first_frame,first_frame),[],([] if return_info else None)
+        r,c=self._get_data_dimensions_rc()
+        nbuff=sum(n for n,_ in raw_data)
+        views=self._buffer_mgr.get_frames_views(first_frame//self._frame_merge,nbuff,self._get_buffer_dtype(),(self._frame_merge*r,c))
+        frames=[v.reshape((n*self._frame_merge,r,c)) for n,v in views]
+        return (first_frame,first_frame+nbuff*self._frame_merge),frames,frame_info
 
 
 
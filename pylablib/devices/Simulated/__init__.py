@@ -0,0 +1,3 @@
+from . import camera
+from .camera import SimulatedCamera, parse_status_line
+from .camera import SimulatedCameraError, SimulatedCameraTimeoutError
@@ -0,0 +1,339 @@
+from ...core.devio import comm_backend, interface
+from ...core.utils import funcargparse
+from ..interface import camera
+
+import numpy as np
+import collections
+import threading
+import time
+
+
+class SimulatedCameraError(comm_backend.DeviceError):
+    """Generic simulated camera error"""
+class SimulatedCameraTimeoutError(SimulatedCameraError):
+    """Simulated camera frame timeout error"""
+
+
+
+
+def parse_status_line(frame):
+    """
+    Parse the status line of a simulated camera frame (in the default ``"rct"`` indexing).
+
+    Return tuple ``(framestamp, timestamp)``, where ``framestamp`` is the camera-side frame counter (including the dropped frames),
+    and ``timestamp`` is the frame acquisition time in microseconds since the acquisition start.
+    """
+    sline=frame[...,0,:4].astype("<u8")
+    framestamp=sline[...,0]+(sline[...,1]<<16)
+    timestamp=sline[...,2]+(sline[...,3]<<16)
+    return framestamp,timestamp
+
+
+
+
+TFrameInfo=collections.namedtuple("TFrameInfo",["frame_index","framestamp","timestamp"])
+class SimulatedCamera(camera.IBinROICamera, camera.IExposureCamera):
+    """
+    Simulated camera, which generates synthetic frames at a given rate.
+
+    Does not require any hardware or external libraries, so it can be used for testing and benchmarking the acquisition and processing pipelines.
+    The frames are generated in a separate thread and written into a ring buffer managed by :class:`.ChunkBufferManager`,
+    so the readout behaves the same way as for a frame grabber: frames can be lost if the buffer overflows, read in chunks (``fastbuff``), or leased.
+
+    Args:
+        detector_size: detector size ``(width, height)``
+        dtype: frame data type
+        frame_period: initial frame period (the inverse of the target frame rate)
+        pattern: frames pattern; can be ``"noise"`` (uniform random noise), ``"gradient"`` (a static gradient),
+            or ``"zero"`` (zero-filled frames); all patterns but ``"zero"`` have a moving bright spot to distinguish consecutive frames
+        npatterns: number of different pre-generated frames, which are cycled through during the acquisition
+        drop_rate: probability of a frame to be dropped by the camera (it is not placed into the buffer, but still increases the camera framestamp)
+        status_line: if ``True``, write the status line containing the framestamp and the timestamp into the first 4 pixels of the first row
+            as 16-bit words (it can be parsed using :func:`parse_status_line`; requires at least 16-bit integer `dtype`)
+        seed: random generator seed (used for the frame noise and the dropped frames)
+    """
+    Error=SimulatedCameraError
+    TimeoutError=SimulatedCameraTimeoutError
+    _TFrameInfo=TFrameInfo
+    _frameinfo_fields=TFrameInfo._fields
+    _frameinfo_field_dtypes={"frame_index":"<i8","framestamp":"<i8","timestamp":"<f8"}
+    _max_generated_batch=1000
+    _max_generate_period=10E-3
+    def __init__(self, detector_size=(1024,1024), dtype="<u2", frame_period=10E-3, pattern="noise", npatterns=16, drop_rate=0., status_line=False, seed=None):
+        super().__init__()
+        funcargparse.check_parameter_range(pattern,"pattern",["noise","gradient","zero"])
+        self._detector_size=tuple(detector_size)
+        self._dtype=np.dtype(dtype)
+        self._frame_period=frame_period
+        self._exposure=frame_period
+        self._pattern=pattern
+        self._npatterns=npatterns
+        self._drop_rate=drop_rate
+        self._status_line=status_line
+        self._random=np.random.RandomState(seed)
+        self._roi=(0,self._detector_size[0],0,self._detector_size[1],1,1)
+        self._patterns=None
+        self._buffer_mgr=camera.ChunkBufferManager()
+        self._framestamps=None
+        self._timestamps=None
+        self._frame_notifier=camera.FrameNotifier()
+        self._acq_thread=None
+        self._acq_stop=threading.Event()
+        self._acquired_frames=None
+        self._framestamp=0
+        self._opened=False
+        self.open()
+        self._add_settings_variable("frame_period",self.get_frame_period,self.set_frame_period)
+        self._add_settings_variable("drop_rate",self.get_drop_rate,self.set_drop_rate)
+        self._add_settings_variable("status_line",self.is_status_line_enabled,self.enable_status_line)
+
+    def _get_connection_parameters(self):
+        return self._detector_size,self._dtype.str
+    def open(self):
+        """Open connection to the camera"""
+        self._opened=True
+    def close(self):
+        """Close connection to the camera"""
+        if self._opened:
+            self.clear_acquisition()
+            self._opened=False
+    def is_opened(self):
+        """Check if the device is connected"""
+        return self._opened
+
+    ### Generation settings ###
+    def get_drop_rate(self):
+        """Get the probability of a frame being dropped"""
+        return self._drop_rate
+    def set_drop_rate(self, drop_rate=0.):
+        """Set the probability of a frame being dropped"""
+        self._drop_rate=drop_rate
+        return self._drop_rate
+    def is_status_line_enabled(self):
+        """Check if the status line is enabled"""
+        return self._status_line
+    def enable_status_line(self, enabled=True):
+        """Enable or disable the status line"""
+        self._status_line=enabled
+        return self._status_line
+
+    ### Timing ###
+    @camera.acqstopped
+    def set_exposure(self, exposure):
+        """Set camera exposure; the frame period is increased to be at least equal to the exposure"""
+        self._exposure=exposure
+        self._frame_period=max(self._frame_period,exposure)
+        return self.get_exposure()
+    @camera.acqstopped
+    def set_frame_period(self, frame_period):
+        """Set frame period (time between two consecutive frames); the exposure is decreased to be at most equal to the frame period"""
+        self._frame_period=frame_period
+        self._exposure=min(self._exposure,frame_period)
+        return self.get_frame_period()
+    def get_frame_timings(self):
+        return self._TAcqTimings(self._exposure,self._frame_period)
+
+    ### ROI ###
+    def get_detector_size(self):
+        return self._detector_size
+    def get_roi(self):
+        return self._roi
+    @camera.acqcleared
+    def set_roi(self, hstart=0, hend=None, vstart=0, vend=None, hbin=1, vbin=1):
+        hlim,vlim=self.get_roi_limits(hbin=hbin,vbin=vbin)
+        hstart,hend,hbin=self._truncate_roi_axis((hstart,hend,hbin),hlim)
+        vstart,vend,vbin=self._truncate_roi_axis((vstart,vend,vbin),vlim)
+        self._roi=(hstart,hend,vstart,vend,hbin,vbin)
+        self._patterns=None
+        return self.get_roi()
+    def get_roi_limits(self, hbin=1, vbin=1):
+        w,h=self._detector_size
+        hbin,vbin=max(1,min(hbin,16,w)),max(1,min(vbin,16,h))  # minimal size should contain at least one binned pixel
+        return camera.TAxisROILimit(min(max(4,hbin),w),w,1,1,min(16,w)),camera.TAxisROILimit(vbin,h,1,1,min(16,h))
+    def _get_data_dimensions_rc(self):
+        hstart,hend,vstart,vend,hbin,vbin=self._roi
+        return (vend-vstart)//vbin,(hend-hstart)//hbin
+
+    ### Frames generation ###
+    def _build_patterns(self):
+        """Pre-generate the cycled frame patterns"""
+        r,c=self._get_data_dimensions_rc()
+        dmax=np.iinfo(self._dtype).max if self._dtype.kind in "ui" else 1.
+        if self._pattern=="zero":
+            self._patterns=np.zeros((1,r,c),dtype=self._dtype)
+            return
+        if self._pattern=="noise":
+            base=self._random.uniform(0,dmax/4,size=(self._npatterns,r,c))
+        else:
+            base=np.tile(np.add.outer(np.arange(r)/max(r,1),np.arange(c)/max(c,1))[None,:,:]*dmax/4,(self._npatterns,1,1))
+        sr,sc=max(r//16,1),max(c//16,1)
+        for i in range(self._npatterns):
+            pr,pc=(i*r)//self._npatterns,(i*c)//self._npatterns
+            base[i,pr:pr+sr,pc:pc+sc]=dmax/2
+        self._patterns=base.astype(self._dtype)
+    def _write_status_line(self, frames, framestamps, timestamps):
+        if frames.shape[-1]<4:
+            return
+        timestamps=(timestamps*1E6).astype("<u8")
+        framestamps=framestamps.astype("<u8")
+        sline=frames[:,0,:4]
+        sline[:,0]=framestamps&0xFFFF
+        sline[:,1]=(framestamps>>16)&0xFFFF
+        sline[:,2]=timestamps&0xFFFF
+        sline[:,3]=(timestamps>>16)&0xFFFF
+    def _generate_frames(self, framestamps):
+        """Write frames with the given framestamps into the buffer"""
+        nbuff=self._buffer_mgr.nframes
+        skipped=max(len(framestamps)-nbuff,0) # frames which would be immediately overwritten are not generated
+        framestamps=framestamps[skipped:]
+        start=self._acquired_frames+skipped
+        shape=self._get_data_dimensions_rc()
+        views=self._buffer_mgr.get_frames_views(start,len(framestamps),self._dtype,shape)
+        pos=0
+        npat=len(self._patterns)
+        for n,v in views:
+            fs=framestamps[pos:pos+n]
+            v[:]=self._patterns[fs%npat]
+            slots=(np.arange(n)+start+pos)%nbuff
+            ts=fs*self._frame_period
+            self._framestamps[slots]=fs
+            self._timestamps[slots]=ts
+            if self._status_line:
+                self._write_status_line(v,fs,ts)
+            pos+=n
+    def _acquisition_loop(self, t0, nframes):
+        while not self._acq_stop.is_set():
+            target=min(int((time.time()-t0)/self._frame_period)+1,self._framestamp+self._max_generated_batch)
+            if target>self._framestamp:
+                framestamps=np.arange(self._framestamp,target)
+                if self._drop_rate>0:
+                    framestamps=framestamps[self._random.uniform(size=len(framestamps))>=self._drop_rate]
+                if nframes is not None:
+                    framestamps=framestamps[:max(nframes-self._acquired_frames,0)]
+                if len(framestamps):
+                    self._generate_frames(framestamps)
+                    self._acquired_frames+=len(framestamps)
+                    self._frame_notifier.inc()
+                self._framestamp=target
+                if nframes is not None and self._acquired_frames>=nframes:
+                    break
+            next_time=t0+self._framestamp*self._frame_period
+            self._acq_stop.wait(min(max(next_time-time.time(),0),self._max_generate_period))
+
+    ### Acquisition controls ###
+    @interface.use_parameters(mode="acq_mode")
+    def setup_acquisition(self, mode="sequence", nframes=100):  # pylint: disable=arguments-differ
+        """
+        Setup acquisition mode.
+
+        `mode` can be either ``"snap"`` (single frame or a fixed number of frames) or ``"sequence"`` (continuous acquisition).
+        `nframes` sets up number of frame buffers.
+        """
+        self.clear_acquisition()
+        super().setup_acquisition(mode=mode,nframes=nframes)
+        r,c=self._get_data_dimensions_rc()
+        self._buffer_mgr.allocate(nframes,r*c*self._dtype.itemsize)
+        self._framestamps=np.zeros(nframes,dtype="<i8")
+        self._timestamps=np.zeros(nframes)
+        if self._patterns is None:
+            self._build_patterns()
+    def clear_acquisition(self):
+        if self._acq_params:
+            self.stop_acquisition()
+            self._buffer_mgr.deallocate()
+            self._framestamps=None
+            self._timestamps=None
+        super().clear_acquisition()
+    def start_acquisition(self, *args, **kwargs):
+        self.stop_acquisition()
+        super().start_acquisition(*args,**kwargs)
+        self._frame_counter.reset(self._buffer_mgr.nframes)
+        self._frame_notifier.reset()
+        self._acquired_frames=0
+        self._framestamp=0
+        self._acq_stop.clear()
+        nframes=self._acq_params["nframes"] if self._acq_params["mode"]=="snap" else None
+        self._acq_thread=threading.Thread(target=self._acquisition_loop,args=(time.time(),nframes),daemon=True)
+        self._acq_thread.start()
+    def stop_acquisition(self):
+        if self.acquisition_in_progress():
+            self._acq_stop.set()
+            self._acq_thread.join()
+            self._acq_thread=None
+            self._frame_counter.update_acquired_frames(self._get_acquired_frames())
+    def acquisition_in_progress(self):
+        return self._acq_thread is not None
+    def _get_acquired_frames(self):
+        return self._acquired_frames
+    def _wait_for_next_frame(self, timeout=20., idx=None):
+        self._frame_notifier.wait(timeout=min(timeout,self._max_generate_period) if timeout is not None else self._max_generate_period)
+
+    ### Frames readout ###
+    def _zero_frame(self, n):
+        return np.zeros((n,)+self.get_data_dimensions(),dtype=self._dtype)
+    def _get_frames_views(self, rng):
+        return self._buffer_mgr.get_frames_views(rng[0],rng[1]-rng[0],self._dtype,self._get_data_dimensions_rc()) if rng[1]>rng[0] else []
+    def _get_frames_info(self, rng, nmissing=0):
+        slots=np.arange(*rng)%self._buffer_mgr.nframes
+        info=self._build_frame_info_array(rng,nmissing=nmissing,framestamp=self._framestamps[slots],timestamp=self._timestamps[slots])
+        return info
+    def _read_frames(self, rng, return_info=False):
+        frames=[f for _,v in self._get_frames_views(rng) for f in self._convert_indexing(v.copy(),"rct",axes=(-2,-1))]
+        info=self._convert_frame_info_array(self._get_frames_info(rng)) if return_info else None
+        return frames,info
+    def _read_multiple_images_view(self, rng=None, peek=False, return_info=False):
+        trimmed=self._trim_images_range(rng) if self._buffer_mgr else None
+        if trimmed is None:
+            return None,None,None
+        rng,_=trimmed
+        views=self._get_frames_views(rng)
+        frames=[v for _,v in views]
+        frame_info=None
+        if return_info:
+            info=self._convert_frame_info_array(self._get_frames_info(rng),fmt="array")
+            frame_info=np.split(info,np.cumsum([n for n,_ in views])[:-1]) if views else []
+        if not peek:
+            self._frame_counter.advance_read_frames(rng)
+        return rng,frames,frame_info
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, fastbuff=False, out=None):  # pylint: disable=arguments-differ
+        """
+        Read multiple images specified by `rng` (by default, all un-read images).
+
+        If `rng` is specified, it is a tuple ``(first, last)`` with images range (first inclusive).
+        If no new frames are available, return an empty list; if no acquisition is running, return ``None``.
+        If ``peek==True``, return images but not mark them as read.
+        `missing_frame` determines what to do with frames which are out of range (missing or lost):
+        can be ``"none"`` (replacing them with ``None``), ``"zero"`` (replacing them with zero-filled frame), or ``"skip"`` (skipping them).
+        If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of :class:`TFrameInfo` instances
+        describing frame index, framestamp (camera-side frame counter, which includes dropped frames), and the frame timestamp (in seconds since the acquisition start);
+        if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If ``fastbuff==False``, return a list of individual frames (2D numpy arrays).
+        Otherwise, return a list of 'chunks', which are 3D numpy arrays containing several frames;
+        in this case, if `return_info` is ``True``, then ``frame_info`` will automatically be in an ``"array"`` format, with the rows corresponding to the frames
+        within the chunks, and the columns corresponding to the frames.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are written (see :meth:`.ICamera.read_multiple_images`);
+        in this case, ``fastbuff`` is ignored.
+        """
+        funcargparse.check_parameter_range(missing_frame,"missing_frame",["none","zero","skip"])
+        if not fastbuff or out is not None:
+            return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info,out=out)
+        if missing_frame=="none":
+            raise ValueError("'none' missing frames mode is not supported if fastbuff==True")
+        trimmed=self._trim_images_range(rng) if self._buffer_mgr else None
+        if trimmed is None:
+            return (None,None) if return_info else None
+        rng,skipped_frames=trimmed
+        nmissing=skipped_frames if missing_frame=="zero" else 0
+        views=self._get_frames_views(rng)
+        frames=[self._convert_indexing(v.copy(),"rct",axes=(-2,-1)) for _,v in views]
+        frame_info=None
+        if return_info:
+            info=self._convert_frame_info_array(self._get_frames_info(rng,nmissing=nmissing),fmt="array")
+            chunk_sizes=([nmissing] if nmissing else [])+[n for n,_ in views]
+            frame_info=np.split(info,np.cumsum(chunk_sizes)[:-1]) if chunk_sizes else []
+        if nmissing:
+            frames=[self._zero_frame(nmissing)]+frames
+        if not peek:
+            self._frame_counter.advance_read_frames(rng)
+        frames,frame_info=self._convert_frame_format(frames,frame_info)
+        return (frames,frame_info) if return_info else frames
@@ -51,6 +51,7 @@ class ITektronixScope(SCPI.SCPIDevice):
         self._add_parameter_class(interface.EnumParameterClass("input_channel",self._main_channels,value_case="upper"))
         self._add_parameter_class(interface.EnumParameterClass("channel",self._main_channels+self._aux_channels,value_case="upper"))
         self.default_data_fmt="<i1"
+        self._wfmpre_cache={}
         self._add_info_variable("channels_number",self.get_channels_number)
         self._add_info_variable("channels",self.get_channels)
         self._add_settings_variable("edge_trigger/source",self.get_edge_trigger_source,self.set_edge_trigger_source)
@@ -65,6 +66,10 @@ class ITektronixScope(SCPI.SCPIDevice):
         self._add_settings_variable("coupling",self.get_coupling,self.set_coupling,mux=(self._main_channels_idx,))
         self._add_settings_variable("probe_attenuation",self.get_probe_attenuation,self.set_probe_attenuation,mux=(self._main_channels_idx,))
 
+    def open(self):
+        self.invalidate_wfmpre_cache()
+        return super().open()
+
     def _detect_main_channels_number(self):
         ch=1
         while ch<=16:
@@ -220,6 +225,7 @@ class ITektronixScope(SCPI.SCPIDevice):
         return self.ask(":HORIZONTAL:SCALE?","float")*10. # scale is per division (10 division per screen)
     def set_horizontal_span(self, span):
         """Set horizontal span (in seconds)"""
+        self.invalidate_wfmpre_cache()
         self.write(":HORIZONTAL:SCALE",span/10.,"float") # scale is per division (10 division per screen)
         return self.get_horizontal_span()
     def _to_horizontal_pos(self, center_time):
@@ -245,6 +251,7 @@ class ITektronixScope(SCPI.SCPIDevice):
             return self._from_horizontal_pos(self.ask(":HORIZONTAL:POS?","float"))
     def set_horizontal_offset(self, offset=0.):
         """Set horizontal offset (position of the center of the sweep; in seconds)"""
+        self.invalidate_wfmpre_cache()
         if self._hor_offset_method=="delay":
             self.write(":HORIZONTAL:DELAY:MODE 1")
             self.write(":HORIZONTAL:DELAY:TIME",offset,"float")
@@ -263,6 +270,7 @@ class ITektronixScope(SCPI.SCPIDevice):
     @interface.use_parameters(channel="input_channel")
     def set_vertical_span(self, channel, span):
         """Set channel vertical span (in V)"""
+        self.invalidate_wfmpre_cache()
         self.write(":{}:SCALE".format(channel),span/10.,"float") # scale is per division (10 division per screen)
         return self._wip.get_vertical_span(channel)
     @muxchannel
@@ -274,6 +282,7 @@ class ITektronixScope(SCPI.SCPIDevice):
     @interface.use_parameters(channel="input_channel")
     def set_vertical_position(self, channel, position):
         """Set channel vertical position (offset of the zero volt line; in V)"""
+        self.invalidate_wfmpre_cache()
         position/=self._wip.get_vertical_span(channel)/10. # position is in divisions (10 division per screen)
         self.write(":{}:POSITION".format(channel),position,"float")
         return self._wip.get_vertical_position(channel)
@@ -350,6 +359,7 @@ class ITektronixScope(SCPI.SCPIDevice):
     @interface.use_parameters(channel="input_channel")
     def set_probe_attenuation(self, channel, attenuation):
         """Set channel probe attenuation"""
+        self.invalidate_wfmpre_cache()
         if self._probe_attenuation_comm:
             comm,kind=self._probe_attenuation_comm
             self.write(":{}:{}".format(channel,comm),attenuation if kind=="att" else 1./attenuation)
@@ -384,6 +394,7 @@ class ITektronixScope(SCPI.SCPIDevice):
         If ``reset_limits==True``, reset the datapoints range (:meth:`set_data_pts_range`) to the full range.
         The actual set value (returned by this method) can be different from the requested value.
         """
+        self.invalidate_wfmpre_cache()
         if pts_num<5E4:
             self._set_data_resolution("REDUCED")
         else:
@@ -406,6 +417,7 @@ class ITektronixScope(SCPI.SCPIDevice):
         The range is defined from 1 to the points number (returned by :meth:`get_points_number` with ``kind="acq"``).
         If ``rng is None``, set the full range.
         """
+        self.invalidate_wfmpre_cache()
         if rng is None:
             start,stop=1,self.get_points_number(kind="acq")
         else:
@@ -421,6 +433,7 @@ class ITektronixScope(SCPI.SCPIDevice):
         `fmt` is a string describing the format; can be either ``"ascii"``, or a numpy-style format string (e.g., ``"<u2"``).
         If ``"default"``, use the oscilloscope default format (usually binary with smallest appropriate byte size).
         """
+        self.invalidate_wfmpre_cache()
         if fmt=="default":
             fmt=self.default_data_fmt
         fmt=data_format.DataFormat.from_desc(fmt)
@@ -471,16 +484,22 @@ class ITektronixScope(SCPI.SCPIDevice):
         wfmpre["yzero"]=float(data[13])
         wfmpre["yoff"]=float(data[14])
         return wfmpre
-    def get_wfmpre(self, channel=None, enable=True):
+    def get_wfmpre(self, channel=None, enable=True, cached=False):
         """
         Get preamble dictionary describing all scaling and format data for the given channel or a list of channels.
 
         Can be acquired once and used in subsequent multiple reads to save time on re-requesting.
         If `channel` is ``None``, use the currently selected channel.
         If ``enable==True``, make sure that the requested channel is enabled; getting preamble for disabled channels raises an error.
+        If ``cached==True`` and the preamble for this channel is stored in the cache, return the stored value instead of requesting it.
+        The cache is updated on every request, and it is invalidated when the relevant settings are changed (see :meth:`invalidate_wfmpre_cache`).
         """
         if isinstance(channel,(list,tuple)):
-            return {self._normalize_channel(ch):self.get_wfmpre(ch,enable=enable) for ch in channel}
+            return {self._normalize_channel(ch):self.get_wfmpre(ch,enable=enable,cached=cached) for ch in channel}
+        if channel is not None:
+            channel=self._normalize_channel(channel)
+            if cached and channel in self._wfmpre_cache:
+                return self._wfmpre_cache[channel]
         self._change_channel(channel)
         if enable:
             channel=self._get_channel(channel)
@@ -488,7 +507,18 @@ class ITektronixScope(SCPI.SCPIDevice):
                 self.enable_channel(channel)
         data=self.ask(":{}?".format(self._wfmpre_comm)).split(";")
         data=[d.strip().upper() for d in data]
-        return self._build_wfmpre(data)
+        wfmpre=self._build_wfmpre(data)
+        if channel is not None:
+            self._wfmpre_cache[channel]=wfmpre
+        return wfmpre
+    def invalidate_wfmpre_cache(self):
+        """
+        Invalidate the cached preambles.
+
+        Called automatically by the methods changing the scaling or the format of the data (e.g., :meth:`set_vertical_span` or :meth:`set_data_format`).
+        Should be called explicitly if these settings are changed in some other way, e.g., on the oscilloscope front panel or through the direct :meth:`write` calls.
+        """
+        self._wfmpre_cache.clear()
     
     def read_raw_data(self, channel=None, fmt=None, timeout=None):
         """
@@ -519,15 +549,13 @@ class ITektronixScope(SCPI.SCPIDevice):
         ypts=(data-wfmpre["yoff"])*wfmpre["ymult"]+wfmpre["yzero"]
         return np.column_stack((xpts,ypts))
     
-    @interface.use_parameters(channel="input_channel")
-    def _read_sweep_fast(self, channel, wfmpre=None, timeout=None):
-        self.write(":DATA:SOURCE {}".format(channel))
-        wfmpre=wfmpre or self.get_wfmpre(enable=False)
-        self.write(":CURVE?")
+    def _request_sweep(self, channel):
+        self.write(":DATA:SOURCE {};:CURVE?".format(channel))
+    def _read_sweep_data(self, wfmpre, timeout=None):
         if wfmpre["fmt"].is_ascii():
-            data=self.read("raw",timeout=timeout)
-        else:
-            data=self.read_binary_array_data(timeout=timeout)
+            return self.read("raw",timeout=timeout)
+        return self.read_binary_array_data(timeout=timeout)
+    def _parse_sweep_data(self, data, wfmpre):
         trace=self.parse_array_data(data,wfmpre["fmt"].to_desc())
         if len(trace)!=wfmpre["pts"]:
             raise TektronixError("received data length {0} is not equal to the number of points {1}".format(len(trace),wfmpre["pts"]))
@@ -536,10 +564,15 @@ class ITektronixScope(SCPI.SCPIDevice):
         """
         Read data from a multiple channels channel.
 
+        The requests are pipelined: the next channel data is requested right after the previous channel data is received,
+        so that the oscilloscope prepares it while the previous data is being parsed.
+
         Args:
             channels: list of channel indices or names
             wfmpres: optional list or dictionary of preambles (obtained using :meth:`get_wfmpre`);
-                if it is ``None``, obtain during reading, which slows down the data acquisition a bit
+                if it is ``None``, obtain during reading, which slows down the data acquisition a bit;
+                if it is ``"cached"``, use the cached preambles (see :meth:`get_wfmpre`) and only request the missing ones,
+                which is the fastest option for repeated readouts
             ensure_fmt: if ``True``, make sure that oscilloscope data format agrees with the one in `wfmpre`
             timeout: read timeout
             return_wfmpres: if ``True``, return tuple ``(sweeps, wfmpres)``, where ``wfmpres`` can be used for further sweep readouts.
@@ -547,7 +580,9 @@ class ITektronixScope(SCPI.SCPIDevice):
         if not channels:
             return []
         channels=[self._normalize_channel(ch) for ch in channels]
-        if wfmpres is None:
+        if wfmpres=="cached":
+            wfmpres={ch:self._wfmpre_cache[ch] for ch in channels if ch in self._wfmpre_cache}
+        elif wfmpres is None:
             wfmpres={}
         elif isinstance(wfmpres,(list,tuple)):
             wfmpres=dict(zip(channels,wfmpres))
@@ -557,9 +592,20 @@ class ITektronixScope(SCPI.SCPIDevice):
             if self.get_data_format()!=data_format.DataFormat.from_desc(fmt).to_desc():
                 self.set_data_format(fmt=fmt)
         for ch in channels:
-            if ch not in wfmpres:
+            if wfmpres.get(ch) is None:
                 wfmpres[ch]=self.get_wfmpre(ch,enable=False)
-        sweeps=[self._read_sweep_fast(ch,wfmpres[ch],timeout=timeout) for ch in channels]
+        sweeps=[]
+        self._request_sweep(channels[0])
+        for ch,next_ch in zip(channels,channels[1:]+[None]):
+            data=self._read_sweep_data(wfmpres[ch],timeout=timeout)
+            if next_ch is not None:
+                self._request_sweep(next_ch)
+            try:
+                sweeps.append(self._parse_sweep_data(data,wfmpres[ch]))
+            except (TektronixError,ValueError):
+                if next_ch is not None:
+                    self._read_sweep_data(wfmpres[next_ch],timeout=timeout)  # clear the already requested data
+                raise
         return (sweeps,wfmpres) if return_wfmpres else sweeps
     def read_sweep(self, channel, wfmpre=None, ensure_fmt=True, timeout=None):
         """
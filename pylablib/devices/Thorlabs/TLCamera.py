@@ -384,7 +384,7 @@ class ThorlabsTLCamera(camera.IBinROICamera, camera.IExposureCamera):
             buff_size=self._default_acq_params.get("nframes",100)
         return {"nframes":buff_size,"frames_per_trigger":None,"auto_start":True}
 
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False):
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, out=None):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -396,5 +396,6 @@ class ThorlabsTLCamera(camera.IBinROICamera, camera.IExposureCamera):
         If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of :class:`TFrameInfo` instances
         describing frame index and frame metadata, which contains framestamp, pixel clock, pixel format, and pixel offset;
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are written (see :meth:`.ICamera.read_multiple_images`).
         """
-        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
\ No newline at end of file
+        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info,out=out)
\ No newline at end of file
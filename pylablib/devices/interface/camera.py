@@ -4,6 +4,7 @@ from ...core.utils import functions as function_utils, general as general_utils,
 
 import numpy as np
 import collections
+import collections.abc
 import contextlib
 import time
 import functools
@@ -14,6 +15,8 @@ import ctypes
 
 class DefaultFrameTransferError(comm_backend.DeviceError):
     """Generic frame transfer error"""
+class FramesLeaseExpiredError(DefaultFrameTransferError):
+    """Error raised when a leased frames range has been overwritten by the newly acquired frames"""
 
 TFramesStatus=collections.namedtuple("TFramesStatus",["acquired","unread","skipped","buffer_size"])
 TFrameSize=collections.namedtuple("TFrameSize",["width","height"])
@@ -317,10 +320,11 @@ class ICamera(interface.IDevice):
         Can be ``"namedtuple"`` (potentially nested named tuples; convenient to get particular values),
         ``"list"`` (flat list of values, with field names are given by :meth:`get_frame_info_fields`; convenient for building a table),
         ``"array"`` (same as ``"list"``, but with a numpy array, which is easier to use for ``fastbuff`` readout supported by some cameras),
-        or ``"dict"`` (flat dictionary with the same fields as the ``"list"`` format; more resilient to future format changes)
+        ``"dict"`` (flat dictionary with the same fields as the ``"list"`` format; more resilient to future format changes),
+        or ``"structured"`` (numpy structured array with the fields given by :meth:`get_frame_info_fields`; the fastest for large frame ranges)
         """
         return self._frameinfo_format
-    _p_frameinfo_format=interface.EnumParameterClass("frame_info_format",["namedtuple","list","array","dict"])
+    _p_frameinfo_format=interface.EnumParameterClass("frame_info_format",["namedtuple","list","array","dict","structured"])
     @interface.use_parameters(fmt="frame_info_format")
     def set_frame_info_format(self, fmt, include_fields=None):
         """
@@ -329,7 +333,8 @@ class ICamera(interface.IDevice):
         Can be ``"namedtuple"`` (potentially nested named tuples; convenient to get particular values),
         ``"list"`` (flat list of values, with field names are given by :meth:`get_frame_info_fields`; convenient for building a table),
         ``"array"`` (same as ``"list"``, but with a numpy array, which is easier to use for ``fastbuff`` readout supported by some cameras),
-        or ``"dict"`` (flat dictionary with the same fields as the ``"list"`` format; more resilient to future format changes)
+        ``"dict"`` (flat dictionary with the same fields as the ``"list"`` format; more resilient to future format changes),
+        or ``"structured"`` (numpy structured array with the fields given by :meth:`get_frame_info_fields`; the fastest for large frame ranges)
         If `include_fields` is not ``None``, it specifies the fields included for non-``"tuple"`` formats.
         """
         if self.get_frame_format()=="array":
@@ -374,6 +379,24 @@ class ICamera(interface.IDevice):
         if self._frameinfo_include_fields is not None:
             return list(self._frameinfo_include_fields)
         return list(self._frameinfo_fields)
+    _frameinfo_field_dtypes={"frame_index":"<i8"}  # numpy dtypes of the frame info fields; need to be declared for all fields if the camera uses :meth:`_build_frame_info_array`
+    def _get_frame_info_dtype(self, values=None):
+        """
+        Get structured numpy dtype describing all frame info fields.
+
+        The field dtypes are taken from ``_frameinfo_field_dtypes``. If some of them are not declared, infer them from the given flat list of `values`
+        (non-numeric values are stored as objects); if `values` are not given, raise an error.
+        """
+        dtype=[]
+        for i,f in enumerate(self._frameinfo_fields):
+            if f in self._frameinfo_field_dtypes:
+                dtype.append((f,self._frameinfo_field_dtypes[f]))
+            elif values is not None:
+                vdt=np.asarray(values[i]).dtype
+                dtype.append((f,vdt if (vdt.kind in "biuf" and vdt.shape==()) else "O"))
+            else:
+                raise ValueError("dtype of the frame info field {} is not declared".format(f))
+        return np.dtype(dtype)
     def _convert_frame_info(self, info, fmt=None):
         if fmt is None:
             fmt=self._frameinfo_format
@@ -383,6 +406,10 @@ class ICamera(interface.IDevice):
         if fmt=="namedtuple":
             return info
         info=general_utils.flatten_list(info)
+        if fmt=="structured":
+            info=tuple(-1 if v is None else v for v in info)
+            info=np.array(info,dtype=self._get_frame_info_dtype(info))
+            return info if self._frameinfo_include_fields is None else info[self._frameinfo_include_fields]
         if self._frameinfo_include_fields is not None:
             info=[v for v,inc in zip(info,self._frameinfo_fields_mask) if inc]
         if fmt=="list":
@@ -393,6 +420,73 @@ class ICamera(interface.IDevice):
                 arr=arr.T
             return arr
         return dict(zip(fields,info))
+    def _build_frame_info_array(self, rng, nmissing=0, **values):
+        """
+        Build a structured frame info array for the frames range `rng` in a single vectorized call.
+
+        `values` specify the field values (arrays with one element per frame in `rng`, or scalars common to all frames);
+        ``frame_index`` defaults to the frame indices, and the rest of the fields default to -1.
+        If `nmissing` is above zero, the array is prepended with `nmissing` missing frame entries with all fields set to -1.
+        """
+        info=np.full(nmissing+rng[1]-rng[0],-1,dtype=self._get_frame_info_dtype())
+        info["frame_index"][nmissing:]=np.arange(*rng)
+        for k,v in values.items():
+            info[k][nmissing:]=v
+        return info
+    def _convert_frame_info_array(self, info, fmt=None):
+        """
+        Convert structured frame info array containing all frame info fields into the given format.
+
+        ``"structured"`` format returns a view into the array with only the included fields, ``"array"`` returns a 2D array with one row per frame,
+        and the remaining formats return a lazy :class:`FrameInfoSequence`, which only builds individual frame infos when they are accessed.
+        Frames with negative indices are considered missing.
+        """
+        if fmt is None:
+            fmt=self._frameinfo_format
+        valid=info["frame_index"]>=0
+        if fmt=="namedtuple":
+            ntcls=self._get_flat_frame_info_class()
+            return FrameInfoSequence(info,valid,lambda v: ntcls(*v))
+        if self._frameinfo_include_fields is not None:
+            info=info[self._frameinfo_include_fields]
+        if fmt=="structured":
+            return info
+        fields=info.dtype.names
+        if fmt=="array":
+            arr=np.empty((len(info),len(fields)),dtype=np.result_type(*[info.dtype[f] for f in fields]))
+            for i,f in enumerate(fields):
+                arr[:,i]=info[f]
+            arr[~valid]=-1
+            return arr
+        if fmt=="list":
+            return FrameInfoSequence(info,valid,list)
+        return FrameInfoSequence(info,valid,lambda v: dict(zip(fields,v)))
+    _flat_frame_info_classes={}
+    def _get_flat_frame_info_class(self):
+        """
+        Get the namedtuple class used to build frame infos from the flat structured array.
+
+        Same as ``_TFrameInfo``, unless it is nested (which can not be restored from the flat array);
+        in this case, build a flat namedtuple class with the same name, which is cached for the subsequent calls.
+        """
+        fields=tuple(self._frameinfo_fields)
+        if tuple(self._TFrameInfo._fields)==fields:
+            return self._TFrameInfo
+        key=(self._TFrameInfo,fields)
+        if key not in self._flat_frame_info_classes:
+            self._flat_frame_info_classes[key]=collections.namedtuple(self._TFrameInfo.__name__,fields)
+        return self._flat_frame_info_classes[key]
+    def _prepend_missing_frame_info(self, info, nmissing):
+        """
+        Prepend `nmissing` missing frame infos to the given info (list, sequence, or array).
+
+        Structured arrays are padded with -1 entries (negative frame index marks a missing frame);
+        otherwise, the result is a list with ``None`` for the missing frames, same as for the per-frame info formats.
+        """
+        if isinstance(info,np.ndarray) and info.dtype.names is not None:
+            pad=np.full(nmissing,-1,dtype=info.dtype)
+            return np.concatenate([pad,info],axis=0)
+        return [None]*nmissing+list(info)
 
     def get_new_images_range(self):
         """
@@ -437,8 +531,42 @@ class ICamera(interface.IDevice):
     _frameinfo_fields=TFrameInfo._fields
     _adjustable_frameinfo_period=False
     _p_missing_frame=interface.EnumParameterClass("missing_frame",["none","zero","skip"])
+    def _fit_images_range(self, rng, skipped_frames, nmax, missing_frame="skip"):
+        """
+        Shrink the trimmed images range `rng` preceded by `skipped_frames` missing frames to fit into at most `nmax` output frames.
+
+        Return tuple ``(rng, skipped_frames)`` with the updated range and number of missing frames to be included in the output.
+        """
+        if missing_frame=="skip":
+            skipped_frames=0
+        skipped_frames=min(skipped_frames,nmax)
+        rng=(rng[0],max(rng[0],min(rng[1],rng[0]+nmax-skipped_frames)))
+        return rng,skipped_frames
+    def _write_frames_out(self, out, frames, skipped_frames=0, missing_frame="skip"):
+        """
+        Write the read `frames` (list of 2D arrays or a 3D array) into the `out` array preceded by `skipped_frames` zero frames.
+
+        Return the filled part of the `out` array.
+        Raise :exc:`ValueError` if the frames shape differs from the `out` frame shape,
+        or if the frames dtype can not be cast to the `out` dtype without changing its kind (e.g., from float to integer).
+        """
+        if missing_frame=="skip":
+            skipped_frames=0
+        for f in ([frames] if isinstance(frames,np.ndarray) else frames):
+            fshape=f.shape[-2:] if f.ndim>=2 else f.shape
+            if fshape!=out.shape[1:]:
+                raise ValueError("frame shape {} does not match the output array frame shape {}".format(fshape,out.shape[1:]))
+            if not np.can_cast(f.dtype,out.dtype,casting="same_kind"):
+                raise ValueError("frame dtype {} can not be cast to the output array dtype {}".format(f.dtype,out.dtype))
+        out[:skipped_frames]=0
+        if isinstance(frames,np.ndarray):
+            out[skipped_frames:skipped_frames+len(frames)]=frames
+        else:
+            for i,f in enumerate(frames):
+                out[skipped_frames+i]=f
+        return out[:skipped_frames+len(frames)]
     @interface.use_parameters
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False):
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, out=None):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -449,18 +577,27 @@ class ICamera(interface.IDevice):
         can be ``"none"`` (replacing them with ``None``), ``"zero"`` (replacing them with zero-filled frame), or ``"skip"`` (skipping them).
         If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of frame info tuples (camera-dependent, by default, only the frame index);
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If `out` is not ``None``, it is a 3D numpy array (e.g., a preallocated array or an ``np.memmap``) with the frames shape and dtype,
+        into which the frames are written; in this case, at most ``len(out)`` frames are read (the rest are left unread),
+        missing frames are always zero-filled (unless ``missing_frame=="skip"``), and the returned frames are views into `out`;
+        if the frames do not fit into `out` (different frame shape, or dtype of a different kind), raise :exc:`ValueError` and leave the frames unread.
         """
-        rng,skipped_frames=self._trim_images_range(rng)
-        if rng is None:
+        trimmed=self._trim_images_range(rng)
+        if trimmed is None:
             return (None,None) if return_info else None
+        rng,skipped_frames=trimmed
+        if out is not None:
+            rng,skipped_frames=self._fit_images_range(rng,skipped_frames,len(out),missing_frame=missing_frame)
         images,info=self._read_frames(rng,return_info=return_info)
-        if skipped_frames and missing_frame!="skip":
+        if out is not None:
+            images=self._write_frames_out(out,images,skipped_frames,missing_frame=missing_frame)
+        elif skipped_frames and missing_frame!="skip":
             if missing_frame=="zero":
                 images=list(self._zero_frame(skipped_frames))+images
             else:
                 images=[None]*skipped_frames+images
-            if return_info:
-                info=[None]*skipped_frames+info
+        if skipped_frames and missing_frame!="skip" and return_info:
+            info=self._prepend_missing_frame_info(info,skipped_frames)
         if not peek:
             self._frame_counter.advance_read_frames(rng)
         images,info=self._convert_frame_format(images,info)
@@ -509,7 +646,7 @@ class ICamera(interface.IDevice):
             return {"nframes":nframes,"mode":"snap"}
         else:
             return {"nframes":buff_size,"mode":"sequence"}
-    def grab(self, nframes=1, frame_timeout=5., missing_frame="none", return_info=False, buff_size=None):
+    def grab(self, nframes=1, frame_timeout=5., missing_frame="none", return_info=False, buff_size=None, out=None):
         """
         Snap `nframes` images (with preset image read mode parameters)
         
@@ -520,22 +657,96 @@ class ICamera(interface.IDevice):
         or ``"skip"`` (skipping them, while still keeping total returned frames number to `n`).
         If ``return_info==True``, return tuple ``(frames, infos)``, where ``infos`` is a list of frame info tuples (camera-dependent);
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
+        If `out` is not ``None``, it is a 3D numpy array with at least `nframes` frames, which is filled with the acquired frames in place
+        (missing frames are zero-filled); in this case, the returned frames are ``out[:nframes]``.
         """
         acq_params=self._get_grab_acquisition_parameters(nframes,buff_size)
+        if out is not None:
+            if len(out)<nframes:
+                raise ValueError("output array length {} is smaller than the number of frames {}".format(len(out),nframes))
+            out=out[:nframes]
         frames,info=[],[]
+        nread=0
         self.start_acquisition(**acq_params)
         try:
-            while len(frames)<nframes:
+            while nread<nframes:
                 self.wait_for_frame(timeout=frame_timeout)
+                frames_out=None if out is None else out[nread:]
                 if return_info:
-                    new_frames,new_info=self.read_multiple_images(missing_frame=missing_frame,return_info=True)
-                    frames+=new_frames
-                    info+=new_info
+                    new_frames,new_info=self.read_multiple_images(missing_frame=missing_frame,return_info=True,out=frames_out)
+                    info.extend(new_info)
                 else:
-                    frames+=self.read_multiple_images(missing_frame=missing_frame,return_info=False)
+                    new_frames=self.read_multiple_images(missing_frame=missing_frame,return_info=False,out=frames_out)
+                if out is None:
+                    frames.extend(new_frames)
+                nread+=len(new_frames)
+            if out is not None:
+                frames=out
             return (frames[:nframes],info[:nframes]) if return_info else frames[:nframes]
         finally:
             self.stop_acquisition()
+    def grab_into(self, path, nframes=1, dtype=None, frame_timeout=5., missing_frame="none", return_info=False, buff_size=None):
+        """
+        Snap `nframes` images directly into a newly created ``np.memmap`` file located at `path`.
+
+        Frames are streamed into the file as they are read, so they are never all kept in RAM simultaneously.
+        `dtype` specifies the file data type (by default, the camera default image dtype).
+        The rest of the parameters are the same as in :meth:`grab`.
+        Return the memmap array (or tuple ``(frames, infos)`` if ``return_info==True``).
+        """
+        if dtype is None:
+            dtype=self._default_image_dtype
+        out=np.memmap(path,dtype=dtype,mode="w+",shape=(nframes,)+tuple(self.get_data_dimensions()))
+        try:
+            return self.grab(nframes=nframes,frame_timeout=frame_timeout,missing_frame=missing_frame,return_info=return_info,buff_size=buff_size,out=out)
+        finally:
+            out.flush()
+    def _read_multiple_images_view(self, rng=None, peek=False, return_info=False):
+        """
+        Read multiple images as read-only views into the internal frames buffer.
+
+        Return tuple ``(rng, frames, infos)``, where ``rng`` is the actually read frames range, ``frames`` is a list of 3D chunk arrays,
+        and ``infos`` is the corresponding list of 2D frame info arrays (or ``None`` if ``return_info==False``).
+        If no acquisition is running, return ``(None, None, None)``.
+        Only implemented for the cameras with directly accessible buffers (e.g., the ones using :class:`ChunkBufferManager`).
+        """
+        raise NotImplementedError("ICamera._read_multiple_images_view")
+    def lease_multiple_images(self, rng=None, peek=False, return_info=False):
+        """
+        Lease multiple images specified by `rng` (by default, all un-read images) without copying them out of the camera buffer.
+
+        Return a :class:`FramesLease` object, which holds a list of read-only 3D numpy arrays (chunks of consecutive frames)
+        directly pointing into the acquisition buffer; if no acquisition is running, return ``None``.
+        The lease should be released (using :meth:`FramesLease.release`, or as a context manager) as soon as the frames are no longer needed.
+        While the lease is held, its frames are counted as unavailable for overwriting (see :meth:`get_frames_lease_margin`);
+        if the camera nevertheless writes over them, any further access to the lease frames raises :exc:`FramesLeaseExpiredError`.
+        If ``peek==True``, return images but not mark them as read.
+        If ``return_info==True``, the lease also holds frame info in the ``"array"`` format, one 2D array per frames chunk.
+        Missing frames are always skipped.
+        """
+        rng,frames,info=self._read_multiple_images_view(rng=rng,peek=peek,return_info=return_info)
+        if frames is None:
+            return None
+        frames=self._convert_indexing(frames,"rct",axes=(-2,-1))
+        lid=self._frame_counter.add_lease(rng)
+        return FramesLease(self,lid,rng,frames,info)
+    def check_frames_lease(self, lease):
+        """Check if the given lease frames are still valid (i.e., have not been written over)"""
+        if self.acquisition_in_progress():
+            self._frame_counter.update_acquired_frames(self._get_acquired_frames())
+        return self._frame_counter.is_lease_valid(lease.lid)
+    def release_frames_lease(self, lease):
+        """Release the given frames lease"""
+        self._frame_counter.release_lease(lease.lid)
+    def get_frames_lease_margin(self):
+        """
+        Get the number of frames which can still be acquired before the oldest held lease is overwritten.
+
+        Return ``None`` if no leases are currently held.
+        """
+        if self.acquisition_in_progress():
+            self._frame_counter.update_acquired_frames(self._get_acquired_frames())
+        return self._frame_counter.get_lease_margin()
     def snap(self, timeout=5., return_info=False):
         """Snap a single frame"""
         res=self.grab(frame_timeout=timeout,return_info=return_info)
@@ -586,6 +797,7 @@ class FrameCounter:
     Keeps track of the buffer occupation, acquired/missed frames, last read and wait buffers, etc.
     """
     def __init__(self):
+        self._lease_counter=0 # not reset, so that the leases taken before a reset never match the new ones
         self.reset()
     
     def reset(self, buffer_size=None):
@@ -602,6 +814,7 @@ class FrameCounter:
         self.last_read_frame=-1
         self.first_valid_frame=-1
         self.skipped_frames=0
+        self.leases={}
     def update_acquired_frames(self, acquired_frames):
         """Update the counter of acquired frames (needs to be called by the camera whenever necessary)"""
         if self.buffer_size is None:
@@ -698,6 +911,137 @@ class FrameCounter:
         if self.buffer_size is not None:
             self.first_valid_frame=first_valid_frame
 
+    def add_lease(self, rng):
+        """Register a new lease for the given frames range and return its ID"""
+        self._lease_counter+=1
+        self.leases[self._lease_counter]=tuple(rng)
+        return self._lease_counter
+    def release_lease(self, lid):
+        """Release the lease with the given ID (no error if it is already released)"""
+        self.leases.pop(lid,None)
+    def is_lease_valid(self, lid):
+        """
+        Check if the lease with the given ID is still valid.
+
+        The lease is valid if it has not been released, the buffer has not been reset since it was taken,
+        and none of its frames could have been written over (including the frame which is currently being acquired).
+        """
+        if self.buffer_size is None or lid not in self.leases:
+            return False
+        rng=self.leases[lid]
+        return rng[0]>=self.last_acquired_frame+2-self.buffer_size
+    def get_lease_margin(self):
+        """
+        Get the number of frames which can still be acquired before the oldest lease becomes invalid.
+
+        Return ``None`` if there are no leases.
+        """
+        if self.buffer_size is None or not self.leases:
+            return None
+        oldest=min(rng[0] for rng in self.leases.values())
+        return max(oldest-self.last_acquired_frame-2+self.buffer_size,0)
+
+
+
+
+class FrameInfoSequence(collections.abc.Sequence):
+    """
+    Lazy sequence of frame infos backed by a structured numpy array.
+
+    The individual frame infos are built only when accessed; missing frames are returned as ``None``.
+
+    Args:
+        info: structured numpy array with frame info
+        valid: boolean array indicating which of the frames are present
+        conv: function which converts a tuple of frame info values into the resulting frame info
+    """
+    def __init__(self, info, valid, conv):
+        self.info=info
+        self.valid=valid
+        self.conv=conv
+    def __len__(self):
+        return len(self.info)
+    def __getitem__(self, idx):
+        if isinstance(idx,slice):
+            return FrameInfoSequence(self.info[idx],self.valid[idx],self.conv)
+        return self.conv(self.info[idx].item()) if self.valid[idx] else None
+    def __add__(self, other):
+        return list(self)+list(other)
+    def __radd__(self, other):
+        return list(other)+list(self)
+    def __repr__(self):
+        return repr(list(self))
+    def get_array(self):
+        """Get the underlying structured array"""
+        return self.info
+
+
+
+
+class FramesLease:
+    """
+    Lease on a range of frames stored in the camera acquisition buffer.
+
+    Created by :meth:`ICamera.lease_multiple_images`; holds read-only numpy views into the buffer.
+    Can be used as a context manager, which releases the lease on exit.
+
+    Args:
+        cam: camera which produced the lease
+        lid: lease ID within the camera frame counter
+        rng: leased frames range ``(first, last)`` (first inclusive)
+        frames: list of 3D numpy arrays with frame chunks
+        info: list of 2D frame info arrays, or ``None`` if it is not available
+    """
+    def __init__(self, cam, lid, rng, frames, info=None):
+        self.cam=cam
+        self.lid=lid
+        self.rng=rng
+        self._frames=frames
+        self._info=info
+        for f in frames:
+            f.flags.writeable=False
+    def nframes(self):
+        """Get number of frames in the lease"""
+        return self.rng[1]-self.rng[0]
+    def is_valid(self):
+        """Check if the lease is still valid (not released or written over)"""
+        return self._frames is not None and self.cam.check_frames_lease(self)
+    def check(self):
+        """Raise :exc:`FramesLeaseExpiredError` if the lease is no longer valid"""
+        if self._frames is None:
+            raise FramesLeaseExpiredError("frames lease {} has already been released".format(self.rng))
+        if not self.cam.check_frames_lease(self):
+            raise FramesLeaseExpiredError("frames lease {} has been written over by the camera".format(self.rng))
+    def get_frames(self):
+        """Get the list of leased frame chunks (3D numpy arrays), checking that they are still valid"""
+        self.check()
+        return self._frames
+    def get_info(self):
+        """Get the list of leased frame info chunks (2D numpy arrays), or ``None`` if frame info was not requested"""
+        self.check()
+        return self._info
+    def copy(self):
+        """Check the lease validity and return a copy of the frames as a single 3D numpy array"""
+        frames=self.get_frames()
+        frames=np.concatenate(frames,axis=0) if frames else np.zeros((0,)+self.cam.get_data_dimensions(),dtype=self.cam._default_image_dtype)
+        self.check() # frames could be overwritten during copying
+        return frames
+    def release(self):
+        """Release the lease"""
+        if self._frames is not None:
+            self.cam.release_frames_lease(self)
+            self._frames=None
+            self._info=None
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.release()
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
 
 
 
@@ -791,6 +1135,34 @@ class ChunkBufferManager:
             jbuff=0
             ibuff=(ibuff+1)%len(self.chunks)
         return read_chunks
+    def get_frames_views(self, idx, nframes, dtype, shape):
+        """
+        Get frames data starting from `idx` and spanning `nframes` frames as numpy arrays pointing directly into the buffer.
+
+        `dtype` and `shape` specify a single buffer frame data type and shape.
+        Return a list of tuples ``(nread, chunk_array)``, where ``nread`` is the number of frames in the chunk,
+        and ``chunk_array`` is a numpy array with the shape ``(nread,)+shape`` (the arrays keep the buffers alive even after deallocation).
+        """
+        dtype=np.dtype(dtype)
+        count=int(np.prod(shape))
+        if count*dtype.itemsize>self.frame_size:
+            raise ValueError("frame shape {} and dtype {} exceed the frame size {}".format(shape,dtype,self.frame_size))
+        shape=tuple(shape)
+        strides=(self.frame_size,)+tuple(int(np.prod(shape[i+1:]))*dtype.itemsize for i in range(len(shape)))  # frames can be padded, so build strided views directly
+        idx%=self.nframes
+        ibuff=idx//self.frames_per_chunk
+        jbuff=idx%self.frames_per_chunk
+        views=[]
+        while nframes>0:
+            ch=self.chunks[ibuff]
+            chunk_frames=self.frames_per_chunk if ibuff<len(self.chunks)-1 else self.frames_per_chunk_last
+            nread=min(nframes,chunk_frames-jbuff)
+            data=np.ndarray(shape=(nread,)+shape,dtype=dtype,buffer=ch,offset=jbuff*self.frame_size,strides=strides)
+            views.append((nread,data))
+            nframes-=nread
+            jbuff=0
+            ibuff=(ibuff+1)%len(self.chunks)
+        return views
     def allocate(self, nframes, frame_size):
         """Allocate buffers for the given number of frames and frame size (in bytes)"""
         self.deallocate()
@@ -626,7 +626,7 @@ class UC480Camera(camera.IBinROICamera,camera.IExposureCamera):
             buff_size=self._default_acq_params.get("nframes",100)
         return {"nframes":buff_size}
 
-    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False):
+    def read_multiple_images(self, rng=None, peek=False, missing_frame="skip", return_info=False, out=None):
         """
         Read multiple images specified by `rng` (by default, all un-read images).
 
@@ -640,5 +640,6 @@ class UC480Camera(camera.IBinROICamera,camera.IExposureCamera):
         device timestamp (time from camera restart, in 0.1us steps), frame size, digital input state, and additional flags;
         if some frames are missing and ``missing_frame!="skip"``, the corresponding frame info is ``None``.
         Note that obtaining frame info might take about 2ms, so at high frame rates it will become a limiting factor.
+        If `out` is not ``None``, it is a 3D numpy array, into which the frames are written (see :meth:`.ICamera.read_multiple_images`).
         """
-        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info)
\ No newline at end of file
+        return super().read_multiple_images(rng=rng,peek=peek,missing_frame=missing_frame,return_info=return_info,out=out)
\ No newline at end of file
@@ -12,7 +12,7 @@ from ....core.gui.widgets.container import QWidgetContainer
 from ....core.gui.widgets.layout_manager import QLayoutManagedWidget
 from ....core.thread import controller
 from ....core.dataproc import utils as trace_utils
-from ....thread.stream.table_accum import TableAccumulator, TableAccumulatorThread
+from ....thread.stream.table_accum import TableAccumulator, TableAccumulatorThread, decimate_minmax
 
 import pyqtgraph
 
@@ -94,7 +94,7 @@ class TracePlotter(QLayoutManagedWidget):
         super().__init__(parent)
         self.name=None
         self.ctl=None
-    def setup(self, name=None, add_end_marker=False, update_only_on_visible=True):  # pylint: disable=arguments-differ
+    def setup(self, name=None, add_end_marker=False, update_only_on_visible=True, decimate=True):  # pylint: disable=arguments-differ
         """
         Setup the image view.
 
@@ -102,6 +102,9 @@ class TracePlotter(QLayoutManagedWidget):
             name (str): widget name
             add_end_marker (bool): if ``True``, point markers are added at the position of the last point (makes easier to track plotting progress).
             update_only_on_visible (bool): if ``True``, only update plot if the widget is visible.
+            decimate (bool): if ``True``, long traces are min/max-decimated down to about 2 points per horizontal pixel before plotting
+                (only the rows containing the minima and maxima of the plotted channels are kept, so the peaks are preserved,
+                but the plotting and the data transfer become much faster).
         """
         self.name=name
         super().setup(layout="vbox",no_margins=True)
@@ -118,6 +121,7 @@ class TracePlotter(QLayoutManagedWidget):
         self.data_src=None
         self.add_end_marker=add_end_marker
         self.update_only_on_visible=update_only_on_visible
+        self.decimate=decimate
         self.displayed=[]
         self.vlines=[]
         self.vmarks=[]
@@ -207,6 +211,12 @@ class TracePlotter(QLayoutManagedWidget):
         xaxis=self.channel_indices[self.ctl.channels_table.v["xaxis"]]
         order_by=self.channel_indices[self.ctl.channels_table.v["order_by"]]
         return [xaxis,order_by]+self.get_enabled_channels()
+    def get_max_points(self):
+        """Get maximal number of plotted points per trace (2 points per horizontal pixel), or ``None`` if decimation is disabled"""
+        if not self.decimate:
+            return None
+        width=int(self.plot_widget.plotItem.getViewBox().width())
+        return 2*width if width>0 else None
     def get_data_from_accum(self, table_accum):
         """
         Get data from the table accumulator, taking selected channels into account
@@ -215,7 +225,7 @@ class TracePlotter(QLayoutManagedWidget):
         """
         channels=self.get_required_channels()
         maxlen=self.ctl.plot_params_table.v["disp_last"] if self.ctl else None
-        return table_accum.get_data_dict(channels,maxlen=maxlen,fmt="columns")
+        return table_accum.get_data_dict(channels,maxlen=maxlen,max_points=self.get_max_points(),ref_channels=self.get_enabled_channels())
     def get_data_from_accum_thread(self, table_accum_thread):
         """
         Get data from the table accumulator thread, taking selected channels into account
@@ -224,7 +234,7 @@ class TracePlotter(QLayoutManagedWidget):
         """
         channels=self.get_required_channels()
         maxlen=self.ctl.plot_params_table.v["disp_last"] if self.ctl else None
-        return table_accum_thread.csi.get_data(channels,maxlen=maxlen,fmt="dict")
+        return table_accum_thread.csi.get_data(channels,maxlen=maxlen,fmt="dict",max_points=self.get_max_points(),ref_channels=self.get_enabled_channels())
 
 
     def setup_data_source(self, src=None):
@@ -289,6 +299,9 @@ class TracePlotter(QLayoutManagedWidget):
                 last_pts=[col[-1] for col in norm_data]
             else:
                 last_pts=None
+            max_points=self.get_max_points()
+            if max_points is not None:
+                norm_data=decimate_minmax(norm_data,max_points,ref=range(2,len(norm_data)))
             if order_by!=idx_column:
                 norm_data=np.column_stack(norm_data)
                 norm_data=trace_utils.sort_by(norm_data,x_column=1,stable=True)
@@ -318,11 +331,11 @@ class TracePlotterCombined(QWidgetContainer):
     The plotter can be accessed as ``.plt`` attribute, and the controller as ``.ctl`` attribute.
     The ``"sidebar"`` sublayout can be used to add additional elements if necessary.
     """
-    def setup(self, add_end_marker=False, update_only_on_visible=True, name=None):  # pylint: disable=arguments-differ
+    def setup(self, add_end_marker=False, update_only_on_visible=True, name=None, decimate=True):  # pylint: disable=arguments-differ
         super().setup(layout="hbox",no_margins=True,name=name)
         self.plt=TracePlotter(self)
         self.add_to_layout(self.plt)
-        self.plt.setup(name="plt",add_end_marker=add_end_marker,update_only_on_visible=update_only_on_visible)
+        self.plt.setup(name="plt",add_end_marker=add_end_marker,update_only_on_visible=update_only_on_visible,decimate=decimate)
         with self.using_new_sublayout("sidebar","vbox"):
             self.ctl=TracePlotterCtl(self)
             self.add_child("ctl",self.ctl)
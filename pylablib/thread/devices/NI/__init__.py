@@ -0,0 +1 @@
+from .daq import NIDAQStreamThread
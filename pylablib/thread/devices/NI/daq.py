@@ -0,0 +1,155 @@
+from ... import device_thread
+from ...stream import stream_manager, stream_message
+from ..generic.camera import RateCalculator
+from ....core.utils import dictionary
+
+
+class NIDAQStreamThread(device_thread.DeviceThread):
+    """
+    NI DAQ device thread with continuous hardware-timed streaming of the input channels.
+
+    The samples are read by the device in blocks into preallocated buffers (see :meth:`.NIDAQ.start_streaming`),
+    and all blocks available at each loop iteration are sent together as a single :class:`.DataBlockMessage`.
+
+    Device args:
+        - ``dev_name``: device name (e.g., ``"dev0"``)
+        - ``rate``: sampling rate
+        - ``buffer_size``: size of the device input buffer (in samples per channel)
+        - ``backend``: DAQmx backend (``"nidaqmx"`` or ``"simulated"``)
+        - ``index_channel``: name of the sample index channel added to the sent data (``None`` means that it is not added)
+        - ``misc``: additional parameters: ``"stream/block_time"`` (duration of a single block in seconds, 0.05 by default),
+            ``"stream/nbuffers"`` (number of block buffers, 2 by default), and ``"loop/max_blocks"`` (maximal number of blocks sent in a single message)
+
+    Variables:
+        - ``"status/acquisition"``: acquisition status; can be ``"stopped"`` or ``"acquiring"``
+        - ``"samples/read"``: number of read and sent samples
+        - ``"samples/rate"``: calculated sampling rate (averaged over 1 second)
+        - ``"samples/last_idx"``: index of the last sent sample
+        - ``"stream/status"``: streaming status dictionary (see :meth:`.NIDAQ.get_stream_status`)
+        - ``"stream/flow"``: flow control status of the registered consumers (see :meth:`.StreamFlowControl.get_status`), or ``None`` if there are none
+        - ``"parameters"``: device parameters (input channels and clock settings)
+
+    Multicasts:
+        - ``"stream/data"``: newly acquired samples as a :class:`.DataBlockMessage` with 1D numpy columns for all input channels and the sample index channel;
+            the streaming status (``"lag"``, ``"dropped"``, ``"overflows"``, and ``"lost"`` samples, see :meth:`.NIDAQ.get_stream_status`)
+            and the sampling ``"rate"`` are added to the message metainfo, along with ``"consumer_drops"`` if any flow control consumers dropped messages
+
+    External methods (deal with synchronization, so should be called directly):
+        - ``wait_acq``: wait until streaming is in a given state (started or stopped)
+        - ``wait_for_samples``: wait until the given number of new samples is sent
+
+    Commands:
+        - ``add_voltage_input``, ``add_counter_input``, ``add_clock_period_input``, ``add_digital_input``, ``setup_clock``: set up the inputs and the clock
+            (same as the corresponding device methods; the streaming is stopped if it is running)
+        - ``acq_start``: start the streaming
+        - ``acq_stop``: stop the streaming
+    """
+    parameter_variables={"input_channels","voltage_input_parameters","counter_input_parameters","digital_input_parameters","clock_cfg"}
+    def connect_device(self):
+        with self.using_devclass("NI.daq.NIDAQ",host=self.remote) as cls:
+            self.device=cls(**self.daq_kwargs)
+    def setup_task(self, dev_name="dev0", rate=1E3, buffer_size=1E5, backend="nidaqmx", index_channel="idx", remote=None, misc=None):  # pylint: disable=arguments-differ
+        self.daq_kwargs={"dev_name":dev_name,"rate":rate,"buffer_size":buffer_size,"backend":backend}
+        self.remote=remote
+        self.misc=dictionary.Dictionary(misc)
+        self.index_channel=index_channel
+        self.data_src=stream_manager.StreamSource(stream_message.DataBlockMessage,sn=self.name)
+        self.data_flow=stream_manager.StreamFlowControl(self,self.data_src)
+        self.rate_calc=RateCalculator(1.)
+        self.open()
+        for name in ["add_voltage_input","add_counter_input","add_clock_period_input","add_digital_input","setup_clock"]:
+            self._add_setup_command(name)
+        self.add_job("update_parameters",self.update_parameters,2.)
+        self.add_command("acq_start",self.acq_start)
+        self.add_command("acq_stop",self.acq_stop)
+        self.add_batch_job("acq_loop",self.acq_loop,self.acq_finalize)
+        self.v["stream/sn"]=self.name
+        self.acq_finalize()
+    def _add_setup_command(self, name):
+        def command(*args, **kwargs):
+            if self.open():
+                self.acq_stop()
+                getattr(self.device,name)(*args,**kwargs)
+                self.update_parameters()
+        self.add_command(name,command)
+
+    def _reset_counters(self):
+        self.v["samples/read"]=0
+        self.v["samples/rate"]=0
+        self.v["samples/last_idx"]=-1
+        self.v["stream/status"]=None
+        self.v["stream/flow"]=None
+        self.rate_calc.reset()
+        self.data_src.next_session()
+        self.v["stream"]=self.data_src.get_ids(as_dict=True)
+    def _get_metainfo(self, status):
+        metainfo={"rate":self.device.get_clock_parameters()[0],"lag":status.queued*self._block_size+status.backlog,
+                    "dropped":status.dropped,"overflows":status.overflows,"lost":status.lost}
+        drops=self.data_flow.get_drops()
+        if drops:
+            metainfo["consumer_drops"]=drops
+        return metainfo
+    def _read_send_data(self, timeout=0.):
+        """Read and send the available streamed samples; return the number of sent samples"""
+        indices,columns=self.device.read_stream(timeout=timeout,max_blocks=self.misc.get("loop/max_blocks"))
+        indices=self.rpyc_obtain(indices)
+        if not len(indices):
+            return 0
+        data=dict(zip(self.device.get_input_channels(include=self._include),self.rpyc_obtain(columns)))
+        if self.index_channel is not None:
+            data[self.index_channel]=indices
+        status=self.device.get_stream_status()
+        msg=self.data_src.build_message(data,source="daq",metainfo=self._get_metainfo(status),sn=self.name)
+        self.send_multicast("any","stream/data",msg)
+        self.v["samples/read"]+=len(indices)
+        self.v["samples/last_idx"]=int(indices[-1])
+        self.v["stream/status"]=status._asdict()
+        return len(indices)
+
+    def acq_start(self, include=("ai","ci","di")):
+        """Start the streaming of the given channel types (see :meth:`.NIDAQ.read`)"""
+        if self.open():
+            self.acq_stop()
+            self.start_batch_job("acq_loop",0,include=include)
+    def acq_stop(self):
+        """Stop the streaming"""
+        self.stop_batch_job("acq_loop")
+    def acq_loop(self, include=("ai","ci","di")):
+        """Streaming loop"""
+        self._include=include
+        rate=self.device.get_clock_parameters()[0]
+        self._block_size=max(int(rate*self.misc.get("stream/block_time",0.05)),1)
+        self.device.start_streaming(self._block_size,nbuffers=self.misc.get("stream/nbuffers",2),include=include)
+        self.v["status/acquisition"]="acquiring"
+        yield
+        while True:
+            self._read_send_data(timeout=0.1)
+            self.v["samples/rate"]=self.rate_calc.update(self.v["samples/read"])
+            self.v["stream/flow"]=self.data_flow.get_status() or None
+            yield
+    def acq_finalize(self, include=None):  # pylint: disable=unused-argument
+        """Finalize the streaming loop"""
+        if self.device is not None and self.device.is_streaming():
+            self._read_send_data()
+            self.device.stop_streaming()
+        self._reset_counters()
+        self.v["status/acquisition"]="stopped"
+
+    def wait_acq(self, state="acquiring"):
+        """
+        Wait until streaming is in the given state.
+
+        State can be ``"stopped"`` (acquisition stopped) or ``"acquiring"`` (acquisition is in progress)
+        """
+        self.sync_variable("status/acquisition",state)
+    def wait_for_samples(self, n=1, start=None, timeout=None):
+        """
+        Wait until `n` samples have been sent starting from the `start` (current moment by default).
+
+        If `timeout` is defined, it is the waiting timeout; if it's passed, raise :exc:`.threadprop.TimeoutThreadError`.
+        Should only be called from an external thread. The streaming must be running for this method to finish.
+        """
+        if start is None:
+            start=self.v["samples/read"]
+        self.sync_variable("samples/read",lambda nread: nread>=start+n,timeout=timeout)
+        return self.v["samples/last_idx"]
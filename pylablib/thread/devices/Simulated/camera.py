@@ -0,0 +1,25 @@
+from ..generic import camera
+
+
+class SimulatedCameraThread(camera.GenericCameraThread):
+    """
+    Simulated camera device thread.
+
+    See :class:`.camera.GenericCameraThread`.
+    """
+    parameter_variables=camera.GenericCameraThread.parameter_variables|{
+            "exposure","frame_period","detector_size","buffer_size","roi_limits","roi","drop_rate","status_line"}
+    parameter_freeze_running={"exposure","frame_period","detector_size","roi_limits","roi"}
+    _frameinfo_include_fields={"frame_index","framestamp","timestamp"}
+    def connect_device(self):
+        with self.using_devclass("Simulated.SimulatedCamera",host=self.remote) as cls:
+            self.device=cls(**self.cam_kwargs)
+    def _get_metainfo(self, frames, indices, infos):
+        metainfo=super()._get_metainfo(frames,indices,infos)
+        if self.device.is_status_line_enabled():
+            metainfo["status_line"]=("simulated",(0,0,0,3))
+        return metainfo
+    def setup_task(self, remote=None, misc=None, **kwargs):  # pylint: disable=arguments-differ
+        """Setup the thread; `kwargs` are passed to the :class:`.SimulatedCamera` constructor"""
+        self.cam_kwargs=kwargs
+        super().setup_task(remote=remote,misc=misc)
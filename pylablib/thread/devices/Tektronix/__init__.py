@@ -0,0 +1 @@
+from .base import TektronixScopeThread
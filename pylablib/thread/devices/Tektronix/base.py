@@ -0,0 +1,142 @@
+from ... import device_thread
+from ...stream import stream_manager, stream_message
+from ..generic.camera import RateCalculator
+from ....core.utils import dictionary
+
+
+class TektronixScopeThread(device_thread.DeviceThread):
+    """
+    Tektronix oscilloscope device thread with continuous sweeps streaming.
+
+    The sweeps are read using the cached preambles, which are re-requested only after the relevant settings are changed
+    (see :meth:`.ITektronixScope.read_multiple_sweeps`), and all channels of a single sweep are sent together as a :class:`.DataBlockMessage`.
+
+    Device args:
+        - ``addr``: device address; usually a VISA address string
+        - ``model``: oscilloscope class name (``"TDS2000"`` or ``"DPO2000"``)
+        - ``nchannels``: number of channels (``"auto"`` means autodetection)
+        - ``time_channel``: name of the time axis channel added to the sent data (``None`` means that it is not added)
+        - ``misc``: additional parameters: ``"loop/period"`` (period of the acquisition loop; 0 by default)
+
+    Variables:
+        - ``"status/acquisition"``: acquisition status; can be ``"stopped"`` or ``"acquiring"``
+        - ``"sweeps/read"``: number of read and sent sweeps
+        - ``"sweeps/rate"``: calculated sweeps rate (averaged over 1 second)
+        - ``"stream/flow"``: flow control status of the registered consumers (see :meth:`.StreamFlowControl.get_status`), or ``None`` if there are none
+        - ``"parameters"``: device settings
+
+    Multicasts:
+        - ``"stream/data"``: newly read sweep as a :class:`.DataBlockMessage` with 1D numpy columns for all read channels (named as ``"CH1"``, ``"CH2"``, etc.)
+            and the time axis channel; the sweep index ``"sweep_idx"`` is added to the message metainfo,
+            along with ``"consumer_drops"`` if any flow control consumers dropped messages
+
+    External methods (deal with synchronization, so should be called directly):
+        - ``wait_acq``: wait until acquisition is in a given state (started or stopped)
+        - ``wait_for_sweeps``: wait until the given number of new sweeps is sent
+
+    Commands:
+        - ``acq_start``: start the acquisition
+        - ``acq_stop``: stop the acquisition
+    """
+    def connect_device(self):
+        with self.using_devclass("Tektronix.{}".format(self.model),host=self.remote) as cls:
+            self.device=cls(self.addr,nchannels=self.nchannels)
+    def setup_task(self, addr, model="TDS2000", nchannels="auto", time_channel="t", remote=None, misc=None):  # pylint: disable=arguments-differ
+        self.addr=addr
+        self.model=model
+        self.nchannels=nchannels
+        self.remote=remote
+        self.misc=dictionary.Dictionary(misc)
+        self.time_channel=time_channel
+        self.data_src=stream_manager.StreamSource(stream_message.DataBlockMessage,sn=self.name)
+        self.data_flow=stream_manager.StreamFlowControl(self,self.data_src)
+        self.rate_calc=RateCalculator(1.)
+        self.open()
+        self.add_job("update_parameters",self.update_parameters,2.)
+        self.add_command("acq_start",self.acq_start)
+        self.add_command("acq_stop",self.acq_stop)
+        self.add_batch_job("acq_loop",self.acq_loop,self.acq_finalize)
+        self.v["stream/sn"]=self.name
+        self._reset_counters()
+        self.v["status/acquisition"]="stopped"
+
+    def _reset_counters(self):
+        self.v["sweeps/read"]=0
+        self.v["sweeps/rate"]=0
+        self.v["stream/flow"]=None
+        self.rate_calc.reset()
+        self.data_src.next_session()
+        self.v["stream"]=self.data_src.get_ids(as_dict=True)
+    def _read_send_sweeps(self, channels):
+        """Read and send the sweeps from the given channels"""
+        sweeps=self.rpyc_obtain(self.device.read_multiple_sweeps(channels,wfmpres="cached"))
+        data={}
+        if self.time_channel is not None:
+            data[self.time_channel]=sweeps[0][:,0]
+        data.update({ch:sw[:,1] for ch,sw in zip(channels,sweeps)})
+        metainfo={"sweep_idx":self.v["sweeps/read"]}
+        drops=self.data_flow.get_drops()
+        if drops:
+            metainfo["consumer_drops"]=drops
+        msg=self.data_src.build_message(data,source="scope",metainfo=metainfo,sn=self.name)
+        self.send_multicast("any","stream/data",msg)
+        self.v["sweeps/read"]+=1
+
+    def acq_start(self, channels="all", single=True, software_trigger=False):
+        """
+        Start the acquisition.
+
+        `channels` is a list of read channels (``"all"`` means all main channels).
+        If ``single==True``, start a single acquisition before each readout, so that all sweeps are distinct and the channels within a sweep are synchronized;
+        otherwise, set the oscilloscope into the continuous acquisition mode and read the current sweeps as fast as possible.
+        If ``software_trigger==True``, send the software trigger in the single acquisition mode (see :meth:`.ITektronixScope.grab_single`).
+        """
+        if self.open():
+            self.acq_stop()
+            self.start_batch_job("acq_loop",self.misc.get("loop/period",0.),channels=channels,single=single,software_trigger=software_trigger)
+    def acq_stop(self):
+        """Stop the acquisition"""
+        self.stop_batch_job("acq_loop")
+    def acq_loop(self, channels="all", single=True, software_trigger=False):
+        """Acquisition loop"""
+        if channels=="all":
+            channels=self.device.get_channels(only_main=True)
+        channels=[self.device.normalize_channel_name(ch) for ch in channels]
+        if not single:
+            self.device.grab_continuous()
+        self.v["status/acquisition"]="acquiring"
+        yield
+        while True:
+            if single:
+                self.device.grab_single(wait=False,software_trigger=software_trigger)
+                while self.device.is_grabbing():
+                    yield
+            self._read_send_sweeps(channels)
+            self.v["sweeps/rate"]=self.rate_calc.update(self.v["sweeps/read"])
+            self.v["stream/flow"]=self.data_flow.get_status() or None
+            yield
+    def acq_finalize(self, channels=None, single=True, software_trigger=False):  # pylint: disable=unused-argument
+        """Finalize the acquisition loop"""
+        if self.device is not None and self.device.is_opened():
+            self.device.stop_grabbing()
+        self._reset_counters()
+        self.v["status/acquisition"]="stopped"
+
+    def wait_acq(self, state="acquiring"):
+        """
+        Wait until acquisition is in the given state.
+
+        State can be ``"stopped"`` (acquisition stopped) or ``"acquiring"`` (acquisition is in progress)
+        """
+        self.sync_variable("status/acquisition",state)
+    def wait_for_sweeps(self, n=1, start=None, timeout=None):
+        """
+        Wait until `n` sweeps have been sent starting from the `start` (current moment by default).
+
+        If `timeout` is defined, it is the waiting timeout; if it's passed, raise :exc:`.threadprop.TimeoutThreadError`.
+        Should only be called from an external thread. The acquisition must be running for this method to finish.
+        """
+        if start is None:
+            start=self.v["sweeps/read"]
+        self.sync_variable("sweeps/read",lambda nread: nread>=start+n,timeout=timeout)
+        return self.v["sweeps/read"]
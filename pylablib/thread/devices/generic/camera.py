@@ -1,6 +1,6 @@
 from ... import device_thread
-from ...stream import stream_manager, stream_message
-from ....core.utils import dictionary, functions as func_utils
+from ...stream import stream_manager, stream_message, frame_pool
+from ....core.utils import dictionary, funcargparse, functions as func_utils
 from ....devices.interface import camera as cam_utils
 
 import numpy as np
@@ -63,11 +63,22 @@ class GenericCameraThread(device_thread.DeviceThread):
         - ``"frames/fps"``: calculated frame streaming fps (averaged over 1 second)
         - ``"frames/last_idx"``: index of the last acquired frame
         - ``"frames/last_frame"``: last acquired frame
+        - ``"frames/buffer_pool"``: statistics of the frame buffer pool used to build the sent frame chunks (see :meth:`.FrameBufferPool.get_stats`)
+        - ``"frames/decimated"``: number of frames dropped before sending because of the lack of consumer credits (only with ``"decimate"`` flow policy)
+        - ``"frames/flow"``: flow control status of the registered consumers (see :meth:`.StreamFlowControl.get_status`), or ``None`` if there are none
         - ``"parameters"``: camera settings
 
     Multicasts:
         - ``"frames/new"``: newly acquired frames; a list of tuples ``(idx, frame)`` of frame index and frame value (except for :class:`IMAQPhotonFocusCameraThread`)
 
+    Flow control:
+        Consumers can register for the credit-based flow control (using :class:`.StreamCreditSender` or :meth:`.IStreamReceiver.enable_flow_control`)
+        to advertise their capacity and acknowledge processed messages. The behavior when some consumer is out of credits
+        is defined by ``"stream/flow_policy"`` misc parameter: ``"report"`` (send the frames anyway), ``"coalesce"`` (keep the frames in the camera buffer
+        for at most ``"stream/max_hold"`` seconds, so that they are sent later in a single larger message), or ``"decimate"`` (drop the frames before sending).
+        In all cases, the number of messages dropped by each consumer and the number of frames decimated before sending
+        are added to the message metainfo as ``"consumer_drops"`` and ``"source_decimated"`` respectively.
+
     External methods (deal with synchronization, so should be called directly):
         - ``wait_acq``: wait until streaming is in a given state (started or stopped)
         - ``wait_for_next_frame``: wait until a new frame is acquired and return it
@@ -94,7 +105,13 @@ class GenericCameraThread(device_thread.DeviceThread):
         self.frames_src=stream_manager.StreamSource(stream_message.FramesMessage,sn=self.name)
         self.remote=remote
         self._use_fastbuff=False
-        self._max_chunk_size_bytes=2**20
+        self._max_chunk_size_bytes=self.misc.get("buffer/max_chunk_size",2**20)
+        self._frame_pool=frame_pool.get_default_pool()
+        self.frames_flow=stream_manager.StreamFlowControl(self,self.frames_src)
+        self._last_send_time=time.time()
+        self.v["frames/decimated"]=0
+        self.v["frames/flow"]=None
+        self.set_flow_policy(self.misc.get("stream/flow_policy","report"),self.misc.get("stream/max_hold",0.5))
         self._acquisition_loops={}
         self._running_loop=None
         self.min_poll_period=self.misc.get("loop/min_poll_period",self._default_min_poll_period)
@@ -108,6 +125,7 @@ class GenericCameraThread(device_thread.DeviceThread):
         self.add_command("remove_acq_loop",self.remove_acq_loop)
         self.add_command("acq_start",self.acq_start)
         self.add_command("acq_stop",self.acq_stop)
+        self.add_command("set_flow_policy",self.set_flow_policy)
         self.add_batch_job("acq_loop",self.acq_loop,self.acq_finalize)
         self.add_acq_loop("regular",self.acq_loop_regular,self.acq_finalize_regular)
         self.v["stream/sn"]=self.name
@@ -182,6 +200,9 @@ class GenericCameraThread(device_thread.DeviceThread):
         self.v["frames/buffer_filled"]=0
         self.v["frames/fps"]=0
         self.v["frames/last_idx"]=0
+        self.v["frames/buffer_pool"]=self._frame_pool.get_stats()
+        self.v["frames/decimated"]=0
+        self._last_send_time=time.time()
         self.fps_calc.reset()
         self.frames_src.next_session()
         self.v["stream"]=self.frames_src.get_ids(as_dict=True)
@@ -224,6 +245,10 @@ class GenericCameraThread(device_thread.DeviceThread):
         if self.v["parameters/add_info"]:
             fields=self.v["parameters/frame_info_fields"]
             metainfo["frame_info_fields"]=fields[:1]+["acq_timestamp_ms","width","height"]+fields[1:]
+        drops=self.frames_flow.get_drops()
+        if drops or self.v["frames/decimated"]:
+            metainfo["consumer_drops"]=drops
+            metainfo["source_decimated"]=self.v["frames/decimated"]
         return metainfo
     def _build_chunks(self, frames, infos, max_size=None):
         if infos is not None and not all(isinstance(inf,np.ndarray) for inf in infos):
@@ -244,7 +269,7 @@ class GenericCameraThread(device_thread.DeviceThread):
             curr_size+=f.nbytes
         if s is not None:
             chunks.append((s,len(frames)))
-        frames=[np.asarray(frames[s:e]) for s,e in chunks]
+        frames=[self._frame_pool.stack(frames[s:e]) for s,e in chunks]
         if infos is not None:
             infos=[np.asarray(infos[s:e]) for s,e in chunks]
         return frames,infos
@@ -252,11 +277,46 @@ class GenericCameraThread(device_thread.DeviceThread):
         if infos is None:
             return None
         timestamp=int(time.time()*1E3)
-        infos=[np.column_stack([i[:,0],[timestamp]*len(i),[f.shape[-1]]*len(i),[f.shape[-2]]*len(i),i[:,1:]]) for i,f in zip(infos,frames)]
+        infos=[i[None] if i.ndim==1 else i for i in infos]
+        ncols=infos[0].shape[1] if infos else 0
+        if any(i.shape[1]!=ncols for i in infos):
+            infos=[np.column_stack([i[:,0],[timestamp]*len(i),[f.shape[-1]]*len(i),[f.shape[-2]]*len(i),i[:,1:]]) for i,f in zip(infos,frames)]
+        else: # fill a single preallocated array for all chunks, and return its views
+            dtype=np.result_type(*[i.dtype for i in infos],np.int64) if infos else np.int64
+            expanded=np.empty((sum(len(i) for i in infos),ncols+3),dtype=dtype)
+            expanded[:,1]=timestamp
+            pos=0
+            chunks=[]
+            for i,f in zip(infos,frames):
+                e=expanded[pos:pos+len(i)]
+                e[:,0]=i[:,0]
+                e[:,2]=f.shape[-1]
+                e[:,3]=f.shape[-2]
+                e[:,4:]=i[:,1:]
+                chunks.append(e)
+                pos+=len(i)
+            infos=chunks
         infos=[i[0] if f.ndim==2 else i for i,f in zip(infos,frames)]
         return infos
-    def _read_send_images(self):
-        """Read and send new available images"""
+    def set_flow_policy(self, policy="report", max_hold=None):
+        """
+        Set the behavior when some flow control consumer is out of credits.
+
+        `policy` can be ``"report"`` (send the frames anyway), ``"coalesce"`` (keep the frames in the camera buffer for at most `max_hold` seconds),
+        or ``"decimate"`` (drop the frames before sending). If `max_hold` is ``None``, keep the current value.
+        """
+        funcargparse.check_parameter_range(policy,"policy",["report","coalesce","decimate"])
+        self._flow_policy=policy
+        if max_hold is not None:
+            self._flow_max_hold=max_hold
+    def _read_send_images(self, flow_control=True):
+        """
+        Read and send new available images.
+
+        If ``flow_control==False``, ignore the flow control policy and send all available images.
+        """
+        if flow_control and self._flow_policy=="coalesce" and time.time()<self._last_send_time+self._flow_max_hold and not self.frames_flow.can_send():
+            return 0
         rng=self.device.get_new_images_range()
         nsent=0
         fastbuff_kwargs={"fastbuff":True} if self._use_fastbuff else {}
@@ -290,7 +350,11 @@ class GenericCameraThread(device_thread.DeviceThread):
             self.v["frames/buffer_filled"]=rng[1]-rng[0]
             self.v["frames/last_idx"]=rng[1]-1
             nsent=len(frames)
-            if frames:
+            if frames and flow_control and self._flow_policy=="decimate" and not self.frames_flow.can_send():
+                self.v["frames/decimated"]+=nread
+                nsent=0
+            elif frames:
+                self._last_send_time=time.time()
                 msg=self.frames_src.build_message(frames,indices,infos,source="camera",metainfo=self._get_metainfo(frames,indices,infos),sn=self.name)
                 self.send_multicast("any","frames/new",msg)
                 self.v["frames/last_frame"]=frames[-1] if frames[-1].ndim==2 else frames[-1][-1]
@@ -359,11 +423,13 @@ class GenericCameraThread(device_thread.DeviceThread):
             if dt<self.min_poll_period:
                 self.sleep(self.min_poll_period-dt)
             self.v["frames/fps"]=self.fps_calc.update(self.v["frames/acquired"])
+            self.v["frames/buffer_pool"]=self._frame_pool.get_stats()
+            self.v["frames/flow"]=self.frames_flow.get_status() or None
             yield
     def acq_finalize_regular(self):
         """Finalize regular acquisition loop"""
         if self.device:
-            self._read_send_images()
+            self._read_send_images(flow_control=False)
             self.device.stop_acquisition()
         self._reset_frame_counters()
         self.v["frames/last_frame"]=None
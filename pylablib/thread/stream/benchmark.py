@@ -0,0 +1,284 @@
+"""
+Benchmarking tools for the frames streaming pipelines.
+
+Set up a chain of a simulated camera thread, an optional frame processing thread, and probe threads,
+run it for a given time, and collect the statistics (frame rates, dropped frames, and latencies of each stage).
+Can be run from the command line as ``python -m pylablib.thread.stream.benchmark``.
+"""
+
+from ...core.thread import controller, threadprop
+from ...core.utils import funcargparse
+from ...core.gui import QtWidgets
+from ..devices.Simulated import SimulatedCameraThread
+from . import frameproc
+
+import numpy as np
+import time
+import json
+import csv
+import itertools
+import os
+
+
+
+
+class FramesProbeThread(controller.QTaskThread):
+    """
+    Frames probe thread: receives frame messages and records their arrival statistics.
+
+    Only stores message indices and timings, so it introduces minimal processing overhead.
+
+    Setup args:
+        - ``src``: name of the source thread
+        - ``tag``: receiving multicast tag
+        - ``limit_queue``: maximal number of the input multicasts in the queue; by default, no limit
+
+    Variables:
+        - ``frames/received``: number of received frames since the last reset
+        - ``frames/missing``: number of frames missing in the received stream (determined from the frame indices)
+        - ``messages/received``: number of received messages since the last reset
+
+    Commands:
+        - ``reset``: reset the recorded statistics
+        - ``get_records``: get the recorded statistics
+    """
+    def setup_task(self, src, tag, limit_queue=0):  # pylint: disable=arguments-differ
+        self.subscribe_commsync(self.process_input_frames,srcs=src,tags=tag,limit_queue=limit_queue)
+        self.add_command("reset")
+        self.add_command("get_records")
+        self.reset()
+
+    def reset(self):
+        """Reset the recorded statistics"""
+        self._records=[]
+        self._last_index=None
+        self.v["frames/received"]=0
+        self.v["frames/missing"]=0
+        self.v["messages/received"]=0
+    def get_records(self):
+        """
+        Get the recorded statistics.
+
+        Return a 2D numpy array with one row per received message and columns ``(first_index, last_index, nframes, step, recv_time, creation_time)``.
+        """
+        return np.array(self._records,dtype="f8").reshape((-1,6))
+    def process_input_frames(self, src, tag, msg):  # pylint: disable=unused-argument
+        """Process multicast message with input frames"""
+        t=time.time()
+        nframes=msg.nframes()
+        if not nframes:
+            return
+        self.v["frames/missing"]+=max(msg.get_missing_frames_number(self._last_index),0)
+        self._last_index=msg.last_frame_index()
+        self._records.append((msg.first_frame_index(),self._last_index,nframes,msg.mi.step,t,msg.mi.creation_time))
+        self.v["frames/received"]+=nframes
+        self.v["messages/received"]+=1
+
+
+
+
+def _get_stream_stats(records, duration):
+    """Get the stream statistics from the probe records"""
+    if not len(records):
+        return {"frames":0,"messages":0,"fps":0.,"expected_frames":0,"dropped_frames":0,"dropped_fraction":0.}
+    nframes=int(records[:,2].sum())
+    step=records[-1,3]
+    expected=int((records[-1,1]-records[0,0])//step+1)
+    dropped=max(expected-nframes,0)
+    return {"frames":nframes,"messages":len(records),"fps":nframes/duration,
+            "expected_frames":expected,"dropped_frames":dropped,"dropped_fraction":dropped/expected}
+def _get_latency_stats(latencies, prefix):
+    latencies=np.asarray(latencies)
+    if not len(latencies):
+        return {prefix+k:None for k in ["mean","median","p90","p99","max"]}
+    return {prefix+"mean":float(np.mean(latencies)),prefix+"median":float(np.median(latencies)),
+            prefix+"p90":float(np.percentile(latencies,90)),prefix+"p99":float(np.percentile(latencies,99)),prefix+"max":float(np.max(latencies))}
+def _get_stage_latencies(src_records, dst_records):
+    """
+    Get the latencies between the source and the destination stages.
+
+    For each destination message, find the source message containing its last frame, and take the difference of the receiving times.
+    """
+    if not (len(src_records) and len(dst_records)):
+        return []
+    pos=np.searchsorted(src_records[:,1],dst_records[:,1],side="left")
+    valid=pos<len(src_records)
+    pos,dst_records=pos[valid],dst_records[valid]
+    matched=src_records[pos,0]<=dst_records[:,1]
+    return dst_records[matched,4]-src_records[pos[matched],4]
+
+
+
+_stage_classes={"binning":frameproc.FrameBinningThread,"background":frameproc.BackgroundSubtractionThread,"slowdown":frameproc.FrameSlowdownThread}
+def _setup_stage(stage, thread, params):
+    if stage=="binning":
+        thread.cs.setup_binning(params.get("spat_bin",(2,2)),params.get("spat_bin_mode","mean"),params.get("time_bin",1),params.get("time_bin_mode","mean"))
+        thread.cs.setup_workers(params.get("nworkers",1))
+        thread.cs.enable_binning(True)
+    elif stage=="background":
+        thread.cs.setup_running_subtraction(params.get("n",5),params.get("mode","mean"))
+        thread.cs.setup_subtraction_method("running",enabled=True)
+    elif stage=="slowdown":
+        if "target_fps" in params:
+            thread.cs.setup_slowdown(params["target_fps"],params.get("buffer_size",1000))
+            thread.cs.enable(True)
+
+_app=None
+def ensure_app():
+    """Make sure that the Qt application and the main thread controller exist (create them if necessary), and return the main controller"""
+    global _app
+    if QtWidgets.QApplication.instance() is None:
+        _app=QtWidgets.QApplication([])
+    return controller.get_gui_controller()
+
+def run_benchmark(frame_size=(512,512), chunk_size=2**20, limit_queue=None, stage=None, stage_params=None,
+        frame_period=1E-3, dtype="<u2", duration=5., warmup=1., fastbuff=False, buffer_time=0.2, poll_period=None, name_prefix=None):
+    """
+    Run a single streaming benchmark.
+
+    The pipeline consists of a :class:`.SimulatedCameraThread`, an optional processing thread, and two :class:`FramesProbeThread` probes,
+    one subscribed to the camera output, and one to the processing thread output (if it is present).
+    Should be called from the thread with a controller (e.g., the main thread after calling :func:`ensure_app`).
+
+    Args:
+        frame_size: frame size ``(width, height)``
+        chunk_size: maximal size of frames chunk in bytes (sets the camera thread ``_max_chunk_size_bytes``; only used if ``fastbuff==False``)
+        limit_queue: input queue limit of the processing thread (``None`` means the thread default)
+        stage: processing stage; can be ``None`` (no processing), ``"binning"`` (:class:`.FrameBinningThread`),
+            ``"background"`` (:class:`.BackgroundSubtractionThread`), or ``"slowdown"`` (:class:`.FrameSlowdownThread`)
+        stage_params: additional parameters of the processing stage: ``"spat_bin"``, ``"spat_bin_mode"``, ``"time_bin"``, ``"time_bin_mode"`` and ``"nworkers"`` for binning,
+            ``"n"`` and ``"mode"`` for the running background subtraction, ``"target_fps"`` and ``"buffer_size"`` for the slowdown (by default, it passes frames through)
+        frame_period: simulated camera frame period
+        dtype: simulated camera frame dtype
+        duration: measurement duration (in seconds)
+        warmup: time between the acquisition start and the beginning of the measurement
+        fastbuff: if ``True``, use the fast buffer camera readout, where the chunks are determined by the camera buffer rather than `chunk_size`
+        buffer_time: minimal duration of the camera frame buffer (in seconds)
+        poll_period: camera thread minimal polling period (``None`` means the thread default)
+        name_prefix: prefix of the created threads names (should be unique for each run, since thread names can not be reused); by default, generate a new unique name
+
+    Return a dictionary with the benchmark parameters and the results:
+    ``"camera_*"`` values describe the camera output stream, ``"output_*"`` values describe the final (processing stage output) stream,
+    ``"latency_*"`` values describe the time (in seconds) between the camera message creation and its reception at the output,
+    and ``"stage_latency_*"`` values describe the time between the reception of the same frame at the camera and the output probes.
+    """
+    if stage is not None:
+        funcargparse.check_parameter_range(stage,"stage",_stage_classes)
+    stage_params=stage_params or {}
+    ctl=ensure_app()
+    name_prefix=name_prefix or threadprop.thread_uids("benchmark")
+    cam_name=name_prefix+"_camera"
+    misc={"buffer/max_chunk_size":chunk_size,"buffer/min_size/time":buffer_time}
+    if poll_period is not None:
+        misc["loop/min_poll_period"]=poll_period
+    threads=[SimulatedCameraThread(cam_name,kwargs={"detector_size":frame_size,"frame_period":frame_period,"dtype":dtype,"misc":misc})]
+    src_probe=FramesProbeThread(name_prefix+"_probe_camera",args=(cam_name,"frames/new"))
+    threads.append(src_probe)
+    dst_probe=src_probe
+    if stage is not None:
+        stage_name=name_prefix+"_"+stage
+        stage_kwargs={} if limit_queue is None else {"limit_queue":limit_queue}
+        stage_thread=_stage_classes[stage](stage_name,args=(cam_name,"frames/new","frames/processed"),kwargs=stage_kwargs)
+        dst_probe=FramesProbeThread(name_prefix+"_probe_output",args=(stage_name,"frames/processed"))
+        threads+=[stage_thread,dst_probe]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            controller.sync_controller(t.name,"run",timeout=10.)
+        cam=threads[0]
+        cam.cs.apply_parameters({"fastbuff":fastbuff})
+        if stage is not None:
+            _setup_stage(stage,stage_thread,stage_params)
+        cam.cs.acq_start()
+        ctl.sleep(warmup)
+        for p in {src_probe,dst_probe}:
+            p.cs.reset()
+        acquired=cam.v["frames/acquired"]
+        t0=time.time()
+        ctl.sleep(duration)
+        src_records=src_probe.cs.get_records()
+        dst_records=dst_probe.cs.get_records()
+        acquired=cam.v["frames/acquired"]-acquired
+        duration=time.time()-t0
+        cam.cs.acq_stop()
+    finally:
+        for t in threads[::-1]:
+            t.stop(sync=True)
+    result={"frame_width":frame_size[0],"frame_height":frame_size[1],"dtype":dtype,"frame_period":frame_period,
+            "chunk_size":chunk_size,"limit_queue":limit_queue,"stage":stage or "none","fastbuff":fastbuff,"duration":duration,
+            "camera_acquired_frames":acquired,"camera_acquired_fps":acquired/duration}
+    src_stats=_get_stream_stats(src_records,duration)
+    result.update({"camera_"+k:v for k,v in src_stats.items()})
+    result["camera_mbps"]=src_stats["fps"]*frame_size[0]*frame_size[1]*np.dtype(dtype).itemsize/2**20
+    result.update({"output_"+k:v for k,v in _get_stream_stats(dst_records,duration).items()})
+    result.update(_get_latency_stats(dst_records[:,4]-dst_records[:,5],"latency_"))
+    result.update(_get_latency_stats(_get_stage_latencies(src_records,dst_records),"stage_latency_"))
+    return result
+
+
+def run_sweep(frame_sizes=((512,512),), chunk_sizes=(2**20,), limit_queues=(None,), stages=(None,), **kwargs):
+    """
+    Run benchmarks for all combinations of the given frame sizes, chunk sizes, queue limits, and processing stages.
+
+    `kwargs` are passed to :func:`run_benchmark`.
+    Return list of result dictionaries.
+    """
+    results=[]
+    for frame_size,chunk_size,limit_queue,stage in itertools.product(frame_sizes,chunk_sizes,limit_queues,stages):
+        results.append(run_benchmark(frame_size=frame_size,chunk_size=chunk_size,limit_queue=limit_queue,stage=stage,**kwargs))
+    return results
+
+
+def save_results(results, path, fmt=None):
+    """
+    Save the benchmark results to a file.
+
+    `fmt` can be ``"json"`` or ``"csv"``; by default, determined by the file extension (``"json"`` if it is not recognized).
+    """
+    if fmt is None:
+        fmt="csv" if os.path.splitext(path)[1].lower()==".csv" else "json"
+    funcargparse.check_parameter_range(fmt,"fmt",["json","csv"])
+    if fmt=="json":
+        with open(path,"w") as f:
+            json.dump(results,f,indent=2)
+    else:
+        fields=list(results[0]) if results else []
+        with open(path,"w",newline="") as f:
+            writer=csv.DictWriter(f,fields)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+
+
+def _parse_frame_size(s):
+    w,_,h=s.partition("x")
+    return int(w),int(h or w)
+def _parse_optional_int(s):
+    return None if s.lower()=="none" else int(s)
+def main(argv=None):
+    import argparse
+    parser=argparse.ArgumentParser(description="streaming pipeline benchmark")
+    parser.add_argument("--frame-size",nargs="+",default=["512x512"],help="frame sizes in the form WIDTHxHEIGHT")
+    parser.add_argument("--chunk-size",nargs="+",type=int,default=[2**20],help="maximal chunk sizes in bytes")
+    parser.add_argument("--limit-queue",nargs="+",default=["none"],help="processing thread queue limits (none for default)")
+    parser.add_argument("--stage",nargs="+",default=["none"],help="processing stages: none, binning, background, or slowdown")
+    parser.add_argument("--frame-period",type=float,default=1E-3,help="camera frame period")
+    parser.add_argument("--duration",type=float,default=5.,help="duration of a single measurement")
+    parser.add_argument("--fastbuff",action="store_true",help="use fast buffer camera readout")
+    parser.add_argument("--output",default="benchmark.json",help="output file (.json or .csv)")
+    args=parser.parse_args(argv)
+    os.environ.setdefault("QT_QPA_PLATFORM","offscreen")
+    results=run_sweep(frame_sizes=[_parse_frame_size(s) for s in args.frame_size],chunk_sizes=args.chunk_size,
+        limit_queues=[_parse_optional_int(s) for s in args.limit_queue],stages=[None if s=="none" else s for s in args.stage],
+        frame_period=args.frame_period,duration=args.duration,fastbuff=args.fastbuff)
+    save_results(results,args.output)
+    for r in results:
+        print("{}x{}, chunk {}, queue {}, stage {}: {:.1f} FPS out, {:.1%} dropped, median latency {}".format(
+            r["frame_width"],r["frame_height"],r["chunk_size"],r["limit_queue"],r["stage"],r["output_fps"],r["output_dropped_fraction"],r["latency_median"]))
+    controller.stop_all_controllers(stop_self=False)
+
+
+if __name__=="__main__":
+    main()
@@ -17,6 +17,13 @@ class StreamFormerThread(controller.QTaskThread):
     When the block is complete (determined by ``block_period`` attribute), :meth:`on_new_block` is called.
     Accumulated data can be accessed with :meth:`get_data` and :meth:`pop_data`, or by default through ``"stream/data"`` multicast.
 
+    If the thread is set up with ``block_mode=True``, the channel queues store data in numpy chunks (see :class:`BlockChannelQueue`),
+    the rows are completed using array slicing, and the accumulated data (including the emitted blocks) is stored as numpy columns.
+    This mode is preferable for sources delivering data in large blocks (e.g., DAQs).
+
+    Setup args:
+        - ``block_mode (bool)``: if ``True``, use the block-aware numpy-based alignment mode
+
     Attributes:
         - ``block_period``: size of a row block which causes :meth:`on_new_block` call
 
@@ -39,7 +46,7 @@ class StreamFormerThread(controller.QTaskThread):
         Prepare a newly acquired chunk.
         
         `columns` is a dictionary ``{name: data}`` of newly acquired data,
-        where ``name`` is a channel name, and ``data`` is a list of one or more newly acquired values.
+        where ``name`` is a channel name, and ``data`` is a list (or a 1D numpy array in the block mode) of one or more newly acquired values.
         Returned data should be in the same format.
         By default, no modifications are made.
         """
@@ -54,9 +61,11 @@ class StreamFormerThread(controller.QTaskThread):
         """Gets called every time a new block is complete"""
         self.send_multicast(tag="stream/data",value=self._build_new_block())
 
-    def setup_task(self):  # pylint: disable=arguments-differ
+    def setup_task(self, block_mode=False):  # pylint: disable=arguments-differ
+        self.block_mode=block_mode
         self.channels={}
         self.table={}
+        self._table_len=0
         self.source_schedulers={}
         self.add_command("get_data")
         self.add_command("pop_data")
@@ -194,6 +203,140 @@ class StreamFormerThread(controller.QTaskThread):
             Return tuple ``(enabled, queue_len, max_queue_len)``
             """
             return TStreamFormerQueueStatus(self.enabled,len(self.queue),self.max_queue_len)
+    class BlockChannelQueue(ChannelQueue):
+        """
+        Queue for a single channel storing the data in numpy chunks.
+
+        Used in the block mode of :class:`StreamFormerThread`. Unlike :class:`ChannelQueue`, with ``expand_list==True`` both lists and 1D numpy arrays are expanded,
+        and the values are returned as 1D numpy arrays (object arrays for non-numeric or non-scalar data, e.g., tuples).
+        For arguments, see :meth:`.StreamFormerThread.add_channel`.
+        """
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args,**kwargs)
+            self.qlen=0
+        @staticmethod
+        def _as_chunk(values):
+            try:
+                chunk=np.asarray(values)
+            except ValueError:  # ragged sequences
+                chunk=None
+            if chunk is None or chunk.ndim!=1:  # e.g., list of tuples or arrays
+                chunk=np.empty(len(values),dtype=object)
+                for i,v in enumerate(values):
+                    chunk[i]=v
+            return chunk
+        @classmethod
+        def _repeat(cls, value, n):
+            return np.repeat(cls._as_chunk([value]),n)
+        def _from_func(self, n):
+            return self._repeat(self.func(),n) if self.pure_func else self._as_chunk([self.func() for _ in range(n)])
+        @staticmethod
+        def _concat(chunks):
+            return chunks[0] if len(chunks)==1 else np.concatenate(chunks)
+        def _append(self, chunk):
+            if len(chunk):
+                self.queue.append(chunk)
+                self.qlen+=len(chunk)
+        def _pop(self, n):
+            chunks=[]
+            while n>0:
+                chunk=self.queue[0]
+                if len(chunk)<=n:
+                    chunks.append(self.queue.popleft())
+                else:
+                    chunks.append(chunk[:n])
+                    self.queue[0]=chunk[n:]
+                n-=len(chunks[-1])
+                self.qlen-=len(chunks[-1])
+            return chunks
+        def add(self, value):
+            """Add a new value (or list or array of values) to the queue"""
+            if self.expand_list and isinstance(value,list):
+                chunk=self._as_chunk(value)
+            elif self.expand_list and isinstance(value,np.ndarray) and value.ndim==1:
+                chunk=value.copy()  # the source can reuse the array
+            else:
+                chunk=self._as_chunk([value])
+            if self.enabled and len(chunk):
+                nvals=len(chunk)
+                if not self.required:
+                    toadd=1
+                    topop=self.qlen
+                elif self.max_queue_len:
+                    toadd=min(nvals,self.max_queue_len)
+                    topop=self.qlen if self.max_queue_len<=nvals else max(0,self.qlen+nvals-self.max_queue_len)
+                else:
+                    topop=0
+                    toadd=nvals
+                self._pop(topop)
+                self._append(chunk[nvals-toadd:])
+                if self.latching:
+                    self.last_value=chunk[-1]
+        def add_from_func(self, n=1):
+            """
+            Fill the queue from the function (if available)
+            
+            `n` specifies number of values to add.
+            """
+            if self.enabled and self.func and self.fill_on=="started":
+                self._append(self._from_func(n))
+                return True
+            return False
+        def queued_len(self):
+            """Get queue length"""
+            return self.qlen
+        def ready(self):
+            """Check if at leas one datapoint is ready"""
+            return (not self.enabled) or (not self.required) or self.qlen>0
+        def ready_len(self):
+            """
+            Return length of the stored data.
+
+            Return 0 if no data is ready, or -1 if "infinite" amount of data is ready (e.g., channel is off)
+            """
+            return -1 if ((not self.enabled) or (not self.required)) else self.qlen
+        def enable(self, enable=True):
+            """Enable or disable the queue"""
+            if self.enabled and not enable:
+                self.queue.clear()
+                self.qlen=0
+            self.enabled=enable
+        def get(self, n=1):
+            """
+            Pop the oldest values
+            
+            `n` specifies number of values to pop. Return 1D numpy array of values.
+            """
+            if not self.enabled:
+                return np.full(n,None,dtype=object)
+            elif self.qlen:
+                if self.required:
+                    if n>self.qlen:
+                        raise IndexError("not enough queued data to get")
+                    return self._concat(self._pop(n))
+                else:
+                    poplen=min(self.qlen,n)
+                    chunks=self._pop(poplen)
+                    if poplen<n:
+                        chunks.append(self.get(n-poplen))
+                    return self._concat(chunks)
+            elif self.func:
+                return self._from_func(n)
+            elif not self.required:
+                return self._repeat(self.last_value,n)
+            else:
+                raise IndexError("no queued data to get")
+        def clear(self):
+            """Clear the queue"""
+            super().clear()
+            self.qlen=0
+        def get_status(self):
+            """
+            Get the queue status
+
+            Return tuple ``(enabled, queue_len, max_queue_len)``
+            """
+            return TStreamFormerQueueStatus(self.enabled,self.qlen,self.max_queue_len)
             
 
     def add_channel(self, name, func=None, max_queue_len=10, enabled=True, required="auto", background=False, fill_on="started", latching=True, expand_list=False, pure_func=True, initial=None):
@@ -217,7 +360,7 @@ class StreamFormerThread(controller.QTaskThread):
                 can be either ``"started"`` (when the new row is created) or ``"completed"`` (when the new row is complete)
             latching (bool): determines value of non-'required' channel if `func` is not supplied;
                 if ``True``, it is equal to the last received values; otherwise, it is default
-            expand_list (bool): if ``True`` and the received value is list, assume that it contains several datapoints and add them sequentially
+            expand_list (bool): if ``True`` and the received value is list (or 1D numpy array in the block mode), assume that it contains several datapoints and add them sequentially
                 (note that this would generally required setting `max_queue_len`>1, otherwise only the last received value will show up in the queue)
             pure_func (bool): if ``True``, assume that fast consecutive calls to `func` return the same result, and the function has no side-effects
                 (in this case, several consecutive calls to `func` are replaced by a single call result repeated necessary number of times)
@@ -225,7 +368,8 @@ class StreamFormerThread(controller.QTaskThread):
         """
         if name in self.channels:
             raise KeyError("channel {} already exists".format(name))
-        self.channels[name]=self.ChannelQueue(func,max_queue_len=max_queue_len,required=required,background=background,enabled=enabled,
+        queue_cls=self.BlockChannelQueue if self.block_mode else self.ChannelQueue
+        self.channels[name]=queue_cls(func,max_queue_len=max_queue_len,required=required,background=background,enabled=enabled,
             fill_on=fill_on,latching=latching,expand_list=expand_list,pure_func=pure_func,initial=initial)
         self.table[name]=[]
     def subscribe_source(self, name, srcs, tags=None, dsts="any", filt=None, parse="default", sn=None):
@@ -324,8 +468,13 @@ class StreamFormerThread(controller.QTaskThread):
             for n,ch in self.channels.items():
                 new_columns[n]=ch.get(new_rows)
             new_columns=self.prepare_new_data(new_columns)
-            for n,ch in new_columns.items():
-                self.table[n]+=new_columns[n]
+            if self.block_mode:  # table columns are stored as lists of chunks
+                for n,ch in new_columns.items():
+                    self.table[n].append(ch)
+                self._table_len+=new_rows
+            else:
+                for n,ch in new_columns.items():
+                    self.table[n]+=new_columns[n]
             self._row_cnt+=new_rows
             if self._row_cnt>=self.block_period:
                 self._row_cnt=0
@@ -339,6 +488,12 @@ class StreamFormerThread(controller.QTaskThread):
 
 
 
+    def _get_block_table(self):
+        """Get the table in the block mode, merging the stored chunks into single numpy columns"""
+        for n,chunks in self.table.items():
+            if len(chunks)!=1:
+                self.table[n]=[np.concatenate(chunks) if chunks else np.zeros(0)]
+        return {n:chunks[0] for n,chunks in self.table.items()}
     def get_data(self, nrows=None, columns=None, copy=True):
         """
         Get accumulated data.
@@ -350,7 +505,14 @@ class StreamFormerThread(controller.QTaskThread):
 
         Return dictionary ``{name: [value]}`` of channel value lists (all lists have the same length) if columns are not specified,
         or a 2D numpy array if the columns are specified.
+        In the block mode, the channel values are returned as 1D numpy arrays instead of lists.
         """
+        if self.block_mode:
+            table=self._get_block_table()
+            nrows=self._table_len if nrows is None else nrows
+            if columns is None:
+                return {n:(v[:nrows].copy() if copy else v[:nrows]) for n,v in table.items()}
+            return np.column_stack([table[c][:nrows] for c in columns])
         if columns is None and nrows is None:
             return self.table.copy() if copy else self.table
         if nrows is None:
@@ -365,6 +527,14 @@ class StreamFormerThread(controller.QTaskThread):
 
         Same as :meth:`get_data`, but removes the returned data from the internal storage.
         """
+        if self.block_mode:
+            res=self.get_data(nrows=nrows,columns=columns,copy=False)  # popped rows are not referenced by the table afterwards
+            if nrows is None or nrows>=self._table_len:
+                self.clear_table()
+            else:
+                self.table={n:[c[0][nrows:]] for n,c in self.table.items()}
+                self._table_len-=nrows
+            return res
         if nrows is None:
             table=self.table
             self.table=dict([(n,[]) for n in table])
@@ -381,9 +551,11 @@ class StreamFormerThread(controller.QTaskThread):
     def clear_table(self):
         """Clear table containing all complete rows"""
         self.table=dict([(n,[]) for n in self.table])
+        self._table_len=0
     def reset(self):
         """Clear everything: table of complete rows and all channel queues"""
         self.table=dict([(n,[]) for n in self.table])
+        self._table_len=0
         for _,ch in self.channels.items():
             ch.clear()
         self._partial_rows=[]
@@ -0,0 +1,216 @@
+"""
+Cross-process transport for frame messages.
+
+Frames are copied into a shared memory ring (:class:`.ipc.SharedMemRing`), and only the message metadata
+(indices, frame info, metainfo, and stream IDs) is sent through a pipe.
+The receiving side rebuilds :class:`.FramesMessage` with frames directly referencing the shared memory,
+which is reused once these frames are no longer referenced.
+"""
+
+from ...core.thread import controller
+from ...core.utils import ipc
+from . import stream_message
+
+import collections
+
+
+
+TFramesMessageMeta=collections.namedtuple("TFramesMessageMeta",["frames","indices","frame_info","chunks","metainfo","sn","sid","mid"])
+class FramesShmemSender:
+    """
+    Sending side of the frames shared memory transport.
+
+    Args:
+        ring_size: size of the shared memory ring in bytes; it should be enough to hold all frames which are being processed on the receiving side
+        pipe_conn: pipe connection used to send the metadata; by default, create a new pipe
+    """
+    def __init__(self, ring_size=2**28, pipe_conn=None):
+        self.pipe=ipc.PipeIPCChannel(pipe_conn)
+        self.ring=ipc.SharedMemRing(ring_size)
+        self.closed=False
+    def get_peer_args(self):
+        """Get arguments required to create a receiving side (should be passed to :meth:`FramesShmemReceiver.from_args`)"""
+        return self.pipe.get_peer_args()+self.ring.get_peer_args()[1:]
+
+    def send_message(self, msg, timeout=0):
+        """
+        Send frames message.
+
+        If there is not enough space in the ring, wait until it is released on the receiving side;
+        if `timeout` is passed by then, drop the message and return ``False`` (``timeout=0`` means no waiting).
+        If the receiving side has been closed, drop the message, set :attr:`closed` to ``True``, and return ``False``.
+        Otherwise, return ``True``.
+        """
+        if self.closed:
+            return False
+        frames=[]
+        try:
+            if self.ring.is_reader_closed():
+                raise RuntimeError("ring reader is closed")
+            try:
+                for f in msg.frames:
+                    frames.append(self.ring.write_array(f,timeout=timeout))
+            except TimeoutError:
+                if frames: # release the already written blocks on the receiving side
+                    self.pipe.send(("release",[b for b,_,_ in frames]))
+                return False
+            meta=TFramesMessageMeta(frames,msg.indices,msg.frame_info,msg.chunks,msg.metainfo,msg.sn,msg.sid,msg.mid)
+            self.pipe.send(("message",meta))
+            return True
+        except (RuntimeError,OSError): # receiving side is closed
+            self.closed=True
+            return False
+    def get_used_size(self):
+        """Get the size of the ring part occupied by the frames which are not released on the receiving side yet"""
+        return self.ring.get_used_size()
+    def close(self):
+        """Notify the receiving side and close the transport"""
+        if not self.closed:
+            try:
+                self.pipe.send(("close",None))
+            except (OSError,ValueError):
+                pass
+        self.closed=True
+        self.ring.close()
+
+
+class FramesShmemReceiver:
+    """
+    Receiving side of the frames shared memory transport.
+
+    Normally, created using :meth:`from_args` with the arguments returned by the sender :meth:`FramesShmemSender.get_peer_args` method.
+
+    Args:
+        pipe_conn: pipe connection used to receive the metadata
+        ring_name: name of the shared memory ring
+    """
+    def __init__(self, pipe_conn, ring_name):
+        self.pipe=ipc.PipeIPCChannel(pipe_conn)
+        self.ring=ipc.SharedMemRing(name=ring_name)
+        self.closed=False
+    @classmethod
+    def from_args(cls, *args):
+        """Create a receiver from the supplied arguments"""
+        return cls(*args)
+
+    def recv_message(self, timeout=None):
+        """
+        Receive the next frames message.
+
+        Return the message, or ``None`` if the sending side has been closed.
+        If `timeout` is not ``None`` and no message arrived during this time, raise :exc:`TimeoutError`.
+        """
+        if self.closed:
+            return None
+        kind,meta=self.pipe.recv(timeout=timeout)
+        while kind=="release":
+            for b in meta:
+                self.ring.release(b)
+            kind,meta=self.pipe.recv(timeout=timeout)
+        if kind=="close":
+            self.close()
+            return None
+        frames=[self.ring.get_array(*f) for f in meta.frames]
+        return stream_message.FramesMessage(frames,indices=meta.indices,frame_info=meta.frame_info,chunks=meta.chunks,
+            step=meta.metainfo.get("step",1),metainfo=meta.metainfo,sn=meta.sn,sid=meta.sid,mid=meta.mid)
+    def close(self):
+        """
+        Close the receiver.
+
+        The shared memory stays mapped until all received frames are deleted.
+        """
+        self.closed=True
+        self.ring.close()
+
+
+
+
+class FramesShmemSenderThread(controller.QTaskThread):
+    """
+    Frames sender thread: receives frames multicasts and sends them to a different process through the shared memory transport.
+
+    The receiving process should create :class:`FramesShmemReceiverThread` (or :class:`FramesShmemReceiver`) using the arguments
+    returned by :meth:`get_peer_args` command.
+
+    Setup args:
+        - ``src``: name of the source thread (usually, a camera)
+        - ``tag_in``: receiving multicast tag (for the source multicast)
+        - ``ring_size``: size of the shared memory ring in bytes
+        - ``limit_queue``: maximal number of the input multicasts in the queue; by default, 10
+        - ``timeout``: maximal time to wait for the free space in the ring before dropping the message; by default, 0 (drop immediately)
+
+    Variables:
+        - ``sent/messages``, ``sent/frames``: number of sent messages and frames
+        - ``dropped/messages``, ``dropped/frames``: number of messages and frames dropped because of the lack of the ring space or the closed receiving side
+        - ``ring/used``: size of the ring part occupied by the frames still used on the receiving side
+        - ``closed``: whether the receiving side has been closed
+
+    Commands:
+        - ``get_peer_args``: get arguments for the receiving side
+    """
+    def setup_task(self, src, tag_in, ring_size=2**28, limit_queue=10, timeout=0):  # pylint: disable=arguments-differ
+        self.sender=FramesShmemSender(ring_size)
+        self.timeout=timeout
+        self.subscribe_commsync(self.process_input_frames,srcs=src,tags=tag_in,limit_queue=limit_queue,on_full_queue="skip_oldest")
+        for k in ["sent","dropped"]:
+            self.v[k,"messages"]=0
+            self.v[k,"frames"]=0
+        self.v["ring/used"]=0
+        self.v["closed"]=False
+        self.add_command("get_peer_args")
+    def finalize_task(self):
+        self.sender.close()
+        super().finalize_task()
+
+    def get_peer_args(self):
+        """Get arguments for the receiving side (to be passed to :class:`FramesShmemReceiverThread` or :meth:`FramesShmemReceiver.from_args`)"""
+        return self.sender.get_peer_args()
+    def process_input_frames(self, src, tag, msg):  # pylint: disable=unused-argument
+        """Process multicast message with input frames"""
+        k="sent" if self.sender.send_message(msg,timeout=self.timeout) else "dropped"
+        self.v[k,"messages"]+=1
+        self.v[k,"frames"]+=msg.nframes()
+        self.v["ring/used"]=self.sender.get_used_size()
+        self.v["closed"]=self.sender.closed
+
+
+class FramesShmemReceiverThread(controller.QTaskThread):
+    """
+    Frames receiver thread: receives frames sent through the shared memory transport from a different process and re-emits them as multicasts.
+
+    Setup args:
+        - ``peer_args``: receiver arguments returned by ``get_peer_args`` command of :class:`FramesShmemSenderThread`
+        - ``tag_out``: emitting multicast tag
+        - ``poll_period``: period of checking for new messages
+
+    Multicasts:
+        - ``<tag_out>``: emitted with the received frames
+
+    Variables:
+        - ``received/messages``, ``received/frames``: number of received messages and frames
+        - ``closed``: whether the sending side has been closed
+    """
+    def setup_task(self, peer_args, tag_out="frames/new", poll_period=5E-3):  # pylint: disable=arguments-differ
+        self.receiver=FramesShmemReceiver.from_args(*peer_args)
+        self.tag_out=tag_out
+        self.v["received/messages"]=0
+        self.v["received/frames"]=0
+        self.v["closed"]=False
+        self.add_job("receive_messages",self.receive_messages,poll_period)
+    def finalize_task(self):
+        self.receiver.close()
+        super().finalize_task()
+
+    def receive_messages(self):
+        """Receive and emit all available messages"""
+        while not self.receiver.closed:
+            try:
+                msg=self.receiver.recv_message(timeout=0)
+            except TimeoutError:
+                break
+            if msg is None:
+                self.v["closed"]=True
+                break
+            self.v["received/messages"]+=1
+            self.v["received/frames"]+=msg.nframes()
+            self.send_multicast(dst="any",tag=self.tag_out,value=msg)
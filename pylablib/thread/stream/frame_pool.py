@@ -0,0 +1,155 @@
+import numpy as np
+
+import threading
+import weakref
+
+
+
+class _BufferSlot:
+    """
+    Pooled buffer storage.
+
+    While the buffer is leased, `ref` holds a weak reference to the lease root array, i.e., the array which serves as a base for all the arrays
+    built on the buffer (numpy sets the base of any view to it, since it does not own its data and its own base is not an array).
+    Once all of these arrays are disposed, the root array is finalized, and the buffer is released back to the pool.
+    """
+    def __init__(self, nbytes):
+        self.storage=np.empty(nbytes,dtype="u1")
+        self.nbytes=nbytes
+        self.ref=None
+    def lease(self, shape, dtype):
+        """Lease the buffer and return an array with the given shape and dtype built on it"""
+        root=np.frombuffer(memoryview(self.storage),dtype=dtype)
+        self.ref=weakref.ref(root,self._release)
+        return root.reshape(shape)
+    def _release(self, ref):
+        if self.ref is ref:
+            self.ref=None
+    def is_leased(self):
+        """Check if the buffer is currently leased"""
+        return self.ref is not None
+
+class FrameBufferPool:
+    """
+    Pool of reusable frame buffers keyed by shape and dtype.
+
+    Buffers are borrowed using :meth:`empty` (or one of the filling methods such as :meth:`copy`, :meth:`astype`, or :meth:`stack`),
+    and each borrowed buffer is leased until the borrowed array and all of its views are disposed, at which point it is released back to the pool.
+    Hence, a :class:`.FramesMessage` sent to several subscribers only returns its buffers to the pool after all subscribers have released it
+    (and any frames taken from it); a buffer is never handed out again while any array referring to it is still alive.
+
+    Args:
+        min_size: minimal buffer size (in bytes) to be taken from the pool; smaller arrays are cheap to allocate, so they are created directly
+        max_size: maximal total size (in bytes) of all buffers held by the pool; if the new buffer would exceed it, it is allocated directly
+        max_buffers: maximal number of buffers held for a single shape and dtype
+    """
+    def __init__(self, min_size=2**16, max_size=2**27, max_buffers=64):
+        self.min_size=min_size
+        self.max_size=max_size
+        self.max_buffers=max_buffers
+        self._buffers={}
+        self._size=0
+        self._lock=threading.Lock()
+        self._stats={"hits":0,"misses":0,"direct":0}
+
+    def empty(self, shape, dtype="float"):
+        """Borrow an uninitialized buffer with the given shape and dtype"""
+        dtype=np.dtype(dtype)
+        shape=tuple(shape) if np.ndim(shape) else (shape,)
+        nbytes=int(np.prod(shape))*dtype.itemsize
+        if nbytes<self.min_size:
+            return np.empty(shape,dtype=dtype)
+        key=shape,dtype.str
+        with self._lock:
+            buffers=self._buffers.setdefault(key,[])
+            for slot in buffers:
+                if not slot.is_leased():
+                    self._stats["hits"]+=1
+                    return slot.lease(shape,dtype)
+            if self._size+nbytes>self.max_size:
+                self._remove_free(self._size+nbytes-self.max_size)
+            if len(buffers)<self.max_buffers and self._size+nbytes<=self.max_size:
+                slot=_BufferSlot(nbytes)
+                buffers.append(slot)
+                self._size+=nbytes
+                self._stats["misses"]+=1
+                return slot.lease(shape,dtype)
+            self._stats["direct"]+=1
+            return np.empty(shape,dtype=dtype)
+    def copy(self, a):
+        """Return a copy of array `a` stored in a pooled buffer"""
+        out=self.empty(a.shape,a.dtype)
+        np.copyto(out,a)
+        return out
+    def astype(self, a, dtype):
+        """Return a copy of array `a` converted to the given dtype and stored in a pooled buffer"""
+        out=self.empty(a.shape,dtype)
+        np.copyto(out,a,casting="unsafe")
+        return out
+    def stack(self, arrays):
+        """Stack a list of arrays with the same shape and dtype along the new first axis into a pooled buffer"""
+        out=self.empty((len(arrays),)+arrays[0].shape,arrays[0].dtype)
+        for i,a in enumerate(arrays):
+            out[i]=a
+        return out
+    def concatenate(self, arrays):
+        """Concatenate a list of arrays along the first axis into a pooled buffer"""
+        if len(arrays)==1:
+            return arrays[0]
+        dtype=np.result_type(*arrays)
+        out=self.empty((sum(len(a) for a in arrays),)+arrays[0].shape[1:],dtype)
+        return np.concatenate(arrays,axis=0,out=out)
+
+    def get_stats(self):
+        """
+        Get the pool statistics.
+
+        Return dictionary with keys ``"buffers"`` (total number of held buffers), ``"used"`` (number of currently borrowed buffers),
+        ``"size"`` (total size of held buffers in bytes), ``"used_size"`` (total size of borrowed buffers in bytes),
+        ``"hits"`` (number of requests served by an existing free buffer), ``"misses"`` (number of requests which required a new pooled buffer),
+        and ``"direct"`` (number of requests allocated outside the pool because of the size limits).
+        """
+        with self._lock:
+            nbuff=nused=used_size=0
+            for buffers in self._buffers.values():
+                for slot in buffers:
+                    nbuff+=1
+                    if slot.is_leased():
+                        nused+=1
+                        used_size+=slot.nbytes
+            stats={"buffers":nbuff,"used":nused,"size":self._size,"used_size":used_size}
+            stats.update(self._stats)
+            return stats
+    def reset_stats(self):
+        """Reset hit and miss counters"""
+        with self._lock:
+            self._stats={"hits":0,"misses":0,"direct":0}
+    def _remove_free(self, nbytes=None):
+        """Remove free buffers (the ones with the oldest keys first) until at least `nbytes` are freed (all free buffers if ``None``)"""
+        removed=0
+        for key,buffers in list(self._buffers.items()):
+            free=[i for i,slot in enumerate(buffers) if not slot.is_leased()]
+            for i in free[::-1]:
+                removed+=buffers.pop(i).nbytes
+                if nbytes is not None and removed>=nbytes:
+                    break
+            if not buffers:
+                del self._buffers[key]
+            if nbytes is not None and removed>=nbytes:
+                break
+        self._size-=removed
+    def clear(self):
+        """
+        Remove all free buffers from the pool.
+
+        Currently borrowed buffers are kept and are returned to the pool after release.
+        """
+        with self._lock:
+            self._remove_free()
+
+
+
+_default_pool=FrameBufferPool()
+def get_default_pool():
+    """Get the default frame buffer pool shared by the stream pipeline threads"""
+    return _default_pool
@@ -2,14 +2,56 @@ from ...core.thread import controller
 from ...core.dataproc import filters
 
 from ...devices.interface import camera as camera_utils
-from . import stream_manager, stream_message
+from . import stream_manager, stream_message, frame_pool
 
 import numpy as np
 import time
 import collections
+import concurrent.futures
 
 ########## Frame processing ##########
 
+def _get_accumulator_dtype(dtype, n):
+    """Get the smallest integer dtype of the same kind as `dtype` which can hold a sum of `n` values of `dtype` (or float, if none of them can)"""
+    info=np.iinfo(dtype)
+    for size in [1,2,4,8]:
+        acc_dtype=np.dtype("{}{}".format(dtype.kind,size))
+        acc_info=np.iinfo(acc_dtype)
+        if info.max*n<=acc_info.max and info.min*n>=acc_info.min:
+            return acc_dtype
+    return np.dtype("float")
+def _bin_spatial_sum(frames, n, acc_dtype):
+    """Sum 3D frames array in blocks of ``n[0] x n[1]`` pixels using the given accumulator dtype"""
+    nr,nc=frames.shape[-2]//n[0]*n[0],frames.shape[-1]//n[1]*n[1]
+    rows=frames[:,0:nr:n[0],:nc].astype(acc_dtype)
+    for i in range(1,n[0]):
+        rows+=frames[:,i:nr:n[0],:nc]
+    res=rows[:,:,0::n[1]].copy() if n[1]>1 else rows
+    for j in range(1,n[1]):
+        res+=rows[:,:,j::n[1]]
+    return res
+def _bin_spatial_decimate(frames, n, dec):
+    """Decimate 3D frames array along both spatial axes"""
+    if n[0]>1:
+        frames=filters.decimate(frames,n[0],dec=dec,axis=-2)
+    if n[1]>1:
+        frames=filters.decimate(frames,n[1],dec=dec,axis=-1)
+    return frames
+def _decimate_time(frames, n, dec, acc_dtype=None):
+    """Decimate 3D frames array along the time axis, using the given accumulator dtype for the sum decimation"""
+    if acc_dtype is not None and dec=="sum":
+        nb=len(frames)//n*n
+        res=frames[0:nb:n].astype(acc_dtype)
+        for i in range(1,n):
+            res+=frames[i:nb:n]
+        return res
+    return filters.decimate(frames,n,dec=dec,axis=0)
+def _decimate_time_full(frames, dec, acc_dtype=None):
+    """Completely decimate frames array or list along the time axis, using the given accumulator dtype for the sum decimation"""
+    if acc_dtype is not None and dec=="sum":
+        return np.sum(frames,axis=0,dtype=acc_dtype)
+    return filters.decimate_full(frames,dec)
+
 class FrameBinningThread(controller.QTaskThread):
     """
     Full frame binning thread: receives frames and re-emit them after binning along time or space axes.
@@ -18,6 +60,10 @@ class FrameBinningThread(controller.QTaskThread):
         - ``src``: name of the source thread (usually, a camera)
         - ``tag_in``: receiving multicast tag (for the source multicast)
         - ``tag_out``: emitting multicast tag (for the multicast emitted by the processor); by default, same as ``tag_in``
+        - ``limit_queue``: maximal number of the input multicasts in the queue; by default, 2
+        - ``nworkers``: number of worker threads used for binning; by default, 1 (binning is done in the thread itself)
+        - ``flow_control``: if ``True``, register at the source for the credit-based flow control with the capacity equal to ``limit_queue``
+          (see :class:`.StreamFlowControl`); by default, ``False``
 
     Multicasts:
         - ``<tag_out>``: emitted with binned frames
@@ -26,24 +72,37 @@ class FrameBinningThread(controller.QTaskThread):
         - ``params/spat``: spatial binning parameters: ``"bin"`` for binning size (a 2-tuple) and ``"mode"`` for binning mode
         - ``params/time``: temporal binning parameters: ``"bin"`` for binning size and ``"mode"`` for binning mode
         - ``params/dtype``: resulting frames type (see :meth:`setup_binning` for parameters)
+        - ``params/nworkers``: number of worker threads used for binning
         - ``enabled``: indicates whether binning has been enabled
+        - ``buffer_pool``: statistics of the frame buffer pool used for the output frames (see :meth:`.FrameBufferPool.get_stats`)
 
     Commands:
         - ``enable_binning``: enable or disable the binning
         - ``setup_binning``: setup binning parameters
+        - ``setup_workers``: setup the number of worker threads
     """
-    def setup_task(self, src, tag_in, tag_out=None):  # pylint: disable=arguments-differ
-        self.subscribe_commsync(self.process_input_frames,srcs=src,tags=tag_in,limit_queue=2,on_full_queue="wait")
+    _min_parallel_size=2**20 # minimal frames chunk size (in bytes) to be split between the workers
+    def setup_task(self, src, tag_in, tag_out=None, limit_queue=2, nworkers=1, flow_control=False):  # pylint: disable=arguments-differ
+        callback=stream_manager.StreamCreditSender(self,src,capacity=limit_queue).wrap(self.process_input_frames) if flow_control else self.process_input_frames
+        self.subscribe_commsync(callback,srcs=src,tags=tag_in,limit_queue=limit_queue,on_full_queue="wait")
         self.tag_out=tag_out or tag_in
         self.v["params/spat"]={"bin":(1,1),"mode":"skip"}
         self.v["params/time"]={"bin":1,"mode":"skip"}
         self.v["params/dtype"]=None
         self.v["enabled"]=False
-        self._recv_acc=stream_message.FramesAccumulator()
+        self._recv_acc=stream_message.FramesRingAccumulator(store_frames=False)
         self._clear_buffer()
         self.cnt=stream_manager.StreamIDCounter()
+        self._pool=None
+        self._frame_pool=frame_pool.get_default_pool()
+        self.v["buffer_pool"]=self._frame_pool.get_stats()
+        self.setup_workers(nworkers)
         self.add_command("setup_binning")
         self.add_command("enable_binning")
+        self.add_command("setup_workers")
+    def finalize_task(self):
+        self.setup_workers(1)
+        super().finalize_task()
 
     def enable_binning(self, enabled=True):
         """Enable or disable the binning"""
@@ -60,7 +119,8 @@ class FrameBinningThread(controller.QTaskThread):
             dtype: if not ``None``, the resulting frames are converted to the given type;
                 otherwise, they are converted into the same type as the source frames;
                 note that if the source type is integer and binning mode is ``"mean"`` or ``"sum"``, some information might be lost through rounding or integer overflow;
-                for the purposes of ``"mean"`` and ``"sum"`` binning the frames are always temporarily converted to float
+                for the purposes of ``"mean"`` and ``"sum"`` binning the integer frames are temporarily converted to an integer type wide enough to avoid the overflow,
+                and the float frames are temporarily converted to float
         """
         par=self.v["params"]
         if spat_bin!=par["spat/bin"] or spat_bin_mode!=par["spat/mode"] or time_bin!=par["time/bin"] or time_bin_mode!=par["time/mode"]:
@@ -68,30 +128,61 @@ class FrameBinningThread(controller.QTaskThread):
         self.v["params/spat"]={"bin":spat_bin,"mode":spat_bin_mode}
         self.v["params/time"]={"bin":time_bin,"mode":time_bin_mode}
         self.v["params/dtype"]=dtype
+    def setup_workers(self, nworkers=1):
+        """
+        Set the number of worker threads used for binning.
+
+        If `nworkers` is 1, the binning is done in the thread itself.
+        Otherwise, the frame chunks are split between the workers: by frame for the spatial binning, and by row bands for the temporal binning.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool=None
+        if nworkers>1:
+            self._pool=concurrent.futures.ThreadPoolExecutor(nworkers)
+        self.v["params/nworkers"]=nworkers
 
     def _clear_buffer(self):
         self.acc_frame=None
         self.acc_frame_num=0
         self._recv_acc.clear()
-    def _bin_spatial(self, frames, n, dec, status_line):
+    def _split_map(self, func, frames, axis=0, align=1):
+        """
+        Split `frames` into parts along the given axis, apply `func` to them using the workers pool, and concatenate the results.
+
+        The parts boundaries are multiples of `align`, with the remainder going into the last part.
+        """
+        nparts=min(self.v["params/nworkers"],frames.shape[axis]//align)
+        if self._pool is None or nparts<2 or frames.nbytes<self._min_parallel_size:
+            return func(frames)
+        axis%=frames.ndim
+        size=frames.shape[axis]//align
+        bounds=[(size*i//nparts)*align for i in range(nparts)]+[frames.shape[axis]]
+        parts=[frames[(slice(None),)*axis+(slice(s,e),)] for s,e in zip(bounds[:-1],bounds[1:])]
+        return np.concatenate(list(self._pool.map(func,parts)),axis=axis)
+    def _bin_spatial(self, frames, n, dec, status_line, acc_dtype=None):
         if n!=(1,1):
             sl=camera_utils.extract_status_line(frames,status_line,copy=False)
-            if n[0]>1:
-                frames=filters.decimate(frames,n[0],dec=dec,axis=-2)
-            if n[1]>1:
-                frames=filters.decimate(frames,n[1],dec=dec,axis=-1)
+            if acc_dtype is not None and dec in {"sum","mean"}:
+                func=lambda f: _bin_spatial_sum(f,n,acc_dtype)
+            else:
+                func=lambda f: _bin_spatial_decimate(f,n,dec)
+            if len(frames)>=self.v["params/nworkers"]:
+                frames=self._split_map(func,frames,axis=0)
+            else:
+                frames=self._split_map(func,frames,axis=-2,align=n[0])
             if sl is not None:
                 frames=camera_utils.insert_status_line(frames,status_line,sl,copy=(dec=="skip"))
         return frames
-    def _decimate_with_status_line(self, frames, n, dec, status_line):
-        res=filters.decimate(frames,n,dec=dec,axis=0)
+    def _decimate_with_status_line(self, frames, n, dec, status_line, acc_dtype=None):
+        res=self._split_map(lambda f: _decimate_time(f,n,dec,acc_dtype),frames,axis=-2)
         if dec!="skip" and status_line is not None:
             binned_n=n*(len(frames)//n)
             sl=camera_utils.extract_status_line(frames[:binned_n:n],status_line,copy=False)
             res=camera_utils.insert_status_line(res,status_line,sl,copy=False)
         return res
-    def _decimate_full_with_status_line(self, frames, dec, status_line):
-        res=filters.decimate_full(frames,dec)
+    def _decimate_full_with_status_line(self, frames, dec, status_line, acc_dtype=None):
+        res=_decimate_time_full(frames,dec,acc_dtype)
         if dec!="skip" and status_line is not None:
             sl=camera_utils.extract_status_line(frames[0],status_line,copy=False)
             res=camera_utils.insert_status_line(res,status_line,sl,copy=False)
@@ -101,43 +192,53 @@ class FrameBinningThread(controller.QTaskThread):
         if frames.ndim==2:
             frames=frames[None]
         dtype=frames.dtype if par["dtype"] is None else par["dtype"]
-        frames=self._bin_spatial(frames,par["spat/bin"],par["spat/mode"],status_line)
+        spat_bin,spat_bin_mode=par["spat/bin"],par["spat/mode"]
         time_bin,time_bin_mode=par["time/bin"],par["time/mode"]
+        acc_dtype=None
+        divisor=1
+        if frames.dtype.kind in "ui": # accumulate integer sums and divide only at the end
+            nacc=(spat_bin[0]*spat_bin[1] if spat_bin_mode in {"sum","mean"} else 1)*(time_bin if time_bin_mode in {"sum","mean"} else 1)
+            if nacc>1:
+                acc_dtype=_get_accumulator_dtype(frames.dtype,nacc)
+                divisor=(spat_bin[0]*spat_bin[1] if spat_bin_mode=="mean" else 1)*(time_bin if time_bin_mode=="mean" else 1)
+        elif time_bin_mode=="mean" and time_bin>1:
+            divisor=time_bin
+        frames=self._bin_spatial(frames,spat_bin,spat_bin_mode,status_line,acc_dtype=acc_dtype)
         if time_bin>1:
             if self.acc_frame is not None and frames.shape[-2:]!=self.acc_frame.shape:
                 self._clear_buffer()
             binned_frames=[]
             time_dec_mode=time_bin_mode if time_bin_mode!="mean" else "sum"
-            if time_dec_mode=="sum":
+            if time_dec_mode=="sum" and acc_dtype is None:
                 frames=frames.astype("float")
             if self.acc_frame is not None and self.acc_frame_num+len(frames)>=time_bin: # complete current chunk
                 chunk=frames[:time_bin-self.acc_frame_num]
                 frames=frames[time_bin-self.acc_frame_num:]
-                chunk=filters.decimate_full(chunk,time_dec_mode) if len(chunk)>1 else chunk[0]
+                chunk=_decimate_time_full(chunk,time_dec_mode,acc_dtype) if len(chunk)>1 else chunk[0]
                 if self.acc_frame is not None:
-                    chunk=self._decimate_full_with_status_line([self.acc_frame,chunk],time_dec_mode,status_line)
+                    chunk=self._decimate_full_with_status_line([self.acc_frame,chunk],time_dec_mode,status_line,acc_dtype=acc_dtype)
                 binned_frames.append(chunk)
                 self.acc_frame=None
                 self.acc_frame_num=0
             if len(frames):
-                binned_frames+=list(self._decimate_with_status_line(frames,time_bin,time_dec_mode,status_line)) # decimate all complete chunks
+                binned_frames.extend(self._decimate_with_status_line(frames,time_bin,time_dec_mode,status_line,acc_dtype=acc_dtype)) # decimate all complete chunks
             frames_left=len(frames)%time_bin
             if frames_left: # update accumulator
                 chunk=frames[-frames_left:]
-                chunk=self._decimate_full_with_status_line(chunk,time_dec_mode,status_line) if len(chunk)>1 else chunk[0]
+                chunk=self._decimate_full_with_status_line(chunk,time_dec_mode,status_line,acc_dtype=acc_dtype) if len(chunk)>1 else chunk[0]
                 if self.acc_frame is not None:
-                    chunk=self._decimate_full_with_status_line([self.acc_frame,chunk],time_dec_mode,status_line)
+                    chunk=self._decimate_full_with_status_line([self.acc_frame,chunk],time_dec_mode,status_line,acc_dtype=acc_dtype)
                 self.acc_frame=chunk
                 self.acc_frame_num+=frames_left
             frames=np.asarray(binned_frames)
-            if time_bin_mode=="mean" and binned_frames:
-                if status_line is None:
-                    frames/=time_bin
-                else:
-                    sl=camera_utils.extract_status_line(frames,status_line,copy=True)
-                    frames/=time_bin
-                    frames=camera_utils.insert_status_line(frames,status_line,sl,copy=False)
-        frames=frames.astype(dtype)
+        if divisor>1 and len(frames):
+            if status_line is None:
+                frames=frames/divisor
+            else:
+                sl=camera_utils.extract_status_line(frames,status_line,copy=True)
+                frames=frames/divisor
+                frames=camera_utils.insert_status_line(frames,status_line,sl,copy=False)
+        frames=self._frame_pool.astype(frames,dtype)
         return frames
 
     # TODO: direct subscription + command for no-overhead forwarding?
@@ -156,15 +257,16 @@ class FrameBinningThread(controller.QTaskThread):
             l=len(proc_chunk)
             if l:
                 frames.append(proc_chunk if msg.chunks else proc_chunk[0])
-        _,indices,frame_info=self._recv_acc.get_slice(0,(-(time_bin-1) or None),step=time_bin,flatten=True)
+        _,indices,frame_info=self._recv_acc.get_slice(0,(-(time_bin-1) or None),step=time_bin,flatten=True,copy=True)
         self._recv_acc.cut_to_size(self.acc_frame_num,from_end=True)
         if frames:
             if msg.chunks:
-                frames=np.concatenate(frames,axis=0)
+                frames=self._frame_pool.concatenate(frames)
                 indices=np.asarray(indices)
                 frame_info=np.asarray(frame_info) if frame_info is not None else None
             msg=msg.copy(frames=frames,indices=indices,frame_info=frame_info,source=self.name,step=msg.mi.step*self.v["params/time/bin"])
             self.send_multicast(dst="any",tag=self.tag_out,value=msg)
+        self.v["buffer_pool"]=self._frame_pool.get_stats()
 
 
 
@@ -178,6 +280,9 @@ class FrameSlowdownThread(controller.QTaskThread):
         - ``src``: name of the source thread (usually, a camera)
         - ``tag_in``: receiving multicast tag (for the source multicast)
         - ``tag_out``: emitting multicast tag (for the multicast emitted by the processor); by default, same as ``tag_in``
+        - ``limit_queue``: maximal number of the input multicasts in the queue; by default, 10
+        - ``flow_control``: if ``True``, register at the source for the credit-based flow control with the capacity equal to ``limit_queue``
+          (see :class:`.StreamFlowControl`); by default, ``False``
 
     Multicasts:
         - ``<tag_out>``: emitted with slowed frames; emitted with the maximal period controlled by the :meth:`set_output_period`,
@@ -198,8 +303,9 @@ class FrameSlowdownThread(controller.QTaskThread):
         - ``setup_slowdown``: setup slowdown parameters
         - ``set_output_period``: set the period of output frames generation
     """
-    def setup_task(self, src, tag_in, tag_out=None):  # pylint: disable=arguments-differ
-        self.subscribe_commsync(self.process_input_frames,srcs=src,tags=tag_in,limit_queue=10)
+    def setup_task(self, src, tag_in, tag_out=None, limit_queue=10, flow_control=False):  # pylint: disable=arguments-differ
+        callback=stream_manager.StreamCreditSender(self,src,capacity=limit_queue).wrap(self.process_input_frames) if flow_control else self.process_input_frames
+        self.subscribe_commsync(callback,srcs=src,tags=tag_in,limit_queue=limit_queue)
         self.tag_out=tag_out or tag_in
         self.frames_buffer=[]
         self.buffer_size=1
@@ -310,6 +416,147 @@ class FrameSlowdownThread(controller.QTaskThread):
 
 
 
+class RunningBackgroundCalculator:
+    """
+    Running background calculator, which incrementally updates the background over a window of the last `n` frames.
+
+    When a new frame is added, the frame leaving the window is subtracted from the accumulated state instead of recalculating it from scratch.
+    The incremental calculation is implemented for ``"mean"`` mode (using the running sum), and for ``"median"`` mode with integer frames
+    (using the rolling per-pixel histogram with `nbins` bins spanning the frames values range with some margin, which gives the median up to the bin width;
+    the histogram is rebuilt from the window whenever the lower or the upper median reaches its edges, e.g., due to the frames values drift);
+    for other modes or float frames the background is recalculated from the full window when it is requested.
+
+    Args:
+        n: window size
+        mode: calculation mode; can be ``"mean"``, ``"median"``, ``"min"``, or ``"max"``
+        nbins: number of histogram bins for the median calculation (the histogram takes ``nbins`` bytes per pixel);
+            if ``None``, the median is always recalculated from the full window
+    """
+    _float_resync_period=1000 # number of added frames after which the float running sum is recalculated to avoid the rounding errors accumulation
+    def __init__(self, n, mode="mean", nbins=64):
+        self.n=n
+        self.mode=mode
+        self.nbins=nbins
+        self.reset()
+
+    def reset(self):
+        """Remove all frames from the window"""
+        self.window=collections.deque()
+        self.frame_dtype=None
+        self._sum=None
+        self._sum_updates=0
+        self._hist=None
+    def nframes(self):
+        """Get the number of frames in the window"""
+        return len(self.window)
+    def _use_hist(self):
+        return self.mode=="median" and self.nbins is not None and self.frame_dtype.kind in "ui"
+
+    def _update_sum(self, frame, removed):
+        if self._sum is None or (self.frame_dtype.kind=="f" and self._sum_updates>=self._float_resync_period):
+            self._sum=np.sum(self.window,axis=0,dtype=self._sum_dtype)
+            self._sum_updates=0
+            return
+        self._sum+=frame
+        if removed is not None:
+            self._sum-=removed
+        self._sum_updates+=1
+    def _get_bins(self, frame):
+        lo,width=self._hist["lo"],self._hist["width"]
+        bins=(frame.ravel().astype("i8")-lo)//width
+        return np.clip(bins,0,self.nbins-1)
+    def _build_hist(self):
+        """Build the histogram from scratch using the current window"""
+        lo=min(int(f.min()) for f in self.window)
+        hi=max(int(f.max()) for f in self.window)
+        nmargin=min(max(self.nbins//8,1),(self.nbins-1)//2) # leave some empty bins on both edges to account for the range drift
+        width=-(-(hi-lo+1)//max(self.nbins-2*nmargin,1))
+        npix=self.window[0].size
+        self._hist={"lo":lo-nmargin*width,"width":width}
+        count_dtype="u1" if self.n<2**8 else ("u2" if self.n<2**16 else "u4")
+        counts=np.zeros((self.nbins,npix),dtype=count_dtype)
+        pix=np.arange(npix)
+        for f in self.window:
+            counts[self._get_bins(f),pix]+=1
+        self._hist.update({"counts":counts,"pix":pix})
+        for name in ["bin","below","bin_hi","below_hi"]:
+            self._hist[name]=np.zeros(npix,dtype="i4")
+        self._rebalance_hist()
+    def _move_rank_bins(self, k, b, below):
+        """Move bins `b` (with the number of values below them `below`) in-place to contain the values of rank `k`"""
+        counts,pix=self._hist["counts"],self._hist["pix"]
+        idx=pix
+        while len(idx):
+            dn=below[idx]>k
+            up=(below[idx]+counts[b[idx],idx])<=k
+            ii=idx[dn]
+            b[ii]-=1
+            below[ii]-=counts[b[ii],ii]
+            ii=idx[up]
+            below[ii]+=counts[b[ii],ii]
+            b[ii]+=1
+            idx=idx[dn|up]
+    def _rebalance_hist(self):
+        """Move the median bins to contain the lower and the upper median ranks (the same for the odd window size)"""
+        self._move_rank_bins((len(self.window)-1)//2,self._hist["bin"],self._hist["below"])
+        self._move_rank_bins(len(self.window)//2,self._hist["bin_hi"],self._hist["below_hi"])
+    def _update_hist(self, frame, removed):
+        if self._hist is None:
+            self._build_hist()
+            return
+        hist=self._hist
+        counts,pix=hist["counts"],hist["pix"]
+        bins=self._get_bins(frame)
+        counts[bins,pix]+=1
+        hist["below"]+=bins<hist["bin"]
+        hist["below_hi"]+=bins<hist["bin_hi"]
+        if removed is not None:
+            bins=self._get_bins(removed)
+            counts[bins,pix]-=1
+            hist["below"]-=bins<hist["bin"]
+            hist["below_hi"]-=bins<hist["bin_hi"]
+        self._rebalance_hist()
+        if np.any(hist["bin"]==0) or np.any(hist["bin_hi"]==self.nbins-1): # the median might be affected by the values clipped at the histogram edges
+            self._build_hist()
+    def _get_hist_rank_value(self, k, b, below):
+        lo,width=self._hist["lo"],self._hist["width"]
+        if width==1:
+            return lo+b
+        c=self._hist["counts"][b,self._hist["pix"]]
+        return lo+width*(b+(k-below+0.5)/np.maximum(c,1)) # interpolate within the bin
+    def _get_hist_median(self):
+        k=(len(self.window)-1)//2
+        median=self._get_hist_rank_value(k,self._hist["bin"],self._hist["below"])
+        if len(self.window)%2==0: # average with the upper median
+            median=(median+self._get_hist_rank_value(k+1,self._hist["bin_hi"],self._hist["below_hi"]))/2
+        return median.reshape(self.window[0].shape)
+
+    def add_frame(self, frame):
+        """Add a new frame to the window, removing the oldest frame if the window is full"""
+        if self.window and self.window[0].shape!=frame.shape:
+            self.reset()
+        if self.frame_dtype is None:
+            self.frame_dtype=frame.dtype
+            self._sum_dtype="i8" if frame.dtype.kind in "ui" else "f8"
+        self.window.append(frame)
+        removed=self.window.popleft() if len(self.window)>self.n else None
+        if self.mode=="mean":
+            self._update_sum(frame,removed)
+        elif self._use_hist():
+            self._update_hist(frame,removed)
+    def get_background(self):
+        """Get the background calculated over the current window (``None`` if the window is empty)"""
+        if not self.window:
+            return None
+        if self.mode=="mean":
+            return self._sum/len(self.window)
+        if self._use_hist():
+            return self._get_hist_median()
+        return filters.decimate_full(list(self.window),self.mode,axis=0)
+
+
+
+
 class BackgroundSubtractionThread(controller.QTaskThread):
     """
     Frame background subtraction thread: receives frame streams and re-emits individual frames after background subtraction.
@@ -321,6 +568,9 @@ class BackgroundSubtractionThread(controller.QTaskThread):
         - ``tag_in``: receiving multicast tag (for the source multicast)
         - ``tag_out``: emitting multicast tag (for the multicast emitted by the processor) for frames intended to be shown;
             by default, ``tag_in+"/show"``
+        - ``limit_queue``: maximal number of the input multicasts in the queue; by default, 20
+        - ``flow_control``: if ``True``, register at the source for the credit-based flow control with the capacity equal to ``limit_queue``
+          (see :class:`.StreamFlowControl`); by default, ``False``
 
     Multicasts:
         - ``<tag_out>``: emitted with background-subtracted frames; emitted with the maximal period controlled by the :meth:`set_output_period`,
@@ -342,6 +592,7 @@ class BackgroundSubtractionThread(controller.QTaskThread):
             ``"mode"`` for the combination mode (``"min"``, ``"mean"``, etc.), ``"dtype"`` for the final dtype, ``"offset"`` to enable or disable background offset
         - ``running/grabbed``: number of grabbed frames in the running background buffer
         - ``running/background``: status of the running background: ``"frame"`` for the final frame and ``"offset"`` for the final offset
+        - ``buffer_pool``: statistics of the frame buffer pool used for the output frames (see :meth:`.FrameBufferPool.get_stats`)
 
     Commands:
         - ``setup_snapshot_subtraction``: setup snapshot background calculation parameters
@@ -352,9 +603,10 @@ class BackgroundSubtractionThread(controller.QTaskThread):
         - ``set_output_period``: set the period of output frames generation
     """
     TStoredFrame=collections.namedtuple("TStoredFrame",["frame","index","info","status_line"])
-    def setup_task(self, src, tag_in, tag_out=None):  # pylint: disable=arguments-differ
+    def setup_task(self, src, tag_in, tag_out=None, limit_queue=20, flow_control=False):  # pylint: disable=arguments-differ
         self.frames_src=stream_manager.StreamSource(builder=stream_message.FramesMessage,use_mid=False)
-        self.subscribe_commsync(self.process_input_frames,srcs=src,tags=tag_in,limit_queue=20,on_full_queue="skip_oldest")
+        callback=stream_manager.StreamCreditSender(self,src,capacity=limit_queue).wrap(self.process_input_frames) if flow_control else self.process_input_frames
+        self.subscribe_commsync(callback,srcs=src,tags=tag_in,limit_queue=limit_queue,on_full_queue="skip_oldest")
         self.tag_out=tag_out or tag_in+"/show"
         self.v["enabled"]=False
         self.v["overridden"]=False
@@ -369,12 +621,15 @@ class BackgroundSubtractionThread(controller.QTaskThread):
         self.v["snapshot/background/buffer"]=None
         self.v["snapshot/background/state"]="none"
         self.v["snapshot/background/saving"]="none"
-        self.running_buffer=[]
+        self.running_background=RunningBackgroundCalculator(1,"mean")
+        self._running_last_frame=None
         self.v["running/parameters"]={"count":1,"mode":"mean","dtype":None,"offset":False}
         self.v["running/grabbed"]=0
         self.v["running/background/frame"]=None
         self.v["running/background/offset"]=None
         self.status_line_policy="duplicate"
+        self._frame_pool=frame_pool.get_default_pool()
+        self.v["buffer_pool"]=self._frame_pool.get_stats()
         self.add_command("setup_snapshot_subtraction")
         self.add_command("grab_snapshot_background")
         self.add_command("setup_snapshot_saving")
@@ -385,9 +640,12 @@ class BackgroundSubtractionThread(controller.QTaskThread):
         self.add_job("output_frame",self.output_frame,1.)
 
     def _calculate_background(self, buffer, mode, dtype, use_offset):
-        if dtype is None:
-            dtype="i4" if buffer[0].dtype.kind in "ui" else "f"
         background=filters.decimate_full(buffer,mode,axis=0)
+        return self._finalize_background(background,buffer[0].dtype,dtype,use_offset)
+    def _finalize_background(self, background, frame_dtype, dtype, use_offset):
+        """Convert the calculated background to the given dtype, remove the status line, and calculate the offset"""
+        if dtype is None:
+            dtype="i4" if frame_dtype.kind in "ui" else "f"
         background=background.astype(dtype)
         status_line=self.last_frame.status_line
         if status_line is not None:
@@ -470,25 +728,35 @@ class BackgroundSubtractionThread(controller.QTaskThread):
 
     def _update_running_buffer(self, msg):
         count=self.v["running/parameters/count"]
-        updated_frames=msg.get_frames_stack(count+1,reverse=True) # need to take one extra frame, since the last frame in the buffer shouldn't be subtracted
-        if self.running_buffer and updated_frames and self.running_buffer[0].shape!=updated_frames[0].shape:
-            self.running_buffer=[]
-        if len(updated_frames)==count+1:
-            self.running_buffer=updated_frames
-        else:
-            self.running_buffer=updated_frames+self.running_buffer[:count+1-len(updated_frames)]
-        self.v["running/grabbed"]=max(len(self.running_buffer)-1,0)
+        updated_frames=msg.get_frames_stack(count+1,reverse=True)[::-1] # need to take one extra frame, since the last frame in the buffer shouldn't be subtracted
+        if updated_frames and self._running_last_frame is not None and self._running_last_frame.shape!=updated_frames[0].shape:
+            self.running_background.reset()
+            self._running_last_frame=None
+        for f in updated_frames: # the last frame is only added to the background when the next frame arrives
+            if self._running_last_frame is not None:
+                self.running_background.add_frame(self._running_last_frame)
+            self._running_last_frame=f
+        self.v["running/grabbed"]=self.running_background.nframes()
     def setup_running_subtraction(self, n=1, mode="mean", dtype=None, offset=False):
         """
         Setup running background parameters.
 
         Args:
             n: number of frames in the buffer
-            mode: calculation mode; can be ``"mean"``, ``"median"``, ``"min"``, or ``"max"``
+            mode: calculation mode; can be ``"mean"``, ``"median"``, ``"min"``, or ``"max"``;
+                the background is updated incrementally for ``"mean"`` and (for integer frames) ``"median"`` modes,
+                in which case the median is approximate (see :class:`RunningBackgroundCalculator`)
             dtype: numpy dtype of the final background and the output frames; ``None`` means ``int32`` for integer input frames and ``float`` otherwise
             offset: if ``True``, subtract the median background value from it, so that the background subtracted frames stay roughly in the same
                 range as the original; otherwise, keep it the same, which shifts the background subtracted frames range towards zero.
         """
+        par=self.v["running/parameters"]
+        if n!=par["count"] or mode!=par["mode"]: # create a new calculator and move the frames from the old window
+            window=list(self.running_background.window)[-n:]
+            self.running_background=RunningBackgroundCalculator(n,mode)
+            for f in window:
+                self.running_background.add_frame(f)
+            self.v["running/grabbed"]=self.running_background.nframes()
         self.v["running/parameters"]={"count":n,"mode":mode,"dtype":dtype,"offset":offset}
     
     def setup_subtraction_method(self, method=None, enabled=None, overridden=None):
@@ -535,14 +803,21 @@ class BackgroundSubtractionThread(controller.QTaskThread):
                     background,offset=self.v["snapshot/background/frame"],self.v["snapshot/background/offset"]
         if enabled and method=="running":
             par=self.v["running/parameters"]
-            if len(self.running_buffer)==par["count"]+1:
-                background,offset=self._calculate_background(self.running_buffer[1:],par["mode"],par["dtype"],par["offset"])
+            if self.running_background.nframes()==par["count"]:
+                background=self.running_background.get_background()
+                background,offset=self._finalize_background(background,self.running_background.frame_dtype,par["dtype"],par["offset"])
                 if background.shape!=frame.shape:
                     background,offset=None,None
             self.v["running/background/frame"]=background
             self.v["running/background/offset"]=offset
         if background is not None:
-            frame=frame-(background-offset)
+            subtracted=self._frame_pool.empty(frame.shape,np.result_type(frame,background,offset))
+            np.subtract(frame,background,out=subtracted)
+            if offset:
+                subtracted+=offset
+            if status_line is not None:
+                subtracted=camera_utils.remove_status_line(subtracted,status_line,policy=self.status_line_policy,copy=False)
+            return subtracted
         if status_line is not None:
             frame=camera_utils.remove_status_line(frame,status_line,policy=self.status_line_policy)
         return frame
@@ -552,6 +827,7 @@ class BackgroundSubtractionThread(controller.QTaskThread):
         if self._new_show_frame and not self.v["overridden"]:
             show_frame=self.process_frame(self.last_frame.frame,status_line=self.last_frame.status_line)
             self.send_multicast(dst="any",tag=self.tag_out,value=self.frames_src.build_message(show_frame,self.last_frame.index,[self.last_frame.info],source=self.name))
+            self.v["buffer_pool"]=self._frame_pool.get_stats()
         self._new_show_frame=False
 
     def process_input_frames(self, src, tag, msg):   # pylint: disable=unused-argument
@@ -366,6 +366,160 @@ class StreamSource:
 
 
 
+TStreamCredit=collections.namedtuple("TStreamCredit",["consumer","sn","sid","mid","nproc","capacity"])
+class StreamFlowControl:
+    """
+    Producer side of the credit-based stream flow control.
+
+    Consumers (using :class:`StreamCreditSender`) advertise their capacity (maximal number of sent but not yet processed messages)
+    and acknowledge the processed messages by sending multicasts with the given `tag` to the producer.
+    Based on that, the producer can check whether all consumers have free capacity (credits) before sending a new message,
+    and get the number of messages dropped by each consumer (e.g., because of its subscription queue limit).
+
+    Args:
+        ctl: producer controller (receives the credit multicasts)
+        source: :class:`StreamSource` object whose message IDs are tracked
+        tag: credit multicast tag
+    """
+    def __init__(self, ctl, source, tag="stream/credits"):
+        self.ctl=ctl
+        self.source=source
+        self.tag=tag
+        self._consumers={}
+        self._lock=threading.Lock()
+        self.sid=ctl.subscribe_direct(self._recv_credit,tags=tag,dsts=ctl.name)
+    class _Consumer:
+        def __init__(self, capacity, sid, acked_mid):
+            self.capacity=capacity
+            self.sid=sid
+            self.acked_mid=acked_mid
+            self.drops=0
+        def update_session(self, sid):
+            if self.sid!=sid:
+                self.sid=sid
+                self.acked_mid=-1
+        def inflight(self, sid, mid):
+            self.update_session(sid)
+            return 0 if mid is None else max(mid-1-self.acked_mid,0)
+    def _recv_credit(self, src, tag, value):  # pylint: disable=unused-argument
+        if not isinstance(value,TStreamCredit) or value.sn not in [None,self.source.sn]:
+            return
+        sid,mid=self.source.get_ids()
+        with self._lock:
+            if value.capacity is None:
+                self._consumers.pop(value.consumer,None)
+                return
+            if value.consumer not in self._consumers:
+                self._consumers[value.consumer]=self._Consumer(value.capacity,sid,-1 if mid is None else mid-1)
+            cons=self._consumers[value.consumer]
+            cons.capacity=value.capacity
+            cons.update_session(sid)
+            if value.mid is not None and mid is not None and value.sid==sid and value.mid>cons.acked_mid:
+                cons.drops+=max(value.mid-cons.acked_mid-value.nproc,0)
+                cons.acked_mid=value.mid
+    def close(self):
+        """Stop receiving the credits"""
+        if self.sid is not None:
+            self.ctl.unsubscribe(self.sid)
+            self.sid=None
+
+    def get_credits(self):
+        """
+        Get the smallest number of available credits among all consumers.
+
+        Return ``None`` if there are no consumers.
+        """
+        sid,mid=self.source.get_ids()
+        with self._lock:
+            if not self._consumers:
+                return None
+            return min(c.capacity-c.inflight(sid,mid) for c in self._consumers.values())
+    def can_send(self):
+        """Check if all the consumers have free capacity for a new message (always ``True`` if there are no consumers)"""
+        ncredits=self.get_credits()
+        return ncredits is None or ncredits>0
+    def get_drops(self):
+        """Get dictionary ``{consumer: drops}`` with the number of messages dropped by each consumer"""
+        with self._lock:
+            return {n:c.drops for n,c in self._consumers.items()}
+    def get_status(self):
+        """Get dictionary ``{consumer: status}`` with dictionaries containing ``"capacity"``, ``"inflight"``, ``"credits"``, and ``"drops"`` of each consumer"""
+        sid,mid=self.source.get_ids()
+        with self._lock:
+            status={}
+            for n,c in self._consumers.items():
+                inflight=c.inflight(sid,mid)
+                status[n]={"capacity":c.capacity,"inflight":inflight,"credits":c.capacity-inflight,"drops":c.drops}
+            return status
+
+
+class StreamCreditSender:
+    """
+    Consumer side of the credit-based stream flow control (see :class:`StreamFlowControl`).
+
+    Registers the consumer with the given capacity at the producer on creation, and unregisters it on :meth:`close`
+    (called automatically when the consumer thread is stopped).
+    The processed messages should be acknowledged using :meth:`ack` (or by wrapping the message callback using :meth:`wrap`).
+
+    Args:
+        ctl: consumer controller (its name identifies the consumer)
+        src: producer thread name
+        capacity: maximal number of the sent but not yet processed messages (usually, the subscription queue limit)
+        sn: stream name; by default, use the stream name of the acknowledged messages
+        tag: credit multicast tag
+        ack_period: number of processed messages between acknowledgements
+    """
+    def __init__(self, ctl, src, capacity=1, sn=None, tag="stream/credits", ack_period=1):
+        self.ctl=ctl
+        self.src=src
+        self.capacity=capacity
+        self.sn=sn
+        self.tag=tag
+        self.ack_period=ack_period
+        self._nproc=0
+        self._last_ids=None,None
+        self._lock=threading.Lock()
+        self._send(None,None)
+        self.ctl.add_stop_notifier(self.close)
+    def _send(self, sid, mid, capacity="current"):
+        self.ctl.send_multicast(dst=self.src,tag=self.tag,value=TStreamCredit(self.ctl.name,self.sn,sid,mid,self._nproc,self.capacity if capacity=="current" else capacity))
+        self._nproc=0
+    def ack(self, msg):
+        """Acknowledge the processed message"""
+        try:
+            sid,mid=msg.get_ids(self.sn)
+        except (AttributeError,KeyError,TypeError):
+            return
+        with self._lock:
+            self._nproc+=1
+            self._last_ids=sid,mid
+            if self._nproc>=self.ack_period:
+                self._send(sid,mid)
+    def wrap(self, callback):
+        """Wrap a multicast callback ``callback(src, tag, msg)`` to acknowledge the message after the callback is done"""
+        def wrapped(src, tag, msg):
+            try:
+                return callback(src,tag,msg)
+            finally:
+                self.ack(msg)
+        wrapped.__name__=getattr(callback,"__name__",wrapped.__name__)
+        return wrapped
+    def set_capacity(self, capacity):
+        """Change the advertised capacity"""
+        with self._lock:
+            self.capacity=capacity
+            self._send(*self._last_ids)
+    def close(self):
+        """Unregister the consumer at the producer"""
+        with self._lock:
+            if self.capacity is not None:
+                self.capacity=None
+                self._send(None,None)
+        self.ctl.remove_stop_notifier(self.close)
+
+
+
+
 
 
 
@@ -375,12 +529,14 @@ class IStreamReceiver:
 
     Can be subscribed to a data source multicast.
     Calls :meth:`recv_message` method (overloaded in subclasses) whenever a new stream message arrives.
+    If the flow control is enabled (see :meth:`enable_flow_control`), the messages are acknowledged to the producer after :meth:`recv_message` is done.
     """
     _sid_gen=general.NamedUIDGenerator(thread_safe=True)
     def __init__(self, ctl=None):
         self.ctl=ctl or controller.get_controller()
         self.subid=None
         self.lock=threading.Lock()
+        self.credits=None
     
     def recv_message(self, src, tag, msg):
         """Process the reception of the new message"""
@@ -393,6 +549,8 @@ class IStreamReceiver:
             if self.subid is subid:
                 with self.lock:
                     self.recv_message(src,tag,msg)
+                    if self.credits is not None:
+                        self.credits.ack(msg)
         self.ctl.subscribe_direct(func,srcs=srcs,tags=tags,dsts=dsts,filt=filt,sid=subid)
         self.subid=subid
         return subid
@@ -400,8 +558,23 @@ class IStreamReceiver:
         """Unsubscribe from the data stream"""
         if self.subid is None:
             raise KeyError("stream is not subscribed")
-        self.ctl.unsubscribe()
+        self.ctl.unsubscribe(self.subid)
         self.subid=None
+        self.disable_flow_control()
+    def enable_flow_control(self, src, capacity=1, sn=None, tag="stream/credits"):
+        """
+        Enable credit-based flow control with the producer `src` (see :class:`StreamCreditSender` for the parameters description).
+
+        Return the created :class:`StreamCreditSender` object.
+        """
+        self.disable_flow_control()
+        self.credits=StreamCreditSender(self.ctl,src,capacity=capacity,sn=sn,tag=tag)
+        return self.credits
+    def disable_flow_control(self):
+        """Disable flow control and unregister from the producer"""
+        if self.credits is not None:
+            self.credits.close()
+            self.credits=None
 
 
 
@@ -1,4 +1,5 @@
 from ...core.utils import functions
+from . import frame_pool
 
 import time
 
@@ -110,7 +111,11 @@ class DataStreamMessage(IStreamMessage):
         self._add_metainfo_args(source=source,tag=tag,creation_time=creation_time)
         if "creation_time" not in self.metainfo:
             self.metainfo["creation_time"]=time.time()
-        self.mi=MetainfoAccessor(self)
+
+    @property
+    def mi(self):
+        """Metainfo accessor (created on request to avoid a reference cycle, so that the message and its frames are freed as soon as it is released)"""
+        return MetainfoAccessor(self)
 
     _metainfo_args={"source","tag","creation_time"}  # creation arguments which are automatically added to the metainfo
     def _add_metainfo_args(self, **kwargs):
@@ -406,6 +411,7 @@ class FramesMessage(DataStreamMessage):
         Return a tuple ``(frames, indices, frame_info)`` for the frames with the corresponding indices.
         If ``flatten==True`` and the message contains frame chunks (as opposed to individual frames in a list),
         "flatten" the chunks and return a lists of individual frames and indices; otherwise, these lists would contain chunks.
+        If ``copy==True``, the copied frames are stored in buffers borrowed from the default :class:`.FrameBufferPool`.
         """
         n=self.nframes()
         if step<0:
@@ -438,7 +444,8 @@ class FramesMessage(DataStreamMessage):
                         frame_info.append(self.frame_info[i][s:e:step])
                 pos+=l
             if copy:
-                frames=[f.copy() for f in frames]
+                pool=frame_pool.get_default_pool()
+                frames=[pool.copy(f) for f in frames]
                 indices=[idx.copy() for idx in indices]
                 if frame_info is not None:
                     frame_info=[inf.copy() for inf in frame_info]
@@ -452,7 +459,8 @@ class FramesMessage(DataStreamMessage):
             indices=self.indices[start:end:step]
             frame_info=None if self.frame_info is None else self.frame_info[start:end:step]
             if copy:
-                frames=[f.copy() for f in frames]
+                pool=frame_pool.get_default_pool()
+                frames=[pool.copy(f) for f in frames]
         return frames,indices,frame_info
     def cut_to_size(self, n, from_end=False):
         """
@@ -609,4 +617,184 @@ class FramesAccumulator:
         return self.nframes()==n
     def clear(self):
         """Clear the stored frames"""
-        self.data=[]
\ No newline at end of file
+        self.data=[]
+
+
+class FramesRingAccumulator:
+    """
+    Frames message accumulator backed by preallocated contiguous arrays.
+
+    Has the same interface as :class:`FramesAccumulator`, but stores frames, indices and frame infos in preallocated arrays,
+    which are compacted or extended when the end is reached. Hence, adding a message only copies its frames,
+    getting the number of frames takes constant time, cutting to a contiguous range only moves the boundaries,
+    and slices are returned as views of the stored data (only valid until the next added message).
+    If the frame shape or dtype, or the frame info shape or dtype changes while the accumulator is not empty,
+    or the frame infos are not numpy arrays, it falls back to the list storage (:class:`FramesAccumulator`) until it is emptied.
+
+    Args:
+        store_frames: if ``False``, only store frame indices and infos, and return ``None`` instead of frames in :meth:`get_slice`
+            (useful when only the frames metadata is needed, since it avoids copying the frames)
+        min_capacity: minimal number of frames in the preallocated arrays
+    """
+    def __init__(self, store_frames=True, min_capacity=16):
+        self.store_frames=store_frames
+        self.min_capacity=min_capacity
+        self._frames=None
+        self._indices=None
+        self._info=None
+        self._list=None
+        self._start=self._end=0
+    
+    def _get_chunks(self, msg):
+        """Get message content as a list of ``(frames, indices, info)`` chunks, or ``None`` if the frame infos are not arrays"""
+        frame_info=msg.frame_info if msg.frame_info is not None else [None]*len(msg.frames)
+        chunks=[]
+        for f,idx,inf in zip(msg.frames,msg.indices,frame_info):
+            if inf is not None and not isinstance(inf,np.ndarray):
+                return None
+            if not msg.chunks:
+                f,idx,inf=f[None],[idx],(None if inf is None else inf[None])
+            chunks.append((f,idx,inf))
+        return chunks
+    def _is_compatible(self, chunks):
+        """Check if the chunks can be added to the current arrays"""
+        for f,_,inf in chunks:
+            if self.store_frames and (f.shape[1:]!=self._frames.shape[1:] or f.dtype!=self._frames.dtype):
+                return False
+            if (inf is None)!=(self._info is None) or (inf is not None and (inf.shape[1:]!=self._info.shape[1:] or inf.dtype!=self._info.dtype)):
+                return False
+        return True
+    def _reset_arrays(self, chunks, capacity):
+        """Allocate new arrays with the given capacity and the format taken from the given chunks"""
+        f,_,inf=chunks[0]
+        self._frames=np.empty((capacity,)+f.shape[1:],dtype=f.dtype) if self.store_frames else None
+        self._indices=np.empty(capacity,dtype="i8")
+        self._info=None if inf is None else np.empty((capacity,)+inf.shape[1:],dtype=inf.dtype)
+        self._start=self._end=0
+    def _reserve(self, n):
+        """Make sure that `n` more frames can be added at the end, compacting or extending the arrays if necessary"""
+        capacity=len(self._indices)
+        if self._end+n<=capacity:
+            return
+        nstored=self._end-self._start
+        arrs=[a for a in [self._frames,self._indices,self._info] if a is not None]
+        if (nstored+n)*2>capacity: # extend
+            capacity=max((nstored+n)*2,self.min_capacity)
+            arrs=[np.concatenate([a[self._start:self._end],np.empty((capacity-nstored,)+a.shape[1:],dtype=a.dtype)]) for a in arrs]
+        else: # move to the beginning
+            for a in arrs:
+                a[:nstored]=a[self._start:self._end]
+        if self._frames is not None:
+            self._frames=arrs.pop(0)
+        self._indices=arrs.pop(0)
+        if self._info is not None:
+            self._info=arrs.pop(0)
+        self._start,self._end=0,nstored
+    def add_message(self, msg):
+        """Add a new message to the storage"""
+        if self._list is not None:
+            if self._list.nframes():
+                self._list.add_message(msg)
+                return
+            self._list=None
+        chunks=self._get_chunks(msg)
+        if not chunks:
+            if chunks is None:
+                self._to_list_mode()
+                self._list.add_message(msg)
+            return
+        if self._indices is None or (not self._is_compatible(chunks) and self.nframes()==0):
+            self._reset_arrays(chunks,max(self.min_capacity,sum(len(f) for f,_,_ in chunks)*2))
+        elif not self._is_compatible(chunks):
+            self._to_list_mode()
+            self._list.add_message(msg)
+            return
+        self._reserve(sum(len(f) for f,_,_ in chunks))
+        for f,idx,inf in chunks:
+            s,e=self._end,self._end+len(f)
+            if self._frames is not None:
+                self._frames[s:e]=f
+            self._indices[s:e]=idx
+            if inf is not None:
+                self._info[s:e]=inf
+            self._end=e
+    def _to_list_mode(self):
+        """Switch to the list storage, moving the currently stored frames there"""
+        self._list=FramesAccumulator()
+        if self._end>self._start:
+            rng=slice(self._start,self._end)
+            frames=self._frames[rng].copy() if self._frames is not None else np.zeros((self._end-self._start,0,0))
+            info=[self._info[rng].copy()] if self._info is not None else None
+            self._list.add_message(FramesMessage([frames],[self._indices[rng].copy()],info,chunks=True))
+        self._start=self._end=0
+    def nframes(self):
+        """Get total number of stored frames"""
+        if self._list is not None:
+            return self._list.nframes()
+        return self._end-self._start
+
+    def _get_range(self, start, end=None, step=1):
+        """Get slice of the stored arrays corresponding to the given range relative to the stored frames"""
+        if step<=0:
+            raise ValueError("only positive step can be used")
+        n=self.nframes()
+        start,end,_=slice(start,end).indices(n)
+        return slice(self._start+start,self._start+max(start,end),step)
+    def get_slice(self, start, end=None, step=1, copy=False, flatten=False):
+        """
+        Get a slice of the stored frames.
+
+        Return a tuple ``(frames, indices, frame_info)`` for the frames with the corresponding indices.
+        If ``flatten==True``, return lists of individual frames, indices and infos; otherwise, return them as a single chunk
+        (lists containing a single 3D frames array, 1D indices array and 2D frame info array).
+        If ``copy==False``, the returned arrays are views of the stored data, which are only valid until the next :meth:`add_message` call.
+        If ``store_frames==False``, return ``None`` instead of frames.
+        """
+        if self._list is not None:
+            frames,indices,frame_info=self._list.get_slice(start,end,step=step,copy=copy,flatten=flatten)
+            return (frames if self.store_frames else None),indices,frame_info
+        rng=self._get_range(start,end,step)
+        if rng.start>=rng.stop:
+            return ([] if self.store_frames else None),[],None
+        frames=self._frames[rng] if self._frames is not None else None
+        indices=self._indices[rng]
+        frame_info=self._info[rng] if self._info is not None else None
+        if copy:
+            frames,indices,frame_info=[None if a is None else a.copy() for a in [frames,indices,frame_info]]
+        if flatten:
+            return (None if frames is None else list(frames)),list(indices),(None if frame_info is None else list(frame_info))
+        return (None if frames is None else [frames]),[indices],(None if frame_info is None else [frame_info])
+    def cut_to_slice(self, start, end, step=1):
+        """Cut the accumulator to only contain frames given by the slice"""
+        if self._list is not None:
+            self._list.cut_to_slice(start,end,step=step)
+            return
+        if not self.nframes():
+            return
+        rng=self._get_range(start,end,step)
+        if step==1:
+            self._start,self._end=rng.start,rng.stop
+        else:
+            for a in [self._frames,self._indices,self._info]:
+                if a is not None:
+                    sel=a[rng].copy()
+                    a[self._start:self._start+len(sel)]=sel
+            self._end=self._start+len(sel)
+    def cut_to_size(self, n, from_end=False):
+        """
+        Cut contained data to contain at most `n` frames.
+
+        If ``from_end==True``, leave last `n` frames; otherwise, leave first `n` frames.
+        Return ``True`` if there are `n` frames after the cut, and ``False`` if there are less than `n`.
+        """
+        if n==0:
+            self.clear()
+        elif from_end:
+            self.cut_to_slice(-n,None)
+        else:
+            self.cut_to_slice(0,n)
+        return self.nframes()==n
+    def clear(self):
+        """Clear the stored frames"""
+        self._list=None
+        self._start=self._end=0
@@ -1,24 +1,172 @@
 from ...core.thread import controller
 from . import stream_message, stream_manager
 
+import numpy as np
 import threading
 
 
 
+def _reduce_minmax(values, bucket, offset=0):
+    """
+    Split values into buckets of the given size along the first axis (the last bucket can be incomplete).
+
+    Return array with the shape ``(nbuckets, 4) + values.shape[1:]``, which contains the minimal and the maximal values in each bucket,
+    and the row indices of these values (the index of the first row in `values` is `offset`).
+    """
+    nfull=len(values)//bucket
+    parts=[values[:nfull*bucket].reshape((nfull,bucket)+values.shape[1:])] if nfull else []
+    if len(values)>nfull*bucket:
+        parts.append(values[nfull*bucket:][None])
+    if not parts:
+        return np.zeros((0,4)+values.shape[1:])
+    res=[]
+    for p in parts:
+        imin=np.argmin(p,axis=1)[:,None]
+        imax=np.argmax(p,axis=1)[:,None]
+        rows=(np.arange(len(p))*bucket+offset).reshape((-1,)+(1,)*(p.ndim-2))
+        res.append(np.stack([np.take_along_axis(p,imin,axis=1)[:,0],np.take_along_axis(p,imax,axis=1)[:,0],imin[:,0]+rows,imax[:,0]+rows],axis=1))
+        offset+=len(p)*bucket
+    return np.concatenate(res) if len(res)>1 else res[0]
+def _merge_minmax_pairs(buckets):
+    """Merge pairs of consecutive buckets produced by :func:`_reduce_minmax`"""
+    buckets=buckets.reshape((-1,2)+buckets.shape[1:])
+    first,second=buckets[:,0],buckets[:,1]
+    min_second=second[:,0]<first[:,0]
+    max_second=second[:,1]>first[:,1]
+    return np.stack([np.where(min_second,second[:,0],first[:,0]),np.where(max_second,second[:,1],first[:,1]),
+        np.where(min_second,second[:,2],first[:,2]),np.where(max_second,second[:,3],first[:,3])],axis=1)
+def _get_minmax_rows(buckets):
+    """Get sorted unique row indices of the minimal and maximal values in the buckets produced by :func:`_reduce_minmax`"""
+    return np.unique(buckets[:,2:4].ravel()).astype("i8")
+def decimate_minmax(columns, max_points, ref=None):
+    """
+    Decimate data columns down to at most `max_points` points, preserving peaks.
+
+    The rows are split into equal buckets, and for each bucket only the rows containing the minimal and maximal values of the reference columns are returned.
+    Hence, all returned rows are present in the original data (the values in different columns stay consistent), and the peaks of the reference columns are preserved.
+    `ref` is a list of indices of the reference columns; by default, use all columns.
+    If the columns are already short enough or any of the columns are not numeric, return them unchanged.
+    """
+    columns=[np.asarray(c) for c in columns]
+    if not columns or len(columns[0])<=max_points or any(c.ndim!=1 or c.dtype.kind not in "biuf" for c in columns):
+        return columns
+    ref=list(range(len(columns))) if not ref else list(ref)
+    bucket=-(-len(columns[0])//max(max_points//(2*len(ref)),1))
+    rows=_get_minmax_rows(_reduce_minmax(np.column_stack([columns[i] for i in ref]),bucket))
+    return [c[rows] for c in columns]
+
+
+
+class MinMaxDecimator:
+    """
+    Incrementally maintained min/max decimation pyramid for :class:`TableAccumulator` numeric channels.
+
+    Level ``k`` stores the minimal and the maximal values of each channel and their row indices for all complete buckets of ``base_bucket*2**k`` rows
+    (level 0 is built from the raw data, and each next level is built by merging pairs of the previous level buckets).
+    A decimated view of any part of the history is then assembled from the rows of the minima and maxima in the buckets of a suitable level
+    (only the incomplete buckets at its edges are computed from the raw data), and the values of all the channels are taken from these rows.
+
+    Args:
+        nch: number of channels
+        memsize: maximal number of rows stored in the table
+        start: index of the first row stored in the table (number of rows which are already removed from it)
+        base_bucket: number of rows in a level-0 bucket
+    """
+    def __init__(self, nch, memsize, start, base_bucket=8):
+        self.base_bucket=base_bucket
+        self.levels=[]
+        self.next_bucket=[]
+        bucket,first_bucket=base_bucket,-(-start//base_bucket)
+        while True:
+            size=memsize//bucket+2
+            self.levels.append(TableAccumulator.ArrayChannelData(size,np.float64,shape=(4,nch)))
+            self.next_bucket.append(first_bucket)
+            if size<=8:
+                break
+            bucket*=2
+            first_bucket=-(-first_bucket//2)
+    def update(self, columns, nrows):
+        """
+        Update the pyramid with the new rows.
+
+        `columns` is the list of table channels (:class:`TableAccumulator.ArrayChannelData` instances), and `nrows` is the total number of rows added to the table.
+        Return ``False`` if the pyramid can not be updated (some of the new rows are already removed from the table), and ``True`` otherwise.
+        """
+        bucket=self.base_bucket
+        j0,j1=self.next_bucket[0],nrows//bucket
+        if j1>j0:
+            back=nrows-j0*bucket
+            if any(len(col)<back for col in columns):
+                return False
+            values=np.column_stack([col.get_span(back,(j1-j0)*bucket,copy=False) for col in columns])
+            self.levels[0].add_data(_reduce_minmax(values,bucket,offset=j0*bucket))
+            self.next_bucket[0]=j1
+        for k in range(1,len(self.levels)):
+            j0,j1=self.next_bucket[k],self.next_bucket[k-1]//2
+            if j1<=j0:
+                break
+            self.levels[k].add_data(_merge_minmax_pairs(self.levels[k-1].get_span(self.next_bucket[k-1]-2*j0,2*(j1-j0),copy=False)))
+            self.next_bucket[k]=j1
+        return True
+    def get_data(self, channels, columns, nrows, start, max_points, ref=None):
+        """
+        Get decimated data.
+
+        Args:
+            channels: indices of the channels to return
+            columns: list of the corresponding table channels (used to get the edge buckets and the values in the selected rows)
+            nrows: total number of rows added to the table
+            start: index of the first row to decimate
+            max_points: maximal number of points in the result (the actual number is between about a quarter and a full `max_points`)
+            ref: indices (within `channels`) of the reference channels, whose minima and maxima are preserved; by default, use all channels
+
+        Return list of columns, or ``None`` if the data can not be taken from the pyramid (e.g., it is too short).
+        """
+        ref=list(range(len(channels))) if not ref else list(ref)
+        nbuckets=max(max_points//(2*len(ref)),1)
+        for k,level in enumerate(self.levels):
+            bucket=self.base_bucket<<k
+            if (nrows-start)//bucket+3<=nbuckets:  # body buckets, plus incomplete head and tail buckets
+                break
+        else:
+            return None
+        jend=self.next_bucket[k]
+        jstart=max(-(-start//bucket),jend-len(level))
+        if jend<=jstart:
+            return None
+        refcols=[columns[i] for i in ref]
+        head=np.column_stack([col.get_span(nrows-start,jstart*bucket-start,copy=False) for col in refcols])
+        tail=np.column_stack([col.get_span(nrows-jend*bucket,nrows-jend*bucket,copy=False) for col in refcols])
+        body=level.get_data(jend-jstart,copy=False)[:,:,[channels[i] for i in ref]]
+        rows=np.concatenate([_get_minmax_rows(b) for b in [_reduce_minmax(head,bucket,offset=start),body,_reduce_minmax(tail,bucket,offset=jend*bucket)]])
+        back=nrows-rows
+        return [col.take(back) for col in columns]
+
+
+
+
 class TableAccumulator:
     """
     Data accumulator which receives data chunks and adds them into a common table.
 
     Can receive either list of columns, or dictionary of named columns; designed to work with :class:`StreamFormerThread`.
+    If `typed` is ``True``, numeric channels are stored in numpy ring buffers (:class:`ArrayChannelData`) with the dtype inferred from the first added block;
+    in this case, the returned columns are numpy arrays. Non-numeric (e.g., object or string) channels are stored in Python lists.
+    When the data is requested with `max_points` limit (e.g., for plotting), it is min/max-decimated using :class:`MinMaxDecimator`,
+    which is created on the first such request and is afterwards updated incrementally with the data added since the previous request.
 
     Args:
         channels([str]): channel names
         memsize(int): maximal number of rows to store
+        typed(bool): if ``True``, store numeric channels in typed numpy ring buffers; otherwise, store all data in Python lists
     """
-    def __init__(self, channels, memsize=10**6):
+    def __init__(self, channels, memsize=10**6, typed=True):
         self.channels=channels
         self.memsize=memsize
+        self.typed=typed
         self.data=[self.ChannelData(self.memsize) for _ in channels]
+        self._nrows=0
+        self._decimator=None
 
     class ChannelData:
         """
@@ -51,10 +199,112 @@ class TableAccumulator:
             self.start=0
             self.end=0
             self.data=[]
-        def get_data(self, l=None):
-            """Get last at most `l` samples from the buffer (if `l` is ``None``, get all samples)"""
+        def __len__(self):
+            return self.end-self.start
+        def get_data(self, l=None, copy=True):  # pylint: disable=unused-argument
+            """
+            Get last at most `l` samples from the buffer (if `l` is ``None``, get all samples).
+
+            The returned list is always a copy; `copy` argument is added for compatibility with :class:`ArrayChannelData`.
+            """
             start=max(0,(self.end-self.start)-l) if l is not None else 0
             return self.data[self.start+start:self.end]
+    class ArrayChannelData:
+        """
+        Single channel data manager based on a typed numpy ring buffer.
+
+        The buffer grows (doubling its size) until it reaches `memsize` samples; after that, new samples overwrite the oldest ones.
+        Each sample is a scalar by default, or an array with the given `shape`.
+        """
+        def __init__(self, memsize, dtype, min_size=1024, shape=()):
+            self.memsize=memsize
+            self.min_size=min_size
+            self.shape=tuple(shape)
+            self.buffer=np.empty((min(memsize,min_size),)+self.shape,dtype=dtype)
+            self.pos=0  # position of the next written sample
+            self.size=0  # number of stored samples
+        @property
+        def dtype(self):
+            return self.buffer.dtype
+        def __len__(self):
+            return self.size
+        def _reallocate(self, capacity, dtype=None):
+            buffer=np.empty((capacity,)+self.shape,dtype=self.dtype if dtype is None else dtype)
+            buffer[:self.size]=self.get_data(copy=False)
+            self.buffer=buffer
+            self.pos=self.size%capacity
+        def set_dtype(self, dtype):
+            """Change the buffer dtype, converting the stored data"""
+            self._reallocate(len(self.buffer),dtype=dtype)
+        def add_data(self, data):
+            """Add data (array or list of values) to the buffer"""
+            data=np.asarray(data)
+            l=len(data)
+            if l>self.memsize:
+                data=data[l-self.memsize:]
+                l=self.memsize
+            capacity=len(self.buffer)
+            if self.size+l>capacity and capacity<self.memsize:  # buffer is still growing, so the data is contiguous starting from 0
+                self._reallocate(min(self.memsize,max(self.size+l,capacity*2)))
+                capacity=len(self.buffer)
+            end=self.pos+l
+            if end<=capacity:
+                self.buffer[self.pos:end]=data
+            else:
+                nhead=capacity-self.pos
+                self.buffer[self.pos:]=data[:nhead]
+                self.buffer[:l-nhead]=data[nhead:]
+            self.pos=end%capacity
+            self.size=min(self.size+l,capacity)
+        def reset_data(self):
+            """Clean the buffer"""
+            self.buffer=np.empty((min(self.memsize,self.min_size),)+self.shape,dtype=self.dtype)
+            self.pos=0
+            self.size=0
+        def get_data(self, l=None, copy=True):
+            """
+            Get last at most `l` samples from the buffer (if `l` is ``None``, get all samples).
+
+            If ``copy==False`` and the requested samples are contiguous in the buffer, return a view, which is only valid until the next :meth:`add_data` call;
+            otherwise, return a copy.
+            """
+            n=self.size if l is None else min(l,self.size)
+            return self.get_span(n,n,copy=copy)
+        def get_span(self, back, n, copy=True):
+            """
+            Get `n` samples starting `back` samples before the end of the buffer.
+
+            If ``copy==False`` and the samples are contiguous in the buffer, return a view; otherwise, return a copy.
+            """
+            start=(self.pos-back)%len(self.buffer)
+            if start+n<=len(self.buffer):
+                data=self.buffer[start:start+n]
+                return data.copy() if copy else data
+            return np.concatenate((self.buffer[start:],self.buffer[:start+n-len(self.buffer)]))
+        def take(self, back):
+            """Get a copy of the samples located `back` samples before the end of the buffer (`back` is an integer array, all values between 1 and the buffer size)"""
+            return self.buffer[(self.pos-back)%len(self.buffer)]
+        def to_list_data(self):
+            """Convert the buffer into a list-based :class:`TableAccumulator.ChannelData` instance with the same data"""
+            col=TableAccumulator.ChannelData(self.memsize)
+            col.add_data(self.get_data(copy=False).tolist())
+            return col
+    def _add_column_data(self, idx, data):
+        """Add data to the given channel, selecting or updating the storage kind depending on the data type"""
+        col=self.data[idx]
+        if self.typed and (isinstance(col,self.ArrayChannelData) or not len(col)):
+            arr=np.asarray(data)
+            numeric=arr.ndim==1 and arr.dtype.kind in "biuf"
+            if isinstance(col,self.ArrayChannelData):
+                if not numeric:
+                    col=self.data[idx]=col.to_list_data()
+                elif not np.can_cast(arr.dtype,col.dtype):
+                    col.set_dtype(np.promote_types(arr.dtype,col.dtype))
+            elif numeric and len(arr):
+                col=self.data[idx]=self.ArrayChannelData(self.memsize,arr.dtype)
+            if numeric:
+                data=arr
+        col.add_data(data)
     def add_data(self, data):
         """
         Add new data to the table.
@@ -71,8 +321,9 @@ class TableAccumulator:
                 table_data.append(data[ch])
             data=table_data
         minlen=min([len(incol) for incol in data])
-        for col,incol in zip(self.data,data):
-            col.add_data(incol[:minlen])
+        for i,incol in enumerate(data[:len(self.data)]):
+            self._add_column_data(i,incol[:minlen])
+        self._nrows+=minlen
         return minlen
     def change_channels(self, channels):
         """
@@ -81,44 +332,81 @@ class TableAccumulator:
         All the accumulated data will be reset.
         """
         self.channels=channels
-        self.data=[self.ChannelData(self.memsize) for _ in channels]
+        self.reset_data()
     def reset_data(self):
         """Clear all data in the table"""
-        for col in self.data:
-            col.reset_data()
+        self.data=[self.ChannelData(self.memsize) for _ in self.channels]
+        self._nrows=0
+        self._decimator=None
     
-    def get_data_columns(self, channels=None, maxlen=None):
+    def _get_decimator(self):
+        """Get the decimator updated with all the data added since the last call (create or re-create it if necessary)"""
+        if not self.data or not all(isinstance(col,self.ArrayChannelData) for col in self.data):
+            self._decimator=None
+        else:
+            if self._decimator is not None and not self._decimator.update(self.data,self._nrows):  # too much data since the last update
+                self._decimator=None
+            if self._decimator is None:
+                self._decimator=MinMaxDecimator(len(self.data),self.memsize,self._nrows-len(self.data[0]))
+                self._decimator.update(self.data,self._nrows)
+        return self._decimator
+    def _get_decimated_columns(self, chidx, maxlen, max_points, ref):
+        nstored=len(self.data[0]) if self.data else 0
+        n=nstored if maxlen is None else min(maxlen,nstored)
+        decimator=self._get_decimator()
+        if decimator is not None:
+            columns=decimator.get_data(chidx,[self.data[i] for i in chidx],self._nrows,self._nrows-n,max_points,ref=ref)
+            if columns is not None:
+                return columns
+        return decimate_minmax([self.data[i].get_data(n,copy=False) for i in chidx],max_points,ref=ref)
+    def get_data_columns(self, channels=None, maxlen=None, copy=True, max_points=None, ref_channels=None):
         """
         Get table data as a list of columns.
         
         Args:
             channels: list of channels to get; all channels by default
             maxlen: maximal column length (if stored length is larger, return last `maxlen` rows)
+            copy: if ``False``, numeric columns are returned as views of the internal ring buffers whenever possible (i.e., if they are not split by the buffer wrap);
+                these views are only valid until the next :meth:`add_data` call
+            max_points: if not ``None`` and the number of returned rows is larger than `max_points`, the data is min/max-decimated (see :func:`decimate_minmax`),
+                i.e., only the rows containing the minima and maxima of the `ref_channels` are returned;
+                intended for plotting, where `max_points` is about twice the number of horizontal pixels
+            ref_channels: list of channels whose minima and maxima are preserved during decimation (e.g., plotted y-axis channels); all returned channels by default
         """
         channels=channels or self.channels
         chidx=[self.channels.index(ch) for ch in channels]
-        data=[self.data[i].get_data(maxlen) for i in chidx]
+        if max_points is not None and self.data and len(self.data[0])>max_points and (maxlen is None or maxlen>max_points):
+            ref=[channels.index(ch) for ch in ref_channels] if ref_channels else None
+            return self._get_decimated_columns(chidx,maxlen,max_points,ref)
+        data=[self.data[i].get_data(maxlen,copy=copy) for i in chidx]
         return data
-    def get_data_rows(self, channels=None, maxlen=None):
+    def get_data_rows(self, channels=None, maxlen=None, max_points=None, ref_channels=None):
         """
         Get table data as a list of rows.
         
         Args:
             channels: list of channels to get; all channels by default
             maxlen: maximal column length (if stored length is larger, return last `maxlen` rows)
+            max_points: if not ``None``, maximal number of returned rows (the data is min/max-decimated if necessary, so the returned rows are a subset of the stored ones;
+                see :meth:`get_data_columns`)
+            ref_channels: list of channels whose minima and maxima are preserved during decimation; all returned channels by default
         """
-        return list(zip(*self.get_data_columns(channels=channels,maxlen=maxlen)))
-    def get_data_dict(self, channels=None, maxlen=None):
+        columns=self.get_data_columns(channels=channels,maxlen=maxlen,copy=False,max_points=max_points,ref_channels=ref_channels)
+        return list(zip(*[col.tolist() if isinstance(col,np.ndarray) else col for col in columns]))
+    def get_data_dict(self, channels=None, maxlen=None, copy=True, max_points=None, ref_channels=None):
         """
         Get table data as a dictionary ``{name: column}``.
         
         Args:
             channels: list of channels to get; all channels by default
             maxlen: maximal column length (if stored length is larger, return last `maxlen` rows)
+            copy: if ``False``, numeric columns are returned as views of the internal ring buffers whenever possible (see :meth:`get_data_columns`)
+            max_points: if not ``None``, maximal number of returned rows (the data is min/max-decimated if necessary; see :meth:`get_data_columns`)
+            ref_channels: list of channels whose minima and maxima are preserved during decimation; all returned channels by default
         """
         channels=channels or self.channels
         channels=list(set(channels))
-        return dict(zip(channels,self.get_data_columns(channels=channels,maxlen=maxlen)))
+        return dict(zip(channels,self.get_data_columns(channels=channels,maxlen=maxlen,copy=copy,max_points=max_points,ref_channels=ref_channels)))
 
 
 
@@ -134,14 +422,15 @@ class TableAccumulatorThread(controller.QTaskThread):
         - ``src (str)``: name of a source thread which emits new data signals (typically, a name of :class:`StreamFormerThread` thread)
         - ``tag (str)``: tag of the source multicast
         - ``memsize (int)``: maximal number of rows to store
+        - ``typed (bool)``: if ``True``, store numeric channels in typed numpy ring buffers (see :class:`TableAccumulator`)
 
     Commands:
         - ``get_data``: get some of the accumulated data
         - ``reset``: clear stored data
     """
-    def setup_task(self, channels, src, tag, memsize=10**6):  # pylint: disable=arguments-differ
+    def setup_task(self, channels, src, tag, memsize=10**6, typed=True):  # pylint: disable=arguments-differ
         self.channels=channels
-        self.table_accum=TableAccumulator(channels=channels,memsize=memsize)
+        self.table_accum=TableAccumulator(channels=channels,memsize=memsize,typed=typed)
         self.subscribe_direct(self._accum_data,srcs=src,tags=tag)
         self.cnt=stream_manager.StreamIDCounter()
         self.data_lock=threading.Lock()
@@ -159,7 +448,7 @@ class TableAccumulatorThread(controller.QTaskThread):
             value=self.preprocess_data(value)
             self.table_accum.add_data(value)
 
-    def get_data(self, channels=None, maxlen=None, fmt="rows"):
+    def get_data(self, channels=None, maxlen=None, fmt="rows", max_points=None, ref_channels=None):
         """
         Get accumulated table data.
         
@@ -167,14 +456,17 @@ class TableAccumulatorThread(controller.QTaskThread):
             channels: list of channels to get; all channels by default
             maxlen: maximal column length (if stored length is larger, return last `maxlen` rows)
             fmt (str): return format; can be ``"rows"`` (list of rows), ``"columns"`` (list of columns), or ``"dict"`` (dictionary of named columns)
+            max_points: if not ``None``, maximal number of returned rows; if there are more rows available, return the min/max-decimated data
+                (maintained incrementally, so repeated requests are cheap; see :meth:`TableAccumulator.get_data_columns`)
+            ref_channels: list of channels whose minima and maxima are preserved during decimation; all returned channels by default
         """
         with self.data_lock:
             if fmt=="columns":
-                return self.table_accum.get_data_columns(channels=channels,maxlen=maxlen)
+                return self.table_accum.get_data_columns(channels=channels,maxlen=maxlen,max_points=max_points,ref_channels=ref_channels)
             elif fmt=="rows":
-                return self.table_accum.get_data_rows(channels=channels,maxlen=maxlen)
+                return self.table_accum.get_data_rows(channels=channels,maxlen=maxlen,max_points=max_points,ref_channels=ref_channels)
             elif fmt=="dict":
-                return self.table_accum.get_data_dict(channels=channels,maxlen=maxlen)
+                return self.table_accum.get_data_dict(channels=channels,maxlen=maxlen,max_points=max_points,ref_channels=ref_channels)
             else:
                 raise ValueError("unrecognized data format: {}".format(fmt))
     def reset(self):
@@ -107,4 +107,36 @@ def test_dict():
     assert "c/d" in d
     # replacing root
     d[""]={"a":1}
-    assert d.asdict()=={"a":1}
\ No newline at end of file
+    assert d.asdict()=={"a":1}
+
+
+##### IPC tests #####
+
+from pylablib.core.utils import ipc
+
+@pytest.mark.skipif(ipc.shared_memory is None,reason="shared memory is not available")
+def test_shmem_ring():
+    """Test shared memory ring allocation and release"""
+    writer=ipc.SharedMemRing(2**12)
+    reader=ipc.SharedMemRing.from_args(*writer.get_peer_args())
+    arrs=[]
+    try:
+        blocks=[writer.write_array(np.full(256,i,dtype="<u4")) for i in range(4)]
+        assert writer.get_used_size()==2**12
+        with pytest.raises(TimeoutError):
+            writer.write_array(np.zeros(16),timeout=0)
+        arrs=[reader.get_array(*b) for b in blocks]
+        assert [a[0] for a in arrs]==[0,1,2,3]
+        view=arrs[0][10:]
+        del arrs[1] # released out of order, so the memory is not reused yet
+        assert writer.get_used_size()==2**12
+        del arrs[0]
+        assert writer.get_used_size()==2**12
+        del view
+        assert writer.get_used_size()==2**11
+        block=writer.write_array(np.arange(300,dtype="<u2"),timeout=0)
+        assert np.all(reader.get_array(*block)==np.arange(300))
+    finally:
+        del arrs
+        reader.close()
+        writer.close()
@@ -7,6 +7,8 @@ from pylablib.devices import PhotonFocus
 from pylablib.devices import PCO
 from pylablib.devices import uc480
 from pylablib.devices import Thorlabs
+from pylablib.devices import Simulated
+from pylablib.devices.interface.camera import ChunkBufferManager, FrameCounter, FramesLeaseExpiredError
 
 from .test_basic_camera import ROICameraTester
 
@@ -176,4 +178,233 @@ class TestUC480(ROICameraTester):
     devname="uc480"
     devcls=uc480.UC480Camera
     rois=gen_rois(128,((1,1),(1,2),(2,2),((0,0),False),((3,3),False),((10,10),False),((100,100),False)))
-    default_roi=(0,512,0,512)
\ No newline at end of file
+    default_roi=(0,512,0,512)
+
+
+
+
+
+def test_chunk_buffer_views():
+    """Test buffer views of padded frames spanning several chunks"""
+    mgr=ChunkBufferManager(chunk_size=120)
+    mgr.allocate(7,40)  # 3 frames per chunk; each frame is 24 bytes of data followed by 16 bytes of padding
+    for i in range(7):
+        for _,v in mgr.get_frames_views(i,1,"<u2",(3,4)):
+            v[:]=np.arange(12).reshape((3,4))+i*100
+    views=mgr.get_frames_views(5,4,"<u2",(3,4))
+    assert [n for n,_ in views]==[1,1,2]
+    frames=np.concatenate([v for _,v in views],axis=0)
+    assert frames.shape==(4,3,4)
+    for f,i in zip(frames,[5,6,0,1]):
+        assert np.all(f==np.arange(12).reshape((3,4))+i*100)
+
+def test_frame_counter_leases():
+    """Test frames lease validity, margin, release, and buffer reset"""
+    cnt=FrameCounter()
+    cnt.reset(10)
+    cnt.update_acquired_frames(5)
+    lid=cnt.add_lease((2,5))
+    assert cnt.is_lease_valid(lid)
+    assert cnt.get_lease_margin()==5
+    cnt.update_acquired_frames(10)
+    assert cnt.is_lease_valid(lid) and cnt.get_lease_margin()==0
+    cnt.update_acquired_frames(11)  # frame 2 is currently being overwritten
+    assert not cnt.is_lease_valid(lid)
+    cnt.release_lease(lid)
+    assert cnt.get_lease_margin() is None
+    cnt.release_lease(lid)
+    old_lid=cnt.add_lease((10,11))
+    cnt.reset(10)
+    assert not cnt.is_lease_valid(old_lid)
+    cnt.update_acquired_frames(2)
+    new_lid=cnt.add_lease((0,2))
+    assert new_lid!=old_lid
+    assert not cnt.is_lease_valid(old_lid)
+    cnt.release_lease(old_lid)  # releasing a stale lease does not affect the new one
+    assert cnt.is_lease_valid(new_lid)
+    cnt.reset()
+    assert not cnt.is_lease_valid(new_lid)
+
+
+
+
+class TestSimulatedCamera(ROICameraTester):
+    """Testing class for simulated camera"""
+    devname="sim_camera"
+    devcls=Simulated.SimulatedCamera
+    grab_size=100
+    rois=gen_rois(128,((1,1),(1,2),(2,2),((0,0),False),((3,3),False),((10,10),False),((100,100),False)))
+    @pytest.mark.devchange(1)
+    def test_frame_info_formats(self, devopener):
+        """Test frame info field types in different formats"""
+        device=devopener()
+        try:
+            device.set_frame_info_format("list")
+            _,infos=device.grab(10,return_info=True)
+            assert all(isinstance(i[0],int) and isinstance(i[1],int) for i in infos)
+            device.set_frame_info_format("array",include_fields=["frame_index","framestamp"])
+            _,infos=device.grab(10,return_info=True)
+            assert all(i.dtype.kind=="i" for i in infos)
+            assert [i[0] for i in infos]==list(range(10))
+            device.set_frame_info_format("structured")
+            _,infos=device.grab(10,return_info=True)
+            assert infos[0].dtype["framestamp"].kind=="i" and infos[0].dtype["timestamp"].kind=="f"
+        finally:
+            device.set_frame_info_format("namedtuple")
+    @pytest.mark.devchange(1)
+    def test_frames_lease(self, devopener):
+        """Test leasing frames from the acquisition buffer"""
+        device=devopener()
+        try:
+            device.setup_acquisition(mode="snap",nframes=10)
+            device.start_acquisition()
+            device.wait_for_frame(since="start",nframes=10)
+            frames=device.read_multiple_images(rng=(2,10),peek=True)
+            with device.lease_multiple_images(rng=(2,10),return_info=True) as lease:
+                assert lease.nframes()==8 and lease.is_valid()
+                assert device.get_frames_lease_margin()==1
+                assert np.all(lease.copy()==np.array(frames))
+                assert all(not f.flags.writeable for f in lease.get_frames())
+                infos=np.concatenate(lease.get_info(),axis=0)
+                assert list(infos[:,0])==list(range(2,10))
+            assert not lease.is_valid()
+            assert device.get_frames_lease_margin() is None
+            with pytest.raises(FramesLeaseExpiredError):
+                lease.get_frames()
+            assert device.lease_multiple_images().nframes()==0
+            old_lease=device.lease_multiple_images(rng=(5,10))
+            device.start_acquisition()  # restarting the acquisition invalidates the old leases
+            device.wait_for_frame(since="start",nframes=10)
+            assert not old_lease.is_valid()
+            lease=device.lease_multiple_images(rng=(5,10))
+            old_lease.release()
+            assert lease.is_valid()
+            lease.release()
+        finally:
+            device.clear_acquisition()
+    @pytest.mark.devchange(1)
+    def test_frames_lease_expiry(self, devopener):
+        """Test that the lease expires once its frames are written over"""
+        device=devopener()
+        exposure,period=device.get_exposure(),device.get_frame_period()
+        try:
+            device.set_frame_period(1E-3)
+            device.setup_acquisition(mode="sequence",nframes=10)
+            device.start_acquisition()
+            device.wait_for_frame(since="start",nframes=5)
+            lease=device.lease_multiple_images(rng=(0,5))
+            device.wait_for_frame(since="start",nframes=20)
+            assert not lease.is_valid()
+            with pytest.raises(FramesLeaseExpiredError):
+                lease.copy()
+            lease.release()
+        finally:
+            device.clear_acquisition()
+            device.set_frame_period(period)
+            device.set_exposure(exposure)
+    @pytest.mark.devchange(1)
+    def test_read_out(self, devopener):
+        """Test reading frames into a preallocated array"""
+        device=devopener()
+        try:
+            device.setup_acquisition(mode="snap",nframes=10)
+            device.start_acquisition()
+            device.wait_for_frame(since="start",nframes=10)
+            frames=device.read_multiple_images(peek=True)
+            shape=frames[0].shape
+            for out_shape in [(3,shape[0]+1,shape[1]),(3,shape[0],shape[1]-1),(3,shape[1])]:
+                with pytest.raises(ValueError):
+                    device.read_multiple_images(out=np.zeros(out_shape,dtype=frames[0].dtype))
+            assert device.get_new_images_range()==(0,10)
+            out=np.full((4,)+shape,-1,dtype="float")  # wider dtype of a different kind is allowed
+            read=device.read_multiple_images(out=out)
+            assert len(read)==4 and np.shares_memory(read,out)
+            assert np.all(read==np.array(frames[:4]))
+            out=np.zeros((20,)+shape,dtype=frames[0].dtype)
+            read,infos=device.read_multiple_images(out=out,return_info=True)
+            assert len(read)==len(infos)==6 and np.all(read==np.array(frames[4:]))
+            assert device.get_new_images_range()==(10,10)
+        finally:
+            device.clear_acquisition()
+    def test_read_out_dtype(self):
+        """Test that the float frames can not be written into an integer array"""
+        with Simulated.SimulatedCamera(detector_size=(16,16),dtype="<f4") as device:
+            device.setup_acquisition(mode="snap",nframes=4)
+            device.start_acquisition()
+            device.wait_for_frame(since="start",nframes=4)
+            with pytest.raises(ValueError):
+                device.read_multiple_images(out=np.zeros((4,16,16),dtype="<u2"))
+            assert len(device.read_multiple_images(out=np.zeros((4,16,16),dtype="<f8")))==4
+    @pytest.mark.devchange(1)
+    def test_read_out_missing(self, devopener):
+        """Test reading frames with missing frames into a preallocated array"""
+        device=devopener()
+        exposure,period=device.get_exposure(),device.get_frame_period()
+        try:
+            device.set_frame_period(2E-2)
+            device.setup_acquisition(mode="sequence",nframes=10)
+            device.start_acquisition()
+            device.wait_for_frame(since="start",nframes=20)
+            shape=device.read_multiple_images(rng=(19,20),peek=True)[0].shape
+            for missing_frame in ["none","zero","skip"]:
+                out=np.full((20,)+shape,1,dtype="<u2")
+                read,infos=device.read_multiple_images(rng=(0,15),peek=True,missing_frame=missing_frame,out=out,return_info=True)
+                nmissing=sum(i is None for i in infos)
+                assert len(read)==len(infos)
+                if missing_frame=="skip":
+                    assert nmissing==0 and 0<len(read)<=10
+                else:
+                    assert len(read)==15 and 5<=nmissing<15
+                    assert np.all(read[:nmissing]==0)  # missing frames are zero-filled even for missing_frame=="none"
+                assert np.all(out[len(read):]==1)
+            out=np.zeros((5,)+shape,dtype="<u2")
+            read,infos=device.read_multiple_images(rng=(0,15),peek=True,missing_frame="zero",out=out,return_info=True)
+            assert len(read)==len(infos)==5 and all(i is None for i in infos)
+        finally:
+            device.clear_acquisition()
+            device.set_frame_period(period)
+            device.set_exposure(exposure)
+    @pytest.mark.devchange(1)
+    def test_grab_into(self, devopener, tmpdir):
+        """Test grabbing frames into a preallocated array and into a memmap file"""
+        device=devopener()
+        try:
+            out=np.zeros((20,)+device.get_data_dimensions(),dtype="<u2")
+            with pytest.raises(ValueError):
+                device.grab(30,out=out)
+            frames=device.grab(15,buff_size=5,out=out)
+            assert len(frames)==15 and np.shares_memory(frames,out)
+            assert np.all(out[15:]==0)
+            path=str(tmpdir.join("frames.bin"))
+            frames,infos=device.grab_into(path,nframes=15,buff_size=5,return_info=True)
+            assert isinstance(frames,np.memmap) and frames.shape==(15,)+device.get_data_dimensions()
+            assert len(infos)==15
+            saved=np.memmap(path,dtype=frames.dtype,mode="r",shape=frames.shape)
+            assert np.all(saved==frames)
+            del saved,frames
+        finally:
+            device.clear_acquisition()
+    @pytest.mark.devchange(1)
+    def test_missing_frame_info(self, devopener):
+        """Test that the missing frames info is ``None`` in the array and namedtuple formats"""
+        device=devopener()
+        exposure,period=device.get_exposure(),device.get_frame_period()
+        try:
+            device.set_frame_period(2E-2)
+            device.setup_acquisition(mode="sequence",nframes=10)
+            for fmt in ["array","namedtuple"]:
+                device.set_frame_info_format(fmt)
+                device.start_acquisition()
+                device.wait_for_frame(since="start",nframes=20)
+                frames,infos=device.read_multiple_images(rng=(0,15),missing_frame="none",return_info=True)
+                assert len(frames)==len(infos)==15
+                nmissing=sum(f is None for f in frames)
+                assert 5<=nmissing<15
+                assert all(i is None for i in infos[:nmissing])
+                assert [i[0] for i in infos[nmissing:]]==list(range(nmissing,15))
+                device.stop_acquisition()
+        finally:
+            device.clear_acquisition()
+            device.set_frame_info_format("namedtuple")
+            device.set_frame_period(period)
+            device.set_exposure(exposure)
@@ -4,6 +4,8 @@ from pylablib.devices import NI
 from .test_basic import DeviceTester
 
 import pytest
+import numpy as np
+import time
 
 
 class TestFW102(DeviceTester):
@@ -50,4 +52,93 @@ class TestNIDAQ(DeviceTester):
         device.start()
         v=device.read(self.samples,timeout=self.samples/self.ai_rate*2+2)
         device.stop()
-        assert v.shape==(self.samples,4)
\ No newline at end of file
+        assert v.shape==(self.samples,4)
+
+
+class TestNIDAQSimulated(TestNIDAQ):
+    """Testing class for NI DAQ interface using the simulated backend"""
+    devname="nidaq_simulated"
+    devargs=("dev0",1E2,1E5,False,"simulated")
+
+    block_size=100
+    def test_streaming(self, devopener):
+        """Test streaming readout continuity and dropped blocks reporting"""
+        device=devopener()
+        device.start_streaming(block_size=self.block_size,nbuffers=2)
+        try:
+            assert device.is_streaming()
+            nch=len(device.get_input_channels())
+            last=-1
+            for _ in range(5):
+                indices,columns=device.read_stream(timeout=2)
+                assert len(indices)>0 and len(indices)%self.block_size==0
+                assert len(columns)==nch
+                assert all(len(c)==len(indices) for c in columns)
+                assert np.all(np.diff(indices)==1)
+                assert indices[0]==last+1
+                last=indices[-1]
+            status=device.get_stream_status()
+            assert status.read==last+1
+            assert status.dropped==0
+            time.sleep(self.block_size/self.ai_rate*6)
+            status=device.get_stream_status()
+            assert status.queued==2
+            assert status.dropped>0
+            indices,columns=device.read_stream(timeout=2,max_blocks=1)
+            assert all(len(c)==len(indices)==self.block_size for c in columns)
+            assert status.dropped<=indices[0]-(last+1)<=device.get_stream_status().dropped  # more blocks might be dropped between the calls
+            assert np.all(np.diff(indices)==1)
+        finally:
+            device.stop_streaming()
+        assert not device.is_streaming()
+    def test_streaming_overflow(self, devopener):
+        """Test restarting the streaming after the hardware buffer overflow"""
+        device=devopener()
+        buffer_size=device.buffer_size
+        device.buffer_size=3*self.block_size
+        device.setup_clock(self.ai_rate)
+        device.start_streaming(block_size=self.block_size,nbuffers=4)
+        try:
+            cidx=device.get_input_channels().index("c0")
+            stall=[]
+            reader=device._stream_readers[0]
+            def stalling_reader(*args, **kwargs):
+                if stall and stall.pop():
+                    time.sleep(self.block_size/self.ai_rate*6)  # stall the stream callback long enough to overflow the input buffer
+                return reader(*args,**kwargs)
+            device._stream_readers[0]=stalling_reader
+            indices,columns=device.read_stream(timeout=2)
+            last=indices[-1]
+            counts=list(columns[cidx])
+            time.sleep(self.block_size/self.ai_rate*2.5)  # queue some blocks before the overflow
+            stall.append(True)
+            time.sleep(self.block_size/self.ai_rate*10)
+            for _ in range(20):
+                indices,columns=device.read_stream(timeout=2)
+                if len(indices):
+                    assert indices[0]>last and np.all(np.diff(indices)>0)
+                    last=indices[-1]
+                    counts+=list(columns[cidx])
+                    if device.get_stream_status().overflows:
+                        break
+            status=device.get_stream_status()
+            assert status.overflows==1 and status.lost>0
+            assert np.all(np.array(counts[1:])<=self.ai_rate*1.01)  # no spurious counts from the blocks read across the restart
+        finally:
+            device.stop_streaming()
+            device.buffer_size=buffer_size
+            device.setup_clock(self.ai_rate)
+
+def test_stream_block_buffer():
+    """Test block dropping in the streaming buffer when all buffers are taken by the reader"""
+    buffer=NI.daq.StreamBlockBuffer(2,10,[((10,),"f8")])
+    for start in [0,10]:
+        buffer.put_filled(buffer.get_free(),start)
+    assert buffer.get_free()==0 and buffer.dropped==1  # oldest filled block is dropped
+    buffer.put_filled(0,20)
+    blocks=buffer.get_filled(timeout=0)
+    assert [start for _,start in blocks]==[10,20]
+    assert buffer.get_free() is None and buffer.dropped==2  # all buffers are taken
+    for idx,_ in blocks:
+        buffer.release(idx)
+    assert buffer.get_free() is not None
@@ -6,6 +6,104 @@ import pytest
 import time
 import numpy as np
 
+class ScriptedTektronixScope:
+    """
+    Scripted Tektronix TDS2000-like oscilloscope, which is used as a fake :class:`.ScriptedDeviceBackend` device.
+
+    Keeps the set values and returns them on the corresponding queries; generates sine waveforms on ``CURVE?`` requests.
+    Counts the received queries in the `queries` dictionary.
+    """
+    def __init__(self, nchannels=4, pts=2500):
+        self.nchannels=nchannels
+        self.values={"*IDN?":"TEKTRONIX,TDS 2024B,C000000,CF:91.1CT FV:v22.11","ACQ:STATE":"0","ACQ:STOPAFTER":"RUNSTOP",
+            "DATA:SOURCE":"CH1","DATA:ENCDG":"RIBINARY","DATA:WIDTH":"1","DATA:START":"1","DATA:STOP":str(pts),
+            "HORIZONTAL:RECORDLENGTH":str(pts),"HORIZONTAL:SCALE":"1.0E-3","HORIZONTAL:POS":"0.0",
+            "TRIGGER:MAIN:EDGE:SOURCE":"CH1","TRIGGER:MAIN:EDGE:COUPL":"DC","TRIGGER:MAIN:EDGE:SLOPE":"RISE",
+            "TRIGGER:MAIN:LEVEL":"0.0","TRIGGER:MAIN:MODE":"AUTO","TRIGGER:MAIN:TYPE":"EDGE","TRIGGER:STATE":"AUTO"}
+        for ch in range(1,nchannels+1):
+            self.values.update({"CH{}:SCALE".format(ch):"1.0","CH{}:POSITION".format(ch):"0.0","CH{}:COUPL".format(ch):"DC",
+                "CH{}:PROBE".format(ch):"1.0","SELECT:CH{}".format(ch):"1"})
+        self.esr=0
+        self.nacq=0
+        self.queries={}
+    def _get_pts(self):
+        start,stop=int(self.values["DATA:START"]),int(self.values["DATA:STOP"])
+        return max(min(stop,int(self.values["HORIZONTAL:RECORDLENGTH"]))-start+1,0)
+    def _get_fmt(self):
+        enc=self.values["DATA:ENCDG"]
+        if enc.startswith("ASC"):
+            return None
+        return (">" if enc.startswith("S") else "<")+("i" if "RI" in enc else "u")+self.values["DATA:WIDTH"]
+    def _get_wfmpre(self):
+        ch=self.values["DATA:SOURCE"]
+        enc=self.values["DATA:ENCDG"]
+        xincr=float(self.values["HORIZONTAL:SCALE"])*10/int(self.values["HORIZONTAL:RECORDLENGTH"])
+        ymult=float(self.values[ch+":SCALE"])/25.*float(self.values[ch+":PROBE"])/256**(int(self.values["DATA:WIDTH"])-1)
+        return ";".join([self.values["DATA:WIDTH"],str(8*int(self.values["DATA:WIDTH"])),"ASC" if enc.startswith("ASC") else "BIN",
+            enc[:-6] if not enc.startswith("ASC") else "RI","LSB",str(self._get_pts()),'"Ch1, DC coupling"',"Y","{:E}".format(xincr),"0",
+            "{:E}".format(-5*float(self.values["HORIZONTAL:SCALE"])),'"s"',"{:E}".format(ymult),"0.0E0","{:E}".format(-float(self.values[ch+":POSITION"])*25),'"Volts"'])
+    def _get_curve(self):
+        ch=int(self.values["DATA:SOURCE"][2:])
+        pts=self._get_pts()
+        data=np.sin(np.arange(pts)*2*np.pi/pts*ch+self.nacq)*100
+        fmt=self._get_fmt()
+        if fmt is None:
+            return ",".join(str(int(d)) for d in data)
+        data=data.astype(fmt).tobytes()
+        size=str(len(data))
+        return b"#"+str(len(size)).encode()+size.encode()+data
+    def _finish_single(self):
+        if self.values["ACQ:STOPAFTER"].startswith("SEQ") and self.values["ACQ:STATE"]!="0":
+            self.nacq+=1
+            self.values["ACQ:STATE"]="0"
+    def _query(self, comm):
+        self.queries[comm]=self.queries.get(comm,0)+1
+        if comm in ["*OPC?","ACQ:STATE?"]:
+            self._finish_single()
+        if comm=="*OPC?":
+            return "1"
+        if comm=="*ESR?":
+            esr,self.esr=self.esr,0
+            return str(esr)
+        if comm=="WFMP?":
+            return self._get_wfmpre()
+        if comm=="WFMP:NR_PT?":
+            return str(self._get_pts())
+        if comm=="CURVE?":
+            if self.values["ACQ:STATE"]!="0":
+                self.nacq+=1
+            return self._get_curve()
+        if comm[:-1] in self.values:
+            return self.values[comm[:-1]]
+        if comm in self.values:
+            return self.values[comm]
+        self.esr|=0x20
+    def _command(self, comm):
+        name,value=(comm.split(None,1)+[""])[:2]
+        if name=="*CLS":
+            self.esr=0
+        elif name=="TRIGGER" and value=="FORCE":
+            pass
+        elif name in self.values:
+            self.values[name]=value.strip()
+            if name=="ACQ:STATE":
+                self.values[name]="1" if value in ["ON","1"] else "0"
+        else:
+            self.esr|=0x20
+    def respond(self, msg):
+        replies=[]
+        for comm in msg.split(";"):
+            comm=comm.strip().lstrip(":").upper()
+            if comm.endswith("?"):
+                reply=self._query(comm)
+                if reply is not None:
+                    replies.append(reply)
+            elif comm:
+                self._command(comm)
+        return replies or None
+
+
+
 class GenericOscilloscopeTester(DeviceTester):
     """Testing a generic oscilloscope"""
     
@@ -33,4 +131,32 @@ class GenericOscilloscopeTester(DeviceTester):
 class TestTektronixTDS2000(GenericOscilloscopeTester):
     """Testing class for Tektronix TDS2000 series oscilloscope"""
     devname="tektronix_tds2000"
-    devcls=Tektronix.TDS2000
\ No newline at end of file
+    devcls=Tektronix.TDS2000
+
+
+
+class TestTektronixScripted(GenericOscilloscopeTester):
+    """Testing class for Tektronix oscilloscope interface using a scripted fake oscilloscope"""
+    devname="tektronix_scripted"
+    devcls=Tektronix.TDS2000
+    devargs=(("scripted",ScriptedTektronixScope()),)
+
+    def test_cached_pipelined_sweeps(self, devopener):
+        """Test preamble caching and its invalidation in pipelined sweep readout"""
+        device=devopener()
+        script=device.instr.script
+        channels=list(range(1,device.get_channels_number()+1))
+        device.invalidate_wfmpre_cache()
+        script.queries.clear()
+        traces=device.read_multiple_sweeps(channels,wfmpres="cached")
+        traces_cached=device.read_multiple_sweeps(channels,wfmpres="cached")
+        assert script.queries["WFMP?"]==len(channels)
+        assert script.queries["CURVE?"]==2*len(channels)
+        assert all(np.all(t==tc) for t,tc in zip(traces,traces_cached))
+        device.set_vertical_span(2,1.)
+        traces_span=device.read_multiple_sweeps(channels,wfmpres="cached")
+        assert script.queries["WFMP?"]==2*len(channels)
+        assert np.allclose(traces_span[1][:,1],traces[1][:,1]/10)
+        assert np.all(traces_span[0]==traces[0])
+        device.set_vertical_span(2,10.)
+
@@ -0,0 +1,65 @@
+from pylablib.core.thread import controller, threadprop, asyncio_bridge
+from pylablib.thread.stream import benchmark
+
+import pytest
+import asyncio
+
+
+
+class CounterThread(controller.QTaskThread):
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.v["counter"]=0
+        self.add_command("add")
+    def add(self, value=1):
+        self.v["counter"]+=value
+        return self.v["counter"]
+
+def run_sync(coro):
+    """Run the coroutine in a new event loop (``asyncio.run`` is not available in Python 3.6)"""
+    loop=asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+@pytest.fixture
+def counter_thread(request):
+    benchmark.ensure_app()
+    name="asyncio_counter_{}".format(request.node.name)
+    thread=CounterThread(name)
+    thread.start()
+    try:
+        yield controller.sync_controller(name)
+    finally:
+        thread.stop(sync=True)
+
+
+def test_call_command(counter_thread):
+    """Test asynchronous command calls"""
+    async def run():
+        access=asyncio_bridge.AsyncControllerAccess(counter_thread,timeout=5.)
+        assert await access.c.add(2)==2
+        return await asyncio_bridge.call_command(counter_thread,"add",args=(3,),timeout=5.)
+    assert run_sync(run())==5
+
+def test_sync_variable(counter_thread):
+    """Test asynchronous variable synchronization"""
+    async def run():
+        wait=asyncio.ensure_future(asyncio_bridge.sync_variable(counter_thread,"counter",lambda v: v>=3,timeout=5.))
+        await asyncio.sleep(0.01)
+        for _ in range(3):
+            counter_thread.ca.add()
+        return await wait
+    assert run_sync(run())==3
+    async def run_timeout():
+        await asyncio_bridge.sync_variable(counter_thread,"counter",10,timeout=0.1)
+    with pytest.raises(threadprop.TimeoutThreadError):
+        run_sync(run_timeout())
+
+def test_sync_exec_point(counter_thread):
+    """Test that asynchronous execution point synchronization agrees with the blocking version"""
+    async def run():
+        return await asyncio_bridge.sync_exec_point(counter_thread,"run",timeout=5.)
+    assert run_sync(run())==counter_thread.sync_exec_point("run")==1
@@ -0,0 +1,60 @@
+from pylablib.thread.stream.blockstream import StreamFormerThread
+from pylablib.thread.stream import benchmark
+from pylablib.core.thread import controller
+
+import pytest
+import numpy as np
+
+
+
+class RecordingFormerThread(StreamFormerThread):
+    def setup_task(self, block_mode=False):  # pylint: disable=arguments-differ
+        super().setup_task(block_mode=block_mode)
+        self.add_channel("x",max_queue_len=100,expand_list=True)
+        self.add_channel("y",max_queue_len=100,expand_list=True)
+        self.add_channel("z",max_queue_len=3)
+        self.add_channel("f",func=lambda: 1.5)
+        self.add_channel("l",required=False,initial=0)
+        self.block_period=4
+        self.blocks=[]
+        self.add_command("feed")
+        self.add_command("get_blocks")
+    def on_new_block(self):
+        self.blocks.append(self._build_new_block().data)
+    def feed(self, inputs):
+        for name,value in inputs:
+            self._add_data(name,value)
+    def get_blocks(self):
+        return self.blocks,self.get_data(),self.get_channel_status()
+
+inputs=[
+    ("x",[1,2,3]), ("y",[(1,2),(3,4)]), ("z","a"), ("l",7), ("z",(1,2)),
+    ("y",[(5,),(6,7,8)]), ("x",4), ("z",np.arange(2)), ("y",[(9,10)]*3), ("l",8), ("z","b"), ("z","c"),
+    ("x",list(range(5,12))), ("y",[None]*4), ("z","d"), ("z","e"), ("z","f"), ("z","g"), ("x",12), ("y",[(0,0)]),
+]
+
+def _run_former(name, block_mode):
+    benchmark.ensure_app()
+    thread=RecordingFormerThread(name,kwargs={"block_mode":block_mode})
+    thread.start()
+    try:
+        ctl=controller.sync_controller(name)
+        ctl.cs.feed(inputs)
+        return ctl.cs.get_blocks()
+    finally:
+        thread.stop(sync=True)
+
+def _as_list(column):
+    return [v.tolist() if isinstance(v,np.ndarray) else v for v in column]
+
+def test_block_mode_equivalence():
+    """Test that the block mode produces the same blocks, table, and queue states as the list mode"""
+    list_blocks,list_table,list_status=_run_former("former_list",False)
+    block_blocks,block_table,block_status=_run_former("former_block",True)
+    assert len(list_blocks)==len(block_blocks)>0
+    for lb,bb in zip(list_blocks+[list_table],block_blocks+[block_table]):
+        assert set(lb)==set(bb)
+        for n in lb:
+            assert isinstance(bb[n],np.ndarray)
+            assert _as_list(bb[n])==_as_list(lb[n])
+    assert list_status==block_status
@@ -0,0 +1,131 @@
+from pylablib.core.thread import callstats, callsync, controller, profile
+from pylablib.thread.stream import benchmark
+
+import time
+
+
+
+def test_histogram():
+    """Test the histogram binning and percentiles"""
+    hist=callstats.TimeHistogram(min_time=1.,nbins=5)
+    assert hist.get_edges()==[1.,2.,4.,8.]
+    assert hist.get_percentile(50) is None
+    for v in [0.5,1.,1.5,3.,3.5,5.,100.]:
+        hist.add(v)
+    assert hist.counts==[1,2,2,1,1]
+    assert hist.get_percentile(10)==1.
+    assert hist.get_percentile(40)==2.
+    assert hist.get_percentile(70)==4.
+    assert hist.get_percentile(80)==8.
+    assert hist.get_percentile(100)==100.
+    snap=hist.snapshot()
+    assert snap["count"]==7 and snap["max"]==100. and abs(snap["mean"]-114.5/7)<1E-9
+    assert snap["p50"]==4.
+    hist=callstats.TimeHistogram(min_time=1.,nbins=5)
+    hist.add(0.2)
+    assert hist.get_percentile(99)==0.2  # limited by the maximal value
+    hist.reset()
+    assert hist.snapshot()["mean"] is None and hist.counts==[0]*5
+
+
+
+def _build_call(stats, queue, func=None):
+    call=queue.build_call(func or (lambda: None),sync_result=False)
+    stats.instrument(call)
+    return call
+
+def test_call_accounting():
+    """Test the accounting of the executed and skipped calls, including calls skipped by a full queue"""
+    tstats=callstats.ThreadCallStats(enabled=True)
+    stats=tstats.get_source("commands","cmd")
+    assert tstats.get_source("commands","cmd") is stats
+    queue=callsync.QQueueLengthLimitScheduler(max_len=2,on_full_queue="skip_oldest")
+    for _ in range(3):
+        queue.schedule(_build_call(stats,queue,lambda: time.sleep(0.01)))
+    snap=stats.snapshot()
+    assert (snap["scheduled"],snap["executed"],snap["skipped"],snap["pending"],snap["max_pending"])==(3,0,1,2,3)
+    queue.pop_call().execute()
+    queue.clear(close=False)
+    snap=stats.snapshot()
+    assert (snap["scheduled"],snap["executed"],snap["skipped"],snap["pending"],snap["max_pending"])==(3,1,2,0,3)
+    assert snap["exec_time"]["count"]==1 and snap["exec_time"]["max"]>=0.01
+    assert snap["wait_time"]["count"]==1
+    queue=callsync.QQueueLengthLimitScheduler(max_len=1,on_full_queue="skip_current")
+    queue.schedule(_build_call(stats,queue))
+    assert not queue.schedule(_build_call(stats,queue))
+    snap=stats.snapshot()
+    assert (snap["scheduled"],snap["skipped"],snap["pending"])==(5,3,1)
+    tsnap=tstats.snapshot()
+    assert tsnap["commands"]["cmd"]==snap and tsnap["jobs"]=={}
+    tstats.reset()
+    assert stats.snapshot()["scheduled"]==0
+
+def test_multi_queue_accounting():
+    """Test that a call skipped by one of the joint queues is counted once and removed from the other queues"""
+    tstats=callstats.ThreadCallStats(enabled=True)
+    stats=tstats.get_source("subscriptions","callback")
+    main_queue=callsync.QQueueScheduler()
+    limit_queue=callsync.QQueueLengthLimitScheduler(max_len=1)
+    notified=[]
+    scheduler=callsync.QMultiQueueScheduler([main_queue,limit_queue],[lambda: notified.append(True)],stats=stats)
+    for _ in range(2):
+        scheduler.schedule(scheduler.build_call(lambda: None,sync_result=False))
+    assert len(main_queue)==len(limit_queue)==1 and len(notified)==1
+    snap=stats.snapshot()
+    assert (snap["scheduled"],snap["executed"],snap["skipped"],snap["pending"])==(2,0,1,1)
+    call=main_queue.pop_call()
+    call.skip()
+    assert len(limit_queue)==0  # removed from the other queue on skipping
+    snap=stats.snapshot()
+    assert (snap["skipped"],snap["pending"])==(2,0)
+
+def test_disabled():
+    """Test that the disabled statistics do not instrument the calls"""
+    tstats=callstats.ThreadCallStats(enabled=False)
+    stats=tstats.get_source("subscriptions","callback")
+    queue=callsync.QQueueScheduler()
+    scheduler=callsync.QMultiQueueScheduler([queue],[],stats=stats)
+    scheduler.schedule(scheduler.build_call(lambda: None,sync_result=False))
+    queue.pop_call().execute()
+    assert stats.snapshot()["scheduled"]==stats.snapshot()["executed"]==0
+
+
+
+class StatsThread(controller.QTaskThread):
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.v["busy"]=False
+        self.subscribe_commsync(self.on_value,tags="stats/value",limit_queue=1)
+        self.add_command("block")
+    def on_value(self, src, tag, value):
+        pass
+    def block(self, delay):
+        self.v["busy"]=True
+        time.sleep(delay)
+        self.v["busy"]=False
+
+def test_thread_stats():
+    """Test the statistics collected in a running thread"""
+    main=benchmark.ensure_app()
+    thread=StatsThread("stats_thread")
+    thread.start()
+    try:
+        ctl=controller.sync_controller("stats_thread")
+        profile.enable_call_stats(True,reset=True,default=False)
+        for _ in range(3):
+            ctl.cs.block(0.01)
+        ctl.ca.block(0.3)
+        ctl.sync_variable("busy",True,timeout=5.)
+        for i in range(5):
+            main.send_multicast(tag="stats/value",value=i)
+        ctl.cs.block(0)
+        stats=profile.get_call_stats(reset=True)["stats_thread"]
+        assert stats["enabled"]
+        cmd=stats["commands"]["block"]
+        assert (cmd["scheduled"],cmd["executed"],cmd["skipped"],cmd["pending"])==(5,5,0,0)
+        assert cmd["exec_time"]["max"]>=0.3
+        sub=stats["subscriptions"]["on_value"]
+        assert (sub["scheduled"],sub["executed"],sub["skipped"],sub["pending"])==(5,1,4,0)
+        assert profile.get_call_stats()["stats_thread"]["commands"]["block"]["scheduled"]==0
+    finally:
+        profile.enable_call_stats(False,default=False)
+        thread.stop(sync=True)
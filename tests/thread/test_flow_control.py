@@ -0,0 +1,190 @@
+from pylablib.core.thread import controller
+from pylablib.thread.stream import stream_manager, stream_message, benchmark
+from pylablib.thread.devices.Simulated import SimulatedCameraThread
+
+import pytest
+import time
+
+
+
+class LoopbackController:
+    """Minimal controller stand-in which delivers the credit multicasts directly between the flow control objects"""
+    def __init__(self, name, hub):
+        self.name=name
+        self.hub=hub
+        self.stop_notifiers=[]
+    def subscribe_direct(self, callback, tags=None, dsts="any"):
+        self.hub.append((dsts,tags,callback))
+        return len(self.hub)-1
+    def unsubscribe(self, sid):
+        self.hub[sid]=None
+    def send_multicast(self, dst="any", tag=None, value=None):
+        for s in list(self.hub):
+            if s is not None and s[0]==dst and s[1]==tag:
+                s[2](self.name,tag,value)
+    def add_stop_notifier(self, func):
+        self.stop_notifiers.append(func)
+    def remove_stop_notifier(self, func):
+        if func in self.stop_notifiers:
+            self.stop_notifiers.remove(func)
+            return True
+        return False
+
+@pytest.fixture
+def flow():
+    hub=[]
+    source=stream_manager.StreamSource(stream_message.GenericDataStreamMessage,sn="camera")
+    control=stream_manager.StreamFlowControl(LoopbackController("camera",hub),source)
+    def add_consumer(name, capacity, ack_period=1):
+        return stream_manager.StreamCreditSender(LoopbackController(name,hub),"camera",capacity=capacity,ack_period=ack_period)
+    def send(n):
+        return [source.build_message() for _ in range(n)]
+    return source,control,add_consumer,send
+
+
+def test_credits_and_drops(flow):
+    """Test credit and drop accounting with skipped messages"""
+    _,control,add_consumer,send=flow
+    assert control.get_credits() is None and control.can_send()
+    send(2)  # messages sent before the registration are not in flight
+    cons=add_consumer("cons",2)
+    assert control.get_credits()==2
+    msgs=send(2)
+    assert control.get_credits()==0 and not control.can_send()
+    cons.ack(msgs[0])
+    assert control.get_credits()==1 and control.can_send()
+    assert control.get_drops()=={"cons":0}
+    msgs+=send(2)
+    assert control.get_credits()==-1 and not control.can_send()
+    cons.ack(msgs[3])  # msgs[1] and msgs[2] are skipped by the consumer
+    assert control.get_drops()=={"cons":2}
+    assert control.get_credits()==2
+    cons.close()
+    assert control.get_credits() is None and control.get_drops()=={}
+
+def test_ack_period(flow):
+    """Test accounting with acknowledgements batched over several messages"""
+    _,control,add_consumer,send=flow
+    cons=add_consumer("cons",3,ack_period=2)
+    msgs=send(3)
+    assert control.get_credits()==0
+    cons.ack(msgs[0])
+    assert control.get_credits()==0  # acknowledgement is not sent yet
+    cons.ack(msgs[1])
+    assert control.get_credits()==2 and control.get_drops()=={"cons":0}
+    cons.ack(msgs[2])
+    msgs=send(3)
+    cons.ack(msgs[1])  # msgs[0] is skipped
+    assert control.get_drops()=={"cons":1}
+    assert control.get_status()["cons"]=={"capacity":3,"inflight":1,"credits":2,"drops":1}
+
+def test_session_change(flow):
+    """Test that a session change resets the in-flight count and ignores acknowledgements from the previous session"""
+    source,control,add_consumer,send=flow
+    cons=add_consumer("cons",2)
+    old=send(2)
+    cons.ack(old[0])
+    assert control.get_credits()==1
+    source.next_session()
+    assert control.get_credits()==2
+    cons.ack(old[1])
+    assert control.get_credits()==2 and control.get_drops()=={"cons":0}
+    msgs=send(2)
+    assert not control.can_send()
+    cons.ack(msgs[1])
+    assert control.get_drops()=={"cons":1}
+    assert control.get_credits()==2
+
+
+
+def test_receiver_flow_control():
+    """Test that re-enabling the receiver flow control replaces the consumer registration without accumulating the stop notifiers"""
+    hub=[]
+    source=stream_manager.StreamSource(stream_message.GenericDataStreamMessage,sn="camera")
+    control=stream_manager.StreamFlowControl(LoopbackController("camera",hub),source)
+    ctl=LoopbackController("cons",hub)
+    recv=stream_manager.IStreamReceiver(ctl)
+    for capacity in [1,2,3]:
+        recv.enable_flow_control("camera",capacity=capacity)
+        assert control.get_credits()==capacity
+        assert len(ctl.stop_notifiers)==1
+    recv.disable_flow_control()
+    assert control.get_credits() is None and ctl.stop_notifiers==[]
+    cons=stream_manager.StreamCreditSender(ctl,"camera",capacity=2)
+    for func in list(ctl.stop_notifiers):  # emulate the thread stop
+        func()
+    assert control.get_credits() is None and ctl.stop_notifiers==[]
+    cons.close()
+
+
+
+
+class CreditConsumerThread(controller.QTaskThread):
+    """Frames consumer which registers for the flow control with capacity 1 and only acknowledges the messages on request"""
+    def setup_task(self, src):  # pylint: disable=arguments-differ
+        self.credits=stream_manager.StreamCreditSender(self,src,capacity=1)
+        self.subscribe_commsync(self.process_frames,srcs=src,tags="frames/new")
+        self.pending=[]
+        self.v["messages"]=0
+        self.v["frames"]=0
+        self.v["source_decimated"]=0
+        self.add_command("ack_all")
+    def process_frames(self, src, tag, msg):  # pylint: disable=unused-argument
+        self.pending.append(msg)
+        self.v["messages"]+=1
+        self.v["frames"]+=msg.nframes()
+        self.v["source_decimated"]=msg.metainfo.get("source_decimated",0)
+    def ack_all(self):
+        for msg in self.pending:
+            self.credits.ack(msg)
+        self.pending=[]
+
+def _run_camera(name, policy, duration=1., ack_at=None):
+    """Run the simulated camera with the given flow policy and a consumer which acknowledges all messages at `ack_at` seconds after the start"""
+    benchmark.ensure_app()
+    misc={"stream/flow_policy":policy,"stream/max_hold":0.3,"loop/min_poll_period":0.02}
+    cam=SimulatedCameraThread(name+"_camera",kwargs={"detector_size":(32,32),"frame_period":1E-3,"misc":misc})
+    cons=CreditConsumerThread(name+"_consumer",args=(name+"_camera",))
+    threads=[cam,cons]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            controller.sync_controller(t.name,"run",timeout=10.)
+        cam.cs.acq_start()
+        t0=time.time()
+        if ack_at is not None:
+            time.sleep(ack_at)
+            nmsg=cons.v["messages"]
+            cons.cs.ack_all()
+            cons.sync_variable("messages",lambda v: v>nmsg,timeout=5.)
+        time.sleep(max(duration-(time.time()-t0),0))
+        result={k:cons.v[k] for k in ["messages","frames","source_decimated"]}
+        result["decimated"]=cam.v["frames/decimated"]
+        result["flow"]=cam.v["frames/flow"]
+        cam.cs.acq_stop()
+        return result
+    finally:
+        for t in threads[::-1]:
+            t.stop(sync=True)
+
+def test_camera_report():
+    """Test that the report policy keeps sending the frames to a consumer without credits"""
+    res=_run_camera("flow_report","report")
+    assert res["messages"]>3
+    assert res["decimated"]==0
+    assert res["flow"]["flow_report_consumer"]["credits"]<0
+
+def test_camera_decimate():
+    """Test that the decimate policy drops the frames while the consumer is out of credits"""
+    res=_run_camera("flow_decimate","decimate",ack_at=0.5)
+    assert res["messages"]==2  # one message before and one after the acknowledgement
+    assert res["decimated"]>0
+    assert res["source_decimated"]>0
+
+def test_camera_coalesce():
+    """Test that the coalesce policy holds the frames for at most max_hold seconds while the consumer is out of credits"""
+    res=_run_camera("flow_coalesce","coalesce")
+    assert 2<=res["messages"]<=5
+    assert res["decimated"]==0
+    assert res["frames"]/res["messages"]>50
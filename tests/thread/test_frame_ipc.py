@@ -0,0 +1,108 @@
+from pylablib.thread.stream.frame_ipc import FramesShmemSender, FramesShmemReceiver, FramesShmemSenderThread, FramesShmemReceiverThread
+from pylablib.thread.stream.stream_message import FramesMessage
+from pylablib.thread.stream import benchmark
+from pylablib.core.thread import controller
+
+import pytest
+import numpy as np
+import sys
+
+
+pytestmark=pytest.mark.skipif(sys.version_info<(3,8),reason="shared memory rings require Python 3.8+")
+
+
+
+@pytest.fixture
+def transport():
+    sender=FramesShmemSender(ring_size=2**13)
+    receiver=FramesShmemReceiver.from_args(*sender.get_peer_args())
+    try:
+        yield sender,receiver
+    finally:
+        receiver.close()
+        sender.close()
+
+def _build_message(nframes, value=0, size=32):
+    frames=[np.full((nframes,size,size),value,dtype="<u2")]
+    info=[np.arange(nframes*2).reshape(nframes,2)]
+    return FramesMessage(frames,indices=[value],frame_info=info,chunks=True,metainfo={"extra":"value"},sn="camera",sid=1,mid=value)
+
+
+def test_round_trip(transport):
+    """Test sending a frames message and rebuilding it on the receiving side"""
+    sender,receiver=transport
+    msg=_build_message(2,value=5)
+    assert sender.send_message(msg)
+    assert sender.get_used_size()==msg.frames[0].nbytes
+    rmsg=receiver.recv_message(timeout=1.)
+    assert len(rmsg.frames)==1 and rmsg.frames[0].shape==(2,32,32) and rmsg.frames[0].dtype==np.dtype("<u2")
+    assert np.all(rmsg.frames[0]==5)
+    assert rmsg.indices==[5] and np.all(rmsg.frame_info[0]==msg.frame_info[0])
+    assert rmsg.metainfo["extra"]=="value"
+    assert (rmsg.sn,rmsg.sid,rmsg.mid)==("camera",1,5)
+    with pytest.raises(TimeoutError):
+        receiver.recv_message(timeout=0)
+    del rmsg
+    assert sender.get_used_size()==0
+
+def test_ring_full(transport):
+    """Test dropping messages which do not fit into the ring, and releasing partially written messages"""
+    sender,receiver=transport
+    assert sender.send_message(_build_message(2,value=1))
+    assert sender.send_message(_build_message(1,value=2))
+    multi=FramesMessage([np.zeros((32,32),dtype="<u2")]*3)
+    assert not sender.send_message(multi)  # only the first frame fits
+    assert not sender.send_message(_build_message(1,value=3))
+    assert not sender.closed
+    assert [receiver.recv_message(timeout=1.).mid for _ in range(2)]==[1,2]
+    with pytest.raises(TimeoutError):
+        receiver.recv_message(timeout=0)  # processes the release of the partially written message
+    assert sender.get_used_size()==0
+    assert sender.send_message(_build_message(1,value=4))
+    assert receiver.recv_message(timeout=1.).mid==4
+
+def test_receiver_closed(transport):
+    """Test that sending to a closed receiver drops the messages"""
+    sender,receiver=transport
+    assert sender.send_message(_build_message(1))
+    receiver.close()
+    assert not sender.send_message(_build_message(1))
+    assert sender.closed
+    assert not sender.send_message(_build_message(1))
+
+def test_sender_closed(transport):
+    """Test that closing the sender is reported on the receiving side"""
+    sender,receiver=transport
+    assert sender.send_message(_build_message(1,value=1))
+    sender.close()
+    assert receiver.recv_message(timeout=1.).mid==1
+    assert receiver.recv_message(timeout=1.) is None
+    assert receiver.closed
+
+
+def test_threads():
+    """Test sending frames multicasts between the sender and the receiver threads"""
+    main=benchmark.ensure_app()
+    sender=FramesShmemSenderThread("shmem_sender",args=(main.name,"frames/new"),kwargs={"ring_size":2**16})
+    sender.start()
+    receiver=None
+    try:
+        sctl=controller.sync_controller("shmem_sender")
+        receiver=FramesShmemReceiverThread("shmem_receiver",args=(sctl.cs.get_peer_args(),))
+        receiver.start()
+        rctl=controller.sync_controller("shmem_receiver")
+        for i in range(3):
+            main.send_multicast(tag="frames/new",value=_build_message(2,value=i))
+        rctl.sync_variable("received/frames",6,timeout=5.)
+        assert rctl.v["received/messages"]==3
+        sctl.sync_variable("sent/messages",3,timeout=5.)
+        assert sctl.v["dropped/messages"]==0
+        receiver.stop(sync=True)
+        receiver=None
+        main.send_multicast(tag="frames/new",value=_build_message(2))
+        sctl.sync_variable("closed",True,timeout=5.)
+        assert sctl.v["dropped/frames"]==2
+    finally:
+        if receiver is not None:
+            receiver.stop(sync=True)
+        sender.stop(sync=True)
@@ -0,0 +1,76 @@
+from pylablib.thread.stream.frame_pool import FrameBufferPool
+
+import numpy as np
+
+
+
+def test_borrow():
+    """Test borrowing buffers of different sizes"""
+    pool=FrameBufferPool(min_size=2**10)
+    a=pool.empty((64,64),"u2")
+    assert a.shape==(64,64) and a.dtype==np.dtype("u2") and a.flags.writeable
+    small=pool.empty((4,4),"u2")
+    assert small.shape==(4,4)
+    stats=pool.get_stats()
+    assert stats["buffers"]==1 and stats["used"]==1
+    assert stats["size"]==stats["used_size"]==a.nbytes
+    b=pool.empty((64,64),"u2")
+    assert not np.shares_memory(a,b)
+    assert pool.get_stats()["used"]==2
+    c=pool.copy(np.arange(64*64).reshape(64,64))
+    assert np.all(c==np.arange(64*64).reshape(64,64))
+    s=pool.stack([np.full((32,32),i,dtype="u2") for i in range(4)])
+    assert s.shape==(4,32,32) and np.all(s[:,0,0]==np.arange(4))
+
+def test_reuse_after_release():
+    """Test that a buffer is reused once the borrowed array and all of its views are released"""
+    pool=FrameBufferPool(min_size=2**10)
+    a=pool.empty((64,64),"u2")
+    storage=pool._buffers[(64,64),np.dtype("u2").str][0].storage
+    assert np.shares_memory(a,storage)
+    v=a[::2].T
+    del a
+    del v
+    assert pool.get_stats()["used"]==0
+    b=pool.empty((64,64),"u2")
+    assert np.shares_memory(b,storage)
+    assert pool.get_stats()["buffers"]==1
+
+def test_no_reuse_while_view_alive():
+    """Test that a buffer is not handed out again while any of its views is alive"""
+    pool=FrameBufferPool(min_size=2**10)
+    a=pool.empty((64,64),"u2")
+    a[:]=1
+    views=[a[10:20],a.reshape(-1),a.view("i2")[::3].T,np.asarray(a)]
+    del a
+    for v in views:
+        b=pool.empty((64,64),"u2")
+        b[:]=2
+        assert np.all(v==1)
+        assert all(not np.shares_memory(b,w) for w in views)
+        del b
+        views=views[1:]
+    del v
+    assert pool.get_stats()["used"]==0
+
+def test_stats():
+    """Test the hit, miss, and direct allocation counters"""
+    pool=FrameBufferPool(min_size=2**10,max_size=2**14,max_buffers=2)
+    a=pool.empty((32,32),"u2")
+    b=pool.empty((32,32),"u2")
+    c=pool.empty((32,32),"u2")
+    stats=pool.get_stats()
+    assert (stats["hits"],stats["misses"],stats["direct"])==(0,2,1)
+    assert stats["used"]==2
+    del a,c
+    a=pool.empty((32,32),"u2")
+    stats=pool.get_stats()
+    assert (stats["hits"],stats["misses"],stats["direct"])==(1,2,1)
+    big=pool.empty((128,128),"u2")
+    assert pool.get_stats()["direct"]==2
+    del a,b,big
+    pool.reset_stats()
+    stats=pool.get_stats()
+    assert (stats["hits"],stats["misses"],stats["direct"],stats["used"])==(0,0,0,0)
+    pool.clear()
+    assert pool.get_stats()["buffers"]==0
@@ -0,0 +1,143 @@
+from pylablib.thread.stream.frameproc import RunningBackgroundCalculator, FrameBinningThread
+from pylablib.thread.stream.frameproc import _get_accumulator_dtype, _bin_spatial_sum, _decimate_time, _decimate_time_full
+from pylablib.thread.stream import stream_message, benchmark
+from pylablib.core.thread import controller
+
+import pytest
+import numpy as np
+
+
+
+@pytest.mark.parametrize("n",[2,3,4,5,10])
+def test_running_median(n):
+    """Test the histogram running median against the direct median of the sliding window with drifting frames"""
+    rng=np.random.RandomState(0)
+    calc=RunningBackgroundCalculator(n,"median",nbins=64)
+    window=[]
+    for i in range(100):
+        frame=rng.normal(1000+i*(i%7),20,size=(16,16)).astype("u2")
+        calc.add_frame(frame)
+        window=(window+[frame])[-n:]
+        assert calc.nframes()==len(window)
+        diff=np.abs(calc.get_background()-np.median(window,axis=0))
+        assert np.all(diff<=calc._hist["width"])
+
+def test_running_median_constant():
+    """Test that constant frames give the exact median and don't cause histogram rebuilds on every frame"""
+    calc=RunningBackgroundCalculator(10,"median",nbins=64)
+    calc.add_frame(np.full((16,16),100,dtype="u2"))
+    hist=calc._hist
+    for i in range(20):
+        calc.add_frame(np.full((16,16),100+i%2,dtype="u2"))
+    assert calc._hist is hist
+    assert np.all(calc.get_background()==100.5)
+
+@pytest.mark.parametrize("mode",["mean","median","min","max"])
+def test_running_background_modes(mode):
+    """Test different background calculation modes against the direct calculation"""
+    rng=np.random.RandomState(0)
+    calc=RunningBackgroundCalculator(5,mode,nbins=None)
+    window=[]
+    for _ in range(20):
+        frame=rng.randint(0,1000,size=(8,8)).astype("u2")
+        calc.add_frame(frame)
+        window=(window+[frame])[-5:]
+        assert np.allclose(calc.get_background(),getattr(np,mode)(window,axis=0))
+
+
+
+@pytest.mark.parametrize("dtype,n,result",[
+    ("u1",1,"u1"),("u1",2,"u2"),("u1",257,"u2"),("u1",258,"u4"),
+    ("i2",2,"i4"),("i1",257,"i4"),("u4",2,"u8"),("u8",2,"float"),("i8",1,"i8"),
+])
+def test_accumulator_dtype(dtype, n, result):
+    """Test choosing the accumulator dtype for integer sums"""
+    assert _get_accumulator_dtype(np.dtype(dtype),n)==np.dtype(result)
+
+@pytest.mark.parametrize("dtype",["u1","u2","i2"])
+@pytest.mark.parametrize("n",[(2,2),(3,1),(1,4),(4,3)])
+def test_integer_binning(dtype, n):
+    """Test integer spatial and temporal sum binning with the widened accumulator against the float reference"""
+    info=np.iinfo(dtype)
+    rng=np.random.RandomState(0)
+    frames=rng.randint(info.min,info.max+1,size=(7,13,14)).astype(dtype)
+    frames[0]=info.max
+    frames[1]=info.min
+    acc_dtype=_get_accumulator_dtype(frames.dtype,n[0]*n[1]*3)
+    nr,nc=13//n[0]*n[0],14//n[1]*n[1]
+    ref=frames[:,:nr,:nc].astype("float").reshape(7,nr//n[0],n[0],nc//n[1],n[1]).sum(axis=(2,4))
+    binned=_bin_spatial_sum(frames,n,acc_dtype)
+    assert binned.dtype==acc_dtype
+    assert np.array_equal(binned,ref)
+    tref=ref[:6].reshape(2,3,*ref.shape[1:]).sum(axis=1)
+    tbinned=_decimate_time(binned,3,"sum",acc_dtype)
+    assert tbinned.dtype==acc_dtype
+    assert np.array_equal(tbinned,tref)
+    assert np.array_equal(_decimate_time_full(binned[:3],"sum",acc_dtype),tref[0])
+
+
+
+class ParallelFrameBinningThread(FrameBinningThread):
+    _min_parallel_size=0  # split even the small frames chunks between the workers
+
+class FramesCollectorThread(controller.QTaskThread):
+    def setup_task(self, src, tag):  # pylint: disable=arguments-differ
+        self.frames=[]
+        self.v["nframes"]=0
+        self.subscribe_commsync(self.process_frames,srcs=src,tags=tag)
+        self.add_command("get_frames")
+    def process_frames(self, src, tag, msg):  # pylint: disable=unused-argument
+        self.frames.extend(np.array(f) for f in msg.frames)
+        self.v["nframes"]+=msg.nframes()
+    def get_frames(self):
+        return np.concatenate(self.frames,axis=0) if self.frames else None
+
+def _reference_binning(frames, spat_bin, spat_mode, time_bin, time_mode):
+    """Bin the frames in float using reshaping"""
+    nr,nc=frames.shape[1]//spat_bin[0]*spat_bin[0],frames.shape[2]//spat_bin[1]*spat_bin[1]
+    frames=frames[:,:nr,:nc].astype("float").reshape(len(frames),nr//spat_bin[0],spat_bin[0],nc//spat_bin[1],spat_bin[1])
+    frames=frames[:,:,0,:,0] if spat_mode=="skip" else getattr(np,spat_mode)(frames,axis=(2,4))
+    nt=len(frames)//time_bin*time_bin
+    frames=frames[:nt].reshape(nt//time_bin,time_bin,*frames.shape[1:])
+    return frames[:,0] if time_mode=="skip" else getattr(np,time_mode)(frames,axis=1)
+
+def _run_binning(name, nworkers, messages, params):
+    main=benchmark.ensure_app()
+    binning=ParallelFrameBinningThread(name+"_binning",args=(main.name,name+"/in",name+"/out"),kwargs={"nworkers":nworkers})
+    collector=FramesCollectorThread(name+"_collector",args=(name+"_binning",name+"/out"))
+    threads=[binning,collector]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            controller.sync_controller(t.name,"run",timeout=10.)
+        binning.cs.setup_binning(*params,dtype="float")
+        binning.cs.enable_binning(True)
+        for i,frames in enumerate(messages):
+            msg=stream_message.FramesMessage([frames],indices=[i*len(frames)],chunks=True,sn=name,sid=0,mid=i)
+            main.send_multicast(tag=name+"/in",value=msg)
+        nframes=sum(len(f) for f in messages)//params[2]
+        collector.sync_variable("nframes",nframes,timeout=10.)
+        return collector.cs.get_frames()
+    finally:
+        for t in threads[::-1]:
+            t.stop(sync=True)
+
+@pytest.mark.parametrize("nframes,params",[
+    (2,((3,3),"sum",1,"skip")),  # fewer frames than workers: split by row bands aligned to the spatial bin
+    (3,((3,2),"mean",1,"skip")),
+    (8,((2,2),"mean",3,"sum")),  # split by frames for the spatial binning and by rows for the temporal binning
+    (5,((1,3),"max",2,"mean")),
+    (7,((1,1),"skip",4,"mean")),
+])
+def test_binning_workers(request, nframes, params):
+    """Test that the binning thread with several workers gives the same result as a single thread, and check it against the float reference"""
+    rng=np.random.RandomState(0)
+    messages=[rng.randint(0,2**16,size=(nframes,30,32)).astype("<u2") for _ in range(3)]
+    name="binning_{}".format(request.node.callspec.id)
+    single=_run_binning(name+"_single",1,messages,params)
+    parallel=_run_binning(name+"_parallel",4,messages,params)
+    assert np.array_equal(single,parallel)
+    ref=_reference_binning(np.concatenate(messages,axis=0),*params)
+    assert single.shape==ref.shape
+    assert np.allclose(single,ref,rtol=1E-12,atol=0)
@@ -0,0 +1,111 @@
+from pylablib.thread.stream.stream_message import FramesMessage, FramesAccumulator, FramesRingAccumulator
+
+import pytest
+import numpy as np
+
+
+
+def _message(start, n, shape=(4,4), dtype="<u2", info_dtype="<i8", info=True, chunks=True):
+    frames=(np.arange(start,start+n)[:,None,None]+np.zeros(shape)).astype(dtype)
+    frame_info=np.stack([np.arange(start,start+n),-np.arange(start,start+n)],axis=1).astype(info_dtype) if info else None
+    if chunks:
+        return FramesMessage([frames],indices=[start],frame_info=None if frame_info is None else [frame_info],chunks=True)
+    return FramesMessage(list(frames),indices=list(range(start,start+n)),frame_info=None if frame_info is None else list(frame_info))
+
+def _get_flat(acc, start, end=None, step=1):
+    frames,indices,frame_info=acc.get_slice(start,end,step=step,flatten=True)
+    frames=None if frames is None else [np.asarray(f).tolist() for f in frames]
+    frame_info=None if frame_info is None else [np.asarray(i).tolist() for i in frame_info]
+    return frames,[int(i) for i in indices],frame_info
+
+slices=[(0,None),(2,7),(-3,None),(1,None,2),(0,10,3),(4,5)]
+def _check_parity(acc, ref, store_frames=True):
+    assert acc.nframes()==ref.nframes()
+    for s in slices:
+        frames,indices,frame_info=_get_flat(acc,*s)
+        rframes,rindices,rframe_info=_get_flat(ref,*s)
+        assert frames==(rframes if store_frames else None)
+        assert indices==rindices
+        assert frame_info==rframe_info
+
+def _apply(accs, messages):
+    for m in messages:
+        for a in accs:
+            a.add_message(m)
+
+
+@pytest.mark.parametrize("store_frames",[True,False])
+def test_ring_parity(store_frames):
+    """Test that the ring accumulator returns the same frames as the list accumulator through adding and cutting"""
+    acc=FramesRingAccumulator(store_frames=store_frames,min_capacity=4)
+    ref=FramesAccumulator()
+    _apply([acc,ref],[_message(0,3),_message(3,5),_message(8,2,chunks=False)])
+    assert acc._list is None
+    _check_parity(acc,ref,store_frames)
+    for a in [acc,ref]:
+        a.cut_to_slice(1,None,2)
+    _check_parity(acc,ref,store_frames)
+    _apply([acc,ref],[_message(10,7),_message(17,1)])
+    _check_parity(acc,ref,store_frames)
+    for a in [acc,ref]:
+        assert a.cut_to_size(4,from_end=True)
+    _check_parity(acc,ref,store_frames)
+    _apply([acc,ref],[_message(18,20)])
+    for a in [acc,ref]:
+        assert a.cut_to_size(10)
+        assert not a.cut_to_size(15)
+    _check_parity(acc,ref,store_frames)
+    assert acc._list is None
+
+def test_ring_chunk_views():
+    """Test the default chunk output format and copying"""
+    acc=FramesRingAccumulator()
+    acc.add_message(_message(0,5))
+    frames,indices,frame_info=acc.get_slice(1,4)
+    assert len(frames)==len(indices)==len(frame_info)==1
+    assert frames[0].shape==(3,4,4) and list(indices[0])==[1,2,3] and frame_info[0].shape==(3,2)
+    frames,_,_=acc.get_slice(0,None,copy=True)
+    frames[0][:]=0
+    assert acc.get_slice(4,None,flatten=True)[0][0][0,0]==4
+    acc.clear()
+    assert acc.nframes()==0
+    assert acc.get_slice(0,None)==([],[],None)
+
+@pytest.mark.parametrize("kind",["shape","dtype","info_shape","info_dtype","info_missing"])
+def test_list_fallback(kind):
+    """Test switching to the list storage when the frames format changes, and switching back once it is emptied"""
+    changes={"shape":{"shape":(5,5)},"dtype":{"dtype":"<f8"},"info_shape":{"info":True},
+        "info_dtype":{"info_dtype":"<f8"},"info_missing":{"info":False}}
+    acc=FramesRingAccumulator(min_capacity=4)
+    ref=FramesAccumulator()
+    _apply([acc,ref],[_message(0,3)])
+    changed=_message(3,2,**changes[kind])
+    if kind=="info_shape":
+        changed.frame_info=[np.concatenate([changed.frame_info[0]]*2,axis=1)]
+    elif kind=="info_dtype":
+        changed.frame_info[0]+=0.5
+    _apply([acc,ref],[changed,_message(5,2)])
+    assert acc._list is not None
+    frames,indices,frame_info=_get_flat(acc,0,None)
+    rframes,rindices,rframe_info=_get_flat(ref,0,None)
+    assert frames==rframes and indices==rindices
+    if kind=="info_missing":
+        assert frame_info[3:5]==[None,None]
+    else:
+        assert frame_info==rframe_info
+    if kind=="info_dtype":
+        assert frame_info[3][0]==3.5
+    for a in [acc,ref]:
+        a.cut_to_slice(1,None,3)
+    _check_parity(acc,ref)
+    acc.cut_to_size(0)
+    acc.add_message(_message(7,2,**changes[kind]))
+    assert acc._list is None and acc.nframes()==2
+
+def test_non_array_info():
+    """Test the list storage fallback for frame infos which are not numpy arrays"""
+    acc=FramesRingAccumulator()
+    msg=FramesMessage([np.zeros((4,4))]*2,indices=[0,1],frame_info=[(0,1),(1,2)])
+    acc.add_message(msg)
+    assert acc._list is not None
+    assert acc.get_slice(0,None,flatten=True)[2]==((0,1),(1,2))
@@ -0,0 +1,155 @@
+from pylablib.core.thread import controller, callsync
+from pylablib.thread.stream import benchmark
+
+import time
+
+
+
+Job=controller.QTaskThread.Job
+JobsHeap=controller.QTaskThread.JobsHeap
+
+class StubJob:
+    def __init__(self, due):
+        self.due=due
+        self.heap_entry=None
+    def next_call_time(self):
+        return self.due
+
+def _pop_all(heap, t):
+    jobs=[]
+    job=heap.pop_due(t)
+    while job is not None:
+        jobs.append(job)
+        job=heap.pop_due(t)
+    return jobs
+
+def _make_jobs(periods):
+    heap=JobsHeap()
+    queue=callsync.QQueueScheduler()
+    calls=[]
+    jobs=[Job((lambda i=i: calls.append(i)),p,queue,heap) for i,p in enumerate(periods)]
+    return heap,queue,jobs,calls
+
+
+def test_heap_order():
+    """Test the heap ordering, including jobs with equal due times, updates, and removal"""
+    heap=JobsHeap()
+    a,b,c,d,e=[StubJob(due) for due in [1.,1.,1.,0.5,None]]
+    for j in [a,b,c,d,e]:
+        heap.push(j)
+    assert e.heap_entry is None
+    assert heap.time_left(0.)==0.5
+    heap.push(a)  # re-adding moves the job behind the ones with the same due time
+    assert _pop_all(heap,0.9)==[d]
+    assert _pop_all(heap,1.)==[b,c,a]
+    assert heap.time_left(0.) is None
+    for j in [a,b,c]:
+        heap.push(j)
+    heap.remove(b)
+    b.due=0.
+    heap.remove(b)  # removing twice has no effect
+    assert _pop_all(heap,2.)==[a,c]
+    heap.push(b)
+    a.due=-1.
+    heap.push(a)
+    assert _pop_all(heap,0.)==[a,b]
+
+def test_job_scheduling():
+    """Test scheduling the due jobs, recording their lateness, and returning them to the heap after execution"""
+    heap,queue,jobs,calls=_make_jobs([10.,25.])
+    t=time.time()
+    assert heap.pop_due(t) is None
+    assert 9.<heap.time_left(t)<=10.
+    assert _pop_all(heap,t+15)==[jobs[0]]
+    jobs[0].schedule(t+15)
+    assert jobs[0].scheduled and jobs[0].heap_entry is None and len(queue)==1
+    jitter=jobs[0].get_jitter()
+    assert jitter["calls"]==1 and 5.<=jitter["last"]==jitter["max"]<5.5
+    assert heap.pop_due(t+22) is None  # scheduled job is not in the heap
+    queue.pop_call().execute()
+    assert calls==[0]
+    assert not jobs[0].scheduled
+    assert _pop_all(heap,t+22)==[jobs[0]]
+    assert _pop_all(heap,t+26)==[jobs[1]]
+
+def test_job_period_change():
+    """Test changing the period of the waiting and the scheduled jobs"""
+    heap,queue,jobs,_=_make_jobs([10.,20.])
+    t=time.time()
+    jobs[1].change_period(5.)
+    assert _pop_all(heap,t+6)==[jobs[1]]
+    jobs[1].schedule(t+6)
+    jobs[1].change_period(30.)  # the scheduled job is returned to the heap only after its execution
+    assert _pop_all(heap,t+100)==[jobs[0]]
+    queue.pop_call().execute()
+    assert _pop_all(heap,t+30) ==[]
+    assert _pop_all(heap,t+40)==[jobs[1]]
+
+def test_job_removal():
+    """Test removing and pausing the waiting and the scheduled jobs"""
+    heap,queue,jobs,calls=_make_jobs([10.,20.])
+    t=time.time()
+    jobs[1].clear()
+    assert _pop_all(heap,t+100)==[jobs[0]]
+    jobs[0].schedule(t+100)
+    jobs[0].clear()
+    assert len(queue)==0 and not jobs[0].scheduled
+    assert heap.time_left(t) is None and calls==[]
+    heap,queue,jobs,calls=_make_jobs([10.])
+    jobs[0].pause()
+    assert heap.time_left(t) is None
+    jobs[0].pause(False)
+    assert _pop_all(heap,t+11)==[jobs[0]]
+    jobs[0].schedule(t+11)
+    jobs[0].pause()  # pausing unschedules the job
+    assert len(queue)==0 and heap.time_left(t) is None
+
+
+
+class JobsThread(controller.QTaskThread):
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.calls={"fast":0,"slow":0}
+        self.steps=[]
+        self.cleanups=0
+        self.v["batch_done"]=False
+        self.add_job("fast",lambda: self.tick("fast"),0.01)
+        self.add_job("slow",lambda: self.tick("slow"),10.)
+        self.add_batch_job("batch",self.batch,cleanup=self.batch_cleanup)
+        for name in ["get_calls","change_job_period","remove_job","start_batch_job","is_batch_job_running","get_steps"]:
+            self.add_command(name)
+    def tick(self, name):
+        self.calls[name]+=1
+    def batch(self, n):
+        for i in range(n):
+            self.steps.append(i)
+            yield (0.02 if i==2 else None)
+    def batch_cleanup(self, n):  # pylint: disable=unused-argument
+        self.cleanups+=1
+        self.v["batch_done"]=True
+    def get_calls(self):
+        return dict(self.calls)
+    def get_steps(self):
+        return self.steps,self.cleanups
+
+def test_thread_jobs():
+    """Test job period changes, job removal, and batch jobs in a running thread"""
+    benchmark.ensure_app()
+    thread=JobsThread("jobs_thread")
+    thread.start()
+    try:
+        ctl=controller.sync_controller("jobs_thread")
+        time.sleep(0.3)
+        calls=ctl.cs.get_calls()
+        assert calls["fast"]>5 and calls["slow"]==1
+        ctl.cs.change_job_period("slow",0.01)
+        ctl.cs.remove_job("fast")
+        fast=ctl.cs.get_calls()["fast"]
+        time.sleep(0.3)
+        calls=ctl.cs.get_calls()
+        assert calls["fast"]==fast and calls["slow"]>5
+        ctl.cs.start_batch_job("batch",0.01,5)
+        ctl.sync_variable("batch_done",True,timeout=5.)
+        assert not ctl.cs.is_batch_job_running("batch")
+        assert ctl.cs.get_steps()==(list(range(5)),1)
+    finally:
+        thread.stop(sync=True)
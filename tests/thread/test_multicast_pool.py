@@ -0,0 +1,145 @@
+from pylablib.core.thread import multicast_pool, callsync, controller
+from pylablib.thread.stream import benchmark
+
+import pytest
+import time
+
+
+
+@pytest.mark.parametrize("subscribed,sent,received",[
+    ("data[0]","data[0]",True),
+    ("data[0]","data0",False),
+    ("data?","data?",True),
+    ("data?","data1",False),
+    ("data/*","data/frames",True),
+    ("data/*","frames/data",False),
+    ("data/*/[ab]","data/x/a",True),
+    ("data/*/[ab]","data/x/c",False),
+])
+def test_tag_matching(subscribed, sent, received):
+    """Test that only tags containing ``*`` are treated as patterns"""
+    pool=multicast_pool.MulticastPool()
+    messages=[]
+    pool.subscribe_direct(lambda src, tag, value: messages.append(value),tags=subscribed)
+    pool.send("src",tag=sent,value=1)
+    assert messages==([1] if received else [])
+
+
+
+def _coalescer(mode="all", max_count=None, max_age=None, scheduler=None):
+    batches=[]
+    scheduler=scheduler or callsync.QQueueScheduler()
+    coalescer=multicast_pool.MulticastCoalescer(batches.append,scheduler,mode=mode,max_count=max_count,max_age=max_age)
+    return coalescer,scheduler,batches
+
+def _execute_all(scheduler):
+    call=scheduler.pop_call()
+    while call is not None:
+        call.execute()
+        call=scheduler.pop_call()
+
+def test_coalesce_all():
+    """Test batching all multicasts arriving while the call is pending"""
+    coalescer,scheduler,batches=_coalescer()
+    for i in range(3):
+        coalescer("src","tag",i)
+    assert len(scheduler)==1
+    _execute_all(scheduler)
+    assert batches==[[("src","tag",0),("src","tag",1),("src","tag",2)]]
+    coalescer("src","tag",3)
+    _execute_all(scheduler)
+    assert batches[1:]==[[("src","tag",3)]]
+
+def test_coalesce_latest():
+    """Test keeping only the latest multicast for each source and tag"""
+    coalescer,scheduler,batches=_coalescer(mode="latest",max_count=3)
+    for src,tag,value in [("a","t",0),("b","t",1),("a","t",2),("a","u",3),("b","t",4)]:
+        coalescer(src,tag,value)
+    assert len(scheduler)==1  # replacing an existing entry does not fill the batch
+    coalescer("c","t",5)
+    assert len(scheduler)==2
+    _execute_all(scheduler)
+    assert batches==[[("a","t",2),("a","u",3),("b","t",4)],[("c","t",5)]]
+
+def test_coalesce_limits():
+    """Test splitting batches by the number of multicasts and by the batch age"""
+    coalescer,scheduler,batches=_coalescer(max_count=2)
+    for i in range(5):
+        coalescer("src","tag",i)
+    assert len(scheduler)==3
+    _execute_all(scheduler)
+    assert [[m.value for m in b] for b in batches]==[[0,1],[2,3],[4]]
+    coalescer,scheduler,batches=_coalescer(max_age=0.05)
+    coalescer("src","tag",0)
+    coalescer("src","tag",1)
+    time.sleep(0.1)
+    coalescer("src","tag",2)
+    _execute_all(scheduler)
+    assert [[m.value for m in b] for b in batches]==[[0,1],[2]]
+
+@pytest.mark.parametrize("on_full_queue,received",[("skip_current",[[0]]),("skip_oldest",[[1,2]])])
+def test_coalesce_full_queue(on_full_queue, received):
+    """Test that a batch skipped by the queue limit is dropped as a whole, and the following multicasts start a new batch"""
+    scheduler=callsync.QQueueLengthLimitScheduler(max_len=1,on_full_queue=on_full_queue)
+    coalescer,scheduler,batches=_coalescer(max_count=1,scheduler=scheduler)
+    coalescer("src","tag",0)
+    coalescer("src","tag",1)  # batch is full, so the new one is scheduled and skipped (either the current or the oldest)
+    coalescer.max_count=None
+    coalescer("src","tag",2)
+    _execute_all(scheduler)
+    assert [[m.value for m in b] for b in batches]==received
+
+def test_coalesce_pool():
+    """Test coalesced subscriptions in the multicast pool"""
+    pool=multicast_pool.MulticastPool()
+    scheduler=callsync.QQueueScheduler()
+    batches=[]
+    values=[]
+    pool.subscribe_direct(batches.append,tags="data/*",scheduler=scheduler,coalesce="all")
+    pool.subscribe_direct(lambda src, tag, value: values.append(value),tags="data/*")
+    for i in range(3):
+        pool.send("src",tag="data/{}".format(i),value=i)
+    pool.send("src",tag="other",value=3)
+    assert values==[0,1,2]
+    _execute_all(scheduler)
+    assert batches==[[("src","data/0",0),("src","data/1",1),("src","data/2",2)]]
+
+
+
+class BatchConsumerThread(controller.QTaskThread):
+    def setup_task(self, **kwargs):  # pylint: disable=arguments-differ
+        self.batches=[]
+        self.v["busy"]=False
+        self.subscribe_commsync(self.process_batch,tags="batch/data",**kwargs)
+        self.add_command("block")
+        self.add_command("get_batches")
+    def process_batch(self, batch):
+        self.batches.append([m.value for m in batch])
+    def block(self, delay):
+        self.v["busy"]=True
+        time.sleep(delay)
+        self.v["busy"]=False
+    def get_batches(self):
+        return self.batches
+
+@pytest.mark.parametrize("kwargs,received",[
+    ({"coalesce":"all"},[list(range(5))]),
+    ({"coalesce":"all","coalesce_max_count":2},[[0,1],[2,3],[4]]),
+    ({"coalesce":"latest"},[[4]]),
+    ({"coalesce":"all","coalesce_max_count":2,"limit_queue":1},[[0,1]]),
+])
+def test_coalesce_commsync(request, kwargs, received):
+    """Test coalesced commsync subscription in a task thread"""
+    main=benchmark.ensure_app()
+    name="batch_consumer_{}".format(request.node.callspec.id)
+    thread=BatchConsumerThread(name,kwargs=kwargs)
+    thread.start()
+    try:
+        ctl=controller.sync_controller(name)
+        ctl.ca.block(0.3)
+        ctl.sync_variable("busy",True,timeout=5.)
+        for i in range(5):
+            main.send_multicast(tag="batch/data",value=i)
+        assert ctl.cs.get_batches()==received
+    finally:
+        thread.stop(sync=True)
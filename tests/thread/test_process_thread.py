@@ -0,0 +1,132 @@
+from pylablib.core.thread import controller, threadprop
+from pylablib.core.thread.process_thread import ProcessTask, QProcessTaskThread, ProcessTaskError
+from pylablib.thread.stream import benchmark
+
+import pytest
+import numpy as np
+import time
+import os
+import sys
+
+
+pytestmark=pytest.mark.skipif(sys.version_info<(3,8),reason="shared memory rings require Python 3.8+")
+
+
+
+class ArrayTask(ProcessTask):
+    def setup_task(self, offset, job_period=None):  # pylint: disable=arguments-differ
+        self.offset=offset
+        self.v["ticks"]=0
+        self.v["pid"]=os.getpid()
+        self.add_command("add")
+        self.add_command("scale")
+        self.add_command("hang")
+        self.add_command("crash")
+        self.add_command("stop_task")
+        if job_period is not None:
+            self.add_job("tick",self.tick,job_period)
+    def add(self, value):
+        return value+self.offset
+    def scale(self, value, factor):
+        return value*factor,value.sum()
+    def hang(self, delay):
+        time.sleep(delay)
+    def crash(self):
+        os._exit(1)
+    def stop_task(self):
+        self.stop()
+    def tick(self):
+        self.v["ticks"]+=1
+
+class TimeoutProcessTaskThread(QProcessTaskThread):
+    call_timeout=0.5
+
+def _start(name, job_period=None, cls=QProcessTaskThread):
+    benchmark.ensure_app()
+    thread=cls(name,args=(ArrayTask,10),kwargs={"job_period":job_period})
+    thread.start()
+    return thread,controller.sync_controller(name)
+
+@pytest.fixture
+def task_thread(request):
+    thread,ctl=_start("process_{}".format(request.node.name))
+    try:
+        yield ctl
+    finally:
+        thread.stop(sync=True)
+
+
+def test_commands(task_thread):
+    """Test command round-trips and exception propagation"""
+    assert task_thread.cs.add(1)==11
+    assert task_thread.cs.add(value=2.5)==12.5
+    assert task_thread.v["pid"]!=os.getpid()
+
+def test_array_payload(task_thread):
+    """Test passing large numpy arrays in both directions"""
+    value=np.arange(2**22,dtype="float64").reshape(2**11,-1)
+    for factor in [2,3]:
+        res,total=task_thread.cs.scale(value,factor)
+        assert res.shape==value.shape and res.dtype==value.dtype
+        assert np.all(res==value*factor)
+        assert total==value.sum()
+
+def test_jobs():
+    """Test job execution in the task process"""
+    thread,ctl=_start("process_jobs",job_period=0.02)
+    try:
+        ctl.sync_variable("ticks",lambda v: v>=5,timeout=5.)
+        assert ctl.cs.add(1)==11
+    finally:
+        thread.stop(sync=True)
+
+def test_shutdown():
+    """Test stopping the thread from both sides"""
+    thread,ctl=_start("process_shutdown")
+    process=thread.process
+    thread.stop(sync=True)
+    assert not process.is_alive()
+    thread,ctl=_start("process_shutdown_task")
+    process=thread.process
+    ctl.ca.stop_task()
+    thread.thread.wait(5000)
+    assert not thread.running()
+    process.join(5.)
+    assert not process.is_alive()
+
+def test_stop_during_call():
+    """Test that a hanging call does not block stopping the thread"""
+    thread,ctl=_start("process_stop_during_call")
+    process=thread.process
+    ctl.ca.hang(30)
+    time.sleep(0.2)
+    t0=time.time()
+    thread.stop(sync=True)
+    assert time.time()-t0<thread.stop_timeout+5
+    assert not process.is_alive()
+
+def test_call_timeout():
+    """Test that a call timeout is reported to the caller without stopping the thread"""
+    thread,ctl=_start("process_call_timeout",cls=TimeoutProcessTaskThread)
+    try:
+        with pytest.raises(threadprop.TimeoutThreadError):
+            ctl.cs.hang(1.5)
+        time.sleep(1.5)  # wait for the task process to finish the timed out call
+        assert thread.running()
+        assert ctl.cs.add(1)==11
+    finally:
+        thread.stop(sync=True)
+
+def test_process_crash():
+    """Test that the task process crash is reported to the caller and stops the thread"""
+    thread,ctl=_start("process_crash")
+    process=thread.process
+    try:
+        with pytest.raises(ProcessTaskError):
+            ctl.cs.crash()
+        thread.thread.wait(5000)
+        assert not thread.running()
+        assert not process.is_alive()
+    finally:
+        if thread.running():
+            thread.stop(sync=True)
@@ -0,0 +1,40 @@
+from pylablib.thread.stream.table_accum import TableAccumulator, decimate_minmax
+
+import pytest
+import numpy as np
+
+
+
+@pytest.mark.parametrize("ref_channels",[None,["y"],["y","z"]])
+def test_decimation_rows(ref_channels):
+    """Test that the decimated data consists of the original rows and preserves the peaks of the reference channels"""
+    rng=np.random.RandomState(0)
+    channels=["idx","x","y","z"]
+    accum=TableAccumulator(channels,memsize=50000)
+    n=0
+    for _ in range(30):
+        l=rng.randint(100,5000)
+        idx=np.arange(n,n+l)
+        x=np.sin(idx/300.)  # non-monotonic x-axis
+        accum.add_data({"idx":idx,"x":x,"y":rng.normal(size=l)+x,"z":np.cos(idx/50.)})
+        n+=l
+        for maxlen in [None,3000]:
+            columns=accum.get_data_columns(maxlen=maxlen,max_points=1000,ref_channels=ref_channels)
+            full=accum.get_data_columns(maxlen=maxlen)
+            assert len(columns[0])<=1000
+            rows=columns[0]-full[0][0]
+            assert np.all(np.diff(rows)>0)
+            for col,fcol in zip(columns,full):
+                assert np.all(col==fcol[rows])
+            for ch in ref_channels or channels:
+                i=channels.index(ch)
+                assert columns[i].min()==full[i].min() and columns[i].max()==full[i].max()
+
+def test_decimate_minmax():
+    """Test standalone min/max decimation"""
+    x=np.sin(np.arange(10000)/100.)
+    y=np.random.RandomState(0).normal(size=10000)
+    xd,yd=decimate_minmax([x,y],500,ref=[1])
+    assert len(xd)<=500
+    assert np.all(np.isin(yd,y)) and yd.min()==y.min() and yd.max()==y.max()
+    assert all(xv==x[np.nonzero(y==yv)[0][0]] for xv,yv in zip(xd,yd))
@@ -0,0 +1,100 @@
+from pylablib.core.thread import tracing, controller
+from pylablib.thread.stream import benchmark
+
+import pytest
+import threading
+import json
+import time
+
+
+
+@pytest.fixture
+def trace():
+    tracing.enable(reset=True)
+    try:
+        yield
+    finally:
+        tracing.enable(False,reset=True)
+
+
+def test_record(trace):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test recording events and exporting them in Chrome Trace Event format"""
+    t0=tracing.now()
+    tracing.add_span("span","test",t0,args={"value":1})
+    tracing.add_instant("instant","test")
+    fid=tracing.start_flow()
+    tracing.end_flow(fid,tracing.now())
+    events=tracing.get_events()
+    tid=threading.get_ident()
+    meta=[e for e in events if e["ph"]=="M" and e["tid"]==tid]
+    assert len(meta)==1 and meta[0]["name"]=="thread_name" and meta[0]["args"]["name"]
+    evts=[e for e in events if e["ph"]!="M" and e["tid"]==tid]
+    assert [e["ph"] for e in evts]==["X","i","s","f"]
+    span,instant,fstart,fend=evts
+    assert span["name"]=="span" and span["cat"]=="test" and span["dur"]>=0 and span["ts"]>=0
+    assert span["args"]["value"]==1 and "ctl" in span["args"]
+    assert instant["s"]=="t"
+    assert fstart["id"]==fend["id"]==fid and fend["bp"]=="e" and "bp" not in fstart
+    assert fstart["ts"]<=fend["ts"]
+    tracing.enable(False)
+    tracing.add_instant("disabled","test")  # explicit recording does not check the flag
+    assert len(tracing.get_events())==len(events)+1
+    tracing.clear()
+    assert [e for e in tracing.get_events() if e["ph"]!="M"]==[]
+
+def test_save(trace, tmpdir):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test saving the trace to a file"""
+    tracing.add_instant("instant","test",args={"name":"µs"})
+    path=str(tmpdir.join("trace.json"))
+    tracing.save_trace(path)
+    with open(path,encoding="utf-8") as f:
+        data=json.load(f)
+    assert data["displayTimeUnit"]=="ms"
+    assert any(e["name"]=="instant" and e["args"]["name"]=="µs" for e in data["traceEvents"])
+
+def test_dead_threads(trace):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test that the buffers of the finished threads are kept until the trace is cleared"""
+    thread=threading.Thread(target=lambda: tracing.add_instant("thread","test"))
+    thread.start()
+    thread.join()
+    assert any(e["name"]=="thread" for e in tracing.get_events())
+    tracing.add_instant("main","test")
+    tracing.clear()
+    tids={e["tid"] for e in tracing.get_events()}
+    assert threading.get_ident() in tids and thread.ident not in tids
+
+
+
+class TracedThread(controller.QTaskThread):
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.add_command("work")
+    def work(self):
+        time.sleep(0.01)
+
+def test_thread_calls(trace):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test the flows connecting the command calls and their execution spans in a running thread"""
+    benchmark.ensure_app()
+    thread=TracedThread("traced_thread")
+    thread.start()
+    try:
+        ctl=controller.sync_controller("traced_thread")
+        tracing.clear()
+        for _ in range(3):
+            ctl.cs.work()
+        time.sleep(0.1)  # the span is recorded after the result is returned
+        events=tracing.get_events()
+    finally:
+        thread.stop(sync=True)
+    names={e["tid"]:e["args"]["name"] for e in events if e["ph"]=="M"}
+    spans=[e for e in events if e["ph"]=="X" and e["name"]=="work"]
+    assert len(spans)==3
+    for s in spans:
+        assert s["cat"]=="commands" and s["args"]["ctl"]=="traced_thread" and s["args"]["state"]=="result"
+        assert names[s["tid"]]=="traced_thread"
+        assert s["dur"]>=1E4
+    starts={e["id"]:e for e in events if e["ph"]=="s"}
+    ends={e["ts"]:e for e in events if e["ph"]=="f" and e["tid"]==spans[0]["tid"]}
+    for s in spans:
+        end=ends[s["ts"]]  # each span starts at its flow end
+        start=starts[end["id"]]
+        assert start["tid"]!=end["tid"] and start["ts"]<=end["ts"]
@@ -0,0 +1,37 @@
+from pylablib.core.thread import controller
+from pylablib.thread.stream import benchmark
+
+import pytest
+
+
+
+class VariableThread(controller.QTaskThread):
+    def setup_task(self):  # pylint: disable=arguments-differ
+        self.v["counter"]=0
+        self.v["branch/leaf"]=0
+        self.add_command("increment")
+    def increment(self, name="counter"):
+        self.v[name]+=1
+
+@pytest.fixture
+def variable_thread(request):
+    benchmark.ensure_app()
+    name="variables_{}".format(request.node.name)
+    thread=VariableThread(name)
+    thread.start()
+    try:
+        yield controller.sync_controller(name)
+    finally:
+        thread.stop(sync=True)
+
+
+@pytest.mark.parametrize("name,path",[("counter","counter"),("branch/leaf","branch"),("branch/leaf","")])
+def test_sync_variable(variable_thread, name, path):
+    """Test waiting for leaf, branch, and root variables"""
+    for _ in range(3):
+        variable_thread.ca.increment(name)
+    def pred(value):
+        if path!=name:
+            value=value[name[len(path)+1 if path else 0:]]
+        return value>=3
+    assert pred(variable_thread.sync_variable(path,pred,timeout=5.))